@@ -4,9 +4,10 @@ from config import get_config
 import os
 import logging
 from logging.handlers import RotatingFileHandler
-from dash_apps.dash_transactions import create_transactions_dash
-from dash_apps.dash_amortization import create_amortization_dash
-from dash_apps.dash_portfolio import create_portfolio_dash
+from dash_apps.lazy import init_dash_apps
+from utils.metrics import init_metrics
+from utils.request_profiler import init_request_profiler
+from utils.startup_profiler import finish_startup_profile, startup_phase
 
 # Make User available for import from this module
 __all__ = ['User', 'create_app']
@@ -82,58 +83,62 @@ def configure_logging(app):
     app.logger.info(f'Application startup in {os.environ.get("FLASK_ENV", "development")} mode')
 
 def create_app(config_class=None):
-    app = Flask(__name__, 
-                template_folder='templates', 
-                static_folder='static', 
-                static_url_path='/static')
+    with startup_phase('flask'):
+        app = Flask(__name__, 
+                    template_folder='templates', 
+                    static_folder='static', 
+                    static_url_path='/static')
     
-    # Get config and create config object
-    if config_class is None:
-        config_class = get_config()
-    
-    # Load config into Flask
-    app.config.from_object(config_class)
-
-    # Ensure critical config values are present
-    critical_configs = [
-        'RENTCAST_API_BASE_URL',
-        'RENTCAST_API_KEY',
-        'RENTCAST_COMP_DEFAULTS',
-        'MAX_COMP_RUNS_PER_SESSION'
-    ]
-    
-    for config_key in critical_configs:
-        if not hasattr(config_class, config_key):
-            app.logger.error(f"Missing critical configuration: {config_key}")
-            raise ValueError(f"Missing required configuration: {config_key}")
-        app.config[config_key] = getattr(config_class, config_key)
-
-    # Add debug logging
-    app.logger.info("Flask App Configuration:")
-    for key in critical_configs:
-        if key == 'RENTCAST_API_KEY':
-            app.logger.info(f"{key} present: {'Yes' if app.config.get(key) else 'No'}")
-        else:
-            app.logger.info(f"{key}: {app.config.get(key, 'Not Found')}")
+    with startup_phase('config'):
+        # Get config and create config object
+        if config_class is None:
+            config_class = get_config()
+        
+        # Load config into Flask
+        app.config.from_object(config_class)
+
+        # Ensure critical config values are present
+        critical_configs = [
+            'RENTCAST_API_BASE_URL',
+            'RENTCAST_API_KEY',
+            'RENTCAST_COMP_DEFAULTS',
+            'MAX_COMP_RUNS_PER_SESSION'
+        ]
+        
+        for config_key in critical_configs:
+            if not hasattr(config_class, config_key):
+                app.logger.error(f"Missing critical configuration: {config_key}")
+                raise ValueError(f"Missing required configuration: {config_key}")
+            app.config[config_key] = getattr(config_class, config_key)
+
+        # Add debug logging
+        app.logger.info("Flask App Configuration:")
+        for key in critical_configs:
+            if key == 'RENTCAST_API_KEY':
+                app.logger.info(f"{key} present: {'Yes' if app.config.get(key) else 'No'}")
+            else:
+                app.logger.info(f"{key}: {app.config.get(key, 'Not Found')}")
     
     # Configure logging
-    configure_logging(app)
+    with startup_phase('logging'):
+        configure_logging(app)
     
     # Log the environment and paths
     app.logger.info(f"Running with BASE_DIR: {config_class.BASE_DIR}")
     app.logger.info(f"Environment: {'Production' if os.environ.get('RENDER') else 'Development'}")
 
     # Only create directories if not in production
-    if not os.environ.get('RENDER'):
-        os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-        os.makedirs(app.config['DATA_DIR'], exist_ok=True)
-        os.makedirs(app.config['ANALYSES_DIR'], exist_ok=True)
-    else:
-        # In production, just log the paths we expect to use
-        app.logger.info(f"Production paths:")
-        app.logger.info(f"UPLOAD_FOLDER: {app.config['UPLOAD_FOLDER']}")
-        app.logger.info(f"DATA_DIR: {app.config['DATA_DIR']}")
-        app.logger.info(f"ANALYSES_DIR: {app.config['ANALYSES_DIR']}")
+    with startup_phase('directories'):
+        if not os.environ.get('RENDER'):
+            os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+            os.makedirs(app.config['DATA_DIR'], exist_ok=True)
+            os.makedirs(app.config['ANALYSES_DIR'], exist_ok=True)
+        else:
+            # In production, just log the paths we expect to use
+            app.logger.info(f"Production paths:")
+            app.logger.info(f"UPLOAD_FOLDER: {app.config['UPLOAD_FOLDER']}")
+            app.logger.info(f"DATA_DIR: {app.config['DATA_DIR']}")
+            app.logger.info(f"ANALYSES_DIR: {app.config['ANALYSES_DIR']}")
 
     # Initialize login manager
     login_manager = LoginManager()
@@ -141,61 +146,49 @@ def create_app(config_class=None):
     login_manager.login_view = 'auth.login'
 
     # Register blueprints
-    from routes.auth import auth_bp
-    from routes.main import main_bp
-    from routes.properties import properties_bp
-    from routes.transactions import transactions_bp
-    from routes.api import api_bp
-    from routes.dashboards import dashboards_bp
-    from routes.analyses import analyses_bp
-    from routes.monitor import monitor_bp
-
-    app.register_blueprint(auth_bp)
-    app.register_blueprint(main_bp)
-    app.register_blueprint(properties_bp)
-    app.register_blueprint(transactions_bp, url_prefix='/transactions')
-    app.register_blueprint(api_bp, url_prefix='/api')
-    app.register_blueprint(dashboards_bp)
-    app.register_blueprint(analyses_bp, url_prefix='/analyses')
-    app.register_blueprint(monitor_bp)
+    with startup_phase('blueprints'):
+        from routes.auth import auth_bp
+        from routes.main import main_bp
+        from routes.properties import properties_bp
+        from routes.transactions import transactions_bp
+        from routes.api import api_bp
+        from routes.dashboards import dashboards_bp
+        from routes.analyses import analyses_bp
+        from routes.monitor import monitor_bp
+        from routes.reports import reports_bp
+
+        app.register_blueprint(auth_bp)
+        app.register_blueprint(main_bp)
+        app.register_blueprint(properties_bp)
+        app.register_blueprint(transactions_bp, url_prefix='/transactions')
+        app.register_blueprint(api_bp, url_prefix='/api')
+        app.register_blueprint(dashboards_bp)
+        app.register_blueprint(analyses_bp, url_prefix='/analyses')
+        app.register_blueprint(monitor_bp)
+        app.register_blueprint(reports_bp, url_prefix='/reports')
+
+    # Request counts and latency for /metrics
+    init_metrics(app)
+
+    # On-demand and sampled cProfile captures under data/logs/profiles
+    init_request_profiler(app)
 
     # Set up login loader
     @login_manager.user_loader
     def load_user(user_id):
         return User.get(user_id)
     
-    # Create and integrate Dash apps
-    app.logger.debug("About to create Dash apps...")
-    
-    try:
-        # Create Amortization Dashboard
-        app.logger.debug("Creating Amortization Dashboard...")
-        app.amortization_dash = create_amortization_dash(app)
-        if app.amortization_dash is None:
-            app.logger.error("Failed to create Amortization Dash app")
-        else:
-            app.logger.debug("Amortization Dash app created successfully")
-
-        # Create Portfolio Dashboard
-        app.logger.debug("Creating Portfolio Dashboard...")
-        app.portfolio_dash = create_portfolio_dash(app)
-        if app.portfolio_dash is None:
-            app.logger.error("Failed to create Portfolio Dash app")
-        else:
-            app.logger.debug("Portfolio Dash app created successfully")
-
-        # Create Transactions Dashboard
-        app.logger.debug("Creating Transactions Dashboard...")
-        app.transactions_dash = create_transactions_dash(app)
-        if app.transactions_dash is None:
-            app.logger.error("Failed to create Transactions Dash app")
-        else:
-            app.logger.debug("Transactions Dash app created successfully")
-
-    except Exception as e:
-        app.logger.error(f"Error creating Dash apps: {str(e)}")
-        app.logger.exception("Full traceback:")
-        raise
-
-    app.logger.info("All Dash apps initialized successfully")
+    # Dash apps (and pandas/plotly with them) are built on first request to their prefix
+    with startup_phase('dash_registration'):
+        init_dash_apps(app)
+    app.logger.info("Dash apps registered for lazy mounting")
+
+    # Keep comps in saved analyses fresh in the background
+    if app.config.get('COMPS_REFRESH_ENABLED'):
+        with startup_phase('comps_refresh'):
+            from services.comps_refresh import start_comps_refresh
+            start_comps_refresh(app)
+        app.logger.info("Comps refresh scheduler started")
+
+    finish_startup_profile()
     return app
\ No newline at end of file
@@ -1,3 +1,7 @@
+# Time imports and create_app phases when STARTUP_PROFILE is set; must run before other imports
+from utils.startup_profiler import start_startup_profiler
+start_startup_profiler()
+
 from __init__ import create_app
 from config import setup_logging
 import os
@@ -87,22 +87,61 @@ class Config:
         
         # Add comps data directory
         self.COMPS_DIR = os.path.join(self.DATA_DIR, 'comps')
+        self.COMPS_CACHE_TTL = int(os.environ.get('COMPS_CACHE_TTL', 7 * 24 * 60 * 60))  # Default 7 days; 0 disables
+        self.COMPS_CACHE_STALE_TTL = int(os.environ.get('COMPS_CACHE_STALE_TTL', 30 * 24 * 60 * 60))  # Default 30 days
+
+        # Generated PDF report cache
+        self.REPORT_CACHE_DIR = os.path.join(self.DATA_DIR, 'report_cache')
+        self.REPORT_CACHE_MAX_BYTES = int(os.environ.get('REPORT_CACHE_MAX_BYTES', 200 * 1024 * 1024))  # Default 200MB
+
+        # Background report rendering
+        self.REPORT_JOBS_DIR = os.path.join(self.DATA_DIR, 'report_jobs')
+        self.REPORT_WORKERS = int(os.environ.get('REPORT_WORKERS', 2))
+
+        # Background downscaling of uploaded images
+        self.IMAGE_WORKERS = int(os.environ.get('IMAGE_WORKERS', 2))
 
         # RentCast API Configuration
         self.RENTCAST_API_KEY = os.environ.get('RENTCASTCOMPS_KEY')
         if not self.RENTCAST_API_KEY:
             raise ValueError("No RENTCASTCOMPS_KEY set in environment variables")
         
-        self.RENTCAST_API_BASE_URL = "https://api.rentcast.io/v1"
+        # Base URLs can point at a local stand-in (python -m utils.upstream_standin) for load tests
+        self.RENTCAST_API_BASE_URL = os.environ.get('RENTCAST_API_BASE_URL', "https://api.rentcast.io/v1")
+        self.GEOAPIFY_API_BASE_URL = os.environ.get('GEOAPIFY_API_BASE_URL', "https://api.geoapify.com/v1")
         self.RENTCAST_COMP_DEFAULTS = {
             'maxRadius': 1.0,  # 1 mile radius
             'daysOld': 180,    # Last 6 months
             'compCount': 10     # Number of comps to return
         }
 
+        # Address autocomplete: in-memory cache of Geoapify suggestions
+        self.AUTOCOMPLETE_CACHE_TTL = int(os.environ.get('AUTOCOMPLETE_CACHE_TTL', 24 * 60 * 60))  # Default 1 day
+        self.AUTOCOMPLETE_CACHE_SIZE = int(os.environ.get('AUTOCOMPLETE_CACHE_SIZE', 2000))
+
         # Session limits for comps
         self.MAX_COMP_RUNS_PER_SESSION = 3
 
+        # Background refresh of stale comps in saved analyses (spends RentCast quota, so opt-in)
+        self.COMPS_REFRESH_ENABLED = os.environ.get('COMPS_REFRESH_ENABLED', 'false').lower() == 'true'
+        self.COMPS_REFRESH_STATE_FILE = os.path.join(self.DATA_DIR, 'comps_refresh.json')
+        self.COMPS_REFRESH_AGE = int(os.environ.get('COMPS_REFRESH_AGE', 30 * 24 * 60 * 60))  # Default 30 days
+        self.COMPS_REFRESH_INTERVAL = int(os.environ.get('COMPS_REFRESH_INTERVAL', 15 * 60))
+        self.COMPS_REFRESH_BATCH_SIZE = int(os.environ.get('COMPS_REFRESH_BATCH_SIZE', 10))
+        self.COMPS_REFRESH_MONTHLY_CALLS = int(os.environ.get('COMPS_REFRESH_MONTHLY_CALLS', 300))
+
+        # Seconds a comps run waits for rental comps fetched alongside property comps; property comps
+        # are bounded by the RentCast client timeouts instead
+        self.COMPS_DEADLINE = float(os.environ.get('COMPS_DEADLINE', 20))
+
+        # Bearer token for Prometheus scrapes of /metrics; without it only admins can read it
+        self.METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+        # Request profiling: admins can ask for a profile per request; others are sampled
+        self.PROFILES_DIR = os.path.join(self.DATA_DIR, 'logs', 'profiles')
+        self.PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))  # 0 disables sampling
+        self.PROFILE_MAX_FILES = int(os.environ.get('PROFILE_MAX_FILES', 200))
+
         # Create necessary directories if not in production
         if not os.environ.get('RENDER'):
             self.create_directories()
@@ -1,9 +1,19 @@
-from .dash_amortization import create_amortization_dash
-from .dash_portfolio import create_portfolio_dash
-from .dash_transactions import create_transactions_dash
+# Dash and its dependencies are imported on first use, see dash_apps.lazy
+_FACTORIES = {
+    'create_amortization_dash': 'dash_amortization',
+    'create_portfolio_dash': 'dash_portfolio',
+    'create_transactions_dash': 'dash_transactions'
+}
 
 __all__ = [
     'create_amortization_dash',
     'create_portfolio_dash',
     'create_transactions_dash'
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    if name in _FACTORIES:
+        from importlib import import_module
+        return getattr(import_module(f'.{_FACTORIES[name]}', __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
@@ -7,6 +7,7 @@ import pandas as pd
 import plotly.graph_objs as go
 from flask_login import current_user
 from services.transaction_service import get_properties_for_user
+from dash_apps.instrumentation import instrument_callbacks
 from datetime import datetime, date
 from dateutil.relativedelta import relativedelta
 import traceback
@@ -532,6 +533,7 @@ def create_amortization_dash(flask_app):
                 {'display': 'block', 'color': 'red', 'marginBottom': '20px'}
             )
 
+        instrument_callbacks(dash_app, 'amortization_dash')
         return dash_app
     
     except Exception as e:
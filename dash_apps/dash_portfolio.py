@@ -6,6 +6,7 @@ from dash.dependencies import Input, Output, State
 from dash.exceptions import PreventUpdate
 from flask_login import current_user
 from services.transaction_service import get_properties_for_user
+from dash_apps.instrumentation import instrument_callbacks
 from datetime import datetime, date
 from dateutil.relativedelta import relativedelta
 import plotly.graph_objs as go
@@ -958,6 +959,7 @@ def create_portfolio_dash(flask_app) -> dash.Dash:
                 return create_empty_response(f"An error occurred: {str(e)}")
         
         logger.info("Portfolio dashboard created successfully")
+        instrument_callbacks(dash_app, 'portfolio_dash')
         return dash_app
         
     except Exception as e:
@@ -8,17 +8,16 @@ import urllib.parse
 from dateutil.relativedelta import relativedelta
 from datetime import datetime, timedelta, date
 from flask_login import current_user
-from flask import current_app, url_for
-import io
-import zipfile
+from flask import current_app, has_app_context, url_for
 import os
 import re
-from urllib.parse import unquote
 import traceback
 import logging
 from typing import Dict, List, Optional, Tuple
 from services.transaction_service import get_transactions_for_view, get_properties_for_user, format_address
-from services.transaction_report_generator import TransactionReportGenerator
+from services.report_jobs import get_report_jobs, JOB_FAILED
+from services.upload_store import get_upload_store
+from dash_apps.instrumentation import instrument_callbacks
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -605,14 +604,20 @@ def create_transactions_dash(flask_app):
                         )
                     ], xs=12, sm=6, md=4),
                     
-                    # Documents ZIP Button
+                    # Documents ZIP Button (streamed by the server as it is built)
                     dbc.Col([
-                        dbc.Button(
-                            [html.I(className="bi bi-file-zip me-2"), "Download Documents"],
-                            id="download-zip-btn",
-                            color="secondary",
-                            className="me-2 mb-2 w-100",
-                            n_clicks=0
+                        html.A(
+                            dbc.Button(
+                                [html.I(className="bi bi-file-zip me-2"), "Download Documents"],
+                                id="download-zip-btn",
+                                color="secondary",
+                                className="me-2 mb-2 w-100",
+                                n_clicks=0
+                            ),
+                            id="download-zip-link",
+                            href="/transactions/documents/export",
+                            className="no-decoration",
+                            target="_parent"
                         )
                     ], xs=12, sm=6, md=4),
                     
@@ -634,7 +639,8 @@ def create_transactions_dash(flask_app):
                 # Status and Download components
                 html.Div(id="download-status", className="mt-2"),
                 dcc.Download(id="download-pdf"),
-                dcc.Download(id="download-zip")
+                dcc.Store(id="pdf-job", storage_type="memory"),
+                dcc.Interval(id="pdf-job-poll", interval=1000, disabled=True)
             ])
         ], className='mb-4', style=STYLE_CONFIG['card']),
         
@@ -862,20 +868,31 @@ def create_transactions_dash(flask_app):
             return [], "", property_options, [], f"An error occurred: {str(e)}", True
 
     @dash_app.callback(
-        Output("download-pdf", "data"),
-        [Input("download-pdf-btn", "n_clicks")],
+        [Output("download-pdf", "data"),
+        Output("pdf-job", "data"),
+        Output("pdf-job-poll", "disabled"),
+        Output("download-status", "children")],
+        [Input("download-pdf-btn", "n_clicks"),
+        Input("pdf-job-poll", "n_intervals")],
         [State("transactions-table", "data"),
         State("property-filter", "value"),
         State("date-range", "start_date"),
-        State("date-range", "end_date")]
+        State("date-range", "end_date"),
+        State("pdf-job", "data")]
     )
-    def generate_pdf_report(n_clicks, transactions_data, property_id, start_date, end_date):
-        """Generate mobile-friendly PDF report."""
+    def generate_pdf_report(n_clicks, n_intervals, transactions_data, property_id,
+                            start_date, end_date, pdf_job):
+        """Queue a mobile-friendly PDF report and poll until it is ready to download."""
+        triggered_id = ctx.triggered[0]['prop_id'].split('.')[0] if ctx.triggered else None
+
+        if triggered_id == "pdf-job-poll":
+            return poll_pdf_job(pdf_job)
+
         if not n_clicks or not transactions_data:
-            return None
+            return None, dash.no_update, dash.no_update, dash.no_update
 
         try:
-            logger.debug(f"Generating PDF report for {len(transactions_data)} transactions")
+            logger.debug(f"Queueing PDF report for {len(transactions_data)} transactions")
             
             # Create metadata for the report
             metadata = {
@@ -899,117 +916,53 @@ def create_transactions_dash(flask_app):
                 
                 formatted_transactions.append(transaction)
 
-            # Generate the PDF
-            buffer = io.BytesIO()
-            report_generator = TransactionReportGenerator()
-            report_generator.generate(formatted_transactions, buffer, metadata)
-            buffer.seek(0)
-
-            return dcc.send_bytes(
-                buffer.getvalue(),
-                f"transactions_report_{datetime.now().strftime('%Y%m%d_%H%M')}.pdf"
+            # Render in the background worker pool instead of blocking this request
+            job = get_report_jobs().submit(
+                current_user.id,
+                'transactions',
+                {'transactions': formatted_transactions, 'metadata': metadata},
+                download_name=f"transactions_report_{datetime.now().strftime('%Y%m%d_%H%M')}.pdf"
             )
+
+            return None, job['id'], False, dbc.Alert("Preparing PDF report...", color="info")
         
         except Exception as e:
             logger.error(f"Error generating PDF: {str(e)}")
             logger.error(traceback.format_exc())
-            return None
+            return None, None, True, dbc.Alert("Error generating PDF report", color="danger")
 
-    @dash_app.callback(
-        Output("download-zip", "data"),
-        [Input("download-zip-btn", "n_clicks")],
-        [State("transactions-table", "data")]
-    )
-    def generate_zip_archive(n_clicks, transactions_data):
-        """Generate ZIP archive with transaction documents."""
-        if not n_clicks or not transactions_data:
-            return None
+    def poll_pdf_job(job_id):
+        """Check a queued PDF report and send it once rendering has finished."""
+        if not job_id:
+            return None, None, True, dash.no_update
 
-        try:
-            logger.debug(f"Generating ZIP for {len(transactions_data)} transactions")
-            buffer = io.BytesIO()
-            
-            with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-                added_files = set()
-                
-                for transaction in transactions_data:
-                    # Add transaction documents
-                    doc_file = transaction.get('documentation_file', '')
-                    logger.debug(f"Processing transaction document: {doc_file}")
-                    
-                    if doc_file:
-                        try:
-                            # Extract filename if it's a button/link
-                            if '<button' in doc_file:
-                                match = re.search(r'/artifact/([^"\']+)', doc_file)
-                                if match:
-                                    filename = unquote(match.group(1))
-                                else:
-                                    continue
-                            else:
-                                filename = doc_file
-                                
-                            if filename and filename not in added_files:
-                                file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-                                if os.path.exists(file_path):
-                                    logger.debug(f"Adding document: {filename}")
-                                    zip_file.write(file_path, f"documents/{filename}")
-                                    added_files.add(filename)
-                                    
-                        except Exception as e:
-                            logger.error(f"Error adding document {filename}: {str(e)}")
-
-                    # Add reimbursement documents
-                    reimb_doc = transaction.get('reimbursement_documentation', '')
-                    logger.debug(f"Processing reimbursement document: {reimb_doc}")
-                    
-                    if reimb_doc:
-                        try:
-                            # Extract filename if it's a button/link
-                            if '<button' in reimb_doc:
-                                match = re.search(r'/artifact/([^"\']+)', reimb_doc)
-                                if match:
-                                    filename = unquote(match.group(1))
-                                else:
-                                    continue
-                            else:
-                                filename = reimb_doc
-
-                            if filename and filename not in added_files:
-                                file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-                                if os.path.exists(file_path):
-                                    logger.debug(f"Adding document: {filename}")
-                                    zip_file.write(file_path, f"documents/{filename}")
-                                    added_files.add(filename)
-                                        
-                        except Exception as e:
-                            logger.error(f"Error adding document {filename}: {str(e)}")
-
-                # Add a summary text file
-                summary = f"""Document Summary
-    Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-    Total Documents: {len(added_files)}
-
-    Documents:
-    {chr(10).join(sorted(added_files))}
-    """
-                zip_file.writestr('document_summary.txt', summary)
+        queue = get_report_jobs()
+        job = queue.get_job(job_id, current_user.id)
+        if not job:
+            return None, None, True, dbc.Alert("PDF report is no longer available", color="warning")
 
-            buffer.seek(0)
-            
-            # Log summary
-            logger.debug(f"Added {len(added_files)} documents to ZIP")
+        if job['status'] == JOB_FAILED:
+            logger.error(f"PDF report job {job_id} failed: {job.get('error')}")
+            return None, None, True, dbc.Alert("Error generating PDF report", color="danger")
 
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M')
-            return dcc.send_bytes(
-                buffer.getvalue(),
-                f"transaction_docs_{timestamp}.zip"
-            )
-            
-        except Exception as e:
-            logger.error(f"Error generating ZIP: {str(e)}")
-            logger.error(traceback.format_exc())
-            return None
+        path = queue.get_output_path(job_id, current_user.id)
+        if not path:
+            return None, dash.no_update, False, dash.no_update
+
+        return dcc.send_file(path, filename=job['download_name']), None, True, None
+
+    @dash_app.callback(
+        Output("download-zip-link", "href"),
+        [Input("filter-options", "data")]
+    )
+    def update_zip_export_link(filter_options):
+        """Point the documents download at the export endpoint with the current filters."""
+        params = {
+            key: value for key, value in (filter_options or {}).items()
+            if value and value != 'all'
+        }
+        query = urllib.parse.urlencode(params)
+        return f"/transactions/documents/export?{query}" if query else "/transactions/documents/export"
 
     @dash_app.callback(
         Output('filter-options', 'data'),
@@ -1327,18 +1280,23 @@ def create_transactions_dash(flask_app):
             return ''
             
         # Extract filename if it's a full URL
-        match = re.search(r'/artifact/([^"]+)', link)
+        match = re.search(r'/artifact/([^"?]+)', link)
         if match:
             filename = match.group(1)
         else:
             # If no match, assume the link is just the filename
             filename = link
             
-        # Construct the proper artifact URL
+        # Construct the proper artifact URL; the content version lets the
+        # browser keep stored documents instead of fetching them again
         artifact_url = f'/transactions/artifact/{filename}'
+        version = get_upload_store().version(filename) if has_app_context() else None
+        if version:
+            artifact_url += f'?v={version}'
                 
         return f'''<button class="btn btn-sm btn-{color} m-1" 
                 onclick="window.open('{artifact_url}', '_blank')">
                 {text}</button>'''
 
+    instrument_callbacks(dash_app, 'transactions_dash')
     return dash_app
\ No newline at end of file
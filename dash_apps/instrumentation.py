@@ -0,0 +1,170 @@
+# instrumentation.py
+"""Per-callback latency, payload size and error tracking for the Dash apps."""
+
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from functools import wraps
+from typing import Dict, List
+
+from flask import has_request_context, request
+
+from utils.metrics import BYTE_BUCKETS, registry
+
+logger = logging.getLogger(__name__)
+
+RECENT_DURATIONS = 200  # Samples kept per callback for percentiles on the debug page
+
+callback_duration = registry.histogram(
+    'dash_callback_duration_seconds', 'Dash callback latency', ('app', 'callback'))
+callback_payload_bytes = registry.histogram(
+    'dash_callback_payload_bytes', 'Dash callback request and response sizes', ('app', 'callback', 'direction'),
+    BYTE_BUCKETS)
+callback_errors = registry.counter(
+    'dash_callback_errors_total', 'Dash callbacks that raised, by exception type', ('app', 'callback', 'error'))
+callback_prevented = registry.counter(
+    'dash_callback_prevented_total', 'Dash callbacks that raised PreventUpdate', ('app', 'callback'))
+
+
+class CallbackStats:
+    """Running totals and recent durations for one callback."""
+
+    def __init__(self, app: str, callback: str, output: str):
+        self.app = app
+        self.callback = callback
+        self.output = output
+        self.calls = 0
+        self.errors = 0
+        self.prevented = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.last_error = None
+        self.last_called = None
+        self.recent = deque(maxlen=RECENT_DURATIONS)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, bytes_in: int, bytes_out: int, error: str = None, prevented: bool = False):
+        with self._lock:
+            self.calls += 1
+            self.total_seconds += seconds
+            self.max_seconds = max(self.max_seconds, seconds)
+            self.bytes_in += bytes_in
+            self.bytes_out += bytes_out
+            self.recent.append(seconds)
+            self.last_called = datetime.now().isoformat()
+            if prevented:
+                self.prevented += 1
+            if error:
+                self.errors += 1
+                self.last_error = error
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            recent = sorted(self.recent)
+            calls = self.calls
+            return {
+                'app': self.app,
+                'callback': self.callback,
+                'output': self.output,
+                'calls': calls,
+                'errors': self.errors,
+                'prevented': self.prevented,
+                'mean_ms': round(self.total_seconds / calls * 1000, 1) if calls else 0.0,
+                'p95_ms': round(recent[min(len(recent) - 1, int(len(recent) * 0.95))] * 1000, 1) if recent else 0.0,
+                'max_ms': round(self.max_seconds * 1000, 1),
+                'total_ms': round(self.total_seconds * 1000, 1),
+                'mean_bytes_in': self.bytes_in // calls if calls else 0,
+                'mean_bytes_out': self.bytes_out // calls if calls else 0,
+                'last_error': self.last_error,
+                'last_called': self.last_called
+            }
+
+
+_stats: Dict[tuple, CallbackStats] = {}
+_stats_lock = threading.Lock()
+
+
+def _get_stats(app: str, callback: str, output: str) -> CallbackStats:
+    with _stats_lock:
+        stats = _stats.get((app, output))
+        if stats is None:
+            stats = _stats[(app, output)] = CallbackStats(app, callback, output)
+        return stats
+
+
+def instrument_callbacks(dash_app, app_name: str):
+    """
+    Wrap every callback registered on a Dash app with timing and size tracking.
+
+    Call after all callbacks are defined. The wrapper sits around Dash's own
+    serialization, so response sizes are the JSON actually sent.
+
+    Args:
+        dash_app: Dash application
+        app_name: Label identifying the app in metrics and on the debug page
+
+    Returns:
+        The same Dash app
+    """
+    from dash.exceptions import PreventUpdate
+
+    for output, entry in dash_app.callback_map.items():
+        func = entry['callback']
+        if getattr(func, '_instrumented', False):
+            continue
+        name = getattr(func, '__name__', output)
+        stats = _get_stats(app_name, name, output)
+
+        def timed_callback(*args, _func=func, _name=name, _stats=stats, **kwargs):
+            bytes_in = (request.content_length or 0) if has_request_context() else 0
+            start = time.perf_counter()
+            error, prevented, bytes_out = None, False, 0
+            try:
+                result = _func(*args, **kwargs)
+                if isinstance(result, (str, bytes)):
+                    bytes_out = len(result)
+                return result
+            except PreventUpdate:
+                prevented = True
+                raise
+            except Exception as e:
+                error = e.__class__.__name__
+                raise
+            finally:
+                elapsed = time.perf_counter() - start
+                _stats.record(elapsed, bytes_in, bytes_out, error, prevented)
+                callback_duration.observe(elapsed, app=app_name, callback=_name)
+                callback_payload_bytes.observe(bytes_in, app=app_name, callback=_name, direction='in')
+                if bytes_out:
+                    callback_payload_bytes.observe(bytes_out, app=app_name, callback=_name, direction='out')
+                if prevented:
+                    callback_prevented.inc(app=app_name, callback=_name)
+                if error:
+                    callback_errors.inc(app=app_name, callback=_name, error=error)
+
+        entry['callback'] = wraps(func)(timed_callback)
+        entry['callback']._instrumented = True
+    logger.debug(f"Instrumented {len(dash_app.callback_map)} callbacks for {app_name}")
+    return dash_app
+
+
+def callback_report(sort_by: str = 'p95_ms') -> List[Dict]:
+    """
+    Get stats for every instrumented callback, slowest first.
+
+    Args:
+        sort_by: Field to sort by, e.g. p95_ms, max_ms, total_ms or errors
+
+    Returns:
+        List of callback stats dicts
+    """
+    with _stats_lock:
+        stats = list(_stats.values())
+    rows = [entry.to_dict() for entry in stats]
+    if rows and sort_by not in rows[0]:
+        raise ValueError(f"Unsupported sort field: {sort_by}")
+    return sorted(rows, key=lambda row: row[sort_by], reverse=True)
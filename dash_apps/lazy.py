@@ -0,0 +1,152 @@
+# lazy.py
+"""Mount Dash apps on first request to their URL prefix instead of at startup."""
+
+import importlib
+import logging
+import threading
+import traceback
+from typing import Callable, Dict, Optional
+
+from flask import Flask, has_request_context, request
+from flask_login import current_user
+from werkzeug.exceptions import InternalServerError
+from werkzeug.routing import BuildError
+
+from utils.metrics import init_metrics
+from utils.request_profiler import init_request_profiler
+from utils.startup_profiler import finish_startup_profile, startup_phase
+
+logger = logging.getLogger(__name__)
+
+# URL prefix -> (attribute on the Flask app, "module:factory" building the Dash app)
+DASH_MOUNTS = {
+    '/dashboards/_dash/amortization/': ('amortization_dash', 'dash_apps.dash_amortization:create_amortization_dash'),
+    '/dashboards/_dash/portfolio/': ('portfolio_dash', 'dash_apps.dash_portfolio:create_portfolio_dash'),
+    '/transactions/view/dash/': ('transactions_dash', 'dash_apps.dash_transactions:create_transactions_dash'),
+}
+
+
+def _import_factory(path: str) -> Callable:
+    module_name, _, attr = path.partition(':')
+    return getattr(importlib.import_module(module_name), attr)
+
+
+class LazyDash:
+    """
+    A Dash app that is imported and built the first time it is needed.
+
+    Flask refuses new routes once it has served a request, so the Dash app gets
+    its own Flask server sharing the main app's config, session cookie, login
+    manager and logger. URLs for main app endpoints still build from inside
+    Dash callbacks.
+    """
+
+    def __init__(self, flask_app: Flask, prefix: str, factory: str, name: Optional[str] = None):
+        self.flask_app = flask_app
+        self.prefix = prefix
+        self.factory = factory
+        self.name = name or prefix
+        self._dash_app = None
+        self._server: Optional[Flask] = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_mounted(self) -> bool:
+        return self._dash_app is not None
+
+    @property
+    def dash_app(self):
+        """The built Dash app, created on first access."""
+        self._ensure_mounted()
+        return self._dash_app
+
+    @property
+    def server(self) -> Flask:
+        """The Flask server the Dash app is registered on."""
+        self._ensure_mounted()
+        return self._server
+
+    def index(self, *args, **kwargs):
+        return self.dash_app.index(*args, **kwargs)
+
+    def _ensure_mounted(self):
+        if self._dash_app is None:
+            with self._lock:
+                if self._dash_app is None:
+                    self._mount()
+
+    def _mount(self):
+        main = self.flask_app
+        main.logger.info(f"Mounting Dash app at {self.prefix}")
+        server = Flask(main.import_name, root_path=main.root_path, static_folder=None)
+        server.config.update(main.config)
+        init_metrics(server, self.name)
+        if hasattr(main, 'login_manager'):
+            main.login_manager.init_app(server)
+            server.before_request(self._require_login)
+        init_request_profiler(server, self.name)
+        server.url_build_error_handlers.append(self._build_main_url)
+
+        with startup_phase(f"dash_mount:{self.prefix}"):
+            dash_app = _import_factory(self.factory)(server)
+        if dash_app is None:
+            raise RuntimeError(f"Dash factory {self.factory} returned no app")
+        self._server = server
+        self._dash_app = dash_app
+        finish_startup_profile()
+
+    def _require_login(self):
+        if not current_user.is_authenticated:
+            return self.flask_app.login_manager.unauthorized()
+
+    def _build_main_url(self, error: BuildError, endpoint: str, values: Dict) -> Optional[str]:
+        # Endpoints such as auth.login live on the main app
+        if not has_request_context():
+            return None
+        adapter = self.flask_app.url_map.bind_to_environ(request.environ)
+        return adapter.build(endpoint, values)
+
+
+class LazyDashDispatcher:
+    """WSGI middleware sending Dash URL prefixes to their lazily mounted servers."""
+
+    def __init__(self, wsgi_app, mounts: Dict[str, LazyDash]):
+        self.wsgi_app = wsgi_app
+        # Longest prefix first so nested prefixes resolve correctly
+        self.mounts = sorted(mounts.values(), key=lambda mount: len(mount.prefix), reverse=True)
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        for mount in self.mounts:
+            if path.startswith(mount.prefix):
+                try:
+                    server = mount.server
+                except Exception as e:
+                    logger.error(f"Error mounting Dash app at {mount.prefix}: {str(e)}")
+                    logger.error(traceback.format_exc())
+                    return InternalServerError()(environ, start_response)
+                return server.wsgi_app(environ, start_response)
+        return self.wsgi_app(environ, start_response)
+
+
+def init_dash_apps(flask_app: Flask, mounts: Optional[Dict] = None) -> Dict[str, LazyDash]:
+    """
+    Register the Dash apps on a Flask app without importing or building them.
+
+    Each app is exposed as an attribute on the Flask app (e.g. ``app.portfolio_dash``)
+    and is built on the first request under its prefix or the first attribute access
+    that needs it.
+
+    Args:
+        flask_app: Main Flask application
+        mounts: Optional override of DASH_MOUNTS
+
+    Returns:
+        Dictionary of URL prefix to LazyDash
+    """
+    lazy_apps = {}
+    for prefix, (attr, factory) in (mounts or DASH_MOUNTS).items():
+        lazy_apps[prefix] = LazyDash(flask_app, prefix, factory, attr)
+        setattr(flask_app, attr, lazy_apps[prefix])
+    flask_app.wsgi_app = LazyDashDispatcher(flask_app.wsgi_app, lazy_apps)
+    return lazy_apps
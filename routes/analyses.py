@@ -198,6 +198,58 @@ def get_analysis(analysis_id: str):
             "message": str(e)
         }), 500
 
+@analyses_bp.route('/sensitivity/<analysis_id>', methods=['POST'])
+@login_required
+def sensitivity_grid(analysis_id: str):
+    """Evaluate cash flow, CoC, cap rate and DSCR over a grid of input ranges."""
+    try:
+        request_data = request.get_json(silent=True) or {}
+        variables = request_data.get('variables')
+        if not variables or not isinstance(variables, list):
+            return jsonify({"success": False, "message": "No sensitivity variables provided"}), 400
+
+        grid = analysis_service.get_sensitivity_grid(analysis_id, current_user.id, variables)
+        if grid is None:
+            return jsonify({"success": False, "message": "Analysis not found"}), 404
+
+        return jsonify({
+            "success": True,
+            "grid": grid
+        })
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error calculating sensitivity grid: {str(e)}")
+        logger.error(traceback.format_exc())
+        return jsonify({
+            "success": False,
+            "message": f"An error occurred: {str(e)}"
+        }), 500
+
+@analyses_bp.route('/simulate/<analysis_id>', methods=['POST'])
+@login_required
+def simulate_projections(analysis_id: str):
+    """Run a Monte Carlo projection and return percentile bands."""
+    try:
+        options = request.get_json(silent=True) or {}
+        results = analysis_service.run_projection_simulation(analysis_id, current_user.id, options)
+        if results is None:
+            return jsonify({"success": False, "message": "Analysis not found"}), 404
+
+        return jsonify({
+            "success": True,
+            "simulation": results
+        })
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error running projection simulation: {str(e)}")
+        logger.error(traceback.format_exc())
+        return jsonify({
+            "success": False,
+            "message": f"An error occurred: {str(e)}"
+        }), 500
+
 @analyses_bp.route('/view_edit_analysis')
 @login_required
 def view_edit_analysis():
@@ -274,27 +326,40 @@ def generate_pdf(analysis_id):
         if not user_id:
             return jsonify({'error': 'User not authenticated'}), 401
 
-        # First, get the analysis data
-        analysis_data = analysis_service.get_analysis(analysis_id, user_id)
-        if not analysis_data:
-            return jsonify({'error': 'Analysis not found'}), 404
+        # Optionally include Monte Carlo risk bands (?simulate=1&paths=...&seed=...);
+        # the seed defaults to one derived from the analysis version
+        simulation_options = request.args.to_dict() if request.args.get('simulate') else None
 
-        # Generate PDF using the report generator directly
         try:
-            # Import at route level to avoid circular imports
-            from services.report_generator import generate_report
-            buffer = generate_report(analysis_data)
+            etag, path = analysis_service.get_pdf_report(
+                analysis_id, user_id, simulation_options, known_etags=request.if_none_match
+            )
+        except ValueError as e:
+            status = 404 if str(e) == 'Analysis not found' else 400
+            return jsonify({'error': str(e)}), status
         except Exception as e:
             current_app.logger.error(f"PDF Generation error: {str(e)}")
             return jsonify({'error': f'Error generating PDF: {str(e)}'}), 500
+
+        if path is None:
+            response = current_app.response_class(status=304)
+            response.set_etag(etag)
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+            return response
         
         # Return the PDF file
-        return send_file(
-            buffer,
+        response = send_file(
+            path,
             mimetype='application/pdf',
             as_attachment=True,
-            download_name=f'analysis_{analysis_id}.pdf'
+            download_name=f'analysis_{analysis_id}.pdf',
+            etag=etag,
+            conditional=True
         )
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+        return response
         
     except Exception as e:
         current_app.logger.error(f"Route error: {str(e)}")
@@ -7,6 +7,9 @@ import re
 from dataclasses import dataclass
 from datetime import datetime, timezone
 import logging
+from flask_login import current_user
+from utils.http_client import get_client
+from utils.address_autocomplete import AUTOCOMPLETE_LIMIT, get_autocomplete
 
 # Configure logger
 logger = logging.getLogger(__name__)
@@ -282,35 +285,49 @@ def autocomplete():
         )
         
         # Construct and validate URL
-        url = f'https://api.geoapify.com/v1/geocode/autocomplete'
+        base_url = current_app.config.get('GEOAPIFY_API_BASE_URL') or 'https://api.geoapify.com/v1'
+        url = f'{base_url.rstrip("/")}/geocode/autocomplete'
         params = {
             'text': sanitized_query,
             'format': 'json',
+            'limit': AUTOCOMPLETE_LIMIT,
             'apiKey': api_key
         }
         
-        # Make API request
-        try:
-            response = requests.get(url, params=params, timeout=10)
-        except requests.RequestException as e:
-            raise ValidationError(f"Failed to connect to Geoapify: {str(e)}", 503)
+        def fetch():
+            # Make API request over the pooled client (short timeouts, retries, circuit breaker)
+            try:
+                response = get_client('geoapify').get(url, params=params)
+            except requests.RequestException as e:
+                raise ValidationError(f"Failed to connect to Geoapify: {str(e)}", 503)
+                
+            # Validate response
+            data = validator.validate_geoapify_response(response)
             
-        # Validate response
-        data = validator.validate_geoapify_response(response)
+            # Process and validate results
+            results = []
+            for result in data.get('results', []):
+                try:
+                    validated_result = GeoapifyResult.from_dict(result)
+                    results.append({
+                        'formatted': validated_result.formatted,
+                        'lat': validated_result.lat,
+                        'lon': validated_result.lon
+                    })
+                except ValidationError as e:
+                    current_app.logger.warning(f"Skipping invalid result: {str(e)}")
+                    continue
+            return results
         
-        # Process and validate results
-        results = []
-        for result in data.get('results', []):
-            try:
-                validated_result = GeoapifyResult.from_dict(result)
-                results.append({
-                    'formatted': validated_result.formatted,
-                    'lat': validated_result.lat,
-                    'lon': validated_result.lon
-                })
-            except ValidationError as e:
-                current_app.logger.warning(f"Skipping invalid result: {str(e)}")
-                continue
+        # Suggest the user's own addresses first, then cached, prefix-filtered or fresh Geoapify results
+        viewer = None
+        if current_user and current_user.is_authenticated:
+            viewer = {
+                'user_id': current_user.id,
+                'name': getattr(current_user, 'name', '')
+            }
+        results, source = get_autocomplete(current_app.config).suggest(query, fetch, viewer)
+        current_app.logger.debug(f"Autocomplete for '{query}' served from {source}")
                 
         return jsonify({
             "status": "success",
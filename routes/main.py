@@ -7,7 +7,6 @@ from dateutil.relativedelta import relativedelta
 import logging
 from typing import Dict, List, Any
 import json
-import pandas as pd
 from flask import Blueprint, render_template, redirect, url_for
 from utils.flash import flash_success, flash_error, flash_warning, flash_info
 
@@ -160,6 +159,8 @@ def calculate_equity(property_address: str) -> Dict[str, float]:
 
 def calculate_cumulative_amortization(properties: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """Calculate cumulative amortization for multiple properties"""
+    import pandas as pd
+
     logger.debug(f"Calculating cumulative amortization for {len(properties)} properties")
     
     if not properties:
@@ -1,5 +1,14 @@
 # routes/monitor.py
-from flask import Blueprint, jsonify
+import hmac
+import os
+
+from flask import Blueprint, Response, abort, current_app, jsonify, render_template, request, send_file
+from flask_login import current_user, login_required
+
+from dash_apps.instrumentation import callback_report
+from utils.metrics import CONTENT_TYPE, registry
+from utils.request_profiler import list_profiles, profile_file
+from utils.utils import admin_required
 
 monitor_bp = Blueprint('monitor', __name__)
 
@@ -9,4 +18,69 @@ def health_check():
     return jsonify({
         'status': 'healthy',
         'service': 'property-management-app'
-    }), 200
\ No newline at end of file
+    }), 200
+
+@monitor_bp.route('/metrics')
+def metrics():
+    """
+    Metrics for this worker in the Prometheus text format.
+
+    Scrapers authenticate with the METRICS_TOKEN bearer token; without a
+    token configured, only logged-in admins can read the metrics.
+    """
+    token = current_app.config.get('METRICS_TOKEN')
+    if token:
+        if not hmac.compare_digest(request.headers.get('Authorization', ''), f"Bearer {token}"):
+            return jsonify({'status': 'error', 'message': 'Unauthorized'}), 401
+    elif not current_user.is_authenticated or current_user.role != 'Admin':
+        return jsonify({'status': 'error', 'message': 'Forbidden'}), 403
+    return Response(registry.render(), content_type=CONTENT_TYPE)
+
+# Sortable columns on the callback timings page
+CALLBACK_COLUMNS = [
+    ('calls', 'Calls'),
+    ('p95_ms', 'p95 (ms)'),
+    ('mean_ms', 'Mean (ms)'),
+    ('max_ms', 'Max (ms)'),
+    ('total_ms', 'Total (ms)'),
+    ('mean_bytes_in', 'Mean In (bytes)'),
+    ('mean_bytes_out', 'Mean Out (bytes)'),
+    ('errors', 'Errors'),
+    ('prevented', 'Prevented')
+]
+
+@monitor_bp.route('/monitor/dash-callbacks')
+@login_required
+@admin_required
+def dash_callbacks():
+    """Slowest Dash callbacks in this worker, as a page or as JSON with ?format=json."""
+    sort = request.args.get('sort', 'p95_ms')
+    if sort not in dict(CALLBACK_COLUMNS):
+        return jsonify({'status': 'error', 'message': f'Unsupported sort field: {sort}'}), 400
+    callbacks = callback_report(sort)
+    if request.args.get('format') == 'json':
+        return jsonify({'status': 'success', 'data': callbacks})
+    return render_template('monitor/dash_callbacks.html', callbacks=callbacks, columns=CALLBACK_COLUMNS)
+
+@monitor_bp.route('/monitor/profiles')
+@login_required
+@admin_required
+def profiles():
+    """Stored request profiles, newest first, as a page or as JSON with ?format=json."""
+    stored = list_profiles(current_app.config.get('PROFILES_DIR'))
+    if request.args.get('format') == 'json':
+        return jsonify({'status': 'success', 'data': stored})
+    return render_template('monitor/profiles.html', profiles=stored)
+
+@monitor_bp.route('/monitor/profiles/<profile_id>/<kind>')
+@login_required
+@admin_required
+def download_profile(profile_id, kind):
+    """Download the pstats, collapsed stack or summary file of one profile."""
+    try:
+        path = profile_file(current_app.config.get('PROFILES_DIR'), profile_id, kind)
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    except FileNotFoundError:
+        abort(404)
+    return send_file(path, as_attachment=True, download_name=f"{profile_id}{os.path.splitext(path)[1]}")
@@ -0,0 +1,111 @@
+from flask import Blueprint, request, jsonify, send_file, current_app, url_for
+from flask_login import login_required, current_user
+from services.analysis_service import AnalysisService
+from services.report_jobs import get_report_jobs, JOB_COMPLETED, JOB_EXPIRED
+from datetime import datetime
+import logging
+import traceback
+
+reports_bp = Blueprint('reports', __name__)
+logger = logging.getLogger(__name__)
+analysis_service = AnalysisService()
+
+
+def _job_response(job):
+    """Public view of a job record."""
+    response = {
+        'job_id': job['id'],
+        'report_type': job['report_type'],
+        'status': job['status'],
+        'error': job.get('error'),
+        'created_at': job.get('created_at'),
+        'completed_at': job.get('completed_at')
+    }
+    if job['status'] == JOB_COMPLETED:
+        response['download_url'] = url_for('reports.download_report_job', job_id=job['id'])
+    return response
+
+
+@reports_bp.route('/jobs', methods=['POST'])
+@login_required
+def submit_report_job():
+    """
+    Queue a PDF report for background rendering.
+
+    Body for an analysis report: {"report_type": "analysis", "analysis_id": ...,
+    "simulation": {...}}. Body for a transaction report: {"report_type":
+    "transactions", "transactions": [...], "metadata": {...}}. Body for a
+    portfolio report: {"report_type": "portfolio", "analysis_ids": [...]}, where
+    omitting analysis_ids includes every analysis of the user.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        report_type = data.get('report_type', 'analysis')
+
+        if report_type == 'analysis':
+            if not data.get('analysis_id'):
+                return jsonify({'success': False, 'message': 'analysis_id is required'}), 400
+            job = analysis_service.submit_pdf_report_job(
+                data['analysis_id'], current_user.id, data.get('simulation')
+            )
+        elif report_type == 'portfolio':
+            analysis_ids = data.get('analysis_ids')
+            if analysis_ids is not None and not isinstance(analysis_ids, list):
+                return jsonify({'success': False, 'message': 'analysis_ids must be a list'}), 400
+            job = analysis_service.submit_portfolio_report_job(current_user.id, analysis_ids)
+        elif report_type == 'transactions':
+            if not isinstance(data.get('transactions'), list):
+                return jsonify({'success': False, 'message': 'transactions must be a list'}), 400
+            job = get_report_jobs().submit(
+                current_user.id,
+                'transactions',
+                {'transactions': data['transactions'], 'metadata': data.get('metadata') or {}},
+                download_name=f"transactions_report_{datetime.now().strftime('%Y%m%d_%H%M')}.pdf"
+            )
+        else:
+            return jsonify({'success': False, 'message': f'Unsupported report type: {report_type}'}), 400
+
+        return jsonify({'success': True, **_job_response(job)}), 202
+
+    except ValueError as e:
+        status = 404 if str(e) in ('Analysis not found', 'No analyses found') else 400
+        return jsonify({'success': False, 'message': str(e)}), status
+    except Exception as e:
+        logger.error(f"Error submitting report job: {str(e)}")
+        logger.error(traceback.format_exc())
+        return jsonify({'success': False, 'message': 'Error submitting report job'}), 500
+
+
+@reports_bp.route('/jobs/<job_id>')
+@login_required
+def report_job_status(job_id):
+    """Get the status of a report job."""
+    job = get_report_jobs().get_job(job_id, current_user.id)
+    if not job:
+        return jsonify({'success': False, 'message': 'Report job not found'}), 404
+    return jsonify({'success': True, **_job_response(job)})
+
+
+@reports_bp.route('/jobs/<job_id>/download')
+@login_required
+def download_report_job(job_id):
+    """Download the PDF of a completed report job."""
+    queue = get_report_jobs()
+    job = queue.get_job(job_id, current_user.id)
+    if not job:
+        return jsonify({'success': False, 'message': 'Report job not found'}), 404
+
+    if job['status'] == JOB_EXPIRED:
+        return jsonify({'success': False, 'message': job['error'], 'status': job['status']}), 410
+
+    path = queue.get_output_path(job_id, current_user.id)
+    if not path:
+        return jsonify({'success': False, 'message': f"Report is not ready (status: {job['status']})"}), 409
+
+    current_app.logger.debug(f"Serving report job {job_id}")
+    return send_file(
+        path,
+        mimetype='application/pdf',
+        as_attachment=True,
+        download_name=job['download_name']
+    )
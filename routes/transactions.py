@@ -1,10 +1,14 @@
 from utils.flash import flash_message
 from functools import wraps
-from flask import abort, Blueprint, render_template, request, redirect, url_for, current_app, send_from_directory, jsonify
+from flask import abort, Blueprint, render_template, request, redirect, url_for, current_app, send_file, jsonify
 from flask_login import login_required, current_user
+from werkzeug.exceptions import HTTPException
 from werkzeug.utils import secure_filename
-from services.transaction_import_service import TransactionImportService
-from services.transaction_service import add_transaction, is_duplicate_transaction, get_properties_for_user, get_transaction_by_id, update_transaction, get_categories, get_partners_for_property
+from services.transaction_service import add_transaction, is_duplicate_transaction, get_properties_for_user, get_transaction_by_id, update_transaction, get_categories, get_partners_for_property, get_transactions_for_view
+from services.document_export import collect_documents, stream_documents_zip
+from services.upload_store import ARTIFACT_VERSION_LENGTH, DOCUMENT_FIELDS, get_upload_store
+from services.image_processing import (DEFAULT_IMAGE_WORKERS, THUMBNAIL_SIZES, get_derivative, is_image,
+                                       schedule_image_optimization)
 from utils.utils import admin_required
 import tempfile
 import os
@@ -13,10 +17,13 @@ import html
 import logging
 import json
 import traceback
-import pandas as pd
+from datetime import datetime
 
 transactions_bp = Blueprint('transactions', __name__)
 
+# Versioned artifact URLs name fixed content, so browsers may keep them for a year
+ARTIFACT_IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
 def property_manager_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
@@ -72,6 +79,37 @@ def generate_documentation_filename(transaction_id, original_filename):
     # Generate new filename with transaction ID prefix
     return f"trans_{transaction_id}_{secure_filename(original_filename)}"
 
+def link_documentation(transaction_id, stored_documents, previous_documents=None, current_documents=None):
+    """
+    Record a saved transaction's documents in the upload store.
+
+    Uploaded images are downscaled and stripped of EXIF data in the
+    background once linked.
+
+    Args:
+        transaction_id: Transaction ID
+        stored_documents: (filename, blob) per field for files uploaded in this request
+        previous_documents: Document name per field before the request
+        current_documents: Document name per field as saved; fields cleared
+            here are released
+    """
+    upload_store = get_upload_store()
+    previous_documents = previous_documents or {}
+    current_documents = current_documents or {}
+    for field in DOCUMENT_FIELDS:
+        previous = previous_documents.get(field)
+        if field in stored_documents:
+            filename, blob = stored_documents[field]
+            upload_store.link(transaction_id, field, filename, blob, previous=previous)
+            if is_image(filename):
+                schedule_image_optimization(
+                    upload_store, blob['sha256'],
+                    workers=current_app.config.get('IMAGE_WORKERS', DEFAULT_IMAGE_WORKERS)
+                )
+        elif previous and not current_documents.get(field):
+            upload_store.unlink(transaction_id, field, previous)
+            current_app.logger.debug(f"Released {field} for transaction {transaction_id}: {previous}")
+
 @transactions_bp.route('/add', methods=['GET', 'POST'])
 @login_required
 def add_transactions():
@@ -112,13 +150,13 @@ def add_transactions():
             current_app.logger.debug(f"Received transaction ID: {transaction_id}")
 
             # Handle documentation files after we have the transaction ID
+            stored_documents = {}
             if 'documentation_file' in request.files:
                 file = request.files['documentation_file']
                 if file and file.filename:
                     if allowed_file(file.filename, file_type='documentation'):
                         filename = generate_documentation_filename(transaction_id, file.filename)
-                        file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-                        file.save(file_path)
+                        stored_documents['documentation_file'] = (filename, get_upload_store().put(file.stream))
                         transaction_data['documentation_file'] = filename
                         current_app.logger.debug(f"Saved documentation file: {filename}")
                     else:
@@ -132,8 +170,9 @@ def add_transactions():
                 if reimb_file and reimb_file.filename:
                     if allowed_file(reimb_file.filename, file_type='documentation'):
                         reimb_filename = generate_documentation_filename(transaction_id, reimb_file.filename)
-                        reimb_file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], reimb_filename)
-                        reimb_file.save(reimb_file_path)
+                        stored_documents['reimbursement_documentation'] = (
+                            reimb_filename, get_upload_store().put(reimb_file.stream)
+                        )
                         transaction_data['reimbursement']['documentation'] = reimb_filename
                         current_app.logger.debug(f"Saved reimbursement documentation: {reimb_filename}")
                     else:
@@ -145,6 +184,7 @@ def add_transactions():
             if transaction_data['documentation_file'] or transaction_data['reimbursement']['documentation']:
                 current_app.logger.debug(f"Updating transaction with file information: {json.dumps(transaction_data, indent=2)}")
                 update_transaction(transaction_data)
+                link_documentation(transaction_id, stored_documents)
             
             flash_message('Transaction added successfully!', 'success')
             return redirect(url_for('transactions.add_transactions'))
@@ -190,11 +230,52 @@ def sanitize_notes(notes):
     
     return notes.strip()
 
+def send_artifact(filename):
+    """
+    Serve a stored document with a strong ETag, byte ranges and cache headers.
+
+    If-None-Match is answered with 304 and Range with 206, so PDF viewers can
+    fetch pages on demand. A stored document requested with its ?v= content
+    version is cached as immutable; anything else is revalidated on each use.
+    Images requested with ?size=thumb get a JPEG thumbnail, rendered on first
+    use and cached on disk.
+    """
+    upload_store = get_upload_store()
+    found = upload_store.lookup(filename)
+    if not found:
+        current_app.logger.error(f"File not found: {filename}")
+        abort(404)
+
+    path, download_name, etag = found['path'], filename, found['etag']
+    size = request.args.get('size')
+    if size in THUMBNAIL_SIZES and is_image(filename):
+        derivative = get_derivative(upload_store, found, size)
+        if derivative:
+            path = derivative
+            download_name = f"{os.path.splitext(filename)[0]}_{size}.jpg"
+            etag = f"{found['etag']}-{size}"
+
+    response = send_file(path, download_name=download_name, etag=etag, conditional=True)
+    response.headers.setdefault('Accept-Ranges', 'bytes')  # Advertise ranges on full responses too
+    response.cache_control.public = False
+    response.cache_control.private = True
+
+    version = request.args.get('v')
+    if found['sha256'] and version == found['sha256'][:ARTIFACT_VERSION_LENGTH]:
+        response.cache_control.no_cache = None
+        response.cache_control.max_age = ARTIFACT_IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+        response.cache_control.max_age = None
+        response.expires = None
+    return response
+
 @transactions_bp.route('/uploads/<filename>')
 @login_required
 def uploaded_file(filename):
     logging.info(f"Uploaded file request for: {filename} by user: {current_user.id}")
-    return send_from_directory(current_app.config['UPLOAD_FOLDER'], filename)
+    return send_artifact(filename)
 
 def allowed_file(filename):
     return '.' in filename and \
@@ -229,6 +310,7 @@ def bulk_import():
                     temp_path = temp_file.name
 
                 try:
+                    from services.transaction_import_service import TransactionImportService
                     import_service = TransactionImportService()
                     results = import_service.process_import_file(temp_path, column_mapping, file.filename)
 
@@ -344,6 +426,7 @@ def get_columns():
             
         try:
             # Use the service to read the file
+            from services.transaction_import_service import TransactionImportService
             import_service = TransactionImportService()
             df = import_service.read_file(temp_path, file.filename)
             
@@ -451,13 +534,15 @@ def edit_transactions(transaction_id):
                     reimbursement_data['documentation'] = None
 
                 # Handle new reimbursement documentation upload
+                stored_documents = {}
                 if 'reimbursement_documentation' in request.files:
                     file = request.files['reimbursement_documentation']
                     if file and file.filename:
                         if allowed_file(file.filename):
                             filename = generate_documentation_filename(transaction_id, file.filename)
-                            file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-                            file.save(file_path)
+                            stored_documents['reimbursement_documentation'] = (
+                                filename, get_upload_store().put(file.stream)
+                            )
                             reimbursement_data['documentation'] = filename
                             current_app.logger.debug(f"Saved new reimbursement documentation: {filename}")
 
@@ -487,8 +572,7 @@ def edit_transactions(transaction_id):
                     if file and file.filename:
                         if allowed_file(file.filename):
                             filename = generate_documentation_filename(transaction_id, file.filename)
-                            file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-                            file.save(file_path)
+                            stored_documents['documentation_file'] = (filename, get_upload_store().put(file.stream))
                             updated_transaction['documentation_file'] = filename
                             current_app.logger.debug(f"Saved new transaction documentation: {filename}")
 
@@ -497,6 +581,18 @@ def edit_transactions(transaction_id):
 
                 # Update the transaction
                 update_transaction(updated_transaction)
+                link_documentation(
+                    transaction_id,
+                    stored_documents,
+                    previous_documents={
+                        'documentation_file': transaction.get('documentation_file'),
+                        'reimbursement_documentation': transaction.get('reimbursement', {}).get('documentation')
+                    },
+                    current_documents={
+                        'documentation_file': updated_transaction['documentation_file'],
+                        'reimbursement_documentation': reimbursement_data['documentation']
+                    }
+                )
                 
                 # Get the referrer information
                 current_app.logger.debug(f"All form data: {json.dumps(form_data, indent=2)}")
@@ -604,29 +700,65 @@ def get_artifact(filename):
     current_app.logger.debug(f"Attempting to serve artifact: {filename}")
     
     try:
-        # All files are now in one directory
-        artifact_dir = current_app.config['UPLOAD_FOLDER']
-        current_app.logger.debug(f"Looking for file in: {artifact_dir}")
+        # Stored documents live in the content-addressed upload store; older
+        # uploads are still found in the flat upload folder
+        return send_artifact(filename)
 
-        # Log the full path being attempted
-        full_path = os.path.join(artifact_dir, filename)
-        current_app.logger.debug(f"Attempting to serve file from: {full_path}")
-        
-        if not os.path.exists(full_path):
-            current_app.logger.error(f"File not found: {full_path}")
-            abort(404)
-
-        return send_from_directory(
-            artifact_dir, 
-            filename, 
-            as_attachment=False
-        )
-        
+    except HTTPException:
+        raise
     except Exception as e:
         current_app.logger.error(f"Error serving artifact {filename}: {str(e)}")
         current_app.logger.error(f"Full error traceback: {traceback.format_exc()}")
         abort(404)
 
+@transactions_bp.route('/documents/export')
+@login_required
+def export_documents():
+    """
+    Stream a ZIP of the documents attached to the user's transactions.
+
+    Query parameters mirror the transactions view filters: property_id,
+    transaction_type, reimbursement_status, start_date, end_date and
+    description_search.
+    """
+    try:
+        args = request.args
+        property_id = args.get('property_id')
+        reimbursement_status = args.get('reimbursement_status')
+        transactions = get_transactions_for_view(
+            current_user.id,
+            current_user.name,
+            property_id if property_id and property_id != 'all' else None,
+            reimbursement_status if reimbursement_status and reimbursement_status != 'all' else None,
+            args.get('start_date') or None,
+            args.get('end_date') or None,
+            current_user.role == 'Admin'
+        )
+
+        transaction_type = args.get('transaction_type')
+        if transaction_type and transaction_type != 'all':
+            transactions = [t for t in transactions if t.get('type', '').lower() == transaction_type.lower()]
+
+        description_search = (args.get('description_search') or '').lower()
+        if description_search:
+            transactions = [t for t in transactions if description_search in (t.get('description') or '').lower()]
+
+        filenames = collect_documents(transactions)
+        current_app.logger.debug(f"Exporting {len(filenames)} documents for {current_user.id}")
+
+        download_name = f"transaction_docs_{datetime.now().strftime('%Y%m%d_%H%M')}.zip"
+        return current_app.response_class(
+            stream_documents_zip(filenames, current_app.config['UPLOAD_FOLDER'],
+                                 resolve=get_upload_store().resolve),
+            mimetype='application/zip',
+            headers={'Content-Disposition': f'attachment; filename="{download_name}"'}
+        )
+
+    except Exception as e:
+        current_app.logger.error(f"Error exporting documents: {str(e)}")
+        current_app.logger.error(f"Full error traceback: {traceback.format_exc()}")
+        abort(500)
+
 @transactions_bp.route('/api/partners')
 @login_required
 def get_property_partners():
@@ -729,21 +861,11 @@ def delete_transaction(transaction_id):
             
         current_app.logger.info(f"Successfully deleted transaction {transaction_id}")
         
-        # Delete associated files if they exist
-        if transaction.get('documentation_file'):
-            file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], transaction['documentation_file'])
-            if os.path.exists(file_path):
-                os.remove(file_path)
-                current_app.logger.debug(f"Deleted documentation file: {file_path}")
-                
-        if transaction.get('reimbursement', {}).get('documentation'):
-            reimb_file_path = os.path.join(
-                current_app.config['UPLOAD_FOLDER'], 
-                transaction['reimbursement']['documentation']
-            )
-            if os.path.exists(reimb_file_path):
-                os.remove(reimb_file_path)
-                current_app.logger.debug(f"Deleted reimbursement file: {reimb_file_path}")
+        # Release associated files; blobs no other transaction uses are removed
+        get_upload_store().unlink_transaction(transaction_id, {
+            'documentation_file': transaction.get('documentation_file'),
+            'reimbursement_documentation': transaction.get('reimbursement', {}).get('documentation')
+        })
             
         return jsonify({'success': True, 'message': 'Transaction deleted successfully'}), 200
             
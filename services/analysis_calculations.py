@@ -3,6 +3,7 @@ from dataclasses import dataclass, field
 from typing import Dict, List, Optional, Union, Callable, TypeVar, Any, Generic
 from decimal import Decimal
 from utils.money import Money, Percentage, MonthlyPayment
+from services.analysis_schema import MAX_LOAN_INTEREST_RATE, MAX_LOAN_TERM, get_validator
 from datetime import datetime
 from math import ceil
 import logging
@@ -24,19 +25,114 @@ if not logger.handlers:
     logger.addHandler(ch)
 
 # Constants
-MAX_RENOVATION_DURATION = 24
 DEFAULT_ANNUAL_INCREASE_RATE = 0.025
-MAX_LOAN_TERM = 360  # 30 years
-MAX_LOAN_INTEREST_RATE = 30.0  # 30%
-
-# Typical ranges for percentage fields
-PERCENTAGE_RANGES = {
-    'management_fee_percentage': (0, 15),
-    'capex_percentage': (0, 10),
-    'vacancy_percentage': (0, 15),
-    'repairs_percentage': (0, 15),
+
+# Stamped on saved metrics snapshots; bump when a metric calculation changes so
+# snapshots saved by older code are recalculated instead of served
+METRICS_VERSION = 1
+
+# Input fields that never feed a calculation (changing them leaves metrics untouched)
+DESCRIPTIVE_FIELDS = frozenset({
+    'id', 'user_id', 'created_at', 'updated_at', 'analysis_name', 'address',
+    'property_type', 'square_footage', 'lot_size', 'year_built', 'bedrooms',
+    'bathrooms', 'comps_data', 'notes', 'initial_loan_name', 'refinance_loan_name',
+    'loan1_loan_name', 'loan2_loan_name', 'loan3_loan_name'
+})
+
+# Input fields mapped to the metric nodes that read them directly. Nodes that
+# depend on those are found by walking the graph from get_metric_dependencies.
+# Fields mapped to an empty tuple only feed the type-specific report metrics.
+_OPERATING_EXPENSE_NODES = ('_calculate_operating_expenses',)
+_POST_BALLOON_EXPENSE_NODES = ('_calculate_operating_expenses', '_calculate_post_balloon_values')
+
+METRIC_INPUT_FIELDS = {
+    # Income and operating expenses
+    'monthly_rent': ('calculate_monthly_cash_flow', '_calculate_operating_expenses',
+                     'total_rent_credits', 'calculate_pre_balloon_monthly_cash_flow',
+                     '_calculate_post_balloon_values', '_calculate_post_balloon_monthly_cash_flow'),
+    'property_taxes': _POST_BALLOON_EXPENSE_NODES + ('_calculate_post_balloon_monthly_cash_flow', 'holding_costs'),
+    'insurance': _POST_BALLOON_EXPENSE_NODES + ('_calculate_post_balloon_monthly_cash_flow', 'holding_costs'),
+    'hoa_coa_coop': _OPERATING_EXPENSE_NODES + ('_calculate_post_balloon_monthly_cash_flow', 'holding_costs'),
+    'management_fee_percentage': _POST_BALLOON_EXPENSE_NODES,
+    'capex_percentage': _POST_BALLOON_EXPENSE_NODES,
+    'repairs_percentage': _POST_BALLOON_EXPENSE_NODES,
+    'vacancy_percentage': _POST_BALLOON_EXPENSE_NODES + ('net_operating_income',),
+    'utilities': _OPERATING_EXPENSE_NODES,
+    'internet': _OPERATING_EXPENSE_NODES,
+    'cleaning': _OPERATING_EXPENSE_NODES,
+    'pest_control': _OPERATING_EXPENSE_NODES,
+    'landscaping': _OPERATING_EXPENSE_NODES,
+    'padsplit_platform_percentage': _OPERATING_EXPENSE_NODES,
+    'common_area_maintenance': _OPERATING_EXPENSE_NODES,
+    'elevator_maintenance': _OPERATING_EXPENSE_NODES,
+    'staff_payroll': _OPERATING_EXPENSE_NODES,
+    'trash_removal': _OPERATING_EXPENSE_NODES,
+    'common_utilities': _OPERATING_EXPENSE_NODES,
+
+    # Purchase details
+    'purchase_price': ('roi', 'total_project_costs', 'calculate_total_cash_invested',
+                       'cap_rate', 'price_per_unit', 'gross_rent_multiplier'),
+    'after_repair_value': ('roi', 'calculate_mao'),
+    'renovation_costs': ('roi', 'calculate_total_cash_invested', 'total_project_costs', 'calculate_mao'),
+    'renovation_duration': ('holding_costs',),
+    'cash_to_seller': ('calculate_total_cash_invested',),
+    'closing_costs': ('calculate_total_cash_invested',),
+    'assignment_fee': ('calculate_total_cash_invested',),
+    'marketing_costs': ('calculate_total_cash_invested',),
+    'furnishing_costs': ('calculate_total_cash_invested',),
+
+    # BRRRR loans
+    'initial_loan_amount': ('_calculate_loan_payments', 'holding_costs', 'calculate_total_cash_invested'),
+    'initial_loan_interest_rate': ('_calculate_loan_payments', 'holding_costs'),
+    'initial_loan_term': ('_calculate_loan_payments',),
+    'initial_interest_only': ('_calculate_loan_payments',),
+    'initial_loan_down_payment': (),
+    'initial_loan_closing_costs': ('total_project_costs', 'calculate_total_cash_invested', 'calculate_mao'),
+    'refinance_loan_amount': ('_calculate_loan_payments', 'calculate_total_cash_invested'),
+    'refinance_loan_interest_rate': ('_calculate_loan_payments',),
+    'refinance_loan_term': ('_calculate_loan_payments',),
+    'refinance_loan_down_payment': (),
+    'refinance_loan_closing_costs': ('total_project_costs', 'calculate_total_cash_invested', 'calculate_mao'),
+
+    # Balloon payment
+    'has_balloon_payment': ('_calculate_loan_payments', '_calculate_post_balloon_loan_payment',
+                            'calculate_balloon_refinance_costs'),
+    'balloon_due_date': ('_calculate_loan_payments', '_calculate_balloon_years'),
+    'balloon_refinance_ltv_percentage': (),
+    'balloon_refinance_loan_amount': ('_calculate_loan_payments', '_calculate_post_balloon_loan_payment'),
+    'balloon_refinance_loan_interest_rate': ('_calculate_loan_payments', '_calculate_post_balloon_loan_payment'),
+    'balloon_refinance_loan_term': ('_calculate_loan_payments', '_calculate_post_balloon_loan_payment'),
+    'balloon_refinance_loan_down_payment': ('calculate_balloon_refinance_costs',),
+    'balloon_refinance_loan_closing_costs': ('calculate_balloon_refinance_costs',),
+
+    # Lease option
+    'option_consideration_fee': ('option_roi', 'calculate_breakeven_months', 'calculate_total_cash_invested'),
+    'option_term_months': ('total_rent_credits',),
+    'strike_price': ('effective_purchase_price',),
+    'monthly_rent_credit_percentage': ('total_rent_credits',),
+    'rent_credit_cap': ('total_rent_credits',),
+
+    # Multi-family
+    'unit_types': ('gross_potential_rent', 'actual_gross_income'),
+    'other_income': ('actual_gross_income', 'net_operating_income'),
+    'total_potential_income': (),
+    'total_units': ('occupancy_rate', 'price_per_unit'),
+    'occupied_units': ('occupancy_rate',),
+    'floors': (),
 }
 
+# Standard loans (loan1-loan3)
+for _prefix in ('loan1', 'loan2', 'loan3'):
+    METRIC_INPUT_FIELDS.update({
+        f'{_prefix}_loan_amount': ('_calculate_single_loan_payment', '_calculate_pre_balloon_loan_payments'),
+        f'{_prefix}_loan_interest_rate': ('_calculate_single_loan_payment',),
+        f'{_prefix}_loan_term': ('_calculate_single_loan_payment',),
+        f'{_prefix}_interest_only': ('_calculate_single_loan_payment',),
+        f'{_prefix}_loan_down_payment': ('calculate_total_cash_invested',),
+        f'{_prefix}_loan_closing_costs': ('calculate_total_cash_invested',),
+    })
+del _prefix
+
 # Generic type for default values in safe_calculation decorator
 T = TypeVar('T')
 
@@ -54,6 +150,52 @@ def safe_calculation(default_value: T = None) -> Callable:
         return wrapper
     return decorator
 
+def metric_node(*depends_on: str) -> Callable:
+    """
+    Decorator declaring a calculation as a memoized node in the metric graph.
+
+    The wrapped calculation runs at most once per Analysis instance (per set of
+    arguments) and only when something asks for it. The names in depends_on are
+    the other nodes this one reads, which lets callers walk the graph.
+
+    Args:
+        depends_on: Names of the metric nodes this node depends on
+    """
+    def decorator(func: Callable) -> Callable:
+        node_key = func.__qualname__
+
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            cache_key = (node_key, args, tuple(sorted(kwargs.items())))
+            cache = self._metric_cache
+            if cache_key not in cache:
+                cache[cache_key] = func(self, *args, **kwargs)
+            return cache[cache_key]
+
+        wrapper.metric_dependencies = tuple(depends_on)
+        return wrapper
+    return decorator
+
+def get_metric_dependencies(analysis_class: type) -> Dict[str, tuple]:
+    """
+    Get the declared dependency graph of an analysis class.
+
+    Args:
+        analysis_class: Analysis subclass to inspect
+
+    Returns:
+        Dictionary mapping each metric node name to the nodes it depends on
+    """
+    graph = {}
+    for name in dir(analysis_class):
+        attr = getattr(analysis_class, name, None)
+        if isinstance(attr, property):
+            attr = attr.fget
+        dependencies = getattr(attr, 'metric_dependencies', None)
+        if dependencies is not None:
+            graph[name] = dependencies
+    return graph
+
 def format_percentage_or_infinite(value: Union[Percentage, str]) -> str:
     """
     Format a percentage value or the string 'Infinite' for consistent display.
@@ -300,59 +442,133 @@ class AnalysisReport:
 
 class Analysis(ABC):
     """Base class for all property investment analysis types."""
-    
-    def __init__(self, data: Dict):
-        """Initialize analysis with flat data structure."""
+
+    # Core report metrics mapped to the metric node that produces each one
+    CORE_METRIC_NODES = {
+        'monthly_cash_flow': 'calculate_monthly_cash_flow',
+        'annual_cash_flow': 'annual_cash_flow',
+        'total_cash_invested': 'calculate_total_cash_invested',
+        'cash_on_cash_return': 'cash_on_cash_return',
+        'roi': 'roi'
+    }
+
+    def __init__(self, data: Dict, validated: bool = False):
+        """
+        Initialize analysis with flat data structure.
+
+        Data is checked by the compiled schema validator for its type, unless
+        the caller has already run it (AnalysisService.normalize_data does).
+        """
         self.data = data
         self.calculated_metrics = {}
-        self._validate_base_requirements()
-        self._validate_type_specific_requirements()
+        self._metric_cache = {}
+        if not validated:
+            self._validate()
+
+    def _validate(self) -> None:
+        """Validate the data against the compiled validator for its analysis type."""
+        logger.debug("Validating %s analysis %s (%d fields)",
+                     self.data.get('analysis_type'), self.data.get('id'), len(self.data))
+        _, errors = get_validator(self.data.get('analysis_type'))(self.data)
+        if errors:
+            logger.error(f"Validation error: {'; '.join(errors)}")
+            raise ValueError("; ".join(errors))
+
+    def invalidate_metrics(self) -> None:
+        """Drop memoized metric values after self.data has been changed."""
+        self._metric_cache.clear()
+        self.calculated_metrics.clear()
+
+    def get_metric(self, name: str) -> Any:
+        """
+        Compute a single metric node, along with only the nodes it depends on.
 
-    @abstractmethod
-    def _validate_type_specific_requirements(self) -> None:
-        """Validate requirements specific to the analysis type."""
-        pass
+        Args:
+            name: Core metric key or metric node name
 
-    def _validate_base_requirements(self) -> None:
-        """Validate base requirements common to all analysis types."""
-        logger.debug(f"Analysis type: {self.data.get('analysis_type')}")
-        logger.debug(f"Analysis data: {self.data}")
+        Returns:
+            The node value (Money, Percentage, etc.)
+        """
+        node_name = self.CORE_METRIC_NODES.get(name, name)
+        node = getattr(type(self), node_name, None)
+        if isinstance(node, property):
+            node = node.fget
+        if getattr(node, 'metric_dependencies', None) is None:
+            raise ValueError(f"Unknown metric: {name}")
 
-        try:
-            # 1. Validate metadata fields
-            required_meta = {
-                'id': 'ID',
-                'user_id': 'User ID',
-                'created_at': 'Created date',
-                'updated_at': 'Updated date',
-                'analysis_type': 'Analysis type',
-                'analysis_name': 'Analysis name',
-                'address': 'Property address'
-            }
-            Validator.validate_required_fields(self.data, required_meta)
-            
-            # 2. Validate ID is valid UUID
-            Validator.validate_uuid(self.data['id'])
-            
-            # 3. Validate dates are in ISO format
-            Validator.validate_date_format(self.data['created_at'], "Created date")
-            Validator.validate_date_format(self.data['updated_at'], "Updated date")
-            
-            # 4. Validate core calculation fields - monthly_rent only for non-Multi-Family
-            if self.data.get('analysis_type') != 'Multi-Family':
-                value = self.data.get('monthly_rent')
-                if not value or not isinstance(value, (int, float)) or value < 0:
-                    raise ValueError(f"Invalid monthly_rent: must be a positive number")
+        value = getattr(self, node_name)
+        return value() if callable(value) else value
 
-            # 5. Validate percentage fields
-            for field, (min_val, max_val) in PERCENTAGE_RANGES.items():
-                value = self.data.get(field, 0)
-                Validator.validate_percentage(value, field, min_val, max_val)
+    @classmethod
+    def get_affected_metric_nodes(cls, changed_fields) -> Optional[set]:
+        """
+        Find the metric nodes whose values depend on any of the changed input fields.
 
-        except Exception as e:
-            logger.error(f"Validation error: {str(e)}")
-            logger.error(traceback.format_exc())
-            raise
+        Args:
+            changed_fields: Names of input fields whose values changed
+
+        Returns:
+            Set of affected node names, or None when a changed field is not in
+            the dependency map and everything should be recalculated
+        """
+        affected = set()
+        for field_name in changed_fields:
+            if field_name in DESCRIPTIVE_FIELDS:
+                continue
+            if field_name not in METRIC_INPUT_FIELDS:
+                return None
+            affected.update(METRIC_INPUT_FIELDS[field_name])
+
+        # Walk the graph upwards to every node that reads an affected node
+        graph = get_metric_dependencies(cls)
+        changed = True
+        while changed:
+            changed = False
+            for node_name, dependencies in graph.items():
+                if node_name not in affected and affected.intersection(dependencies):
+                    affected.add(node_name)
+                    changed = True
+        return affected
+
+    def recalculate_metrics(self, previous_metrics: Dict, changed_fields) -> Dict:
+        """
+        Recalculate report metrics after an edit, reusing unaffected values.
+
+        Core metrics whose nodes do not depend on the changed fields are copied
+        from previous_metrics. Loan payment and type-specific metrics are
+        rebuilt whenever any calculation input changed, since the set of keys
+        they produce depends on the data (e.g. balloon payment metrics).
+
+        Args:
+            previous_metrics: Metrics from the last full calculation
+            changed_fields: Names of input fields whose values changed
+
+        Returns:
+            Metrics dictionary matching get_report_data()['metrics']
+        """
+        affected = self.get_affected_metric_nodes(changed_fields)
+        if affected is None or not previous_metrics:
+            return self.get_report_data()['metrics']
+        if not any(field_name not in DESCRIPTIVE_FIELDS for field_name in changed_fields):
+            return dict(previous_metrics)
+
+        metrics = {}
+        for key, node_name in self.CORE_METRIC_NODES.items():
+            if node_name in affected or key not in previous_metrics:
+                metrics[key] = str(self.get_metric(key))
+            else:
+                metrics[key] = previous_metrics[key]
+
+        type_specific_metrics = self._calculate_type_specific_metrics()
+        metrics.update({
+            key: value for key, value in self.calculated_metrics.items()
+            if 'loan_payment' in key
+        })
+        metrics.update(type_specific_metrics)
+
+        logger.debug(f"Recalculated metrics for {len(changed_fields)} changed fields, "
+                     f"{len(affected)} affected nodes")
+        return metrics
 
     def _get_money(self, field: str) -> Money:
         """Safely get a money value from data."""
@@ -377,6 +593,7 @@ class Analysis(ABC):
             is_interest_only=self.data.get(f'{prefix}_interest_only', False)
         )
 
+    @metric_node()
     @safe_calculation(default_value=Money(0))
     def _calculate_single_loan_payment(self, prefix: str) -> Money:
         """Calculate payment for a single loan by prefix."""
@@ -389,6 +606,7 @@ class Analysis(ABC):
         logger.debug(f"Calculated {prefix} payment: {payment}")
         return payment
 
+    @metric_node('_calculate_operating_expenses', '_calculate_loan_payments')
     @safe_calculation(default_value=Money(0))
     def calculate_monthly_cash_flow(self) -> Money:
         """Calculate monthly cash flow."""
@@ -412,6 +630,7 @@ class Analysis(ABC):
         
         return cash_flow
 
+    @metric_node()
     @safe_calculation(default_value=Money(0))
     def _calculate_operating_expenses(self) -> Money:
         """Calculate total monthly operating expenses."""
@@ -445,6 +664,7 @@ class Analysis(ABC):
         
         return fixed_expenses + rent_based_expenses + padsplit_expenses
 
+    @metric_node('_calculate_single_loan_payment')
     @safe_calculation(default_value=Money(0))
     def _calculate_loan_payments(self) -> Money:
         """Calculate total monthly loan payments."""
@@ -458,6 +678,7 @@ class Analysis(ABC):
         logger.debug(f"Total monthly loan payments: ${total_payments.dollars:.2f}")
         return total_payments
 
+    @metric_node()
     @safe_calculation(default_value=Money(0))
     def calculate_total_cash_invested(self) -> Money:
         """
@@ -489,11 +710,13 @@ class Analysis(ABC):
         return Money(max(0, float(total_cash.dollars)))
 
     @property
+    @metric_node('calculate_monthly_cash_flow')
     def annual_cash_flow(self) -> Money:
         """Calculate annual cash flow."""
         return self.calculate_monthly_cash_flow() * 12
 
     @property
+    @metric_node('calculate_total_cash_invested', 'annual_cash_flow')
     def cash_on_cash_return(self) -> Percentage:
         """Calculate Cash on Cash return."""
         cash_invested = self.calculate_total_cash_invested()
@@ -502,6 +725,7 @@ class Analysis(ABC):
         return Percentage((annual_cf / float(cash_invested.dollars)) * 100) if cash_invested.dollars > 0 else Percentage(0)
 
     @property
+    @metric_node('calculate_total_cash_invested', 'annual_cash_flow')
     def roi(self) -> Percentage:
         """Calculate ROI including equity and cash flow."""
         cash_invested = self.calculate_total_cash_invested()
@@ -524,13 +748,9 @@ class Analysis(ABC):
 
     def _calculate_core_metrics(self) -> Dict:
         """Calculate core metrics shared by all analysis types."""
-        monthly_cf = self.calculate_monthly_cash_flow()
         return {
-            'monthly_cash_flow': str(monthly_cf),
-            'annual_cash_flow': str(monthly_cf * 12),
-            'total_cash_invested': str(self.calculate_total_cash_invested()),
-            'cash_on_cash_return': str(self.cash_on_cash_return),
-            'roi': str(self.roi)
+            key: str(self.get_metric(key))
+            for key in self.CORE_METRIC_NODES
         }
 
     def get_report_data(self) -> Dict:
@@ -563,59 +783,15 @@ class Analysis(ABC):
 class LeaseOptionAnalysis(Analysis):
     """Lease option analysis implementation."""
     
-    def __init__(self, data: Dict):
+    def __init__(self, data: Dict, validated: bool = False):
         """Initialize lease option analysis."""
         if data.get('analysis_type') != 'Lease Option':
             raise ValueError("Invalid analysis type for lease option analysis")
             
-        super().__init__(data)
-
-    def _validate_type_specific_requirements(self) -> None:
-        """Validate fields specific to lease option analysis."""
-        try:
-            # Validate required numeric fields
-            required_fields = {
-                'option_consideration_fee': 'Option fee',
-                'option_term_months': 'Option term',
-                'strike_price': 'Strike price',
-                'monthly_rent_credit_percentage': 'Monthly rent credit percentage',
-                'rent_credit_cap': 'Rent credit cap'
-            }
-            
-            for field, display_name in required_fields.items():
-                if field == 'option_term_months':
-                    value = self.data.get(field, 0)
-                    Validator.validate_positive_number(value, display_name)
-                else:
-                    value = self._get_money(field)
-                    Validator.validate_positive_number(value, display_name)
-
-            # Validate rent credit percentage
-            Validator.validate_percentage(
-                self.data.get('monthly_rent_credit_percentage', 0),
-                "Monthly rent credit percentage"
-            )
-
-            # Validate strike price is greater than purchase price
-            if float(self.data.get('strike_price', 0)) <= float(self.data.get('purchase_price', 0)):
-                raise ValueError("Strike price must be greater than purchase price")
-
-            # Validate standard rental fields
-            rental_fields = {
-                'monthly_rent': 'Monthly rent',
-                'property_taxes': 'Property taxes',
-                'insurance': 'Insurance'
-            }
-            
-            for field, display_name in rental_fields.items():
-                value = self._get_money(field)
-                Validator.validate_positive_number(value, display_name)
+        super().__init__(data, validated)
 
-        except Exception as e:
-            logger.error(f"Lease option validation error: {str(e)}")
-            raise ValueError(f"Lease option validation failed: {str(e)}")
-            
     @property
+    @metric_node()
     def total_rent_credits(self) -> Money:
         """Calculate total potential rent credits over option term."""
         monthly_credit = self._get_money('monthly_rent') * self._get_percentage('monthly_rent_credit_percentage')
@@ -624,17 +800,20 @@ class LeaseOptionAnalysis(Analysis):
         return min(total_potential, credit_cap)
 
     @property
+    @metric_node('total_rent_credits')
     def effective_purchase_price(self) -> Money:
         """Calculate effective purchase price after credits."""
         return self._get_money('strike_price') - self.total_rent_credits
 
     @property
+    @metric_node('annual_cash_flow')
     def option_roi(self) -> Percentage:
         """Calculate ROI on option fee."""
         annual_cf = float(self.annual_cash_flow.dollars)
         option_fee = float(self._get_money('option_consideration_fee').dollars)
         return Percentage((annual_cf / option_fee) * 100) if option_fee > 0 else Percentage(0)
 
+    @metric_node('calculate_monthly_cash_flow')
     @safe_calculation(default_value=float('inf'))
     def calculate_breakeven_months(self) -> int:
         """Calculate months to break even on option fee."""
@@ -674,6 +853,7 @@ class LeaseOptionAnalysis(Analysis):
             'annual_cash_flow': str(monthly_cash_flow * 12)
         }
 
+    @metric_node()
     @safe_calculation(default_value=Money(0))
     def calculate_total_cash_invested(self) -> Money:
         """
@@ -691,79 +871,14 @@ class LeaseOptionAnalysis(Analysis):
 class LTRAnalysis(Analysis):
     """Long-term rental analysis implementation."""
     
-    def __init__(self, data: Dict):
+    def __init__(self, data: Dict, validated: bool = False):
         """Initialize LTR analysis."""
         if data.get('analysis_type') not in ['LTR', 'PadSplit LTR']:
             raise ValueError("Invalid analysis type for LTR analysis")
             
-        super().__init__(data)
-
-    def _validate_type_specific_requirements(self) -> None:
-        """Validate fields specific to LTR analysis."""
-        try:
-            # Validate required numeric fields
-            ltr_fields = {
-                'purchase_price': 'Purchase price',
-                'monthly_rent': 'Monthly rent',
-                'property_taxes': 'Property taxes',
-                'insurance': 'Insurance'
-            }
-            
-            for field, display_name in ltr_fields.items():
-                value = self._get_money(field)
-                Validator.validate_positive_number(value, display_name)
-
-            # Validate balloon payment fields if present
-            if self.data.get('has_balloon_payment'):
-                self.validate_balloon_payment()
-
-        except Exception as e:
-            logger.error(f"LTR validation error: {str(e)}")
-            raise ValueError(f"LTR validation failed: {str(e)}")
-
-    def validate_balloon_payment(self) -> None:
-        """Validate balloon payment specific fields."""
-        if not self.data.get('has_balloon_payment'):
-            return
-
-        try:
-            # Validate required balloon fields
-            balloon_fields = {
-                'balloon_due_date': 'Balloon payment due date',
-                'balloon_refinance_ltv_percentage': 'Balloon refinance LTV percentage',
-                'balloon_refinance_loan_amount': 'Balloon refinance loan amount',
-                'balloon_refinance_loan_interest_rate': 'Balloon refinance interest rate',
-                'balloon_refinance_loan_term': 'Balloon refinance term'
-            }
-            
-            Validator.validate_required_fields(self.data, balloon_fields)
-            
-            # Validate balloon date
-            Validator.validate_date_format(self.data['balloon_due_date'], "Balloon due date")
-            balloon_date = datetime.fromisoformat(self.data['balloon_due_date'].replace('Z', '+00:00'))
-            if balloon_date <= datetime.now():
-                raise ValueError("Balloon due date must be in the future")
-
-            # Validate LTV percentage
-            ltv = self._get_percentage('balloon_refinance_ltv_percentage')
-            Validator.validate_percentage(ltv, "Balloon refinance LTV percentage")
-
-            # Validate refinance loan parameters
-            refinance_amount = self._get_money('balloon_refinance_loan_amount')
-            Validator.validate_positive_number(refinance_amount, "Balloon refinance loan amount")
-
-            interest_rate = self._get_percentage('balloon_refinance_loan_interest_rate')
-            Validator.validate_percentage(interest_rate, "Balloon refinance interest rate", 0, MAX_LOAN_INTEREST_RATE)
-
-            term = self.data.get('balloon_refinance_loan_term', 0)
-            if term <= 0 or term > MAX_LOAN_TERM:
-                raise ValueError(f"Balloon refinance term must be between 1 and {MAX_LOAN_TERM} months")
-
-        except ValueError as e:
-            raise
-        except Exception as e:
-            raise ValueError(f"Invalid balloon payment parameters: {str(e)}")
+        super().__init__(data, validated)
 
+    @metric_node('_calculate_single_loan_payment')
     def _calculate_loan_payments(self) -> Money:
         """Calculate total monthly loan payments considering balloon scenarios."""
         try:
@@ -794,6 +909,7 @@ class LTRAnalysis(Analysis):
             logger.error(traceback.format_exc())
             return Money(0)
 
+    @metric_node('_calculate_single_loan_payment')
     @safe_calculation(default_value=Money(0))
     def _calculate_pre_balloon_loan_payments(self) -> Money:
         """Calculate total monthly loan payments before balloon payment."""
@@ -809,6 +925,7 @@ class LTRAnalysis(Analysis):
                     
         return total_payments
 
+    @metric_node()
     @safe_calculation(default_value=Money(0))
     def _calculate_post_balloon_loan_payment(self) -> Money:
         """Calculate monthly loan payment after balloon refinance."""
@@ -827,6 +944,7 @@ class LTRAnalysis(Analysis):
         logger.debug(f"Calculated post-balloon payment: {payment}")
         return payment
 
+    @metric_node('_calculate_operating_expenses', '_calculate_pre_balloon_loan_payments')
     @safe_calculation(default_value=Money(0))
     def calculate_pre_balloon_monthly_cash_flow(self) -> Money:
         """Calculate monthly cash flow before balloon payment."""
@@ -850,6 +968,7 @@ class LTRAnalysis(Analysis):
         
         return cash_flow
 
+    @metric_node()
     @safe_calculation(default_value=0)
     def _calculate_balloon_years(self) -> float:
         """Calculate the number of years between now and balloon date."""
@@ -864,6 +983,7 @@ class LTRAnalysis(Analysis):
         """Apply annual percentage increase to a value over specified years."""
         return base_value * (1 + increase_rate) ** years
 
+    @metric_node('_calculate_balloon_years')
     @safe_calculation(default_value={})
     def _calculate_post_balloon_values(self) -> Dict:
         """Calculate post-balloon values with annual increases."""
@@ -901,6 +1021,7 @@ class LTRAnalysis(Analysis):
         
         return post_balloon_values
 
+    @metric_node('_calculate_post_balloon_values', '_calculate_post_balloon_loan_payment')
     @safe_calculation(default_value=Money(0))
     def _calculate_post_balloon_monthly_cash_flow(self) -> Money:
         """Calculate monthly cash flow after balloon refinance with increased values."""
@@ -934,6 +1055,7 @@ class LTRAnalysis(Analysis):
         
         return monthly_income - operating_expenses - loan_payment
 
+    @metric_node()
     @safe_calculation(default_value=Money(0))
     def calculate_balloon_refinance_costs(self) -> Money:
         """Calculate total costs associated with balloon payment refinance."""
@@ -1043,84 +1165,12 @@ class LTRAnalysis(Analysis):
 class BRRRRAnalysis(Analysis):
     """BRRRR strategy analysis implementation."""
     
-    def __init__(self, data: Dict):
+    def __init__(self, data: Dict, validated: bool = False):
         """Initialize BRRRR analysis."""
         if data.get('analysis_type') not in ['BRRRR', 'PadSplit BRRRR']:
             raise ValueError("Invalid analysis type for BRRRR analysis")
             
-        super().__init__(data)
-
-    def _validate_type_specific_requirements(self) -> None:
-        """Validate fields specific to BRRRR analysis."""
-        try:
-            # Validate required BRRRR fields
-            required_fields = {
-                'purchase_price': 'Purchase price',
-                'after_repair_value': 'After repair value',
-                'renovation_costs': 'Renovation costs',
-                'renovation_duration': 'Renovation duration',
-                'initial_loan_amount': 'Initial loan amount',
-                'refinance_loan_amount': 'Refinance loan amount'
-            }
-            
-            for field, display_name in required_fields.items():
-                if field == 'renovation_duration':
-                    value = self.data.get(field, 0)
-                    if value <= 0 or value > MAX_RENOVATION_DURATION:
-                        raise ValueError(f"{display_name} must be between 1 and {MAX_RENOVATION_DURATION} months")
-                else:
-                    value = self._get_money(field)
-                    Validator.validate_positive_number(value, display_name)
-
-            # Validate loan parameters
-            self._validate_loan_parameters('initial_loan', is_initial=True)
-            self._validate_loan_parameters('refinance_loan')
-
-            # Validate ARV is greater than purchase price + renovation costs
-            arv = self._get_money('after_repair_value')
-            total_cost = self._get_money('purchase_price') + self._get_money('renovation_costs')
-            if arv <= total_cost:
-                raise ValueError("After repair value must be greater than purchase price plus renovation costs")
-            
-            # Validate initial_interest_only is boolean if present
-            initial_interest_only = self.data.get('initial_interest_only')
-            if initial_interest_only is not None and not isinstance(initial_interest_only, bool):
-                try:
-                    # Convert string values to boolean
-                    if isinstance(initial_interest_only, str):
-                        self.data['initial_interest_only'] = initial_interest_only.lower() in ('true', '1')
-                    else:
-                        self.data['initial_interest_only'] = bool(initial_interest_only)
-                except (ValueError, TypeError):
-                    raise ValueError("initial_interest_only must be a boolean value")
-
-        except Exception as e:
-            logger.error(f"BRRRR validation error: {str(e)}")
-            raise ValueError(f"BRRRR validation failed: {str(e)}")
-
-    def _validate_loan_parameters(self, loan_prefix: str, is_initial: bool = False) -> None:
-        """Validate loan parameters for a given loan type."""
-        try:
-            # Validate loan amount
-            loan_amount = self._get_money(f'{loan_prefix}_amount')
-            Validator.validate_positive_number(loan_amount, f"{loan_prefix} amount")
-
-            # Validate interest rate
-            interest_rate = self._get_percentage(f'{loan_prefix}_interest_rate')
-            Validator.validate_percentage(interest_rate, f"{loan_prefix} interest rate", 0, MAX_LOAN_INTEREST_RATE)
-
-            # Validate loan term
-            loan_term = self.data.get(f'{loan_prefix}_term', 0)
-            if is_initial:
-                if loan_term <= 0 or loan_term > MAX_RENOVATION_DURATION:  # Initial loan typically 3-24 months
-                    raise ValueError(f"Initial loan term must be between 1 and {MAX_RENOVATION_DURATION} months")
-            else:
-                if loan_term <= 0 or loan_term > MAX_LOAN_TERM:  # Long-term loan typically up to 30 years
-                    raise ValueError(f"Refinance loan term must be between 1 and {MAX_LOAN_TERM} months")
-
-        except Exception as e:
-            logger.error(f"Loan validation error: {str(e)}")
-            raise ValueError(f"Loan validation failed: {str(e)}")
+        super().__init__(data, validated)
 
     def _calculate_loan_payments(self) -> Money:
         """Calculate total monthly loan payments for BRRRR."""
@@ -1157,6 +1207,7 @@ class BRRRRAnalysis(Analysis):
             return Money(0)
 
     @property
+    @metric_node()
     @safe_calculation(default_value=Money(0))
     def holding_costs(self) -> Money:
         """
@@ -1199,6 +1250,7 @@ class BRRRRAnalysis(Analysis):
         return total_holding_costs
 
     @property
+    @metric_node('holding_costs')
     @safe_calculation(default_value=Money(0))
     def total_project_costs(self) -> Money:
         """Calculate total project costs including holding costs."""
@@ -1210,6 +1262,7 @@ class BRRRRAnalysis(Analysis):
             self._get_money('refinance_loan_closing_costs')
         ], Money(0))
 
+    @metric_node('holding_costs')
     @safe_calculation(default_value=Money(0))
     def calculate_total_cash_invested(self) -> Money:
         """
@@ -1260,6 +1313,7 @@ class BRRRRAnalysis(Analysis):
         
         return final_investment
 
+    @metric_node('holding_costs')
     @safe_calculation(default_value=Money(0))
     def calculate_mao(self) -> Money:
         """Calculate Maximum Allowable Offer."""
@@ -1278,6 +1332,7 @@ class BRRRRAnalysis(Analysis):
         return Money(max(0, float(mao.dollars)))
 
     @property
+    @metric_node('calculate_total_cash_invested', 'annual_cash_flow')
     def cash_on_cash_return(self) -> Union[Percentage, str]:
         """
         Calculate Cash on Cash return.
@@ -1297,6 +1352,7 @@ class BRRRRAnalysis(Analysis):
         # Normal calculation
         return Percentage((annual_cf / float(cash_invested.dollars)) * 100)
 
+    @metric_node()
     def _calculate_loan_payments(self) -> Money:
         """
         Calculate total monthly loan payments for BRRRR.
@@ -1402,71 +1458,15 @@ class BRRRRAnalysis(Analysis):
 class MultiFamilyAnalysis(Analysis):
     """Multi-Family analysis implementation."""
     
-    def __init__(self, data: Dict):
+    def __init__(self, data: Dict, validated: bool = False):
         """Initialize multi-family analysis."""
         if data.get('analysis_type') != 'Multi-Family':
             raise ValueError("Invalid analysis type for multi-family analysis")
             
-        super().__init__(data)
-
-    def _validate_type_specific_requirements(self) -> None:
-        """Validate fields specific to multi-family analysis."""
-        try:
-            # Validate required numeric fields that must be greater than 0
-            required_positive_fields = {
-                'total_units': 'Total units',
-                'floors': 'Number of floors',
-                'property_taxes': 'Property taxes',
-                'insurance': 'Insurance'
-            }
-            
-            # Fields that must be present but can be 0
-            required_fields = {
-                'elevator_maintenance': 'Elevator maintenance',
-                'other_income': 'Other income',
-                'hoa_coa_coop': 'HOA/COA/COOP fees'
-            }
-            
-            for field, display_name in required_positive_fields.items():
-                if field in ['total_units', 'floors']:
-                    value = self.data.get(field, 0)
-                    Validator.validate_positive_number(value, display_name)
-                else:
-                    value = self._get_money(field)
-                    Validator.validate_positive_number(value, display_name)
-
-            # Just verify these fields exist (can be 0)
-            Validator.validate_required_fields(self.data, required_fields)
-
-            # Validate unit types
-            unit_types = json.loads(self.data.get('unit_types', '[]'))
-            if not unit_types:
-                raise ValueError("At least one unit type must be defined")
-            
-            total_units = sum(ut.get('count', 0) for ut in unit_types)
-            if total_units != self.data.get('total_units', 0):
-                raise ValueError("Sum of units must match total units")
-
-            total_occupied = sum(ut.get('occupied', 0) for ut in unit_types)
-            if total_occupied != self.data.get('occupied_units', 0):
-                raise ValueError("Sum of occupied units must match total occupied units")
-
-            # Validate each unit type has required fields
-            for unit_type in unit_types:
-                if not all(key in unit_type for key in ['type', 'count', 'occupied', 'square_footage', 'rent']):
-                    raise ValueError("Invalid unit type structure")
-                if unit_type['rent'] <= 0:
-                    raise ValueError("Unit rent must be greater than 0")
-                if unit_type['count'] <= 0:
-                    raise ValueError("Unit count must be greater than 0")
-                if unit_type['occupied'] < 0 or unit_type['occupied'] > unit_type['count']:
-                    raise ValueError("Occupied units cannot exceed total units for a type")
-
-        except Exception as e:
-            logger.error(f"Multi-family validation error: {str(e)}")
-            raise ValueError(f"Multi-family validation failed: {str(e)}")
+        super().__init__(data, validated)
 
     @property
+    @metric_node()
     @safe_calculation(default_value=Money(0))
     def gross_potential_rent(self) -> Money:
         """
@@ -1483,6 +1483,7 @@ class MultiFamilyAnalysis(Analysis):
             return Money(0)
 
     @property
+    @metric_node()
     @safe_calculation(default_value=Money(0))
     def actual_gross_income(self) -> Money:
         """
@@ -1505,6 +1506,7 @@ class MultiFamilyAnalysis(Analysis):
             return Money(0)
 
     @property
+    @metric_node('gross_potential_rent', '_calculate_operating_expenses')
     @safe_calculation(default_value=Money(0))
     def net_operating_income(self) -> Money:
         """Calculate NOI (before debt service)."""
@@ -1518,6 +1520,7 @@ class MultiFamilyAnalysis(Analysis):
         return effective_gross_income - operating_expenses
 
     @property
+    @metric_node('net_operating_income')
     @safe_calculation(default_value=Percentage(0))
     def cap_rate(self) -> Percentage:
         """Calculate capitalization rate."""
@@ -1529,6 +1532,7 @@ class MultiFamilyAnalysis(Analysis):
                          float(purchase_price.dollars)) * 100)
 
     @property
+    @metric_node()
     @safe_calculation(default_value=Percentage(0))
     def occupancy_rate(self) -> Percentage:
         """Calculate current occupancy rate as percentage."""
@@ -1541,6 +1545,7 @@ class MultiFamilyAnalysis(Analysis):
         return Percentage((occupied_units / total_units) * 100)
 
     @property
+    @metric_node()
     @safe_calculation(default_value=Money(0))
     def price_per_unit(self) -> Money:
         """Calculate purchase price per unit."""
@@ -1553,6 +1558,7 @@ class MultiFamilyAnalysis(Analysis):
         return Money(float(purchase_price.dollars) / total_units)
 
     @property
+    @metric_node('gross_potential_rent')
     @safe_calculation(default_value=0.0)
     def gross_rent_multiplier(self) -> float:
         """Calculate Gross Rent Multiplier."""
@@ -1562,6 +1568,7 @@ class MultiFamilyAnalysis(Analysis):
         
         return float(self._get_money('purchase_price').dollars) / annual_rent
 
+    @metric_node('gross_potential_rent')
     def _calculate_operating_expenses(self) -> Money:
         """
         Calculate total monthly operating expenses for multi-family property.
@@ -1668,8 +1675,14 @@ class MultiFamilyAnalysis(Analysis):
         
         return {**multi_family_metrics, **unit_metrics}
 
-def create_analysis(data: Dict) -> Analysis:
-    """Factory function to create appropriate analysis instance"""
+def create_analysis(data: Dict, validated: bool = False) -> Analysis:
+    """
+    Factory function to create appropriate analysis instance
+
+    Args:
+        data: Analysis data
+        validated: Whether the data already passed the compiled schema validator
+    """
     analysis_registry = {
         'LTR': LTRAnalysis,
         'BRRRR': BRRRRAnalysis,
@@ -1685,4 +1698,4 @@ def create_analysis(data: Dict) -> Analysis:
     if not analysis_class:
         raise ValueError(f"Invalid analysis type: {analysis_type}")
         
-    return analysis_class(data)
\ No newline at end of file
+    return analysis_class(data, validated)
\ No newline at end of file
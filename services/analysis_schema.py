@@ -1,6 +1,11 @@
 # analysis_schema.py
 """Schema definition for property investment analyses."""
 
+import json
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
 
 ANALYSIS_SCHEMA = {
     # Core fields
@@ -240,4 +245,432 @@ MOBILE_OPTIONAL_FIELDS = [
     'furnishing_costs',
     'other_income',
     'elevator_maintenance',
-]
\ No newline at end of file
+]
+
+# Analysis types with a compiled validator
+ANALYSIS_TYPES = (
+    'LTR',
+    'BRRRR',
+    'Lease Option',
+    'PadSplit LTR',
+    'PadSplit BRRRR',
+    'Multi-Family',
+)
+
+LEASE_OPTION_FIELDS = {
+    'option_consideration_fee': 'Option fee',
+    'option_term_months': 'Option term',
+    'strike_price': 'Strike price',
+    'monthly_rent_credit_percentage': 'Monthly rent credit percentage',
+    'rent_credit_cap': 'Rent credit cap',
+}
+
+MAX_OPTION_TERM_MONTHS = 120
+MAX_LOAN_INTEREST_RATE = 30
+MAX_LOAN_TERM = 360  # 30 years
+MAX_RENOVATION_DURATION = 24
+
+# Typical ranges for percentage fields
+PERCENTAGE_RANGES = {
+    'management_fee_percentage': (0, 15),
+    'capex_percentage': (0, 10),
+    'vacancy_percentage': (0, 15),
+    'repairs_percentage': (0, 15),
+}
+
+# Fields every stored analysis carries besides its type and name
+METADATA_FIELDS = {
+    'id': 'ID',
+    'user_id': 'User ID',
+    'created_at': 'Created date',
+    'updated_at': 'Updated date',
+    'address': 'Property address',
+}
+
+UNIT_TYPE_KEYS = ('type', 'count', 'occupied', 'square_footage', 'rent')
+
+BALLOON_FIELDS = {
+    'balloon_due_date': 'Balloon payment due date',
+    'balloon_refinance_ltv_percentage': 'Balloon refinance LTV percentage',
+    'balloon_refinance_loan_amount': 'Balloon refinance loan amount',
+    'balloon_refinance_loan_interest_rate': 'Balloon refinance interest rate',
+    'balloon_refinance_loan_term': 'Balloon refinance term',
+}
+
+
+def to_int(value: Any) -> Optional[int]:
+    """
+    Convert value to integer, handling empty values for optional fields.
+
+    Args:
+        value: Value to convert
+
+    Returns:
+        Converted integer value or None
+
+    Raises:
+        ValueError: If conversion fails
+    """
+    if value is None or value == '':
+        return None  # Return None for empty optional fields
+    try:
+        if isinstance(value, str):
+            clean_value = value.replace('$', '').replace(',', '').strip()
+            return int(float(clean_value))
+        return int(float(value))
+    except (ValueError, TypeError):
+        raise ValueError(f"Cannot convert {value} to integer")
+
+
+def to_float(value: Any) -> Optional[float]:
+    """
+    Convert value to float, handling empty values for optional fields.
+
+    Args:
+        value: Value to convert
+
+    Returns:
+        Converted float value or None
+
+    Raises:
+        ValueError: If conversion fails
+    """
+    if value is None or value == '':
+        return None  # Return None for empty optional fields
+    try:
+        if isinstance(value, str):
+            clean_value = value.replace('$', '').replace('%', '').replace(',', '').strip()
+            return float(clean_value)
+        return float(value)
+    except (ValueError, TypeError):
+        raise ValueError(f"Cannot convert {value} to float")
+
+
+def _to_string(value: Any) -> str:
+    return value if isinstance(value, str) else str(value)
+
+
+def _to_uuid_string(value: Any) -> str:
+    value = _to_string(value)
+    uuid.UUID(value)
+    return value
+
+
+def _to_datetime_string(value: Any) -> str:
+    value = _to_string(value)
+    datetime.fromisoformat(value.replace('Z', '+00:00'))
+    return value
+
+
+def _to_date_string(value: Any) -> str:
+    # Dates are stored as YYYY-MM-DD
+    return datetime.strptime(_to_string(value), "%Y-%m-%d").strftime("%Y-%m-%d")
+
+
+def _to_bool(value: Any) -> bool:
+    if isinstance(value, str):
+        if value.lower() not in ('true', 'false', '1', '0', 'yes', 'no', 'on', 'off'):
+            raise ValueError(f"Invalid boolean value: {value}")
+        return value.lower() in ('true', '1', 'yes', 'on')
+    if not isinstance(value, bool) and value not in (0, 1):
+        raise ValueError(f"Invalid boolean value: {value}")
+    return bool(value)
+
+
+def _compile_field(field_name: str, field_def: Dict) -> Optional[Callable[[Any], Any]]:
+    """
+    Build the coercer for a single schema field.
+
+    Args:
+        field_name: Schema field name
+        field_def: Schema definition for the field
+
+    Returns:
+        Function coercing a raw value (raises ValueError when invalid), or
+        None for field types that are not coerced (objects)
+    """
+    field_type = field_def['type']
+    if field_type == 'integer':
+        convert = to_int
+    elif field_type == 'float':
+        convert = to_float
+    elif field_type == 'boolean':
+        convert = _to_bool
+    elif field_type == 'string':
+        convert = {
+            'uuid': _to_uuid_string,
+            'datetime': _to_datetime_string,
+            'date': _to_date_string,
+        }.get(field_def.get('format'), _to_string)
+    else:
+        return None
+
+    is_percentage = field_type == 'float' and field_name.endswith('_percentage')
+
+    def convert_field(value: Any) -> Any:
+        try:
+            result = convert(value)
+        except (ValueError, TypeError) as e:
+            raise ValueError(f"Invalid {field_type} value for field {field_name}: {str(e)}")
+        if is_percentage and result is not None and not 0 <= result <= 100:
+            raise ValueError(f"Invalid percentage value for {field_name}: {result}")
+        return result
+    return convert_field
+
+
+# Field coercers are shared by every analysis type
+FIELD_COERCERS = {
+    field_name: (coercer, bool(field_def.get('optional')))
+    for field_name, field_def in ANALYSIS_SCHEMA.items()
+    for coercer in [_compile_field(field_name, field_def)]
+    if coercer is not None
+}
+
+
+def _number(coerced: Dict, field_name: str) -> float:
+    value = coerced.get(field_name)
+    return float(value) if isinstance(value, (int, float)) else 0.0
+
+
+def _check_required(data: Dict, coerced: Dict, errors: List[str]) -> None:
+    for field_name in ('analysis_type', 'analysis_name'):
+        value = data.get(field_name)
+        if not value:
+            errors.append(f"Missing required field: {field_name}")
+        elif not isinstance(value, str):
+            errors.append(f"Invalid type for {field_name}: expected str")
+    for field_name, display_name in METADATA_FIELDS.items():
+        if data.get(field_name) is None:
+            errors.append(f"Missing required field: {display_name}")
+
+
+def _check_percentage_ranges(data: Dict, coerced: Dict, errors: List[str]) -> None:
+    for field_name, (min_val, max_val) in PERCENTAGE_RANGES.items():
+        value = coerced.get(field_name)
+        if isinstance(value, (int, float)) and not min_val <= value <= max_val:
+            errors.append(f"{field_name} must be between {min_val}% and {max_val}%")
+
+
+def _check_monthly_rent(data: Dict, coerced: Dict, errors: List[str]) -> None:
+    rent = coerced.get('monthly_rent')
+    if not isinstance(rent, (int, float)) or rent <= 0:
+        errors.append("Invalid monthly_rent: must be a positive number")
+
+
+def _require_positive(fields: Dict[str, str]) -> Callable[[Dict, Dict, List[str]], None]:
+    """Build a check that each field is greater than 0 (missing counts as 0)."""
+    def check(data: Dict, coerced: Dict, errors: List[str]) -> None:
+        for field_name, display_name in fields.items():
+            if field_name not in coerced and data.get(field_name) not in (None, ''):
+                continue  # Could not be coerced, already reported
+            if _number(coerced, field_name) <= 0:
+                errors.append(f"{display_name} must be greater than 0")
+    return check
+
+
+def _require_present(fields: Dict[str, str]) -> Callable[[Dict, Dict, List[str]], None]:
+    """Build a check that each field has a value, which may be 0."""
+    def check(data: Dict, coerced: Dict, errors: List[str]) -> None:
+        for field_name, display_name in fields.items():
+            if coerced.get(field_name) is None:
+                errors.append(f"Missing required field: {display_name}")
+    return check
+
+
+def _check_loan(errors: List[str], coerced: Dict, prefix: str, display_name: str, max_term: int) -> None:
+    interest_rate = _number(coerced, f'{prefix}_interest_rate')
+    loan_term = _number(coerced, f'{prefix}_term')
+    if interest_rate < 0 or interest_rate > MAX_LOAN_INTEREST_RATE:
+        errors.append(f"{display_name} interest rate must be between 0% and {MAX_LOAN_INTEREST_RATE}%")
+    if loan_term <= 0 or loan_term > max_term:
+        errors.append(f"{display_name} term must be between 1 and {max_term} months")
+
+
+def _check_balloon(data: Dict, coerced: Dict, errors: List[str]) -> None:
+    if not coerced.get('has_balloon_payment'):
+        return
+    missing = [name for field_name, name in BALLOON_FIELDS.items() if coerced.get(field_name) is None]
+    if missing:
+        errors.extend(f"Missing required field: {name}" for name in missing)
+        return
+    if datetime.strptime(coerced['balloon_due_date'], "%Y-%m-%d") <= datetime.now():
+        errors.append("Balloon due date must be in the future")
+    if _number(coerced, 'balloon_refinance_loan_amount') <= 0:
+        errors.append("Balloon refinance loan amount must be greater than 0")
+    _check_loan(errors, coerced, 'balloon_refinance_loan', 'Balloon refinance', MAX_LOAN_TERM)
+
+
+def _check_brrrr(data: Dict, coerced: Dict, errors: List[str]) -> None:
+    duration = _number(coerced, 'renovation_duration')
+    if duration <= 0 or duration > MAX_RENOVATION_DURATION:
+        errors.append(f"Renovation duration must be between 1 and {MAX_RENOVATION_DURATION} months")
+    # The initial (rehab) loan is short term; the refinance loan is a long-term mortgage
+    _check_loan(errors, coerced, 'initial_loan', 'Initial loan', MAX_RENOVATION_DURATION)
+    _check_loan(errors, coerced, 'refinance_loan', 'Refinance loan', MAX_LOAN_TERM)
+    total_cost = _number(coerced, 'purchase_price') + _number(coerced, 'renovation_costs')
+    if _number(coerced, 'after_repair_value') <= total_cost:
+        errors.append("After repair value must be greater than purchase price plus renovation costs")
+
+
+def _check_unit_types(data: Dict, coerced: Dict, errors: List[str]) -> None:
+    if 'unit_types' not in data:
+        errors.append("Missing unit_types for Multi-Family analysis")
+        return
+    try:
+        unit_types = json.loads(data['unit_types'])
+    except (TypeError, json.JSONDecodeError):
+        errors.append("Invalid unit_types format")
+        return
+    if not isinstance(unit_types, list) or not unit_types:
+        errors.append("unit_types must be a non-empty array")
+        return
+    if not all(isinstance(unit, dict) and all(key in unit for key in UNIT_TYPE_KEYS) for unit in unit_types):
+        errors.append("Invalid unit type structure")
+        return
+    for unit in unit_types:
+        rent = unit['rent']
+        if isinstance(rent, bool) or not isinstance(rent, (int, float)) or rent <= 0:
+            errors.append("Each unit type must have a positive rent value")
+            break
+    for unit in unit_types:
+        if unit['count'] <= 0:
+            errors.append("Unit count must be greater than 0")
+            break
+        if unit['occupied'] < 0 or unit['occupied'] > unit['count']:
+            errors.append("Occupied units cannot exceed total units for a type")
+            break
+    if sum(unit['count'] for unit in unit_types) != coerced.get('total_units'):
+        errors.append("Sum of units must match total units")
+    if sum(unit['occupied'] for unit in unit_types) != coerced.get('occupied_units'):
+        errors.append("Sum of occupied units must match total occupied units")
+
+
+def _check_lease_option(data: Dict, coerced: Dict, errors: List[str]) -> None:
+    def number(field_name: str) -> float:
+        return _number(coerced, field_name)
+
+    if number('strike_price') <= number('purchase_price'):
+        errors.append("Strike price must be greater than purchase price")
+
+    for field_name, display_name in LEASE_OPTION_FIELDS.items():
+        if number(field_name) <= 0:
+            errors.append(f"{display_name} must be greater than 0")
+
+    if number('option_term_months') > MAX_OPTION_TERM_MONTHS:
+        errors.append(f"Option term cannot exceed {MAX_OPTION_TERM_MONTHS} months")
+
+    for prefix in ('loan1', 'loan2', 'loan3'):
+        if number(f'{prefix}_loan_amount') > 0:
+            interest_rate = number(f'{prefix}_loan_interest_rate')
+            loan_term = number(f'{prefix}_loan_term')
+            if interest_rate <= 0 or interest_rate > MAX_LOAN_INTEREST_RATE:
+                errors.append(f"{prefix}: Interest rate must be between 0% and {MAX_LOAN_INTEREST_RATE}%")
+            if loan_term <= 0 or loan_term > MAX_LOAN_TERM:
+                errors.append(f"{prefix}: Loan term must be between 1 and {MAX_LOAN_TERM} months")
+
+
+def compile_validator(analysis_type: str) -> Callable[[Dict], Tuple[Dict, List[str]]]:
+    """
+    Compile the schema into a validator specialized for one analysis type.
+
+    The returned function coerces every schema field present in the data,
+    then runs the shared metadata and percentage checks and the type's own
+    rules in a single pass, collecting every error instead of stopping at
+    the first one. Analysis classes and the service both use it, so there is
+    no separate type-specific or storage validation.
+
+    Args:
+        analysis_type: Analysis type the validator is built for
+
+    Returns:
+        Function taking analysis data and returning (coerced values, errors)
+    """
+    checks = [_check_required, _check_percentage_ranges]
+    checks.extend(TYPE_CHECKS.get(analysis_type, [_check_monthly_rent]))
+
+    coercers = FIELD_COERCERS
+
+    def validate(data: Dict) -> Tuple[Dict, List[str]]:
+        coerced = {}
+        errors = []
+        for field_name, value in data.items():
+            entry = coercers.get(field_name)
+            if entry is None or value is None:
+                continue
+            coercer, optional = entry
+            if optional and value == '':
+                continue
+            try:
+                coerced[field_name] = coercer(value)
+            except ValueError as e:
+                errors.append(str(e))
+
+        for check in checks:
+            check(data, coerced, errors)
+        return coerced, errors
+
+    validate.analysis_type = analysis_type
+    return validate
+
+
+_RENTAL_FIELDS = {
+    'property_taxes': 'Property taxes',
+    'insurance': 'Insurance',
+}
+
+_LTR_FIELDS = {'purchase_price': 'Purchase price', **_RENTAL_FIELDS}
+
+_BRRRR_FIELDS = {
+    'purchase_price': 'Purchase price',
+    'after_repair_value': 'After repair value',
+    'renovation_costs': 'Renovation costs',
+    'initial_loan_amount': 'Initial loan amount',
+    'refinance_loan_amount': 'Refinance loan amount',
+}
+
+_MULTI_FAMILY_FIELDS = {
+    'total_units': 'Total units',
+    'floors': 'Number of floors',
+    'property_taxes': 'Property taxes',
+    'insurance': 'Insurance',
+}
+
+# Multi-Family fields that must be present but can be 0
+_MULTI_FAMILY_PRESENT_FIELDS = {
+    'elevator_maintenance': 'Elevator maintenance',
+    'other_income': 'Other income',
+    'hoa_coa_coop': 'HOA/COA/COOP fees',
+}
+
+# Rules for each analysis type on top of the shared checks
+TYPE_CHECKS = {
+    'LTR': [_check_monthly_rent, _require_positive(_LTR_FIELDS), _check_balloon],
+    'PadSplit LTR': [_check_monthly_rent, _require_positive(_LTR_FIELDS), _check_balloon],
+    'BRRRR': [_check_monthly_rent, _require_positive(_BRRRR_FIELDS), _check_brrrr],
+    'PadSplit BRRRR': [_check_monthly_rent, _require_positive(_BRRRR_FIELDS), _check_brrrr],
+    'Lease Option': [_check_monthly_rent, _require_positive(_RENTAL_FIELDS), _check_lease_option],
+    'Multi-Family': [_require_positive(_MULTI_FAMILY_FIELDS), _require_present(_MULTI_FAMILY_PRESENT_FIELDS),
+                     _check_unit_types],
+}
+
+# Validators are compiled once at import
+ANALYSIS_VALIDATORS = {
+    analysis_type: compile_validator(analysis_type)
+    for analysis_type in ANALYSIS_TYPES
+}
+
+# Any other type only gets the shared checks and the monthly rent check
+GENERIC_VALIDATOR = compile_validator(None)
+
+
+def get_validator(analysis_type: Optional[str]) -> Callable[[Dict], Tuple[Dict, List[str]]]:
+    """
+    Get the compiled validator for an analysis type.
+
+    Args:
+        analysis_type: Analysis type (unknown types share a generic validator)
+
+    Returns:
+        Compiled validator function
+    """
+    return ANALYSIS_VALIDATORS.get(analysis_type, GENERIC_VALIDATOR)
@@ -0,0 +1,224 @@
+# analysis_sensitivity.py
+"""Vectorized what-if grids over analysis inputs."""
+
+import logging
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from services.analysis_calculations import create_analysis
+
+logger = logging.getLogger(__name__)
+
+SENSITIVITY_METRICS = ('monthly_cash_flow', 'cash_on_cash_return', 'cap_rate', 'dscr')
+MAX_SENSITIVITY_VARIABLES = 3
+MAX_SENSITIVITY_STEPS = 100
+DEFAULT_SENSITIVITY_STEPS = 11
+
+# Interest rate fields mapped to (amount field, term field, interest-only field)
+RATE_FIELDS = {
+    'loan1_loan_interest_rate': ('loan1_loan_amount', 'loan1_loan_term', 'loan1_interest_only'),
+    'loan2_loan_interest_rate': ('loan2_loan_amount', 'loan2_loan_term', 'loan2_interest_only'),
+    'loan3_loan_interest_rate': ('loan3_loan_amount', 'loan3_loan_term', 'loan3_interest_only'),
+    'refinance_loan_interest_rate': ('refinance_loan_amount', 'refinance_loan_term', None),
+}
+
+SENSITIVITY_FIELDS = ('purchase_price', 'monthly_rent') + tuple(RATE_FIELDS)
+
+
+def _number(data: Dict, field: str) -> float:
+    value = data.get(field)
+    try:
+        return float(value) if value not in (None, '') else 0.0
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def loan_payment_grid(amount: float, annual_rate_pct: np.ndarray, term: int,
+                      is_interest_only: bool = False) -> np.ndarray:
+    """
+    Vectorized monthly loan payment, matching LoanCalculator.calculate_payment.
+
+    Args:
+        amount: Loan amount
+        annual_rate_pct: Annual interest rates in percent (any shape)
+        term: Loan term in months
+        is_interest_only: Whether the loan is interest only
+
+    Returns:
+        Monthly payments with the same shape as annual_rate_pct
+    """
+    rates = np.asarray(annual_rate_pct, dtype=float)
+    if amount <= 0 or term <= 0:
+        return np.zeros_like(rates)
+
+    monthly_rate = rates / 1200.0
+    if is_interest_only:
+        payment = amount * monthly_rate
+    else:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            factor = np.power(1.0 + monthly_rate, term)
+            payment = amount * monthly_rate * factor / (factor - 1.0)
+    return np.where(rates == 0, amount / term, payment)
+
+
+def _parse_variables(variables: List[Dict]) -> List[Tuple[str, np.ndarray]]:
+    """
+    Validate variable ranges and expand them into value arrays.
+
+    Args:
+        variables: List of {'field', 'min', 'max', 'steps'} dictionaries
+
+    Returns:
+        List of (field, values) pairs
+
+    Raises:
+        ValueError: If the variables are invalid
+    """
+    if not variables:
+        raise ValueError("At least one sensitivity variable is required")
+    if len(variables) > MAX_SENSITIVITY_VARIABLES:
+        raise ValueError(f"At most {MAX_SENSITIVITY_VARIABLES} sensitivity variables are supported")
+
+    parsed = []
+    for variable in variables:
+        field = variable.get('field')
+        if field not in SENSITIVITY_FIELDS:
+            raise ValueError(f"Unsupported sensitivity variable: {field}")
+        if any(field == existing for existing, _ in parsed):
+            raise ValueError(f"Duplicate sensitivity variable: {field}")
+
+        try:
+            low = float(variable['min'])
+            high = float(variable['max'])
+            steps = int(variable.get('steps', DEFAULT_SENSITIVITY_STEPS))
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f"Invalid range for sensitivity variable: {field}")
+
+        if high < low:
+            raise ValueError(f"Invalid range for {field}: max must not be less than min")
+        if not 1 <= steps <= MAX_SENSITIVITY_STEPS:
+            raise ValueError(f"Steps for {field} must be between 1 and {MAX_SENSITIVITY_STEPS}")
+        if field in RATE_FIELDS and (low < 0 or high > 30):
+            raise ValueError(f"Interest rate range for {field} must be between 0% and 30%")
+
+        parsed.append((field, np.linspace(low, high, steps)))
+    return parsed
+
+
+def _json_grid(values: np.ndarray) -> List:
+    """Convert a metric grid to nested lists, with non-finite cells as None."""
+    rounded = np.round(values, 2).astype(object)
+    rounded[~np.isfinite(values)] = None
+    return rounded.tolist()
+
+
+def calculate_sensitivity_grid(analysis_data: Dict, variables: List[Dict]) -> Dict:
+    """
+    Evaluate key metrics over a grid of up to three input variables.
+
+    The analysis is instantiated once to get its base values. Each metric is
+    then expressed in terms of the varied inputs and evaluated over the whole
+    grid with NumPy broadcasting. Loan amounts are held at their entered values.
+    Only metrics the analysis type reports are returned (Lease Option analyses
+    have no cap rate or DSCR, for example).
+
+    Args:
+        analysis_data: Stored analysis data
+        variables: List of {'field', 'min', 'max', 'steps'} dictionaries, one
+            per grid axis
+
+    Returns:
+        Dictionary with the axis values and one nested-list matrix per metric,
+        indexed in the same order as variables
+
+    Raises:
+        ValueError: If the variables or analysis type are not supported
+    """
+    analysis_type = analysis_data.get('analysis_type', '')
+    if analysis_type == 'Multi-Family':
+        raise ValueError("Sensitivity analysis is not available for Multi-Family analyses")
+
+    axes = _parse_variables(variables)
+    shape = tuple(len(values) for _, values in axes)
+    grid = {}
+    for index, (field, values) in enumerate(axes):
+        axis_shape = [1] * len(axes)
+        axis_shape[index] = len(values)
+        grid[field] = values.reshape(axis_shape)
+
+    # Base values from a single analysis instance
+    analysis = create_analysis(dict(analysis_data))
+    is_brrrr = 'BRRRR' in analysis_type
+    base_rent = _number(analysis_data, 'monthly_rent')
+    base_price = _number(analysis_data, 'purchase_price')
+    base_opex = float(analysis.get_metric('_calculate_operating_expenses').dollars)
+    base_debt = float(analysis.get_metric('_calculate_loan_payments').dollars)
+    base_cash_invested = float(analysis.get_metric('total_cash_invested').dollars)
+    reported_metrics = analysis.get_report_data()['metrics']
+
+    rent_expense_pct = sum(
+        _number(analysis_data, field) for field in (
+            'management_fee_percentage', 'capex_percentage',
+            'vacancy_percentage', 'repairs_percentage'
+        )
+    )
+    if 'PadSplit' in analysis_type:
+        rent_expense_pct += _number(analysis_data, 'padsplit_platform_percentage')
+
+    rent = grid.get('monthly_rent', base_rent)
+    price = grid.get('purchase_price', base_price)
+
+    # Percentage-based expenses scale with rent, fixed expenses do not
+    operating_expenses = base_opex + (rent - base_rent) * rent_expense_pct / 100.0
+
+    # Swap the base payment for the varied one on loans that are in debt service
+    debt_service = base_debt
+    for field, (amount_field, term_field, interest_only_field) in RATE_FIELDS.items():
+        if field not in grid:
+            continue
+        payment_key = amount_field.replace('_amount', '_payment')
+        if payment_key not in analysis.calculated_metrics:
+            continue
+        amount = _number(analysis_data, amount_field)
+        term = int(_number(analysis_data, term_field))
+        interest_only = bool(analysis_data.get(interest_only_field)) if interest_only_field else False
+        base_payment = loan_payment_grid(amount, _number(analysis_data, field), term, interest_only)
+        debt_service = debt_service + loan_payment_grid(amount, grid[field], term, interest_only) - base_payment
+
+    # BRRRR cash invested includes the purchase price
+    cash_invested = base_cash_invested + (price - base_price) if is_brrrr else base_cash_invested
+
+    noi = rent - operating_expenses
+    monthly_cash_flow = noi - debt_service
+    cap_rate_basis = _number(analysis_data, 'after_repair_value') if is_brrrr else price
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cash_on_cash = np.where(
+            np.asarray(cash_invested) > 0,
+            monthly_cash_flow * 12 / cash_invested * 100,
+            np.nan if is_brrrr else 0.0  # BRRRR reports "Infinite" when no cash is left in
+        )
+        cap_rate = np.where(np.asarray(cap_rate_basis) > 0, noi * 12 / cap_rate_basis * 100, 0.0)
+        dscr = np.where(np.asarray(debt_service) > 0, noi / debt_service, 0.0)
+
+    metrics = {
+        'monthly_cash_flow': monthly_cash_flow,
+        'cash_on_cash_return': cash_on_cash,
+        'cap_rate': cap_rate,
+        'dscr': dscr,
+    }
+    metrics = {name: values for name, values in metrics.items() if name in reported_metrics}
+
+    logger.debug(f"Calculated sensitivity grid {shape} for analysis {analysis_data.get('id')}")
+    return {
+        'variables': [
+            {'field': field, 'values': np.round(values, 4).tolist()}
+            for field, values in axes
+        ],
+        'shape': list(shape),
+        'metrics': {
+            name: _json_grid(np.broadcast_to(np.asarray(values, dtype=float), shape))
+            for name, values in metrics.items()
+        }
+    }
@@ -6,17 +6,50 @@ import json
 import time
 from typing import Dict, List, Optional, Union, Any, Tuple
 import traceback
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from io import BytesIO
 
 from flask import current_app, session
 from services.report_generator import generate_report
+from services.report_cache import get_report_cache, report_cache_key
+from services.report_jobs import get_report_jobs
+from services.portfolio_report import (
+    generate_portfolio_report, portfolio_cache_key, MAX_PORTFOLIO_ANALYSES
+)
 from utils.json_handler import read_json, write_json
-from services.analysis_calculations import create_analysis
+from services.image_processing import MAX_IMAGE_SIZE
+from services.analysis_calculations import create_analysis, DESCRIPTIVE_FIELDS, METRICS_VERSION
+from services.analysis_schema import get_validator
+from services.analysis_sensitivity import calculate_sensitivity_grid
+from services.analysis_simulation import (
+    run_projection_simulation, parse_simulation_options, report_simulation_options, with_projection_simulation,
+    check_inline_simulation
+)
 from utils.comps_handler import fetch_property_comps, update_analysis_comps, RentcastAPIError
 
 
 logger = logging.getLogger(__name__)
 
+# Normalized value of schema fields missing from the input
+EMPTY_FIELD_VALUES = {'integer': None, 'float': None, 'string': '', 'boolean': False}
+
+# Seconds a comps run may take before rental comps are skipped. Property comps are not bound by it: the
+# run has no result without them, so they are only limited by the RentCast client's timeouts and retries.
+DEFAULT_COMPS_DEADLINE = 20
+COMPS_FETCH_WORKERS = 4
+
+_comps_executor: Optional[ThreadPoolExecutor] = None
+_comps_executor_lock = threading.Lock()
+
+
+def _get_comps_executor() -> ThreadPoolExecutor:
+    global _comps_executor
+    with _comps_executor_lock:
+        if _comps_executor is None:
+            _comps_executor = ThreadPoolExecutor(max_workers=COMPS_FETCH_WORKERS, thread_name_prefix='comps')
+    return _comps_executor
+
 
 class AnalysisService:
     """Service for handling property investment analyses with flat data structure."""
@@ -30,7 +63,7 @@ class AnalysisService:
         
         # Mobile-specific configuration
         self.mobile_config = {
-            'max_image_size': 800,  # Max dimension for mobile images
+            'max_image_size': MAX_IMAGE_SIZE,  # Max dimension for uploaded images
             'pagination_size': 10,   # Items per page on mobile
             'cache_duration': 300    # Cache duration in seconds
         }
@@ -70,8 +103,29 @@ class AnalysisService:
                 raise ValueError("Property address is required to fetch comps")
             
             # Get property comps data
-            from utils.comps_handler import fetch_property_comps, fetch_rental_comps, update_analysis_comps
+            from utils.comps_handler import (
+                check_property_comps_allowed, fetch_property_comps, fetch_rental_comps, update_analysis_comps
+            )
             from flask import current_app, session
+
+            # Check the session run limit first, so no paid rental call goes out for a run that cannot finish
+            check_property_comps_allowed(
+                current_app.config, address, property_type, bedrooms, bathrooms, square_footage
+            )
+
+            # Rental comps are fetched on the pool while property comps run here,
+            # so the run takes about as long as the slower of the two calls
+            deadline = time.monotonic() + float(current_app.config.get('COMPS_DEADLINE', DEFAULT_COMPS_DEADLINE))
+            logger.debug("Fetching rental comps")
+            rental_future = _get_comps_executor().submit(
+                fetch_rental_comps,
+                current_app.config,
+                address,
+                bedrooms,
+                bathrooms,
+                square_footage,
+                property_type
+            )
             
             try:
                 comps_data = fetch_property_comps(
@@ -102,21 +156,17 @@ class AnalysisService:
                         else:
                             comps_data[field] = 0
             except RentcastAPIError as e:
+                rental_future.cancel()
                 logger.error(f"RentCast API error: {str(e)}")
                 raise ValueError(f"Could not find property comps: {str(e)}")
+            except Exception:
+                rental_future.cancel()
+                raise
             
-            # Get rental comps data
+            # Collect rental comps, waiting no longer than the shared deadline
             rental_comps = None
             try:
-                logger.debug("Fetching rental comps")
-                rental_comps = fetch_rental_comps(
-                    current_app.config,
-                    address,
-                    bedrooms,
-                    bathrooms,
-                    square_footage,
-                    property_type
-                )
+                rental_comps = rental_future.result(timeout=max(0.0, deadline - time.monotonic()))
                 logger.debug(f"Rental comps fetched successfully: {rental_comps is not None}")
                 
                 # Validate rental comps data
@@ -124,6 +174,9 @@ class AnalysisService:
                     logger.warning("Rental comps missing estimated_rent field")
                     rental_comps['estimated_rent'] = 0
                     
+            except FutureTimeoutError:
+                # The request keeps running and its response still lands in the comps cache
+                logger.warning(f"Rental comps for {address} missed the comps deadline; continuing without them")
             except Exception as e:
                 logger.error(f"Error fetching rental comps: {str(e)}")
                 logger.exception("Full traceback:")
@@ -178,7 +231,11 @@ class AnalysisService:
     
     def normalize_data(self, data: Dict, is_mobile: bool = False) -> Dict:
         """
-        Normalize input data according to schema types.
+        Coerce and validate input data in a single pass of the compiled schema validator.
+        
+        Fields the analysis type or balloon setting does not use are reset to
+        their defaults, and missing IDs and timestamps are generated, before
+        the validator coerces everything else.
         
         Args:
             data: Input data dictionary
@@ -186,13 +243,15 @@ class AnalysisService:
             
         Returns:
             Normalized data dictionary
+            
+        Raises:
+            ValueError: If validation fails, listing every error found
         """
         try:
             logger.debug("=== Starting Data Normalization ===")
-            normalized = {}
             
             # First check if balloon payments are enabled
-            has_balloon = data.get('has_balloon_payment', False)
+            has_balloon = self._convert_to_bool(data.get('has_balloon_payment', False))
             
             # Handle lease option fields
             lease_fields = {
@@ -202,67 +261,46 @@ class AnalysisService:
                 'monthly_rent_credit_percentage': 0.0,
                 'rent_credit_cap': 0
             }
+            mobile_optional_fields = getattr(self, 'MOBILE_OPTIONAL_FIELDS', [])
 
-            # Process each field according to schema
+            # Values used regardless of input, and fields left out entirely
+            defaults = {}
+            skipped = set()
             for field, field_def in self.ANALYSIS_SCHEMA.items():
-                field_type = field_def['type']
                 value = data.get(field)
-                
-                # Handle lease option fields
                 if field in lease_fields and data.get('analysis_type') != 'Lease Option':
-                    normalized[field] = lease_fields[field]
-                    continue
-                
-                # Handle balloon payment fields
-                if field.startswith('balloon_') and not has_balloon:
-                    if field == 'balloon_due_date':
-                        normalized[field] = None
-                    else:
-                        normalized[field] = 0
-                    continue
-                    
-                # Skip empty mobile-optional fields on mobile
-                if is_mobile and not value and field in getattr(self, 'MOBILE_OPTIONAL_FIELDS', []):
-                    continue
-                    
-                # Convert value based on type
-                if field_type == 'integer':
-                    normalized[field] = self._convert_to_int(value)
-                    
-                elif field_type == 'float':
-                    normalized[field] = self._convert_to_float(value)
-                    
-                elif field_type == 'string':
-                    normalized[field] = str(value) if value is not None else ''
-                        
-                elif field_type == 'boolean':
-                    if field == 'has_balloon_payment':
-                        normalized[field] = bool(value)
-                    else:
-                        # Handle other boolean fields
-                        normalized[field] = self._convert_to_bool(value)
-                
-                # Handle special formats
-                if field_def.get('format') == 'uuid' and not value:
-                    normalized[field] = str(uuid.uuid4())
-                    
+                    defaults[field] = lease_fields[field]
+                elif field.startswith('balloon_') and not has_balloon:
+                    defaults[field] = None if field == 'balloon_due_date' else 0
+                elif is_mobile and not value and field in mobile_optional_fields:
+                    skipped.add(field)
+                elif field_def.get('format') == 'uuid' and not value:
+                    defaults[field] = str(uuid.uuid4())
                 elif field_def.get('format') == 'datetime' and not value:
-                    normalized[field] = datetime.now().isoformat()
-                    
-                elif field_def.get('format') == 'date' and value:
-                    try:
-                        if has_balloon or not field.startswith('balloon_'):
-                            parsed_date = datetime.strptime(value, "%Y-%m-%d")
-                            normalized[field] = parsed_date.strftime("%Y-%m-%d")
-                        else:
-                            normalized[field] = None
-                    except ValueError:
-                        normalized[field] = None
-                        logger.warning(f"Invalid date format for field {field}: {value}")
+                    defaults[field] = datetime.now().isoformat()
+
+            inputs = {field: value for field, value in data.items() if field not in skipped}
+            inputs.update(defaults)
+            coerced, errors = get_validator(data.get('analysis_type'))(inputs)
+            if errors:
+                raise ValueError("; ".join(errors))
+
+            normalized = {}
+            for field, field_def in self.ANALYSIS_SCHEMA.items():
+                field_type = field_def['type']
+                if field in skipped or field_type not in EMPTY_FIELD_VALUES:
+                    continue
+                if field in coerced:
+                    normalized[field] = coerced[field]
+                else:
+                    normalized[field] = defaults.get(field, EMPTY_FIELD_VALUES[field_type])
             
             logger.debug("=== Data Normalization Complete ===")
             return normalized
-                
+            
+        except ValueError as e:
+            logger.error(f"Validation error: {str(e)}")
+            raise
         except Exception as e:
             logger.error(f"Error normalizing data: {str(e)}")
             logger.error(traceback.format_exc())
@@ -308,76 +346,23 @@ class AnalysisService:
             for key, value in metrics.items()
         }
     
-    def _get_value(self, data: Dict, field: str) -> Any:
-        """
-        Safely get a value from the data dict, handling various formats.
-        
-        Args:
-            data: The data dictionary to get the value from
-            field: The field name to get
-            
-        Returns:
-            The value or None if not found
-        """
-        if field not in data:
-            return None
-            
-        value = data[field]
-            
-        # Convert empty strings to None
-        if value == '':
-            return None
-            
-        # If it's already None, return it
-        if value is None:
-            return None
-            
-        # Clean up currency values
-        if isinstance(value, str):
-            value = value.replace('$', '').replace(',', '').strip()
-            # Remove % symbol if present
-            if value.endswith('%'):
-                value = value[:-1]
-                
-        return value
-
     def validate_analysis_data(self, data: Dict) -> None:
         """
-        Validate analysis data against schema.
+        Validate analysis data against the compiled schema validator for its type.
         
         Args:
             data: Analysis data to validate
             
         Raises:
-            ValueError: If validation fails
+            ValueError: If validation fails, listing every error found
         """
         try:
             logger.debug("Starting analysis data validation")
             
-            # Validate required base fields
-            required_fields = {
-                'analysis_type': str,
-                'analysis_name': str
-            }
-
-            # Check for monthly rent requirement
-            self._validate_rent_data(data)
-            
-            # Validate required fields
-            self._validate_required_fields(data, required_fields)
-            
-            # Validate field types for non-required fields
-            for field, value in data.items():
-                if field in self.ANALYSIS_SCHEMA and value is not None:
-                    field_def = self.ANALYSIS_SCHEMA[field]
-                    # Skip validation for optional fields that are empty
-                    if field_def.get('optional') and (value is None or value == ''):
-                        continue
-                    self._validate_field_type(field, value)
-                        
-            # Validate analysis-type specific data
-            if data.get('analysis_type') == 'Lease Option':
-                self._validate_lease_option(data)
+            validator = get_validator(data.get('analysis_type'))
+            _, errors = validator(data)
+            if errors:
+                raise ValueError("; ".join(errors))
 
             logger.debug("Analysis data validation complete")
             
@@ -389,170 +374,6 @@ class AnalysisService:
             logger.error(traceback.format_exc())
             raise ValueError(f"Validation failed: {str(e)}")
 
-    def _validate_rent_data(self, data: Dict) -> None:
-        """Validate rent data based on analysis type."""
-        if data.get('analysis_type') != 'Multi-Family':
-            if 'monthly_rent' not in data or \
-            not isinstance(data['monthly_rent'], (int, float)) or \
-            data['monthly_rent'] <= 0:
-                raise ValueError("Invalid monthly_rent: must be a positive number")
-        else:
-            # For Multi-Family, validate unit_types instead
-            if 'unit_types' not in data:
-                raise ValueError("Missing unit_types for Multi-Family analysis")
-            try:
-                unit_types = json.loads(data['unit_types'])
-                if not isinstance(unit_types, list) or not unit_types:
-                    raise ValueError("unit_types must be a non-empty array")
-                    
-                # Validate each unit type has required rent
-                for unit in unit_types:
-                    if 'rent' not in unit or \
-                    not isinstance(unit['rent'], (int, float)) or \
-                    unit['rent'] <= 0:
-                        raise ValueError("Each unit type must have a positive rent value")
-            except json.JSONDecodeError:
-                raise ValueError("Invalid unit_types format")
-
-    def _validate_required_fields(self, data: Dict, required_fields: Dict) -> None:
-        """Validate required fields are present and of correct type."""
-        for field, expected_type in required_fields.items():
-            value = data.get(field)
-            if not value:
-                raise ValueError(f"Missing required field: {field}")
-            if not isinstance(value, expected_type):
-                raise ValueError(f"Invalid type for {field}: expected {expected_type.__name__}")
-
-    def _validate_lease_option(self, data: Dict) -> None:
-        """Validate lease option specific fields."""
-        if float(self._get_value(data, 'strike_price') or 0) <= float(self._get_value(data, 'purchase_price') or 0):
-            raise ValueError("Strike price must be greater than purchase price")
-
-        option_fields = {
-            'option_consideration_fee': "Option fee",
-            'option_term_months': "Option term",
-            'strike_price': "Strike price",
-            'monthly_rent_credit_percentage': "Monthly rent credit percentage",
-            'rent_credit_cap': "Rent credit cap"
-        }
-
-        for field, display_name in option_fields.items():
-            value = self._get_value(data, field)
-            if value is None or float(value) <= 0:
-                raise ValueError(f"{display_name} must be greater than 0")
-
-        rent_credit_pct = float(self._get_value(data, 'monthly_rent_credit_percentage') or 0)
-        if not 0 <= rent_credit_pct <= 100:
-            raise ValueError("Monthly rent credit percentage must be between 0 and 100")
-
-        option_term = int(self._get_value(data, 'option_term_months') or 0)
-        if option_term > 120:
-            raise ValueError("Option term cannot exceed 120 months")
-
-        # Validate loans for Lease Options
-        self._validate_loans(data)
-
-    def _validate_loans(self, data: Dict) -> None:
-        """Validate loan data."""
-        loan_prefixes = ['loan1', 'loan2', 'loan3']
-        for prefix in loan_prefixes:
-            loan_amount = self._get_value(data, f'{prefix}_loan_amount')
-            if loan_amount and float(loan_amount) > 0:
-                # Validate loan amount and terms
-                interest_rate = float(self._get_value(data, f'{prefix}_loan_interest_rate') or 0)
-                loan_term = int(self._get_value(data, f'{prefix}_loan_term') or 0)
-                
-                if interest_rate <= 0 or interest_rate > 30:
-                    raise ValueError(f"{prefix}: Interest rate must be between 0% and 30%")
-                
-                if loan_term <= 0 or loan_term > 360:
-                    raise ValueError(f"{prefix}: Loan term must be between 1 and 360 months")
-
-    def _validate_field_type(self, field: str, value: Any) -> None:
-        """
-        Validate a single field's type and format.
-        
-        Args:
-            field: Field name
-            value: Field value
-            
-        Raises:
-            ValueError: If field value is invalid
-        """
-        field_def = self.ANALYSIS_SCHEMA[field]
-        field_type = field_def['type']
-        
-        try:
-            if field_type == 'integer':
-                self._convert_to_int(value)
-            elif field_type == 'float':
-                self._convert_to_float(value)
-            elif field_type == 'string':
-                if not isinstance(value, str):
-                    value = str(value)
-                
-                # Validate special string formats
-                if field_def.get('format') == 'uuid':
-                    uuid.UUID(str(value))
-                elif field_def.get('format') == 'datetime':
-                    datetime.fromisoformat(str(value).replace('Z', '+00:00'))
-            elif field_type == 'boolean':
-                # Handle various boolean-like values
-                if isinstance(value, str):
-                    if value.lower() not in ('true', 'false', '1', '0'):
-                        raise ValueError(f"Invalid boolean value: {value}")
-                elif not isinstance(value, bool) and value not in (0, 1):
-                    raise ValueError(f"Invalid boolean value: {value}")
-                    
-        except (ValueError, TypeError) as e:
-            raise ValueError(f"Invalid {field_type} value for field {field}: {str(e)}")
-
-    def _convert_to_int(self, value: Any) -> Optional[int]:
-        """
-        Convert value to integer, handling empty values for optional fields.
-        
-        Args:
-            value: Value to convert
-            
-        Returns:
-            Converted integer value or None
-            
-        Raises:
-            ValueError: If conversion fails
-        """
-        if value is None or value == '':
-            return None  # Return None for empty optional fields
-        try:
-            if isinstance(value, str):
-                clean_value = value.replace('$', '').replace(',', '').strip()
-                return int(float(clean_value))
-            return int(float(value))
-        except (ValueError, TypeError):
-            raise ValueError(f"Cannot convert {value} to integer")
-
-    def _convert_to_float(self, value: Any) -> Optional[float]:
-        """
-        Convert value to float, handling empty values for optional fields.
-        
-        Args:
-            value: Value to convert
-            
-        Returns:
-            Converted float value or None
-            
-        Raises:
-            ValueError: If conversion fails
-        """
-        if value is None or value == '':
-            return None  # Return None for empty optional fields
-        try:
-            if isinstance(value, str):
-                clean_value = value.replace('$', '').replace('%', '').replace(',', '').strip()
-                return float(clean_value)
-            return float(value)
-        except (ValueError, TypeError):
-            raise ValueError(f"Cannot convert {value} to float")
-
     def create_analysis(self, analysis_data: Dict, user_id: str) -> Dict:
         """
         Create new analysis with validation and calculation, ensuring metrics consistency.
@@ -567,30 +388,25 @@ class AnalysisService:
         try:
             logger.debug(f"Creating analysis for user {user_id}")
             
-            # Normalize incoming data
-            normalized_data = self.normalize_data(analysis_data)
-            
-            # Add metadata
-            normalized_data.update({
+            # Normalize and validate incoming data along with its metadata
+            normalized_data = self.normalize_data({
+                **analysis_data,
                 'id': str(uuid.uuid4()),
                 'user_id': user_id,
                 'created_at': datetime.now().strftime("%Y-%m-%d"),
                 'updated_at': datetime.now().strftime("%Y-%m-%d")
             })
             
-            # Validate data
-            self.validate_analysis_data(normalized_data)
-            
             # Create Analysis object and get calculations
-            analysis = create_analysis(normalized_data)
+            analysis = create_analysis(normalized_data, validated=True)
             metrics = analysis.get_report_data()['metrics']
             
             # Utilize standardized metrics functions instead of MetricsHandler
             from utils.standardized_metrics import register_metrics
             register_metrics(normalized_data['id'], metrics)
             
-            # Save to storage
-            self._save_analysis(normalized_data, user_id)
+            # Save to storage along with the metrics snapshot
+            self._save_analysis({**normalized_data, 'calculated_metrics': metrics}, user_id)
             
             return {
                 'success': True,
@@ -623,8 +439,8 @@ class AnalysisService:
             if not analysis_id:
                 raise ValueError("Analysis ID required for updates")
             
-            # Verify analysis exists and get current data
-            current_analysis = self.get_analysis(analysis_id, user_id)
+            # Verify analysis exists and get current data (without recalculating)
+            current_analysis = self._load_stored_analysis(analysis_id, user_id)
             if not current_analysis:
                 raise ValueError("Analysis not found")
             
@@ -636,24 +452,18 @@ class AnalysisService:
                 logger.debug("Preserving existing comps data")
                 analysis_data['comps_data'] = current_analysis.get('comps_data')
                 
-            # Normalize and validate new data
-            normalized_data = self.normalize_data(analysis_data)
-            
-            # Preserve metadata and ID
-            normalized_data.update({
+            # Normalize and validate new data, preserving metadata and ID
+            normalized_data = self.normalize_data({
+                **analysis_data,
                 'id': analysis_id,  # Ensure original ID is preserved
                 'user_id': user_id,
                 'created_at': current_analysis.get('created_at', datetime.now().strftime("%Y-%m-%d")),
-                'updated_at': datetime.now().strftime("%Y-%m-%d"),
-                'comps_data': analysis_data.get('comps_data', current_analysis.get('comps_data'))
+                'updated_at': datetime.now().strftime("%Y-%m-%d")
             })
+            normalized_data['comps_data'] = analysis_data.get('comps_data', current_analysis.get('comps_data'))
             
-            # Validate updated data
-            self.validate_analysis_data(normalized_data)
-            
-            # Create Analysis object and get calculations
-            analysis = create_analysis(normalized_data)
-            metrics = analysis.get_report_data().get('metrics', {})
+            # Recalculate only the metrics affected by the changed fields
+            metrics = self._recalculate_metrics(current_analysis, normalized_data)
             
             # Utilize standardized metrics functions instead of MetricsHandler
             from utils.standardized_metrics import register_metrics
@@ -663,7 +473,7 @@ class AnalysisService:
             self._log_comps_data(normalized_data)
             
             # Save to storage with explicit comps preservation
-            self._save_analysis(normalized_data, user_id)
+            self._save_analysis({**normalized_data, 'calculated_metrics': metrics}, user_id)
             
             return {
                 'success': True,
@@ -677,6 +487,74 @@ class AnalysisService:
             logger.error(f"Error updating analysis: {str(e)}", exc_info=True)
             raise
 
+    def _load_stored_analysis(self, analysis_id: str, user_id: str) -> Optional[Dict]:
+        """
+        Load an analysis exactly as stored, without recalculating metrics.
+        
+        Args:
+            analysis_id: Analysis ID
+            user_id: User ID
+            
+        Returns:
+            Stored analysis data or None if not found
+        """
+        filepath = self._get_analysis_filepath(analysis_id, user_id)
+        if not os.path.exists(filepath):
+            return None
+            
+        stored_data = read_json(filepath)
+        
+        # Handle field mapping for backward compatibility
+        if 'property_address' in stored_data and 'address' not in stored_data:
+            stored_data['address'] = stored_data['property_address']
+            
+        return stored_data
+
+    def _recalculate_metrics(self, stored_data: Dict, normalized_data: Dict) -> Dict:
+        """
+        Calculate metrics for updated data, reusing the stored snapshot where possible.
+        
+        Args:
+            stored_data: Analysis data as last saved, including its metrics snapshot
+            normalized_data: Normalized and validated updated data
+            
+        Returns:
+            Calculated metrics for the updated data
+        """
+        previous_metrics = self._stored_metrics(stored_data)
+        changed_fields = {
+            field for field in self.ANALYSIS_SCHEMA
+            if field not in ('updated_at', 'created_at')
+            and stored_data.get(field) != normalized_data.get(field)
+        }
+        
+        if not previous_metrics or 'analysis_type' in changed_fields:
+            logger.debug("No usable metrics snapshot, running full calculation")
+            return create_analysis(normalized_data, validated=True).get_report_data()['metrics']
+            
+        if changed_fields <= DESCRIPTIVE_FIELDS:
+            logger.debug("Only descriptive fields changed, reusing stored metrics")
+            return dict(previous_metrics)
+            
+        logger.debug(f"Changed fields: {sorted(changed_fields)}")
+        analysis = create_analysis(normalized_data, validated=True)
+        return analysis.recalculate_metrics(previous_metrics, changed_fields)
+
+    def _stored_metrics(self, stored_data: Dict) -> Optional[Dict]:
+        """
+        Get the saved metrics snapshot if it can be served as is.
+        
+        Snapshots saved by older metric code are not used. Neither are those of
+        balloon payment analyses, whose metrics depend on today's date (refinance
+        terms apply once the balloon is due), so they are always recalculated.
+        """
+        metrics = stored_data.get('calculated_metrics')
+        if not metrics or stored_data.get('metrics_version') != METRICS_VERSION:
+            return None
+        if stored_data.get('has_balloon_payment'):
+            return None
+        return metrics
+
     def _log_balloon_data(self, analysis_data: Dict) -> None:
         """Log balloon payment fields for debugging."""
         logger.debug(f"Has balloon payment: {analysis_data.get('has_balloon_payment')}")
@@ -704,6 +582,10 @@ class AnalysisService:
         """
         Retrieve analysis with calculations and ensure metrics consistency.
         
+        Metrics are served from the snapshot saved with the analysis when it is
+        current; otherwise they are calculated in full. The snapshot itself is
+        only written by create and update.
+        
         Args:
             analysis_id: Analysis ID
             user_id: User ID
@@ -712,20 +594,16 @@ class AnalysisService:
             Analysis data with calculated metrics or None if not found
         """
         try:
-            filepath = self._get_analysis_filepath(analysis_id, user_id)
-            if not os.path.exists(filepath):
-                return None
-                
             # Load stored data
-            stored_data = read_json(filepath)
-            
-            # Handle field mapping for backward compatibility
-            if 'property_address' in stored_data and 'address' not in stored_data:
-                stored_data['address'] = stored_data['property_address']
+            stored_data = self._load_stored_analysis(analysis_id, user_id)
+            if not stored_data:
+                return None
             
-            # Create Analysis object for calculations
-            analysis = create_analysis(stored_data)
-            metrics = analysis.get_report_data()['metrics']
+            metrics = self._stored_metrics(stored_data)
+            if metrics is None:
+                logger.debug(f"No current metrics snapshot for {analysis_id}, running full calculation")
+                metrics = create_analysis(stored_data).get_report_data()['metrics']
+            stored_data.pop('metrics_version', None)
             
             # Utilize standardized metrics functions instead of MetricsHandler
             from utils.standardized_metrics import register_metrics
@@ -741,6 +619,67 @@ class AnalysisService:
             logger.error(traceback.format_exc())
             raise
 
+    def get_sensitivity_grid(self, analysis_id: str, user_id: str, variables: List[Dict]) -> Optional[Dict]:
+        """
+        Evaluate key metrics for an analysis over a grid of input values.
+        
+        Args:
+            analysis_id: Analysis ID
+            user_id: User ID
+            variables: List of {'field', 'min', 'max', 'steps'} ranges (up to three)
+            
+        Returns:
+            Sensitivity grid data or None if the analysis is not found
+            
+        Raises:
+            ValueError: If the variables are invalid
+        """
+        try:
+            stored_data = self._load_stored_analysis(analysis_id, user_id)
+            if not stored_data:
+                return None
+                
+            return calculate_sensitivity_grid(stored_data, variables)
+            
+        except ValueError:
+            raise
+        except Exception as e:
+            logger.error(f"Error calculating sensitivity grid: {str(e)}")
+            logger.error(traceback.format_exc())
+            raise
+
+    def run_projection_simulation(self, analysis_id: str, user_id: str, options: Optional[Dict] = None) -> Optional[Dict]:
+        """
+        Run a Monte Carlo projection for an analysis.
+        
+        Args:
+            analysis_id: Analysis ID
+            user_id: User ID
+            options: Simulation options (paths, years, seed, distributions)
+            
+        Returns:
+            Simulation results or None if the analysis is not found
+            
+        Raises:
+            ValueError: If the options are invalid or the run is too large
+                to simulate inline
+        """
+        try:
+            stored_data = self._load_stored_analysis(analysis_id, user_id)
+            if not stored_data:
+                return None
+                
+            # Runs inside the request, so keep it small and out of the process pool
+            simulation = check_inline_simulation(parse_simulation_options(options))
+            return run_projection_simulation(stored_data, max_workers=1, **simulation)
+            
+        except ValueError:
+            raise
+        except Exception as e:
+            logger.error(f"Error running projection simulation: {str(e)}")
+            logger.error(traceback.format_exc())
+            raise
+
     def find_analysis_owner(self, analysis_id):
         """Find the user who owns a specific analysis"""
         # Implementation will depend on your storage structure
@@ -818,9 +757,11 @@ class AnalysisService:
                 'updated_at': analysis_data.get('updated_at') or datetime.now().strftime("%Y-%m-%d"),
             })
             
-            # Create Analysis object for calculations
-            analysis = create_analysis(analysis_data)
-            metrics = analysis.get_report_data()['metrics']
+            # Use the saved metrics snapshot when it is current
+            metrics = self._stored_metrics(analysis_data)
+            if metrics is None:
+                metrics = create_analysis(analysis_data).get_report_data()['metrics']
+            analysis_data.pop('metrics_version', None)
             processed_data = {
                 **analysis_data,
                 'calculated_metrics': metrics
@@ -875,47 +816,257 @@ class AnalysisService:
             logger.error(traceback.format_exc())
             raise
 
-    def generate_pdf_report(self, analysis_id: str, user_id: str) -> BytesIO:
+    def _prepare_report_data(self, analysis_id: str, user_id: str) -> Dict:
+        """
+        Load an analysis and attach everything the PDF report needs.
+        
+        Args:
+            analysis_id: Analysis ID
+            user_id: User ID
+            
+        Returns:
+            Analysis data ready for generate_report
+            
+        Raises:
+            ValueError: If analysis not found
+        """
+        analysis_data = self.get_analysis(analysis_id, user_id)
+        if not analysis_data:
+            raise ValueError("Analysis not found")
+
+        # Add current date to the analysis data
+        analysis_data['generated_date'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        
+        # Use standardized metrics directly
+        from utils.standardized_metrics import extract_calculated_metrics, get_metrics
+
+        # Check if metrics are already registered
+        registered_metrics = get_metrics(analysis_id)
+        
+        if not registered_metrics:
+            # Extract and register metrics if not already registered
+            metrics = extract_calculated_metrics(analysis_data)
+            from utils.standardized_metrics import register_metrics
+            register_metrics(analysis_id, metrics)
+        
+        return analysis_data
+
+    def _report_simulation(self, analysis_data: Dict, simulation_options: Optional[Dict],
+                           inline: bool = False) -> Optional[Dict]:
+        """Validate report simulation options up front; the simulation itself runs at render time."""
+        if simulation_options is None:
+            return None
+        simulation = report_simulation_options(analysis_data, simulation_options)
+        return check_inline_simulation(simulation) if inline else simulation
+
+    def get_pdf_report(self, analysis_id: str, user_id: str, simulation_options: Optional[Dict] = None,
+                       known_etags=()) -> Tuple[str, Optional[str]]:
+        """
+        Resolve a PDF report to its cache key and cached file.
+        
+        The cache key identifies the report content, so it doubles as the
+        ETag. It is built from the simulation options, so the simulation
+        and rendering only run on a cache miss.
+        
+        Args:
+            analysis_id: Analysis ID
+            user_id: User ID
+            simulation_options: When given, run a projection simulation with
+                these options and include its risk bands in the report
+            known_etags: ETags the client already holds; a matching report
+                is not rendered
+            
+        Returns:
+            Tuple of (cache key, path to the cached PDF), with the path None
+            when the key is in known_etags
+            
+        Raises:
+            ValueError: If analysis not found or the simulation options are
+                invalid or too large to run inline
+        """
+        analysis_data = self._prepare_report_data(analysis_id, user_id)
+        simulation = self._report_simulation(analysis_data, simulation_options, inline=True)
+        cache_key = report_cache_key(analysis_data, simulation)
+        if cache_key in known_etags:
+            return cache_key, None
+        
+        # Serve from the report cache, simulating (serially) and generating only on a miss
+        path = get_report_cache().get_or_create(
+            cache_key,
+            lambda: generate_report(
+                with_projection_simulation(analysis_data, simulation, max_workers=1), report_type='analysis'
+            ).getvalue()
+        )
+        return cache_key, path
+
+    def generate_pdf_report(self, analysis_id: str, user_id: str,
+                            simulation_options: Optional[Dict] = None) -> BytesIO:
         """
         Generate a PDF report for an analysis with consistent metrics.
         
         Args:
             analysis_id: Analysis ID
             user_id: User ID
+            simulation_options: When given, run a projection simulation with
+                these options and include its risk bands in the report
             
         Returns:
             BytesIO buffer containing PDF data
             
+        Raises:
+            ValueError: If analysis not found or the simulation is too large
+                to run inline
+        """
+        try:
+            _, path = self.get_pdf_report(analysis_id, user_id, simulation_options)
+            with open(path, 'rb') as f:
+                return BytesIO(f.read())
+            
+        except Exception as e:
+            logger.error(f"Error generating PDF report: {str(e)}")
+            logger.error(traceback.format_exc())
+            raise
+
+    def submit_pdf_report_job(self, analysis_id: str, user_id: str,
+                              simulation_options: Optional[Dict] = None) -> Dict:
+        """
+        Queue a PDF report for rendering in the background worker pool.
+        
+        Reports already in the report cache complete immediately.
+        
+        Args:
+            analysis_id: Analysis ID
+            user_id: User ID
+            simulation_options: When given, include projection simulation risk bands
+            
+        Returns:
+            Report job record
+            
         Raises:
             ValueError: If analysis not found
         """
         try:
-            analysis_data = self.get_analysis(analysis_id, user_id)
-            if not analysis_data:
-                raise ValueError("Analysis not found")
+            analysis_data = self._prepare_report_data(analysis_id, user_id)
+            simulation = self._report_simulation(analysis_data, simulation_options)
+            cache = get_report_cache()
+            cache_key = report_cache_key(analysis_data, simulation)
+            
+            return get_report_jobs().submit(
+                user_id,
+                'analysis',
+                {
+                    'analysis_data': analysis_data,
+                    'simulation': simulation,
+                    'cache_key': cache_key,
+                    'cache_dir': cache.cache_dir,
+                    'cache_max_bytes': cache.max_bytes
+                },
+                download_name=f'analysis_{analysis_id}.pdf',
+                output_path=cache.get(cache_key)
+            )
+            
+        except Exception as e:
+            logger.error(f"Error submitting PDF report job: {str(e)}")
+            logger.error(traceback.format_exc())
+            raise
 
-            # Add current date to the analysis data
-            analysis_data['generated_date'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    def _prepare_portfolio_data(self, user_id: str, analysis_ids: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Load and prepare the analyses for a portfolio report.
+        
+        Args:
+            user_id: User ID
+            analysis_ids: Analyses to include, in order. All of the user's
+                analyses (most recently updated first) when empty.
             
-            # Use standardized metrics directly
-            from utils.standardized_metrics import extract_calculated_metrics, get_metrics
+        Returns:
+            List of analysis data ready for generate_report
+            
+        Raises:
+            ValueError: If an analysis is not found or there are too many
+        """
+        if not analysis_ids:
+            suffix = f"_{user_id}.json"
+            analysis_ids = [
+                filename[:-len(suffix)]
+                for filename in os.listdir(current_app.config['ANALYSES_DIR'])
+                if filename.endswith(suffix)
+            ]
+            if not analysis_ids:
+                raise ValueError("No analyses found")
+            load_all = True
+        else:
+            load_all = False
 
-            # Check if metrics are already registered
-            registered_metrics = get_metrics(analysis_id)
+        if len(analysis_ids) > MAX_PORTFOLIO_ANALYSES:
+            raise ValueError(f"Portfolio reports are limited to {MAX_PORTFOLIO_ANALYSES} analyses")
+
+        analyses = [self._prepare_report_data(analysis_id, user_id) for analysis_id in analysis_ids]
+        if load_all:
+            analyses.sort(key=lambda x: x.get('updated_at', ''), reverse=True)
+        return analyses
+
+    def generate_portfolio_report(self, user_id: str, analysis_ids: Optional[List[str]] = None,
+                                  max_workers: Optional[int] = None) -> str:
+        """
+        Generate one PDF covering many analyses, with a comparison summary first.
+        
+        Args:
+            user_id: User ID
+            analysis_ids: Analyses to include; all of the user's analyses when empty
+            max_workers: Worker processes for rendering (defaults to the CPU count)
             
-            if not registered_metrics:
-                # Extract and register metrics if not already registered
-                metrics = extract_calculated_metrics(analysis_data)
-                from utils.standardized_metrics import register_metrics
-                register_metrics(analysis_id, metrics)
+        Returns:
+            Path to the PDF in the report cache
             
-            # Generate report using report generator
-            buffer = generate_report(analysis_data, report_type='analysis')
+        Raises:
+            ValueError: If an analysis is not found or there are too many
+        """
+        try:
+            analyses = self._prepare_portfolio_data(user_id, analysis_ids)
+            cache = get_report_cache()
+            return generate_portfolio_report(
+                analyses, cache.cache_dir, cache.max_bytes, max_workers=max_workers
+            )
             
-            return buffer
+        except Exception as e:
+            logger.error(f"Error generating portfolio report: {str(e)}")
+            logger.error(traceback.format_exc())
+            raise
+
+    def submit_portfolio_report_job(self, user_id: str, analysis_ids: Optional[List[str]] = None) -> Dict:
+        """
+        Queue a portfolio report for rendering in the background worker pool.
+        
+        Args:
+            user_id: User ID
+            analysis_ids: Analyses to include; all of the user's analyses when empty
+            
+        Returns:
+            Report job record
+            
+        Raises:
+            ValueError: If an analysis is not found or there are too many
+        """
+        try:
+            analyses = self._prepare_portfolio_data(user_id, analysis_ids)
+            cache = get_report_cache()
+            portfolio_key = portfolio_cache_key([report_cache_key(analysis) for analysis in analyses])
+            
+            return get_report_jobs().submit(
+                user_id,
+                'portfolio',
+                {
+                    'analyses': analyses,
+                    'cache_dir': cache.cache_dir,
+                    'cache_max_bytes': cache.max_bytes
+                },
+                download_name=f"portfolio_report_{datetime.now().strftime('%Y%m%d_%H%M')}.pdf",
+                output_path=cache.get(portfolio_key)
+            )
             
         except Exception as e:
-            logger.error(f"Error generating PDF report: {str(e)}")
+            logger.error(f"Error submitting portfolio report job: {str(e)}")
             logger.error(traceback.format_exc())
             raise
 
@@ -929,7 +1080,7 @@ class AnalysisService:
             is_mobile: Whether request is from mobile client
             
         Raises:
-            ValueError: If validation fails
+            ValueError: If the data cannot be saved
             IOError: If file operations fail
         """
         try:
@@ -945,6 +1096,8 @@ class AnalysisService:
             
             # Create a copy of the data for storage
             storage_data = analysis_data.copy()
+            if 'calculated_metrics' in storage_data:
+                storage_data['metrics_version'] = METRICS_VERSION
             
             # Add metadata
             storage_data.update({
@@ -953,9 +1106,6 @@ class AnalysisService:
                 'storage_version': '2.0'  # Version tracking for schema changes
             })
             
-            # Validate data before storage
-            self._validate_storage_data(storage_data)
-            
             # Implement retries for file operations
             self._save_with_retries(filepath, storage_data)
             
@@ -1013,57 +1163,6 @@ class AnalysisService:
                     except OSError:
                         pass
 
-    def _validate_storage_data(self, data: Dict) -> None:
-        """
-        Validate data before storage.
-        
-        Args:
-            data: Data to validate
-            
-        Raises:
-            ValueError: If validation fails
-        """
-        required_fields = ['id', 'user_id', 'analysis_type', 'analysis_name']
-        
-        # Check required fields
-        missing_fields = [field for field in required_fields if not data.get(field)]
-        if missing_fields:
-            raise ValueError(f"Missing required fields for storage: {', '.join(missing_fields)}")
-        
-        # Validate ID format
-        try:
-            uuid.UUID(str(data['id']))
-        except ValueError:
-            raise ValueError("Invalid analysis ID format")
-        
-        # Validate numeric fields
-        numeric_fields = {
-            'monthly_rent': int,
-            'property_taxes': int,
-            'insurance': int,
-            'management_fee_percentage': float,
-            'capex_percentage': float,
-            'vacancy_percentage': float,
-            'repairs_percentage': float
-        }
-        
-        for field, field_type in numeric_fields.items():
-            if field in data:
-                value = data[field]
-                if value is not None:
-                    if not isinstance(value, (int, float)):
-                        raise ValueError(f"Invalid type for {field}: expected {field_type.__name__}")
-                    if field_type == float and field.endswith('_percentage'):
-                        if not 0 <= value <= 100:
-                            raise ValueError(f"Invalid percentage value for {field}: {value}")
-                            
-        # Validate dates
-        if 'balloon_due_date' in data and data['balloon_due_date']:
-            try:
-                datetime.strptime(data['balloon_due_date'], "%Y-%m-%d")
-            except ValueError:
-                raise ValueError("Invalid balloon_due_date format")
-            
     def _compress_analysis_data(self, data: Dict) -> Dict:
         """
         Compress analysis data for mobile storage.
@@ -0,0 +1,535 @@
+# analysis_simulation.py
+"""Monte Carlo projections for property investment analyses."""
+
+import hashlib
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from math import ceil
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from services.analysis_calculations import create_analysis
+from services.analysis_sensitivity import loan_payment_grid
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIMULATION_PATHS = 10000
+MAX_SIMULATION_PATHS = 200000
+DEFAULT_SIMULATION_YEARS = 10
+MAX_SIMULATION_YEARS = 30
+SIMULATION_CHUNK_SIZE = 25000
+PARALLEL_SIMULATION_THRESHOLD = 50000
+# Larger runs use the process pool and belong in a report job, not a web request
+MAX_INLINE_SIMULATION_PATHS = PARALLEL_SIMULATION_THRESHOLD
+SIMULATION_PERCENTILES = (5, 25, 50, 75, 95)
+
+SIMULATION_VARIABLES = ('rent_growth', 'expense_growth', 'appreciation', 'vacancy', 'refinance_rate')
+
+# Required parameters for each supported distribution type
+DISTRIBUTION_PARAMETERS = {
+    'fixed': ('value',),
+    'normal': ('mean', 'std'),
+    'uniform': ('low', 'high'),
+    'triangular': ('low', 'mode', 'high'),
+}
+
+SIMULATION_ANALYSIS_TYPES = ('LTR', 'PadSplit LTR', 'BRRRR', 'PadSplit BRRRR')
+
+
+def _number(data: Dict, field: str) -> float:
+    value = data.get(field)
+    try:
+        return float(value) if value not in (None, '') else 0.0
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def build_simulation_model(analysis_data: Dict) -> Dict:
+    """
+    Reduce an analysis to the base values the simulation projects forward.
+
+    Args:
+        analysis_data: Stored analysis data
+
+    Returns:
+        Dictionary of plain floats and loan descriptions (picklable)
+
+    Raises:
+        ValueError: If the analysis type is not supported
+    """
+    analysis_type = analysis_data.get('analysis_type', '')
+    if analysis_type not in SIMULATION_ANALYSIS_TYPES:
+        raise ValueError(f"Projection simulation is not available for {analysis_type} analyses")
+
+    analysis = create_analysis(dict(analysis_data))
+    is_brrrr = 'BRRRR' in analysis_type
+
+    monthly_rent = _number(analysis_data, 'monthly_rent')
+    vacancy = _number(analysis_data, 'vacancy_percentage') / 100
+    rent_expense_pct = sum(
+        _number(analysis_data, field) for field in (
+            'management_fee_percentage', 'capex_percentage', 'repairs_percentage'
+        )
+    ) / 100
+    if 'PadSplit' in analysis_type:
+        rent_expense_pct += _number(analysis_data, 'padsplit_platform_percentage') / 100
+
+    # Everything in operating expenses that does not scale with rent
+    operating_expenses = float(analysis.get_metric('_calculate_operating_expenses').dollars)
+    fixed_expenses = operating_expenses - monthly_rent * (rent_expense_pct + vacancy)
+
+    loans = []
+    refinance = None
+    if is_brrrr:
+        # The refinance loan is the permanent financing; its rate is simulated
+        refinance = {
+            'amount': _number(analysis_data, 'refinance_loan_amount'),
+            'rate': _number(analysis_data, 'refinance_loan_interest_rate'),
+            'term': int(_number(analysis_data, 'refinance_loan_term')),
+            'start_month': 0,
+        }
+    else:
+        end_month = None
+        if analysis_data.get('has_balloon_payment'):
+            end_month = int(ceil(analysis._calculate_balloon_years() * 12))
+            refinance = {
+                'amount': _number(analysis_data, 'balloon_refinance_loan_amount'),
+                'rate': _number(analysis_data, 'balloon_refinance_loan_interest_rate'),
+                'term': int(_number(analysis_data, 'balloon_refinance_loan_term')),
+                'start_month': end_month,
+            }
+        for prefix in ('loan1', 'loan2', 'loan3'):
+            amount = _number(analysis_data, f'{prefix}_loan_amount')
+            if amount > 0:
+                loans.append({
+                    'amount': amount,
+                    'rate': _number(analysis_data, f'{prefix}_loan_interest_rate'),
+                    'term': int(_number(analysis_data, f'{prefix}_loan_term')),
+                    'interest_only': bool(analysis_data.get(f'{prefix}_interest_only')),
+                    'end_month': end_month,
+                })
+
+    cash_invested = float(analysis.get_metric('total_cash_invested').dollars)
+    property_value = _number(analysis_data, 'after_repair_value') if is_brrrr else _number(analysis_data, 'purchase_price')
+
+    return {
+        'monthly_rent': monthly_rent,
+        'fixed_expenses': fixed_expenses,
+        'rent_expense_pct': rent_expense_pct,
+        'vacancy': vacancy,
+        'property_value': property_value,
+        'cash_invested': cash_invested,
+        'loans': loans,
+        'refinance': refinance,
+    }
+
+
+def default_distributions(model: Dict) -> Dict[str, Dict]:
+    """
+    Build default distributions centred on the analysis' own assumptions.
+
+    Args:
+        model: Simulation model from build_simulation_model
+
+    Returns:
+        Distribution spec for each simulation variable
+    """
+    vacancy = model['vacancy']
+    refinance_rate = (model['refinance'] or {}).get('rate', 0.0) / 100
+    return {
+        'rent_growth': {'type': 'normal', 'mean': 0.025, 'std': 0.015},
+        'expense_growth': {'type': 'normal', 'mean': 0.025, 'std': 0.01},
+        'appreciation': {'type': 'normal', 'mean': 0.03, 'std': 0.04},
+        'vacancy': {'type': 'triangular', 'low': max(0.0, vacancy - 0.03),
+                    'mode': vacancy, 'high': min(1.0, vacancy + 0.05)},
+        'refinance_rate': {'type': 'normal', 'mean': refinance_rate, 'std': 0.0075},
+    }
+
+
+def _validate_distribution(name: str, spec: Dict) -> Dict:
+    """
+    Validate a distribution spec and convert its parameters to floats.
+
+    Raises:
+        ValueError: If the spec is invalid
+    """
+    if not isinstance(spec, dict):
+        raise ValueError(f"Distribution for {name} must be an object")
+    dist_type = spec.get('type')
+    if dist_type not in DISTRIBUTION_PARAMETERS:
+        raise ValueError(f"Unsupported distribution type for {name}: {dist_type}")
+
+    validated = {'type': dist_type}
+    for param in DISTRIBUTION_PARAMETERS[dist_type]:
+        try:
+            validated[param] = float(spec[param])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f"Distribution for {name} requires numeric '{param}'")
+
+    if dist_type == 'normal' and validated['std'] < 0:
+        raise ValueError(f"Standard deviation for {name} must not be negative")
+    if dist_type == 'uniform' and validated['high'] < validated['low']:
+        raise ValueError(f"Invalid uniform range for {name}")
+    if dist_type == 'triangular' and not validated['low'] <= validated['mode'] <= validated['high']:
+        raise ValueError(f"Triangular distribution for {name} requires low <= mode <= high")
+    return validated
+
+
+def _draw(rng: np.random.Generator, spec: Dict, size) -> np.ndarray:
+    dist_type = spec['type']
+    if dist_type == 'fixed':
+        return np.full(size, spec['value'])
+    if dist_type == 'normal':
+        return rng.normal(spec['mean'], spec['std'], size)
+    if dist_type == 'uniform':
+        return rng.uniform(spec['low'], spec['high'], size)
+    if spec['low'] == spec['high']:
+        return np.full(size, spec['low'])
+    return rng.triangular(spec['low'], spec['mode'], spec['high'], size)
+
+
+def _loan_balance(amount: float, annual_rate_pct, term: int, months_elapsed,
+                  interest_only: bool = False) -> np.ndarray:
+    """Vectorized remaining balance after a number of monthly payments."""
+    rates = np.asarray(annual_rate_pct, dtype=float)
+    months = np.asarray(months_elapsed, dtype=float)
+    if amount <= 0 or term <= 0:
+        return np.zeros(np.broadcast(rates, months).shape)
+
+    payment = loan_payment_grid(amount, rates, term, interest_only)
+    monthly_rate = rates / 1200.0
+    if interest_only:
+        principal = np.full(np.broadcast(rates, months).shape, amount)
+        balance = np.where(rates == 0, amount - payment * months, principal)
+    else:
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            growth = np.power(1.0 + monthly_rate, months)
+            amortized = amount * growth - payment * (growth - 1.0) / monthly_rate
+        balance = np.where(rates == 0, amount - payment * months, amortized)
+    return np.where(months >= term, 0.0, np.maximum(balance, 0.0))
+
+
+def calculate_irr(cash_flows: np.ndarray, iterations: int = 100) -> np.ndarray:
+    """
+    Vectorized IRR by bisection, one rate per row of annual cash flows.
+
+    Args:
+        cash_flows: Array of shape (paths, periods), period 0 first
+        iterations: Bisection iterations
+
+    Returns:
+        IRR per path as a decimal, NaN where no rate in (-99%, 1000%) solves it
+    """
+    periods = np.arange(cash_flows.shape[1])
+
+    def npv(rate):
+        return (cash_flows / np.power(1.0 + rate[:, None], periods)).sum(axis=1)
+
+    low = np.full(cash_flows.shape[0], -0.99)
+    high = np.full(cash_flows.shape[0], 10.0)
+    npv_low = npv(low)
+    solvable = np.sign(npv_low) != np.sign(npv(high))
+
+    for _ in range(iterations):
+        mid = (low + high) / 2
+        npv_mid = npv(mid)
+        same_sign = np.sign(npv_mid) == np.sign(npv_low)
+        low = np.where(same_sign, mid, low)
+        npv_low = np.where(same_sign, npv_mid, npv_low)
+        high = np.where(same_sign, high, mid)
+
+    return np.where(solvable, (low + high) / 2, np.nan)
+
+
+def _simulate_chunk(model: Dict, distributions: Dict, paths: int, years: int,
+                    seed: np.random.SeedSequence) -> Dict[str, np.ndarray]:
+    """
+    Simulate one chunk of paths. Top-level so it can run in a worker process.
+
+    Returns:
+        Dictionary with annual_cash_flow and equity of shape (paths, years)
+        and irr of shape (paths,)
+    """
+    rng = np.random.default_rng(seed)
+    shape = (paths, years)
+
+    rent_growth = _draw(rng, distributions['rent_growth'], shape)
+    expense_growth = _draw(rng, distributions['expense_growth'], shape)
+    appreciation = _draw(rng, distributions['appreciation'], shape)
+    vacancy = np.clip(_draw(rng, distributions['vacancy'], shape), 0.0, 1.0)
+    refinance_rate = np.clip(_draw(rng, distributions['refinance_rate'], (paths, 1)), 0.0, 0.3) * 100
+
+    # Growth compounds from today, matching the deterministic projections table
+    rent = model['monthly_rent'] * np.cumprod(1 + rent_growth, axis=1)
+    fixed_expenses = model['fixed_expenses'] * np.cumprod(1 + expense_growth, axis=1)
+    monthly_noi = rent - fixed_expenses - rent * (model['rent_expense_pct'] + vacancy)
+
+    year_start = 12 * np.arange(years)
+    year_end = year_start + 12
+    monthly_debt = np.zeros(shape)
+    balance = np.zeros(shape)
+
+    for loan in model['loans']:
+        payment = float(loan_payment_grid(loan['amount'], loan['rate'], loan['term'], loan['interest_only']))
+        active = year_start < loan['term']
+        if loan['end_month'] is not None:
+            active &= year_start < loan['end_month']
+        monthly_debt += np.where(active, payment, 0.0)
+        loan_balance = _loan_balance(loan['amount'], loan['rate'], loan['term'], year_end, loan['interest_only'])
+        if loan['end_month'] is not None:
+            loan_balance = np.where(year_end > loan['end_month'], 0.0, loan_balance)
+        balance += loan_balance
+
+    refinance = model['refinance']
+    if refinance and refinance['amount'] > 0 and refinance['term'] > 0:
+        start = refinance['start_month']
+        payment = loan_payment_grid(refinance['amount'], refinance_rate, refinance['term'])
+        active = (year_start >= start) & (year_start - start < refinance['term'])
+        monthly_debt += np.where(active, payment, 0.0)
+        elapsed = np.maximum(year_end - start, 0)
+        refinance_balance = _loan_balance(refinance['amount'], refinance_rate, refinance['term'], elapsed)
+        balance += np.where(year_end > start, refinance_balance, 0.0)
+
+    annual_cash_flow = (monthly_noi - monthly_debt) * 12
+    property_value = model['property_value'] * np.cumprod(1 + appreciation, axis=1)
+    equity = property_value - balance
+
+    # Buy now, hold for the horizon, sell at the projected value less debt
+    if model['cash_invested'] > 0:
+        flows = np.hstack([np.full((paths, 1), -model['cash_invested']), annual_cash_flow])
+        flows[:, -1] += equity[:, -1]
+        irr = calculate_irr(flows)
+    else:
+        irr = np.full(paths, np.nan)
+
+    return {'annual_cash_flow': annual_cash_flow, 'equity': equity, 'irr': irr}
+
+
+def _percentile_bands(values: np.ndarray) -> Dict[str, List]:
+    """Percentile bands across paths (axis 0), rounded for JSON."""
+    bands = {}
+    for percentile in SIMULATION_PERCENTILES:
+        band = np.nanpercentile(values, percentile, axis=0) if np.isfinite(values).any() else np.full(values.shape[1:], np.nan)
+        band = np.round(np.asarray(band, dtype=float), 2)
+        bands[f'p{percentile}'] = [None if not np.isfinite(v) else float(v) for v in np.atleast_1d(band)]
+    return bands
+
+
+def _run_chunks(model: Dict, distributions: Dict, chunk_sizes: List[int], years: int,
+                seeds: List[np.random.SeedSequence], max_workers: Optional[int]) -> List[Dict]:
+    """Run simulation chunks, in a process pool when the run is large enough."""
+    total_paths = sum(chunk_sizes)
+    workers = max_workers or os.cpu_count() or 1
+    if total_paths >= PARALLEL_SIMULATION_THRESHOLD and workers > 1 and len(chunk_sizes) > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=min(workers, len(chunk_sizes))) as executor:
+                futures = [
+                    executor.submit(_simulate_chunk, model, distributions, size, years, seed)
+                    for size, seed in zip(chunk_sizes, seeds)
+                ]
+                return [future.result() for future in futures]
+        except (OSError, RuntimeError) as e:
+            logger.warning(f"Process pool unavailable, running simulation serially: {str(e)}")
+
+    return [
+        _simulate_chunk(model, distributions, size, years, seed)
+        for size, seed in zip(chunk_sizes, seeds)
+    ]
+
+
+def _resolve_simulation(analysis_data: Dict, paths: int, years: int,
+                        distributions: Optional[Dict]) -> Tuple[Dict, Dict]:
+    """Validate simulation options and resolve every variable's distribution."""
+    if not 1 <= paths <= MAX_SIMULATION_PATHS:
+        raise ValueError(f"Paths must be between 1 and {MAX_SIMULATION_PATHS}")
+    if not 1 <= years <= MAX_SIMULATION_YEARS:
+        raise ValueError(f"Years must be between 1 and {MAX_SIMULATION_YEARS}")
+
+    model = build_simulation_model(analysis_data)
+
+    resolved = default_distributions(model)
+    for name, spec in (distributions or {}).items():
+        if name not in SIMULATION_VARIABLES:
+            raise ValueError(f"Unknown simulation variable: {name}")
+        resolved[name] = spec
+    resolved = {name: _validate_distribution(name, spec) for name, spec in resolved.items()}
+    return model, resolved
+
+
+def run_projection_simulation(analysis_data: Dict, paths: int = DEFAULT_SIMULATION_PATHS,
+                              years: int = DEFAULT_SIMULATION_YEARS,
+                              distributions: Optional[Dict] = None,
+                              seed: Optional[int] = None,
+                              max_workers: Optional[int] = None) -> Dict:
+    """
+    Run a Monte Carlo projection of cash flow, equity and IRR.
+
+    Rent growth, expense growth, appreciation and vacancy are drawn per path
+    and year; the refinance rate (BRRRR refinance or balloon refinance) is
+    drawn once per path. Paths are simulated in chunks with independent seeds
+    so results for a given seed do not depend on how many workers ran them.
+
+    Args:
+        analysis_data: Stored analysis data
+        paths: Number of simulated paths
+        years: Projection horizon in years
+        distributions: Overrides for the default distribution of any variable
+        seed: Seed for reproducible results
+        max_workers: Process pool size for large runs (defaults to CPU count)
+
+    Returns:
+        Dictionary with percentile bands per year for annual cash flow and
+        equity, IRR percentiles and the distributions used
+
+    Raises:
+        ValueError: If the options or analysis type are invalid
+    """
+    model, resolved = _resolve_simulation(analysis_data, paths, years, distributions)
+
+    chunk_sizes = [SIMULATION_CHUNK_SIZE] * (paths // SIMULATION_CHUNK_SIZE)
+    if paths % SIMULATION_CHUNK_SIZE:
+        chunk_sizes.append(paths % SIMULATION_CHUNK_SIZE)
+    seeds = np.random.SeedSequence(seed).spawn(len(chunk_sizes))
+
+    chunks = _run_chunks(model, resolved, chunk_sizes, years, seeds, max_workers)
+    annual_cash_flow = np.vstack([chunk['annual_cash_flow'] for chunk in chunks])
+    equity = np.vstack([chunk['equity'] for chunk in chunks])
+    irr = np.concatenate([chunk['irr'] for chunk in chunks]) * 100
+
+    logger.debug(f"Simulated {paths} paths over {years} years for analysis {analysis_data.get('id')}")
+    return {
+        'paths': paths,
+        'years': list(range(1, years + 1)),
+        'seed': seed,
+        'percentiles': list(SIMULATION_PERCENTILES),
+        'distributions': resolved,
+        'annual_cash_flow': _percentile_bands(annual_cash_flow),
+        'equity': _percentile_bands(equity),
+        'irr': {key: values[0] for key, values in _percentile_bands(irr[:, None]).items()},
+        'probability_negative_cash_flow': np.round((annual_cash_flow < 0).mean(axis=0), 4).tolist(),
+    }
+
+
+def default_simulation_seed(analysis_data: Dict) -> int:
+    """
+    Derive a stable seed for an analysis version.
+
+    Reports for the same saved analysis then show the same risk bands, so
+    they can be served from the report cache, while any edit (which moves
+    updated_at) draws new paths.
+
+    Args:
+        analysis_data: Stored analysis data
+
+    Returns:
+        32-bit seed
+    """
+    version = f"{analysis_data.get('id')}:{analysis_data.get('updated_at')}"
+    return int(hashlib.sha256(version.encode()).hexdigest()[:8], 16)
+
+
+def parse_simulation_options(options: Optional[Dict], analysis_data: Optional[Dict] = None) -> Dict:
+    """
+    Convert request options into run_projection_simulation keyword arguments.
+
+    Args:
+        options: Raw options (paths, years, seed, distributions)
+        analysis_data: When given and no seed is requested, the seed defaults
+            to default_simulation_seed for this analysis
+
+    Returns:
+        Keyword arguments for run_projection_simulation
+
+    Raises:
+        ValueError: If an option has the wrong type
+    """
+    options = options or {}
+    try:
+        parsed = {
+            'paths': int(options.get('paths', DEFAULT_SIMULATION_PATHS)),
+            'years': int(options.get('years', DEFAULT_SIMULATION_YEARS)),
+        }
+        if options.get('seed') is not None:
+            parsed['seed'] = int(options['seed'])
+        elif analysis_data is not None:
+            parsed['seed'] = default_simulation_seed(analysis_data)
+    except (TypeError, ValueError):
+        raise ValueError("Simulation paths, years and seed must be integers")
+
+    distributions = options.get('distributions')
+    if distributions is not None:
+        if not isinstance(distributions, dict):
+            raise ValueError("Simulation distributions must be an object")
+        parsed['distributions'] = distributions
+    return parsed
+
+
+def report_simulation_options(analysis_data: Dict, options: Optional[Dict]) -> Dict:
+    """
+    Parse and validate report simulation options without running the simulation.
+
+    The result fully determines the simulation output (the seed is defaulted
+    and every distribution resolved), so it can key the report cache before
+    any paths are drawn.
+
+    Args:
+        analysis_data: Stored analysis data
+        options: Raw options (paths, years, seed, distributions)
+
+    Returns:
+        Keyword arguments for run_projection_simulation
+
+    Raises:
+        ValueError: If the options or analysis type are invalid
+    """
+    parsed = parse_simulation_options(options, analysis_data)
+    _, parsed['distributions'] = _resolve_simulation(
+        analysis_data, parsed['paths'], parsed['years'], parsed.get('distributions')
+    )
+    return parsed
+
+
+def check_inline_simulation(options: Dict) -> Dict:
+    """
+    Reject simulations too large to run inside a web request.
+
+    Inline runs are simulated serially; anything above
+    MAX_INLINE_SIMULATION_PATHS has to go through the report job queue.
+
+    Args:
+        options: Parsed options from parse_simulation_options or report_simulation_options
+
+    Returns:
+        The options, unchanged
+
+    Raises:
+        ValueError: If the run has too many paths to simulate inline
+    """
+    if options['paths'] > MAX_INLINE_SIMULATION_PATHS:
+        raise ValueError(
+            f"Simulations of more than {MAX_INLINE_SIMULATION_PATHS} paths must be run as a report job"
+        )
+    return options
+
+
+def with_projection_simulation(analysis_data: Dict, simulation: Optional[Dict],
+                               max_workers: Optional[int] = None) -> Dict:
+    """
+    Attach projection simulation results to analysis data for a report.
+
+    Args:
+        analysis_data: Analysis data as passed to generate_report
+        simulation: Options from report_simulation_options, or None for no simulation
+        max_workers: Process pool size for large runs (1 runs serially)
+
+    Returns:
+        Analysis data, with projection_simulation set when options are given
+    """
+    if simulation is None:
+        return analysis_data
+    return {
+        **analysis_data,
+        'projection_simulation': run_projection_simulation(analysis_data, max_workers=max_workers, **simulation)
+    }
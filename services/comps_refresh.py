@@ -0,0 +1,383 @@
+"""Background refresh of stale comps in saved analyses."""
+
+import json
+import logging
+import os
+import threading
+import time
+import traceback
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to the in-process lock only
+    fcntl = None
+
+from utils.comps_handler import RentcastAPIError
+from utils.http_client import CircuitOpenError
+from utils.metrics import register_status_collector
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_COMPS_REFRESH_AGE = 30 * 24 * 60 * 60  # Refresh comps older than a month
+DEFAULT_COMPS_REFRESH_INTERVAL = 15 * 60
+DEFAULT_COMPS_REFRESH_BATCH_SIZE = 10
+DEFAULT_COMPS_REFRESH_MONTHLY_CALLS = 300  # Share of the RentCast quota background refreshes may spend
+CALLS_PER_REFRESH = 2  # Property and rental comps
+FIRST_RUN_DELAY = 60  # Seconds after startup before the first batch
+QUOTA_MONTH_SECONDS = 30 * 24 * 60 * 60
+RATE_LIMITED_STATUS = 429
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at a fixed rate.
+
+    Uses wall-clock time so a bucket restored from disk after a restart
+    accounts for the time the process was down, without exceeding capacity.
+    """
+
+    def __init__(self, rate: float, capacity: float, tokens: Optional[float] = None,
+                 updated: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity if tokens is None else min(tokens, capacity)
+        self.updated = time.time() if updated is None else updated
+
+    def _refill(self) -> None:
+        now = time.time()
+        self.tokens = min(self.capacity, self.tokens + max(0.0, now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self, tokens: float = 1) -> bool:
+        """Take tokens if available; return whether they were taken."""
+        self._refill()
+        if self.tokens < tokens:
+            return False
+        self.tokens -= tokens
+        return True
+
+    def drain(self) -> None:
+        """Empty the bucket, e.g. after the upstream reported its quota exhausted."""
+        self._refill()
+        self.tokens = 0.0
+
+    def time_until(self, tokens: float = 1) -> float:
+        """Seconds until the given number of tokens is available."""
+        self._refill()
+        if self.tokens >= tokens:
+            return 0.0
+        return (tokens - self.tokens) / self.rate if self.rate > 0 else float('inf')
+
+    def to_dict(self) -> Dict:
+        return {'tokens': self.tokens, 'updated': self.updated}
+
+
+def _is_rate_limited(error: BaseException) -> bool:
+    """Check whether an error (or the error it wraps) means RentCast is refusing calls."""
+    while error is not None:
+        if isinstance(error, CircuitOpenError):
+            return True
+        response = getattr(error, 'response', None)
+        if response is not None and response.status_code == RATE_LIMITED_STATUS:
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+def _parse_last_run(value) -> Optional[float]:
+    """Parse comps_data.last_run, stored as naive UTC ISO time, into a timestamp."""
+    try:
+        last_run = datetime.fromisoformat(str(value))
+    except (TypeError, ValueError):
+        return None
+    if last_run.tzinfo is None:
+        last_run = last_run.replace(tzinfo=timezone.utc)
+    return last_run.timestamp()
+
+
+class CompsRefreshScheduler:
+    """
+    Refreshes comps of analyses whose comps_data.last_run is older than max_age.
+
+    Stale analyses are queued oldest first and refreshed in batches. Every
+    refresh spends CALLS_PER_REFRESH tokens from a bucket sized to the
+    RentCast calls background refreshes may make per month. The queue,
+    bucket and failure backoff are persisted to state_file, so a restart
+    resumes where it stopped. Only one process runs a batch at a time.
+    """
+
+    def __init__(self, app, state_file: str, max_age: int = DEFAULT_COMPS_REFRESH_AGE,
+                 interval: int = DEFAULT_COMPS_REFRESH_INTERVAL,
+                 batch_size: int = DEFAULT_COMPS_REFRESH_BATCH_SIZE,
+                 monthly_calls: int = DEFAULT_COMPS_REFRESH_MONTHLY_CALLS):
+        self.app = app
+        self.state_file = state_file
+        self.max_age = max_age
+        self.interval = interval
+        self.batch_size = batch_size
+        self.rate = monthly_calls / QUOTA_MONTH_SECONDS
+        self.capacity = max(CALLS_PER_REFRESH, batch_size * CALLS_PER_REFRESH)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        os.makedirs(os.path.dirname(state_file) or '.', exist_ok=True)
+
+    @property
+    def analyses_dir(self) -> str:
+        return self.app.config['ANALYSES_DIR']
+
+    def _load_state(self) -> Dict:
+        state = {'queue': [], 'failures': {}, 'bucket': None, 'last_scan': 0, 'refreshed': 0, 'failed': 0}
+        try:
+            with open(self.state_file, 'r') as f:
+                state.update(json.load(f))
+        except FileNotFoundError:
+            pass
+        except (json.JSONDecodeError, OSError) as e:
+            logger.warning(f"Ignoring unreadable comps refresh state: {str(e)}")
+        return state
+
+    def _save_state(self, state: Dict) -> None:
+        temp_path = f"{self.state_file}.{uuid.uuid4().hex}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(state, f, indent=2)
+        os.replace(temp_path, self.state_file)
+
+    def _bucket(self, state: Dict) -> TokenBucket:
+        saved = state.get('bucket') or {}
+        return TokenBucket(self.rate, self.capacity, saved.get('tokens'), saved.get('updated'))
+
+    def _read_analysis(self, filename: str) -> Optional[Dict]:
+        try:
+            with open(os.path.join(self.analyses_dir, filename), 'r') as f:
+                analysis = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        return analysis if isinstance(analysis, dict) else None
+
+    def _is_stale(self, analysis: Optional[Dict], now: float) -> bool:
+        if not analysis or not analysis.get('address'):
+            return False
+        comps_data = analysis.get('comps_data')
+        if not isinstance(comps_data, dict):
+            return False  # Comps were never run for this analysis; leave that to the user
+        last_run = _parse_last_run(comps_data.get('last_run'))
+        return last_run is not None and now - last_run >= self.max_age
+
+    def find_stale(self, failures: Optional[Dict] = None) -> List[str]:
+        """
+        Find analyses with stale comps.
+
+        Args:
+            failures: Failure records; analyses still backing off are left out
+
+        Returns:
+            Analysis file names, oldest comps first
+        """
+        now = time.time()
+        failures = failures or {}
+        stale = []
+        if not os.path.isdir(self.analyses_dir):
+            return stale
+        for filename in os.listdir(self.analyses_dir):
+            if not filename.endswith('.json') or '_' not in filename:
+                continue
+            if failures.get(filename, {}).get('next_attempt', 0) > now:
+                continue
+            analysis = self._read_analysis(filename)
+            if self._is_stale(analysis, now):
+                stale.append((_parse_last_run(analysis['comps_data']['last_run']), filename))
+        return [filename for _, filename in sorted(stale)]
+
+    def refresh_analysis(self, filename: str) -> bool:
+        """
+        Refresh the comps of one analysis and save it.
+
+        Args:
+            filename: Analysis file name ({analysis_id}_{user_id}.json)
+
+        Returns:
+            True if refreshed, False if the analysis is gone or no longer stale
+
+        Raises:
+            RentcastAPIError: If property comps could not be fetched
+        """
+        from services.analysis_service import AnalysisService
+        from utils.comps_handler import fetch_property_comps, fetch_rental_comps, update_analysis_comps
+
+        analysis = self._read_analysis(filename)
+        if not self._is_stale(analysis, time.time()):
+            return False
+
+        address = analysis['address']
+        property_type = analysis.get('property_type', 'Single Family')
+        if analysis.get('analysis_type') == 'Multi-Family':
+            property_type = 'Multi-Family'
+        bedrooms = float(analysis.get('bedrooms') or 0)
+        bathrooms = float(analysis.get('bathrooms') or 0)
+        square_footage = float(analysis.get('square_footage') or 0)
+
+        comps_data = fetch_property_comps(
+            self.app.config, address, property_type, bedrooms, bathrooms, square_footage,
+            analysis_data=analysis, refresh=True
+        )
+        rental_comps = None
+        try:
+            rental_comps = fetch_rental_comps(
+                self.app.config, address, bedrooms, bathrooms, square_footage, property_type, refresh=True
+            )
+        except RentcastAPIError as e:
+            logger.warning(f"Rental comps refresh failed for {filename}: {str(e)}")
+
+        # Apply the results to the latest copy, in case the analysis was edited meanwhile
+        latest = self._read_analysis(filename)
+        if not latest:
+            return False
+        run_count = (latest.get('comps_data') or {}).get('run_count', 1)
+        updated = update_analysis_comps(latest, comps_data, rental_comps, run_count)
+        with self.app.app_context():
+            AnalysisService()._save_analysis(updated, filename[:-5].split('_', 1)[1])
+        return True
+
+    def run_batch(self) -> Dict:
+        """
+        Refresh up to batch_size stale analyses within the token budget.
+
+        Returns:
+            Summary with refreshed, failed and remaining counts, plus
+            'skipped' if another process holds the scheduler lock
+        """
+        summary = {'refreshed': 0, 'failed': 0, 'remaining': 0}
+        with self._lock, open(f"{self.state_file}.lock", 'a') as lock_file:
+            if fcntl:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    summary['skipped'] = 'locked'
+                    return summary
+
+            state = self._load_state()
+            bucket = self._bucket(state)
+            if not state['queue'] and time.time() - state['last_scan'] >= self.interval:
+                state['queue'] = self.find_stale(state['failures'])
+                state['last_scan'] = time.time()
+                if state['queue']:
+                    logger.info(f"Queued {len(state['queue'])} analyses for comps refresh")
+
+            attempted = 0
+            while state['queue'] and attempted < self.batch_size and not self._stop.is_set():
+                filename = state['queue'][0]
+                if not self._is_stale(self._read_analysis(filename), time.time()):
+                    # Refreshed by its owner or deleted since it was queued
+                    state['queue'].pop(0)
+                    continue
+                if not bucket.try_acquire(CALLS_PER_REFRESH):
+                    break
+                state['queue'].pop(0)
+                attempted += 1
+                try:
+                    if self.refresh_analysis(filename):
+                        summary['refreshed'] += 1
+                        state['refreshed'] += 1
+                    state['failures'].pop(filename, None)
+                except Exception as e:
+                    if _is_rate_limited(e):
+                        # RentCast is throttling us: retry this analysis once the bucket refills
+                        logger.warning(f"RentCast rate limit hit refreshing comps, pausing: {str(e)}")
+                        bucket.drain()
+                        state['queue'].insert(0, filename)
+                        break
+                    summary['failed'] += 1
+                    state['failed'] += 1
+                    failure = state['failures'].setdefault(filename, {'count': 0})
+                    failure['count'] += 1
+                    failure['error'] = str(e)
+                    failure['next_attempt'] = time.time() + min(self.max_age, self.interval * 2 ** failure['count'])
+                    logger.error(f"Error refreshing comps for {filename}: {str(e)}")
+                    logger.error(traceback.format_exc())
+                finally:
+                    state['bucket'] = bucket.to_dict()
+                    self._save_state(state)
+
+            state['bucket'] = bucket.to_dict()
+            self._save_state(state)
+            summary['remaining'] = len(state['queue'])
+            summary['next_tokens_in'] = bucket.time_until(CALLS_PER_REFRESH)
+        return summary
+
+    def status(self) -> Dict:
+        """
+        Get the persisted scheduler state.
+
+        Returns:
+            Dict with queued, refreshed, failed, backing_off and tokens
+        """
+        state = self._load_state()
+        return {
+            'queued': len(state['queue']),
+            'refreshed': state['refreshed'],
+            'failed': state['failed'],
+            'backing_off': len(state['failures']),
+            'tokens': self._bucket(state).tokens,
+            'last_scan': datetime.fromtimestamp(state['last_scan']).isoformat() if state['last_scan'] else None
+        }
+
+    def _run(self) -> None:
+        delay = FIRST_RUN_DELAY
+        while not self._stop.wait(delay):
+            try:
+                summary = self.run_batch()
+                if summary['refreshed'] or summary['failed']:
+                    logger.info(f"Comps refresh batch: {summary['refreshed']} refreshed, "
+                                f"{summary['failed']} failed, {summary['remaining']} queued")
+                delay = self.interval
+                if summary['remaining'] and not summary.get('skipped'):
+                    # More work queued: come back as soon as the budget allows
+                    delay = min(self.interval, max(1.0, summary['next_tokens_in']))
+            except Exception as e:
+                logger.error(f"Error in comps refresh scheduler: {str(e)}")
+                logger.error(traceback.format_exc())
+                delay = self.interval
+
+    def start(self) -> None:
+        """Start the scheduler thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='comps-refresh', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop the scheduler thread after the current analysis."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+
+def start_comps_refresh(app) -> CompsRefreshScheduler:
+    """
+    Create and start the comps refresh scheduler from the app configuration.
+
+    Args:
+        app: Flask application
+
+    Returns:
+        The running scheduler, also stored as app.comps_refresh
+    """
+    config = app.config
+    scheduler = CompsRefreshScheduler(
+        app,
+        config.get('COMPS_REFRESH_STATE_FILE') or os.path.join(config['DATA_DIR'], 'comps_refresh.json'),
+        max_age=int(config.get('COMPS_REFRESH_AGE', DEFAULT_COMPS_REFRESH_AGE)),
+        interval=int(config.get('COMPS_REFRESH_INTERVAL', DEFAULT_COMPS_REFRESH_INTERVAL)),
+        batch_size=int(config.get('COMPS_REFRESH_BATCH_SIZE', DEFAULT_COMPS_REFRESH_BATCH_SIZE)),
+        monthly_calls=int(config.get('COMPS_REFRESH_MONTHLY_CALLS', DEFAULT_COMPS_REFRESH_MONTHLY_CALLS))
+    )
+    scheduler.start()
+    app.comps_refresh = scheduler
+    register_status_collector('comps_refresh', 'Background comps refresh queue and token budget',
+                              scheduler.status)
+    return scheduler
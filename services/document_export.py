@@ -0,0 +1,227 @@
+# document_export.py
+"""Streaming ZIP export of transaction and reimbursement documents."""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import zipfile
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional
+from urllib.parse import unquote
+
+logger = logging.getLogger(__name__)
+
+# Formats that are already compressed; deflating them again only costs CPU
+STORED_EXTENSIONS = frozenset({
+    '.pdf', '.jpg', '.jpeg', '.png', '.gif', '.webp', '.heic',
+    '.zip', '.gz', '.docx', '.xlsx', '.pptx'
+})
+
+EXPORT_READ_WORKERS = 4
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+# Files up to this size are read whole by the worker threads; larger files
+# are streamed in chunks so memory stays bounded
+EXPORT_PRELOAD_MAX_BYTES = 8 * 1024 * 1024
+
+
+def document_filename(value: Optional[str]) -> Optional[str]:
+    """
+    Get the stored filename from a documentation field.
+
+    Args:
+        value: Plain filename or the artifact link shown in the transactions table
+
+    Returns:
+        Filename, or None if the field holds no document
+    """
+    if not value:
+        return None
+    if '<button' in value or '/artifact/' in value:
+        match = re.search(r'/artifact/([^"\'?]+)', value)
+        return unquote(match.group(1)) if match else None
+    return value
+
+
+def collect_documents(transactions: List[Dict]) -> List[str]:
+    """
+    List the distinct documents attached to transactions, in transaction order.
+
+    Args:
+        transactions: Flattened transactions
+
+    Returns:
+        Filenames of transaction and reimbursement documents
+    """
+    filenames = {}
+    for transaction in transactions:
+        for field in ('documentation_file', 'reimbursement_documentation'):
+            filename = document_filename(transaction.get(field))
+            if filename:
+                filenames.setdefault(filename, None)
+    return list(filenames)
+
+
+def _compression_for(filename: str) -> int:
+    if os.path.splitext(filename)[1].lower() in STORED_EXTENSIONS:
+        return zipfile.ZIP_STORED
+    return zipfile.ZIP_DEFLATED
+
+
+def _load_document(path: str) -> Optional[Dict]:
+    """Stat a document and, if it is small enough, read and hash it (runs in a worker thread)."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    document = {'path': path, 'size': stat.st_size, 'mtime': stat.st_mtime, 'data': None, 'sha256': None}
+    if stat.st_size <= EXPORT_PRELOAD_MAX_BYTES:
+        with open(path, 'rb') as f:
+            document['data'] = f.read()
+        document['sha256'] = hashlib.sha256(document['data']).hexdigest()
+    return document
+
+
+class _ZipSink:
+    """Write-only file object collecting ZIP output until it is drained."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _resolve_in_folder(upload_root: str, filename: str) -> Optional[str]:
+    path = os.path.realpath(os.path.join(upload_root, filename))
+    if os.path.commonpath([upload_root, path]) != upload_root:
+        return None
+    return path
+
+
+def stream_documents_zip(filenames: List[str], upload_folder: str,
+                         max_workers: int = EXPORT_READ_WORKERS,
+                         resolve: Optional[Callable[[str], Optional[str]]] = None) -> Iterator[bytes]:
+    """
+    Build a ZIP of documents and yield it piece by piece as it is written.
+
+    Files are read and hashed ahead of the writer by a small thread pool, with
+    at most max_workers files in flight. Already-compressed formats are stored
+    rather than deflated. Documents that resolve to the same stored file are
+    read once and written under each of their names. The archive ends with manifest.json and document_summary.txt listing each
+    document's size and SHA-256.
+
+    Args:
+        filenames: Documents to include, relative to upload_folder
+        upload_folder: Directory holding the uploads
+        max_workers: Reader threads
+        resolve: Maps a document name to the file holding it (e.g.
+            UploadStore.resolve); defaults to the name inside upload_folder
+
+    Yields:
+        Chunks of the ZIP file
+    """
+    sink = _ZipSink()
+    upload_root = os.path.realpath(upload_folder)
+    resolve = resolve or (lambda filename: _resolve_in_folder(upload_root, filename))
+    manifest = []
+    missing = []
+
+    entries = []
+    for filename in filenames:
+        path = resolve(filename)
+        if path is None:
+            logger.warning(f"Skipping document outside the upload store: {filename}")
+            missing.append(filename)
+            continue
+        entries.append((filename, path))
+    paths = list(dict.fromkeys(path for _, path in entries))
+    remaining = Counter(path for _, path in entries)
+    loaded = {}
+
+    with zipfile.ZipFile(sink, 'w') as zip_file, ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = [executor.submit(_load_document, path) for path in paths[:max_workers]]
+        for filename, path in entries:
+            remaining[path] -= 1
+            if path in loaded:
+                document = loaded[path]
+            else:
+                index = len(loaded)
+                document = loaded[path] = pending[index].result()
+                pending[index] = None
+                if index + max_workers < len(paths):
+                    pending.append(executor.submit(_load_document, paths[index + max_workers]))
+
+            if document is None:
+                logger.warning(f"Document not found: {filename}")
+                missing.append(filename)
+                continue
+
+            zip_info = zipfile.ZipInfo(
+                f"documents/{filename}",
+                date_time=datetime.fromtimestamp(document['mtime']).timetuple()[:6]
+            )
+            zip_info.compress_type = _compression_for(filename)
+            zip_info.external_attr = 0o644 << 16
+            zip_info.file_size = document['size']
+
+            try:
+                with zip_file.open(zip_info, 'w') as dest:
+                    if document['data'] is not None:
+                        dest.write(document['data'])
+                        yield sink.drain()
+                    else:
+                        digest = hashlib.sha256()
+                        with open(path, 'rb') as f:
+                            for chunk in iter(lambda: f.read(EXPORT_CHUNK_SIZE), b''):
+                                digest.update(chunk)
+                                dest.write(chunk)
+                                yield sink.drain()
+                        document['sha256'] = digest.hexdigest()
+            except OSError as e:
+                logger.error(f"Error adding document {filename}: {str(e)}")
+                raise
+
+            if not remaining[path]:
+                document['data'] = None  # Release the file contents once every name using them is written
+
+            manifest.append({
+                'name': filename,
+                'size': document['size'],
+                'sha256': document['sha256'],
+                'stored': zip_info.compress_type == zipfile.ZIP_STORED
+            })
+            yield sink.drain()
+
+        generated = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        zip_file.writestr('manifest.json', json.dumps({
+            'generated': generated,
+            'total_documents': len(manifest),
+            'total_bytes': sum(entry['size'] for entry in manifest),
+            'documents': manifest,
+            'missing': missing
+        }, indent=2))
+
+        lines = [f"{entry['name']}  {entry['size']} bytes  sha256:{entry['sha256']}" for entry in manifest]
+        zip_file.writestr('document_summary.txt', (
+            f"Document Summary\n"
+            f"Generated: {generated}\n"
+            f"Total Documents: {len(manifest)}\n\n"
+            f"Documents:\n" + '\n'.join(lines) + '\n'
+        ))
+
+    logger.debug(f"Exported {len(manifest)} documents, {len(missing)} missing")
+    yield sink.drain()
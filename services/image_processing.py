@@ -0,0 +1,190 @@
+# image_processing.py
+"""Downscaling, EXIF stripping and thumbnails for uploaded receipt images."""
+
+import hashlib
+import logging
+import os
+import threading
+import traceback
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from io import BytesIO
+from typing import Dict, Optional
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+MAX_IMAGE_SIZE = 800  # Longest side of stored images, in pixels
+THUMBNAIL_SIZES = {'thumb': 200}
+JPEG_QUALITY = 85
+IMAGE_EXTENSIONS = frozenset({'.jpg', '.jpeg', '.png'})
+DEFAULT_IMAGE_WORKERS = 2
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def is_image(filename: Optional[str]) -> bool:
+    """Check whether a document name refers to an image we can process."""
+    return bool(filename) and os.path.splitext(filename)[1].lower() in IMAGE_EXTENSIONS
+
+
+def _open_scaled(data: bytes, max_size: int) -> Image.Image:
+    """Decode an image upright and no larger than max_size on its longest side."""
+    image = Image.open(BytesIO(data))
+    if image.format == 'JPEG':
+        image.draft('RGB', (max_size, max_size))  # Let the decoder skip detail we would discard
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail((max_size, max_size), Image.LANCZOS)
+    return image
+
+
+def _encode(image: Image.Image, image_format: str) -> bytes:
+    """Encode without EXIF or text metadata."""
+    buffer = BytesIO()
+    if image_format == 'JPEG':
+        if image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        image.save(buffer, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+    else:
+        image.save(buffer, 'PNG', optimize=True)
+    return buffer.getvalue()
+
+
+def downscale_image(data: bytes, max_size: int = MAX_IMAGE_SIZE) -> Optional[bytes]:
+    """
+    Cap an uploaded image's size and strip its EXIF data.
+
+    Orientation from EXIF is applied to the pixels first so photos stay
+    upright. JPEGs stay JPEG and PNGs stay PNG, matching the stored name.
+
+    Args:
+        data: Original image bytes
+        max_size: Longest side of the result, in pixels
+
+    Returns:
+        Processed image bytes, or None if the image is already within the
+        limit, carries no metadata, or is not a JPEG or PNG
+    """
+    with Image.open(BytesIO(data)) as original:
+        image_format = original.format
+        if image_format not in ('JPEG', 'PNG'):
+            return None
+        has_metadata = 'exif' in original.info or bool(original.getexif())
+        if max(original.size) <= max_size and not has_metadata:
+            return None
+
+    return _encode(_open_scaled(data, max_size), image_format)
+
+
+def create_thumbnail(data: bytes, max_size: int) -> bytes:
+    """
+    Render a JPEG thumbnail, flattening transparency onto white.
+
+    Args:
+        data: Image bytes
+        max_size: Longest side of the thumbnail, in pixels
+
+    Returns:
+        JPEG bytes
+    """
+    image = _open_scaled(data, max_size)
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        image = background
+    return _encode(image, 'JPEG')
+
+
+def optimize_stored_image(store, sha256: str, max_size: int = MAX_IMAGE_SIZE) -> Optional[Dict]:
+    """
+    Replace a stored image with its downscaled, EXIF-free version.
+
+    Every document pointing at the original blob is moved to the new one,
+    after which the original is removed as unreferenced.
+
+    Args:
+        store: UploadStore holding the blob
+        sha256: Content hash of the original image
+        max_size: Longest side of the stored image, in pixels
+
+    Returns:
+        The new blob (sha256 and size), or None if nothing changed
+    """
+    try:
+        with open(store.blob_path(sha256), 'rb') as f:
+            data = f.read()
+        processed = downscale_image(data, max_size)
+        if processed is None:
+            return None
+
+        blob = store.put(BytesIO(processed))
+        moved = store.replace_blob(sha256, blob)
+        logger.info(f"Optimized image {sha256[:12]}: {len(data)} -> {len(processed)} bytes "
+                    f"for {moved} documents")
+        return blob
+
+    except FileNotFoundError:
+        logger.debug(f"Image {sha256[:12]} was removed before it could be optimized")
+        return None
+    except (UnidentifiedImageError, OSError, ValueError) as e:
+        logger.error(f"Error optimizing image {sha256[:12]}: {str(e)}")
+        logger.error(traceback.format_exc())
+        return None
+
+
+def schedule_image_optimization(store, sha256: str, workers: int = DEFAULT_IMAGE_WORKERS) -> Future:
+    """
+    Optimize a stored image on the background thread pool.
+
+    Args:
+        store: UploadStore holding the blob
+        sha256: Content hash of the uploaded image
+        workers: Pool size used when the pool is first created
+
+    Returns:
+        Future resolving to the result of optimize_stored_image
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='image')
+    return _executor.submit(optimize_stored_image, store, sha256)
+
+
+def get_derivative(store, found: Dict, variant: str) -> Optional[str]:
+    """
+    Get the path of an image derivative, rendering and caching it on first use.
+
+    Derivatives of stored blobs are keyed by content hash. Legacy files are
+    keyed by path and ETag, so a changed file gets a fresh derivative.
+
+    Args:
+        store: UploadStore for the upload folder
+        found: Result of UploadStore.lookup for the document
+        variant: Key of THUMBNAIL_SIZES
+
+    Returns:
+        Path to the cached JPEG, or None if the image cannot be decoded
+    """
+    key = found['sha256'] or hashlib.sha256(f"{found['path']}:{found['etag']}".encode()).hexdigest()
+    path = store.derivative_path(key, variant)
+    if os.path.exists(path):
+        return path
+
+    try:
+        with open(found['path'], 'rb') as f:
+            data = create_thumbnail(f.read(), THUMBNAIL_SIZES[variant])
+    except (UnidentifiedImageError, OSError, ValueError) as e:
+        logger.error(f"Error creating {variant} for {found['path']}: {str(e)}")
+        return None
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+    os.replace(temp_path, path)
+    logger.debug(f"Cached {variant} derivative {os.path.basename(path)}")
+    return path
@@ -0,0 +1,376 @@
+# portfolio_report.py
+"""Batch PDF report combining many analyses behind a comparison summary."""
+
+import hashlib
+import logging
+import os
+import tempfile
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import BinaryIO, Dict, Iterable, List, Optional, Tuple
+
+from reportlab.lib import colors as rl_colors
+from reportlab.lib.pagesizes import letter, landscape
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+
+from services.report_cache import ReportCache, report_cache_key
+from services.report_generator import BRAND_CONFIG, REPORT_TEMPLATE_VERSION
+
+logger = logging.getLogger(__name__)
+
+MAX_PORTFOLIO_ANALYSES = 100
+
+# Page attributes a page may inherit from its page tree ancestors
+INHERITED_PAGE_KEYS = ('/Resources', '/MediaBox', '/CropBox', '/Rotate')
+
+# Summary table columns: (calculated_metrics key or analysis field, heading)
+SUMMARY_COLUMNS = [
+    ('analysis_name', 'Analysis'),
+    ('analysis_type', 'Type'),
+    ('purchase_price', 'Purchase Price'),
+    ('monthly_cash_flow', 'Monthly Cash Flow'),
+    ('cash_on_cash_return', 'Cash-on-Cash'),
+    ('cap_rate', 'Cap Rate'),
+    ('dscr', 'DSCR'),
+]
+
+
+def portfolio_cache_key(part_keys: List[str]) -> str:
+    """
+    Build the cache key for a portfolio report from its part keys.
+
+    Args:
+        part_keys: Report cache keys of the analyses, in report order
+
+    Returns:
+        SHA-256 hex digest
+    """
+    digest = hashlib.sha256(f"portfolio:{REPORT_TEMPLATE_VERSION}".encode())
+    for key in part_keys:
+        digest.update(key.encode())
+    return digest.hexdigest()
+
+
+def render_analysis_part(analysis_data: Dict, cache_key: str, cache_dir: str,
+                         cache_max_bytes: int) -> str:
+    """
+    Render one analysis report into the report cache (runs in a worker process).
+
+    Args:
+        analysis_data: Analysis data prepared for generate_report
+        cache_key: Report cache key for the analysis
+        cache_dir: Report cache directory
+        cache_max_bytes: Report cache size cap
+
+    Returns:
+        Path to the rendered PDF
+    """
+    from services.report_generator import generate_report
+    return ReportCache(cache_dir, cache_max_bytes).get_or_create(
+        cache_key, lambda: generate_report(analysis_data, report_type='analysis').getvalue()
+    )
+
+
+def concatenate_pdfs(parts: Iterable[Tuple[str, Optional[str]]], output: BinaryIO) -> int:
+    """
+    Concatenate PDFs into one, streaming each source through in turn.
+
+    Each source's pages and the objects they reference are renumbered and
+    written to the output as soon as they are read, and the source is closed
+    before the next one is opened. Memory use is therefore bounded by the
+    largest single part, not the merged document. Outlines and other
+    document-level structures of the sources are not carried over.
+
+    Args:
+        parts: (path, outline title) pairs in order; parts with a title get a
+            top-level bookmark pointing at their first page
+        output: Binary file opened for writing
+
+    Returns:
+        Number of pages written
+    """
+    from pypdf import PdfReader
+    from pypdf.generic import (
+        ArrayObject, DictionaryObject, IndirectObject, NameObject, NumberObject,
+        StreamObject, TextStringObject
+    )
+
+    offsets = [None]  # offsets[n] is the byte offset of object n
+    page_numbers = []
+    bookmarks = []
+
+    def reserve() -> int:
+        offsets.append(None)
+        return len(offsets) - 1
+
+    def ref(number: int):
+        return IndirectObject(number, 0, None)
+
+    def write_object(number: int, obj) -> None:
+        offsets[number] = output.tell()
+        output.write(f"{number} 0 obj\n".encode())
+        obj.write_to_stream(output)
+        output.write(b"\nendobj\n")
+
+    catalog_number = reserve()
+    pages_number = reserve()
+    output.write(b"%PDF-1.7\n%\xe2\xe3\xcf\xd3\n")
+
+    for path, title in parts:
+        with open(path, 'rb') as f:
+            reader = PdfReader(f)
+            numbers = {}
+            pending = []
+
+            def renumber(indirect):
+                key = (indirect.idnum, indirect.generation)
+                if key not in numbers:
+                    numbers[key] = reserve()
+                    pending.append(indirect)
+                return ref(numbers[key])
+
+            def remap(obj):
+                if isinstance(obj, IndirectObject):
+                    return renumber(obj)
+                if isinstance(obj, StreamObject):
+                    copy = obj.__class__()
+                    copy._data = obj._data  # Still encoded, written as is
+                    copy.update({key: remap(value) for key, value in obj.items()})
+                    return copy
+                if isinstance(obj, DictionaryObject):
+                    return DictionaryObject({key: remap(value) for key, value in obj.items()})
+                if isinstance(obj, ArrayObject):
+                    return ArrayObject([remap(value) for value in obj])
+                return obj
+
+            part_pages = set()
+            for page in reader.pages:
+                number = renumber(page.indirect_reference).idnum
+                part_pages.add(number)
+                page_numbers.append(number)
+            if title and part_pages:
+                bookmarks.append((title, page_numbers[-len(part_pages)]))
+
+            while pending:
+                indirect = pending.pop()
+                number = numbers[(indirect.idnum, indirect.generation)]
+                obj = indirect.get_object()
+                if number in part_pages:
+                    # Point pages at the new page tree, copying inherited attributes down
+                    page = DictionaryObject({
+                        key: value for key, value in obj.items() if key != '/Parent'
+                    })
+                    parent = obj.get('/Parent')
+                    while parent is not None:
+                        parent = parent.get_object()
+                        for key in INHERITED_PAGE_KEYS:
+                            if key not in page and key in parent:
+                                page[NameObject(key)] = parent.raw_get(key)
+                        parent = parent.get('/Parent')
+                    obj = remap(page)
+                    obj[NameObject('/Parent')] = ref(pages_number)
+                else:
+                    obj = remap(obj)
+                write_object(number, obj)
+            del reader
+
+    catalog = DictionaryObject({
+        NameObject('/Type'): NameObject('/Catalog'),
+        NameObject('/Pages'): ref(pages_number)
+    })
+    if bookmarks:
+        outline_number = reserve()
+        item_numbers = [reserve() for _ in bookmarks]
+        for index, ((title, page_number), item_number) in enumerate(zip(bookmarks, item_numbers)):
+            item = DictionaryObject({
+                NameObject('/Title'): TextStringObject(title),
+                NameObject('/Parent'): ref(outline_number),
+                NameObject('/Dest'): ArrayObject([ref(page_number), NameObject('/Fit')])
+            })
+            if index > 0:
+                item[NameObject('/Prev')] = ref(item_numbers[index - 1])
+            if index < len(item_numbers) - 1:
+                item[NameObject('/Next')] = ref(item_numbers[index + 1])
+            write_object(item_number, item)
+        write_object(outline_number, DictionaryObject({
+            NameObject('/Type'): NameObject('/Outlines'),
+            NameObject('/First'): ref(item_numbers[0]),
+            NameObject('/Last'): ref(item_numbers[-1]),
+            NameObject('/Count'): NumberObject(len(item_numbers))
+        }))
+        catalog[NameObject('/Outlines')] = ref(outline_number)
+        catalog[NameObject('/PageMode')] = NameObject('/UseOutlines')
+
+    write_object(pages_number, DictionaryObject({
+        NameObject('/Type'): NameObject('/Pages'),
+        NameObject('/Kids'): ArrayObject([ref(number) for number in page_numbers]),
+        NameObject('/Count'): NumberObject(len(page_numbers))
+    }))
+    write_object(catalog_number, catalog)
+
+    xref_offset = output.tell()
+    output.write(f"xref\n0 {len(offsets)}\n0000000000 65535 f \n".encode())
+    for offset in offsets[1:]:
+        output.write(f"{offset:010d} 00000 n \n".encode())
+    output.write(f"trailer\n<< /Size {len(offsets)} /Root {catalog_number} 0 R >>\n"
+                 f"startxref\n{xref_offset}\n%%EOF\n".encode())
+    return len(page_numbers)
+
+
+def _summary_value(analysis: Dict, field: str) -> str:
+    metrics = analysis.get('calculated_metrics') or {}
+    value = metrics.get(field, analysis.get(field))
+    if value in (None, ''):
+        return '-'
+    if field == 'purchase_price' and isinstance(value, (int, float)):
+        return f"${value:,.0f}"
+    return str(value)
+
+
+def create_summary_pdf(analyses: List[Dict], path: str, title: Optional[str] = None) -> None:
+    """
+    Write the comparison summary pages of a portfolio report.
+
+    Args:
+        analyses: Analyses in report order
+        path: Output PDF path
+        title: Report title
+    """
+    colors = BRAND_CONFIG['colors']
+    fonts = BRAND_CONFIG['fonts']
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        name='PortfolioTitle', parent=styles['Title'], fontName=fonts['primary'],
+        fontSize=18, textColor=colors['primary'], alignment=0
+    )
+    subtitle_style = ParagraphStyle(
+        name='PortfolioSubtitle', parent=styles['Normal'], fontName=fonts['secondary'],
+        fontSize=10, textColor=colors['text_light']
+    )
+    cell_style = ParagraphStyle(
+        name='PortfolioCell', parent=styles['Normal'], fontName=fonts['secondary'],
+        fontSize=8, textColor=colors['text_dark']
+    )
+    header_style = ParagraphStyle(
+        name='PortfolioHeader', parent=cell_style, fontName=fonts['primary'],
+        textColor=rl_colors.white
+    )
+
+    doc = SimpleDocTemplate(
+        path, pagesize=landscape(letter),
+        rightMargin=0.5*inch, leftMargin=0.5*inch, topMargin=0.5*inch, bottomMargin=0.5*inch
+    )
+
+    table_data = [[Paragraph(heading, header_style) for _, heading in SUMMARY_COLUMNS]]
+    for analysis in analyses:
+        table_data.append([
+            Paragraph(_summary_value(analysis, field), cell_style) for field, _ in SUMMARY_COLUMNS
+        ])
+
+    table = Table(
+        table_data,
+        colWidths=[2.6*inch, 1.3*inch] + [1.2*inch] * (len(SUMMARY_COLUMNS) - 2),
+        repeatRows=1
+    )
+    table_style = [
+        ('BACKGROUND', (0, 0), (-1, 0), colors['primary']),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('LINEBELOW', (0, 0), (-1, -1), 0.25, colors['border_light']),
+        ('TOPPADDING', (0, 0), (-1, -1), 4),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+    ]
+    for row in range(2, len(table_data), 2):
+        table_style.append(('BACKGROUND', (0, row), (-1, row), colors['table_row_alt']))
+    table.setStyle(TableStyle(table_style))
+
+    doc.build([
+        Paragraph(title or 'Portfolio Analysis Report', title_style),
+        Paragraph(
+            f"{len(analyses)} analyses | {datetime.now().strftime('%B %d, %Y')}", subtitle_style
+        ),
+        Spacer(1, 0.25*inch),
+        table
+    ])
+
+
+def generate_portfolio_report(analyses: List[Dict], cache_dir: str, cache_max_bytes: int,
+                              max_workers: Optional[int] = None, title: Optional[str] = None) -> str:
+    """
+    Render many analyses into one PDF with a comparison summary at the front.
+
+    Analysis reports are rendered concurrently across processes straight into
+    the report cache, so only file paths travel between processes and finished
+    parts live on disk rather than in memory. The parts are then streamed one
+    at a time behind the summary page (see concatenate_pdfs), so merging holds
+    at most one part in memory. The merged report is cached as well, keyed by
+    its parts.
+
+    Args:
+        analyses: Analysis data prepared for generate_report, in report order
+        cache_dir: Report cache directory
+        cache_max_bytes: Report cache size cap
+        max_workers: Worker processes (defaults to the CPU count)
+        title: Report title
+
+    Returns:
+        Path to the merged PDF in the report cache
+
+    Raises:
+        ValueError: If no analyses or too many analyses are given
+    """
+    if not analyses:
+        raise ValueError("At least one analysis is required for a portfolio report")
+    if len(analyses) > MAX_PORTFOLIO_ANALYSES:
+        raise ValueError(f"Portfolio reports are limited to {MAX_PORTFOLIO_ANALYSES} analyses")
+
+    cache = ReportCache(cache_dir, cache_max_bytes)
+    part_keys = [report_cache_key(analysis) for analysis in analyses]
+    portfolio_key = portfolio_cache_key(part_keys)
+
+    cached = cache.get(portfolio_key)
+    if cached:
+        logger.debug(f"Portfolio report cache hit: {portfolio_key}")
+        return cached
+
+    # Render only the parts that are not cached yet
+    part_paths = {key: cache.get(key) for key in part_keys}
+    pending = [(analysis, key) for analysis, key in zip(analyses, part_keys) if not part_paths[key]]
+    pending = list({key: (analysis, key) for analysis, key in pending}.values())
+
+    workers = min(max_workers or os.cpu_count() or 1, len(pending))
+    logger.info(f"Rendering {len(pending)} of {len(analyses)} portfolio parts with {max(workers, 1)} workers")
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                key: executor.submit(render_analysis_part, analysis, key, cache_dir, cache_max_bytes)
+                for analysis, key in pending
+            }
+            for key, future in futures.items():
+                part_paths[key] = future.result()
+    else:
+        for analysis, key in pending:
+            part_paths[key] = render_analysis_part(analysis, key, cache_dir, cache_max_bytes)
+
+    def merge_parts(summary_path: str):
+        yield summary_path, None
+        for analysis, key in zip(analyses, part_keys):
+            if not os.path.exists(part_paths[key]):
+                # Evicted by a concurrent writer since it was rendered
+                part_paths[key] = render_analysis_part(analysis, key, cache_dir, cache_max_bytes)
+            yield part_paths[key], analysis.get('analysis_name') or key[:8]
+
+    # Stream the merged PDF to a temp file next to the cache, then move it in
+    merged_path = os.path.join(cache_dir, f"{portfolio_key}.{uuid.uuid4().hex}.tmp")
+    try:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            summary_path = os.path.join(temp_dir, 'summary.pdf')
+            create_summary_pdf(analyses, summary_path, title)
+            with open(merged_path, 'wb') as f:
+                concatenate_pdfs(merge_parts(summary_path), f)
+        return cache.put_file(portfolio_key, merged_path)
+    finally:
+        if os.path.exists(merged_path):
+            os.remove(merged_path)
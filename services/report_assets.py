@@ -0,0 +1,121 @@
+# report_assets.py
+"""Process-wide cache of rendering assets shared by the PDF report generators."""
+
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+from reportlab.lib.utils import ImageReader
+
+logger = logging.getLogger(__name__)
+
+CHART_CACHE_MAX_ENTRIES = 64
+
+# Draw the amortization chart with reportlab graphics instead of matplotlib
+NATIVE_AMORTIZATION_CHART = os.environ.get('REPORT_NATIVE_CHARTS', '').lower() in ('1', 'true', 'yes')
+
+_logo_lock = threading.Lock()
+_logos: Dict[str, tuple] = {}
+
+
+def get_logo(logo_path: str) -> Optional[ImageReader]:
+    """
+    Get a decoded logo image, loading it from disk only when the file changes.
+
+    Args:
+        logo_path: Path to the logo file
+
+    Returns:
+        ImageReader ready for canvas.drawImage, or None if the file is missing
+    """
+    try:
+        stat = os.stat(logo_path)
+    except OSError:
+        return None
+
+    state = (stat.st_size, stat.st_mtime_ns)
+    with _logo_lock:
+        cached = _logos.get(logo_path)
+        if cached and cached[0] == state:
+            return cached[1]
+
+        reader = ImageReader(logo_path)
+        # Decode once up front so every page and report reuses the pixel data
+        reader.getRGBData()
+        reader.getTransparent()
+        _logos[logo_path] = (state, reader)
+        logger.debug(f"Loaded report logo from {logo_path}")
+        return reader
+
+
+def schedule_fingerprint(data: Dict) -> str:
+    """
+    Hash the parts of amortization data that the chart draws.
+
+    Args:
+        data: Amortization data with total_schedule and optional balloon_data
+
+    Returns:
+        Hex digest of the schedule
+    """
+    digest = hashlib.sha256()
+    for i, entry in enumerate(data.get('total_schedule', [])):
+        digest.update(repr((
+            entry.get('month', i + 1),
+            entry.get('ending_balance', 0),
+            entry.get('principal_payment', 0),
+            entry.get('interest_payment', 0)
+        )).encode())
+    balloon_data = data.get('balloon_data')
+    digest.update(repr(balloon_data.get('months_to_balloon') if balloon_data else None).encode())
+    return digest.hexdigest()
+
+
+class ChartCache:
+    """Bounded LRU of rendered chart PNG bytes."""
+
+    def __init__(self, max_entries: int = CHART_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_render(self, key: tuple, render: Callable[[], bytes]) -> bytes:
+        """
+        Return cached chart bytes for key, rendering them on a miss.
+
+        Args:
+            key: Chart key, e.g. (chart name, schedule fingerprint, size)
+            render: Callable producing the PNG bytes
+
+        Returns:
+            PNG bytes
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        png = render()
+        with self._lock:
+            self._entries[key] = png
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return png
+
+    def clear(self) -> None:
+        """Drop all cached charts and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+chart_cache = ChartCache()
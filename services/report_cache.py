@@ -0,0 +1,237 @@
+# report_cache.py
+"""Content-addressed on-disk cache for generated analysis PDF reports."""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import uuid
+from typing import Callable, Dict, Optional
+
+from flask import current_app
+
+from services.report_assets import NATIVE_AMORTIZATION_CHART
+from services.report_generator import BRAND_CONFIG, REPORT_TEMPLATE_VERSION
+from utils.metrics import report_render_duration
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REPORT_CACHE_MAX_BYTES = 200 * 1024 * 1024  # 200MB
+
+# Fields that change without changing what the report shows
+VOLATILE_REPORT_FIELDS = frozenset({'created_at', 'updated_at', 'generated_date'})
+
+_brand_fingerprints: Dict[tuple, str] = {}
+_caches: Dict[tuple, 'ReportCache'] = {}
+_caches_lock = threading.Lock()
+
+
+def brand_fingerprint() -> str:
+    """
+    Hash the brand configuration and logo file used in every report.
+
+    The logo hash is kept per (path, size, mtime) so the file is only read
+    again when it changes on disk.
+
+    Returns:
+        Hex digest identifying the current brand assets
+    """
+    logo_path = BRAND_CONFIG.get('logo_path')
+    try:
+        stat = os.stat(logo_path)
+        logo_state = (logo_path, stat.st_size, stat.st_mtime_ns)
+    except (OSError, TypeError):
+        logo_state = (logo_path, None, None)
+
+    if logo_state not in _brand_fingerprints:
+        digest = hashlib.sha256(json.dumps(BRAND_CONFIG, sort_keys=True, default=str).encode())
+        if logo_state[1] is not None:
+            with open(logo_path, 'rb') as f:
+                digest.update(f.read())
+        _brand_fingerprints[logo_state] = digest.hexdigest()
+    return _brand_fingerprints[logo_state]
+
+
+def report_cache_key(analysis_data: Dict, simulation: Optional[Dict] = None) -> str:
+    """
+    Build the cache key for an analysis report.
+
+    The key covers the analysis inputs and calculated metrics snapshot, the
+    projection simulation options, the report template version, the chart
+    renderer and the brand assets. Simulation results are determined by the
+    options, so the key is known before the simulation runs.
+
+    Args:
+        analysis_data: Analysis data as passed to generate_report
+        simulation: Options from report_simulation_options, if the report
+            includes a projection simulation
+
+    Returns:
+        SHA-256 hex digest
+    """
+    content = {
+        key: value for key, value in analysis_data.items()
+        if key not in VOLATILE_REPORT_FIELDS
+    }
+    payload = json.dumps({
+        'analysis': content,
+        'simulation': simulation,
+        'template_version': REPORT_TEMPLATE_VERSION,
+        'native_charts': NATIVE_AMORTIZATION_CHART,
+        'brand': brand_fingerprint()
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ReportCache:
+    """Directory of PDFs named by content hash, capped in size with LRU eviction."""
+
+    def __init__(self, cache_dir: str, max_bytes: int = DEFAULT_REPORT_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.pdf")
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a cached report and mark it as recently used.
+
+        Args:
+            key: Report cache key
+
+        Returns:
+            Path to the cached PDF, or None on a miss
+        """
+        path = self._path(key)
+        try:
+            os.utime(path)  # mtime doubles as last-access time for LRU
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return path
+
+    def put(self, key: str, data: bytes) -> str:
+        """
+        Store a report and evict least recently used reports over the cap.
+
+        Args:
+            key: Report cache key
+            data: PDF bytes
+
+        Returns:
+            Path to the cached PDF
+        """
+        path = self._path(key)
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+        self.evict(keep=path)
+        return path
+
+    def put_file(self, key: str, source_path: str) -> str:
+        """
+        Move an already written PDF into the cache without reading it into memory.
+
+        Args:
+            key: Report cache key
+            source_path: PDF on the same filesystem as the cache directory
+
+        Returns:
+            Path to the cached PDF
+        """
+        path = self._path(key)
+        os.replace(source_path, path)
+        self.evict(keep=path)
+        return path
+
+    def get_or_create(self, key: str, render: Callable[[], bytes]) -> str:
+        """
+        Return the cached report for key, rendering and storing it on a miss.
+
+        Args:
+            key: Report cache key
+            render: Callable producing the PDF bytes
+
+        Returns:
+            Path to the cached PDF
+        """
+        path = self.get(key)
+        if path:
+            logger.debug(f"Report cache hit: {key}")
+            return path
+        logger.debug(f"Report cache miss: {key}")
+        with report_render_duration.time(report_type='analysis', mode='inline'):
+            data = render()
+        return self.put(key, data)
+
+    def evict(self, keep: Optional[str] = None) -> None:
+        """
+        Remove least recently used reports until the cache fits max_bytes.
+
+        Args:
+            keep: Path that must not be evicted (the report just written)
+        """
+        with self._lock:
+            entries = []
+            total = 0
+            for entry in os.scandir(self.cache_dir):
+                if not entry.name.endswith('.pdf'):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+                total += stat.st_size
+
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                if path == keep:
+                    continue
+                try:
+                    os.remove(path)
+                    total -= size
+                    logger.debug(f"Evicted cached report {os.path.basename(path)}")
+                except FileNotFoundError:
+                    pass
+
+
+def report_cache_stats() -> Dict[str, int]:
+    """
+    Get hit and miss counts across the report caches used in this process.
+
+    Returns:
+        Dict of hits and misses
+    """
+    with _caches_lock:
+        caches = list(_caches.values())
+    return {
+        'hits': sum(cache.hits for cache in caches),
+        'misses': sum(cache.misses for cache in caches)
+    }
+
+
+def get_report_cache() -> ReportCache:
+    """
+    Get the report cache configured for the current app.
+
+    Returns:
+        ReportCache for REPORT_CACHE_DIR and REPORT_CACHE_MAX_BYTES
+    """
+    cache_dir = current_app.config.get('REPORT_CACHE_DIR') or \
+        os.path.join(current_app.config['DATA_DIR'], 'report_cache')
+    max_bytes = current_app.config.get('REPORT_CACHE_MAX_BYTES', DEFAULT_REPORT_CACHE_MAX_BYTES)
+    with _caches_lock:
+        cache = _caches.get((cache_dir, max_bytes))
+        if cache is None:
+            cache = _caches[(cache_dir, max_bytes)] = ReportCache(cache_dir, max_bytes)
+    return cache
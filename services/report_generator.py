@@ -5,6 +5,7 @@ import traceback
 from io import BytesIO
 import json
 import math
+from functools import lru_cache
 from typing import Dict, Any, Optional, Union, List  # Add this import
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter
@@ -12,18 +13,19 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.platypus import (SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image,
                                Frame, PageTemplate, NextPageTemplate, FrameBreak, PageBreak, Flowable)
-from reportlab.graphics.shapes import Drawing, Circle, String, Rect
-import matplotlib
-matplotlib.use('Agg')  # Use non-interactive backend
-import matplotlib.pyplot as plt
-import matplotlib.patheffects as patheffects
-from matplotlib.ticker import FuncFormatter
+from reportlab.graphics.shapes import Drawing, Circle, String, Rect, Line
+from reportlab.graphics.charts.lineplots import LinePlot
+from reportlab.graphics.charts.legends import Legend
 from utils.standardized_metrics import extract_calculated_metrics
+from services.report_assets import get_logo, chart_cache, schedule_fingerprint, NATIVE_AMORTIZATION_CHART
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Bump whenever report layout or content changes so cached PDFs are regenerated
+REPORT_TEMPLATE_VERSION = '2024.1'
+
 # Brand configuration
 BRAND_CONFIG = {
     'colors': {
@@ -128,45 +130,101 @@ class KPICardFlowable(Flowable):
         """Return the size this flowable will take up."""
         return (self.width, self.height)
 
+def _pyplot():
+    """Import pyplot on first use; matplotlib is only needed when a chart is rendered."""
+    import matplotlib
+    matplotlib.use('Agg')  # Use non-interactive backend
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def _currency_axis_label(value):
+    """Format an axis value as $ or $K."""
+    if value >= 1000:
+        return f'${value/1000:.0f}K'
+    return f'${value:.0f}'
+
 class ChartGenerator:
     """Generate charts for the report."""
     
+    # Matplotlib figure size (inches) and resolution of the amortization chart
+    AMORTIZATION_FIGSIZE = (5, 3.5)
+    AMORTIZATION_DPI = 100
+    
+    def _amortization_series(self, data):
+        """Extract months, balances and cumulative principal/interest from amortization data."""
+        schedule = data.get('total_schedule', [])
+        if not schedule:
+            raise ValueError("No amortization schedule data available")
+            
+        # Extract data for plotting
+        months = [entry.get('month', i+1) for i, entry in enumerate(schedule)]
+        balances = [entry.get('ending_balance', 0) for entry in schedule]
+        
+        # Calculate cumulative principal and interest
+        cumulative_principal = []
+        cumulative_interest = []
+        principal_sum = 0
+        interest_sum = 0
+        
+        for entry in schedule:
+            principal_sum += entry.get('principal_payment', 0)
+            interest_sum += entry.get('interest_payment', 0)
+            cumulative_principal.append(principal_sum)
+            cumulative_interest.append(interest_sum)
+        
+        # Determine if we have balloon data
+        balloon_month = None
+        if data.get('balloon_data'):
+            balloon_month = data['balloon_data'].get('months_to_balloon')
+        
+        return months, balances, cumulative_principal, cumulative_interest, balloon_month
+    
     def create_amortization_chart(self, data):
-        """Create an enhanced amortization chart showing balance, principal and interest."""
+        """
+        Create an enhanced amortization chart showing balance, principal and interest.
+        
+        Rendered PNGs are memoized by schedule fingerprint and figure size, so
+        reports sharing a loan schedule skip matplotlib entirely.
+        """
+        try:
+            key = ('amortization', schedule_fingerprint(data), self.AMORTIZATION_FIGSIZE, self.AMORTIZATION_DPI)
+            png = chart_cache.get_or_render(key, lambda: self._render_amortization_chart(data))
+            return BytesIO(png)
+            
+        except Exception as e:
+            logger.error(f"Error generating amortization chart: {str(e)}")
+            
+            # Create a simple error message chart
+            buffer = BytesIO()
+            plt = _pyplot()
+            fig, ax = plt.subplots(figsize=(4, 3))
+            ax.text(0.5, 0.5, "Error generating chart", 
+                horizontalalignment='center', 
+                verticalalignment='center',
+                transform=ax.transAxes, 
+                fontsize=10,
+                color=BRAND_CONFIG['colors']['danger'])
+            ax.axis('off')
+            plt.savefig(buffer, format='png', dpi=100)
+            plt.close(fig)
+            
+            buffer.seek(0)
+            return buffer
+    
+    def _render_amortization_chart(self, data):
+        """Render the amortization chart with matplotlib and return the PNG bytes."""
+        from matplotlib.ticker import FuncFormatter
+        plt = _pyplot()
         buffer = BytesIO()
         colors = BRAND_CONFIG['colors']
+        months, balances, cumulative_principal, cumulative_interest, balloon_month = \
+            self._amortization_series(data)
+        
+        # Create figure with improved size for legend
+        fig, ax = plt.subplots(figsize=self.AMORTIZATION_FIGSIZE, dpi=self.AMORTIZATION_DPI)
         
         try:
-            # Extract the schedule data
-            schedule = data.get('total_schedule', [])
-            if not schedule:
-                raise ValueError("No amortization schedule data available")
-                
-            # Extract data for plotting
-            months = [entry.get('month', i+1) for i, entry in enumerate(schedule)]
-            balances = [entry.get('ending_balance', 0) for entry in schedule]
-            
-            # Calculate cumulative principal and interest
-            cumulative_principal = []
-            cumulative_interest = []
-            principal_sum = 0
-            interest_sum = 0
-            
-            for entry in schedule:
-                principal_sum += entry.get('principal_payment', 0)
-                interest_sum += entry.get('interest_payment', 0)
-                cumulative_principal.append(principal_sum)
-                cumulative_interest.append(interest_sum)
-            
-            # Determine if we have balloon data
-            has_balloon = data.get('balloon_data') is not None
-            balloon_month = None
-            if has_balloon and data.get('balloon_data'):
-                balloon_month = data['balloon_data'].get('months_to_balloon')
-            
-            # Create figure with improved size for legend
-            fig, ax = plt.subplots(figsize=(5, 3.5), dpi=100)
-            
             # Set background color
             fig.patch.set_facecolor('#FFFFFF')
             ax.set_facecolor('#F9FBFF')
@@ -193,7 +251,7 @@ class ChartGenerator:
                 solid_capstyle='round')
             
             # Add balloon marker if applicable
-            if has_balloon and balloon_month:
+            if balloon_month:
                 ax.axvline(x=balloon_month, 
                         linestyle='--', 
                         color=colors['warning'], 
@@ -207,12 +265,7 @@ class ChartGenerator:
             ax.set_title('Loan Amortization Schedule', fontsize=10, fontweight='bold', pad=10)
             
             # Format y-axis as currency
-            def currency_formatter(x, pos):
-                if x >= 1000:
-                    return f'${x/1000:.0f}K'
-                return f'${x:.0f}'
-            
-            ax.yaxis.set_major_formatter(FuncFormatter(currency_formatter))
+            ax.yaxis.set_major_formatter(FuncFormatter(lambda x, pos: _currency_axis_label(x)))
             
             # Set y-axis to start at 0
             ax.set_ylim(bottom=0)
@@ -224,32 +277,97 @@ class ChartGenerator:
             ax.legend(loc='upper center', bbox_to_anchor=(0.5, -0.15), 
                     frameon=True, framealpha=0.9, fontsize=8, ncol=4)
             
-            plt.tight_layout()
-            plt.subplots_adjust(bottom=0.25)  # Add extra space for the legend
+            fig.tight_layout()
+            fig.subplots_adjust(bottom=0.25)  # Add extra space for the legend
             
-            plt.savefig(buffer, format='png', dpi=100, bbox_inches='tight')
-            plt.close(fig)
-            
-            buffer.seek(0)
-            return buffer
-            
-        except Exception as e:
-            logger.error(f"Error generating amortization chart: {str(e)}")
-            
-            # Create a simple error message chart
-            fig, ax = plt.subplots(figsize=(4, 3))
-            ax.text(0.5, 0.5, "Error generating chart", 
-                horizontalalignment='center', 
-                verticalalignment='center',
-                transform=ax.transAxes, 
-                fontsize=10,
-                color=colors['danger'])
-            ax.axis('off')
-            plt.savefig(buffer, format='png', dpi=100)
+            fig.savefig(buffer, format='png', dpi=self.AMORTIZATION_DPI, bbox_inches='tight')
+            return buffer.getvalue()
+        finally:
             plt.close(fig)
+    
+    def create_amortization_drawing(self, data, width, height):
+        """
+        Draw the amortization chart natively with reportlab graphics.
+        
+        Vector output that skips matplotlib and PNG encoding altogether; used
+        when REPORT_NATIVE_CHARTS is enabled.
+        
+        Args:
+            data: Amortization data with total_schedule and optional balloon_data
+            width: Drawing width in points
+            height: Drawing height in points
             
-            buffer.seek(0)
-            return buffer
+        Returns:
+            reportlab Drawing flowable
+        """
+        palette = BRAND_CONFIG['colors']
+        fonts = BRAND_CONFIG['fonts']
+        months, balances, cumulative_principal, cumulative_interest, balloon_month = \
+            self._amortization_series(data)
+        
+        drawing = Drawing(width, height)
+        drawing.add(String(width / 2, height - 12, 'Loan Amortization Schedule',
+                           fontName=fonts['primary'], fontSize=9, textAnchor='middle'))
+        
+        plot = LinePlot()
+        plot.x = 42
+        plot.y = 52
+        plot.width = width - 52
+        plot.height = height - 72
+        plot.fillColor = colors.HexColor('#F9FBFF')
+        plot.data = [
+            list(zip(months, balances)),
+            list(zip(months, cumulative_principal)),
+            list(zip(months, cumulative_interest))
+        ]
+        series = [
+            (palette['primary'], 'Loan Balance'),
+            (palette['success'], 'Principal Paid'),
+            (palette['danger'], 'Interest Paid')
+        ]
+        for i, (color, _) in enumerate(series):
+            plot.lines[i].strokeColor = colors.HexColor(color)
+            plot.lines[i].strokeWidth = 1.5
+        
+        plot.xValueAxis.valueMin = 0
+        plot.xValueAxis.valueMax = max(months)
+        plot.xValueAxis.labelTextFormat = '%d'
+        plot.xValueAxis.labels.fontName = fonts['secondary']
+        plot.xValueAxis.labels.fontSize = 7
+        plot.yValueAxis.valueMin = 0
+        plot.yValueAxis.labelTextFormat = _currency_axis_label
+        plot.yValueAxis.labels.fontName = fonts['secondary']
+        plot.yValueAxis.labels.fontSize = 7
+        plot.yValueAxis.visibleGrid = True
+        plot.yValueAxis.gridStrokeColor = colors.HexColor(palette['border'])
+        plot.yValueAxis.gridStrokeDashArray = (1, 2)
+        drawing.add(plot)
+        
+        drawing.add(String(plot.x + plot.width / 2, 28, 'Month',
+                           fontName=fonts['primary'], fontSize=7, textAnchor='middle'))
+        
+        # Add balloon marker if applicable
+        if balloon_month and 0 < balloon_month <= max(months):
+            x = plot.x + plot.width * balloon_month / max(months)
+            drawing.add(Line(x, plot.y, x, plot.y + plot.height,
+                             strokeColor=colors.HexColor(palette['warning']),
+                             strokeWidth=1.2, strokeDashArray=(4, 3)))
+            series.append((palette['warning'], 'Balloon Due'))
+        
+        legend = Legend()
+        legend.x = width / 2 - 34 * len(series)
+        legend.y = 10
+        legend.alignment = 'right'
+        legend.columnMaximum = 1
+        legend.fontName = fonts['secondary']
+        legend.fontSize = 7
+        legend.dx = 8
+        legend.dy = 2
+        legend.deltax = 68
+        legend.colorNamePairs = [(colors.HexColor(color), name) for color, name in series]
+        drawing.add(legend)
+        
+        return drawing
 
 # Main function to generate report that matches the original signature
 def generate_report(data, report_type='analysis'):
@@ -283,6 +401,92 @@ def generate_report(data, report_type='analysis'):
         logger.error(f"Error generating report: {str(e)}", exc_info=True)
         raise RuntimeError(f"Failed to generate report: {str(e)}")
 
+@lru_cache(maxsize=None)
+def _build_report_styles():
+    """Build the report paragraph styles once per process; they are read-only after creation."""
+    styles = getSampleStyleSheet()
+    colors = BRAND_CONFIG['colors']
+    
+    # Add custom styles
+    styles.add(ParagraphStyle(
+        name='BrandNormal',
+        parent=styles['Normal'],
+        fontName=BRAND_CONFIG['fonts']['secondary'],
+        fontSize=8,
+        textColor=colors['text_dark'],
+        spaceAfter=4,
+        wordWrap='CJK'
+    ))
+
+    styles.add(ParagraphStyle(
+        name='BrandHeading1',
+        parent=styles['Heading1'],
+        fontName=BRAND_CONFIG['fonts']['primary'],
+        fontSize=16,
+        textColor=colors['primary'],
+        spaceAfter=12,
+        alignment=0,  # Left aligned
+        wordWrap='CJK'
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='BrandHeading3',
+        parent=styles['Heading3'],
+        fontName=BRAND_CONFIG['fonts']['primary'],
+        fontSize=10,
+        textColor=colors['primary'],
+        spaceBefore=6,
+        spaceAfter=4,
+        alignment=0,  # Left aligned
+        wordWrap='CJK'
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='BrandSmall',
+        parent=styles['Normal'],
+        fontName=BRAND_CONFIG['fonts']['secondary'],
+        fontSize=7,
+        textColor=colors['text_light'],
+        spaceAfter=4,
+        wordWrap='CJK'
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='TableHeader',
+        parent=styles['Normal'],
+        fontName=BRAND_CONFIG['fonts']['primary'],
+        fontSize=9,
+        textColor=colors['background'],
+        alignment=1,  # Center aligned
+        wordWrap='CJK'
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='EnhancedTitle',
+        parent=styles['Heading1'],
+        fontName=BRAND_CONFIG['fonts']['primary'],
+        fontSize=16,
+        leading=20,
+        textColor=colors['primary'],
+        alignment=0,  # Left aligned
+        spaceBefore=0,
+        spaceAfter=2
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='EnhancedSubtitle',
+        parent=styles['Normal'],
+        fontName=BRAND_CONFIG['fonts']['secondary'],
+        fontSize=9,
+        leading=11,
+        textColor=colors['text_light'],
+        alignment=0,  # Left aligned
+        spaceBefore=0,
+        spaceAfter=0
+    ))
+    
+    return styles
+
 class PropertyReportGenerator:
     """Generate property analysis reports."""
     
@@ -312,89 +516,8 @@ class PropertyReportGenerator:
         self.chart_gen = ChartGenerator()
     
     def _create_styles(self):
-        """Create paragraph and table styles."""
-        styles = getSampleStyleSheet()
-        colors = BRAND_CONFIG['colors']
-        
-        # Add custom styles
-        styles.add(ParagraphStyle(
-            name='BrandNormal',
-            parent=styles['Normal'],
-            fontName=BRAND_CONFIG['fonts']['secondary'],
-            fontSize=8,
-            textColor=colors['text_dark'],
-            spaceAfter=4,
-            wordWrap='CJK'
-        ))
-
-        styles.add(ParagraphStyle(
-            name='BrandHeading1',
-            parent=styles['Heading1'],
-            fontName=BRAND_CONFIG['fonts']['primary'],
-            fontSize=16,
-            textColor=colors['primary'],
-            spaceAfter=12,
-            alignment=0,  # Left aligned
-            wordWrap='CJK'
-        ))
-        
-        styles.add(ParagraphStyle(
-            name='BrandHeading3',
-            parent=styles['Heading3'],
-            fontName=BRAND_CONFIG['fonts']['primary'],
-            fontSize=10,
-            textColor=colors['primary'],
-            spaceBefore=6,
-            spaceAfter=4,
-            alignment=0,  # Left aligned
-            wordWrap='CJK'
-        ))
-        
-        styles.add(ParagraphStyle(
-            name='BrandSmall',
-            parent=styles['Normal'],
-            fontName=BRAND_CONFIG['fonts']['secondary'],
-            fontSize=7,
-            textColor=colors['text_light'],
-            spaceAfter=4,
-            wordWrap='CJK'
-        ))
-        
-        styles.add(ParagraphStyle(
-            name='TableHeader',
-            parent=styles['Normal'],
-            fontName=BRAND_CONFIG['fonts']['primary'],
-            fontSize=9,
-            textColor=colors['background'],
-            alignment=1,  # Center aligned
-            wordWrap='CJK'
-        ))
-        
-        styles.add(ParagraphStyle(
-            name='EnhancedTitle',
-            parent=styles['Heading1'],
-            fontName=BRAND_CONFIG['fonts']['primary'],
-            fontSize=16,
-            leading=20,
-            textColor=colors['primary'],
-            alignment=0,  # Left aligned
-            spaceBefore=0,
-            spaceAfter=2
-        ))
-        
-        styles.add(ParagraphStyle(
-            name='EnhancedSubtitle',
-            parent=styles['Normal'],
-            fontName=BRAND_CONFIG['fonts']['secondary'],
-            fontSize=9,
-            leading=11,
-            textColor=colors['text_light'],
-            alignment=0,  # Left aligned
-            spaceBefore=0,
-            spaceAfter=0
-        ))
-        
-        return styles
+        """Return the shared paragraph and table styles."""
+        return _build_report_styles()
     
     def _get_short_address(self, full_address):
         """Extract street address and city from full address."""
@@ -759,8 +882,11 @@ class PropertyReportGenerator:
         # Generate chart if we have data
         if amortization_data.get('total_schedule'):
             # Create chart
-            chart_buffer = self.chart_gen.create_amortization_chart(amortization_data)
-            elements.append(Image(chart_buffer, width=4*inch, height=3*inch))
+            if NATIVE_AMORTIZATION_CHART:
+                elements.append(self.chart_gen.create_amortization_drawing(amortization_data, 4*inch, 3*inch))
+            else:
+                chart_buffer = self.chart_gen.create_amortization_chart(amortization_data)
+                elements.append(Image(chart_buffer, width=4*inch, height=3*inch))
             
             # Add brief explanation
             if self._has_balloon_payment():
@@ -803,10 +929,11 @@ class PropertyReportGenerator:
             logo_height = 1*inch  # Increased from 0.5 to 1 inch
             
             try:
-                if os.path.exists(logo_path):
-                    # Use actual logo from file with transparent background
+                logo = get_logo(logo_path)
+                if logo:
+                    # Use the preloaded logo with transparent background
                     canvas.drawImage(
-                        logo_path,
+                        logo,
                         doc.pagesize[0] - doc.rightMargin - 2.0*inch,  # Moved left to accommodate larger logo
                         doc.pagesize[1] - doc.topMargin - logo_height,
                         width=2.0*inch,  # Increased from 1.5 to 2.0 inch
@@ -844,6 +971,11 @@ class PropertyReportGenerator:
             story.extend(self.create_projections_section())
             story.append(Spacer(1, 0.3*inch))
             
+            # Monte Carlo risk bands, when a simulation was run for this report
+            if self.data.get('projection_simulation'):
+                story.extend(self.create_simulation_section())
+                story.append(Spacer(1, 0.3*inch))
+            
             # Sections 4-6: Purchase Details and Financial Overviews
             if self._has_balloon_payment():
                 # Single column for Purchase Details
@@ -1569,6 +1701,98 @@ class PropertyReportGenerator:
         
         return elements
 
+    def create_simulation_section(self):
+        """Create Monte Carlo projection risk bands section."""
+        elements = []
+        colors = BRAND_CONFIG['colors']
+        simulation = self.data.get('projection_simulation') or {}
+        
+        elements.append(Paragraph("Projection Risk Bands (Monte Carlo)", self.styles['BrandHeading3']))
+        elements.append(Spacer(1, 0.05*inch))
+        
+        years = simulation.get('years', [])
+        timeframes = [year for year in [1, 3, 5, 10] if year in years] or years[-1:]
+        if not timeframes:
+            elements.append(Paragraph("No simulation data available", self.styles['BrandNormal']))
+            return elements
+        
+        header_style = ParagraphStyle(
+            name='SimulationHeader',
+            parent=self.styles['TableHeader'],
+            fontSize=8,
+            textColor=colors['background'],
+            alignment=1
+        )
+        label_style = ParagraphStyle(
+            name='SimulationLabel',
+            parent=self.styles['BrandNormal'],
+            fontSize=8,
+            textColor=colors['text_dark'],
+            alignment=0
+        )
+        value_style = ParagraphStyle(
+            name='SimulationValue',
+            parent=self.styles['BrandNormal'],
+            fontSize=8,
+            textColor=colors['text_dark'],
+            alignment=2
+        )
+        
+        def format_currency(value):
+            return "N/A" if value is None else f"${value:,.0f}"
+        
+        table_data = [
+            [Paragraph("Metric", header_style)] +
+            [Paragraph(f"Year {year}", header_style) for year in timeframes]
+        ]
+        for metric_key, metric_name in [('annual_cash_flow', 'Annual Cash Flow'), ('equity', 'Equity')]:
+            bands = simulation.get(metric_key, {})
+            for band, band_name in [('p5', 'Low (P5)'), ('p50', 'Median'), ('p95', 'High (P95)')]:
+                values = bands.get(band, [])
+                row = [Paragraph(f"{metric_name} - {band_name}", label_style)]
+                for year in timeframes:
+                    index = years.index(year)
+                    row.append(Paragraph(format_currency(values[index] if index < len(values) else None), value_style))
+                table_data.append(row)
+        
+        table_width = self.doc.width * 0.95
+        first_col_width = table_width * 0.3
+        other_col_width = (table_width - first_col_width) / len(timeframes)
+        row_styles = [
+            ('BACKGROUND', (0, i), (-1, i), colors['table_row_alt'])
+            for i in range(1, len(table_data)) if i % 2 == 1
+        ]
+        
+        elements.append(Table(
+            table_data,
+            colWidths=[first_col_width] + [other_col_width] * len(timeframes),
+            style=TableStyle([
+                ('BACKGROUND', (0, 0), (-1, 0), colors['primary']),
+                ('TEXTCOLOR', (0, 0), (-1, 0), colors['background']),
+                ('BACKGROUND', (0, 1), (0, -1), colors['table_header']),
+                ('ALIGN', (1, 1), (-1, -1), 'RIGHT'),
+                ('LINEBELOW', (0, 0), (-1, -1), 0.25, colors['border_light']),
+                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+                ('TOPPADDING', (0, 0), (-1, -1), 3),
+                ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
+                ('LEFTPADDING', (0, 0), (-1, -1), 5),
+                ('RIGHTPADDING', (0, 0), (-1, -1), 5),
+            ] + row_styles)
+        ))
+        
+        irr = simulation.get('irr', {})
+        irr_values = [irr.get(band) for band in ('p5', 'p50', 'p95')]
+        irr_text = " / ".join("N/A" if value is None else f"{value:.1f}%" for value in irr_values)
+        elements.append(Spacer(1, 0.06*inch))
+        elements.append(Paragraph(
+            f"IRR over {years[-1]} years (P5 / Median / P95): {irr_text}. "
+            f"Based on {simulation.get('paths', 0):,} simulated paths of rent growth, expense growth, "
+            f"appreciation, vacancy and refinance rates; equity excludes selling costs.",
+            self.styles['BrandSmall']
+        ))
+        
+        return elements
+
     def _create_projections_table_data(self, projections_data):
         """Create table data for projections."""
         timeframes = projections_data['timeframes']
@@ -0,0 +1,321 @@
+# report_jobs.py
+"""Background PDF report rendering on a local process pool."""
+
+import json
+import logging
+import os
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import Dict, Optional
+
+from flask import current_app
+
+from services.report_cache import ReportCache
+from utils.metrics import report_render_duration
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REPORT_WORKERS = 2
+REPORT_JOB_RETENTION_SECONDS = 24 * 60 * 60
+REPORT_JOB_TYPES = ('analysis', 'transactions', 'portfolio')
+
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_COMPLETED = 'completed'
+JOB_FAILED = 'failed'
+JOB_EXPIRED = 'expired'  # Completed, but the output has since been evicted or removed
+ACTIVE_JOB_STATES = (JOB_QUEUED, JOB_RUNNING)
+
+_queues: Dict[str, 'ReportJobQueue'] = {}
+_queues_lock = threading.Lock()
+
+
+def _job_path(jobs_dir: str, job_id: str) -> str:
+    return os.path.join(jobs_dir, f"{job_id}.json")
+
+
+def _read_job(jobs_dir: str, job_id: str) -> Optional[Dict]:
+    try:
+        with open(_job_path(jobs_dir, job_id), 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _write_job(jobs_dir: str, job: Dict) -> None:
+    """Persist job state atomically so other web workers never see partial files."""
+    job['updated_at'] = datetime.now().isoformat()
+    path = _job_path(jobs_dir, job['id'])
+    temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(temp_path, 'w') as f:
+        json.dump(job, f, indent=2)
+    os.replace(temp_path, path)
+
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def render_report_job(jobs_dir: str, job_id: str, report_type: str, payload: Dict) -> str:
+    """
+    Render a report in a worker process.
+
+    Analysis and portfolio reports are written into the report cache so later
+    requests for the same content are served without rendering. Transaction
+    reports are written next to the job record.
+
+    Args:
+        jobs_dir: Directory holding job records
+        job_id: Job ID
+        report_type: 'analysis', 'transactions' or 'portfolio'
+        payload: Report inputs (see ReportJobQueue.submit)
+
+    Returns:
+        Path to the rendered PDF
+    """
+    job = _read_job(jobs_dir, job_id)
+    if job:
+        job['status'] = JOB_RUNNING
+        job['started_at'] = datetime.now().isoformat()
+        _write_job(jobs_dir, job)
+
+    if report_type == 'analysis':
+        from services.analysis_simulation import with_projection_simulation
+        from services.report_generator import generate_report
+        cache = ReportCache(payload['cache_dir'], payload['cache_max_bytes'])
+        return cache.get_or_create(
+            payload['cache_key'],
+            lambda: generate_report(
+                with_projection_simulation(payload['analysis_data'], payload.get('simulation')),
+                report_type='analysis'
+            ).getvalue()
+        )
+
+    if report_type == 'portfolio':
+        from services.portfolio_report import generate_portfolio_report
+        return generate_portfolio_report(
+            payload['analyses'], payload['cache_dir'], payload['cache_max_bytes'],
+            max_workers=payload.get('max_workers'), title=payload.get('title')
+        )
+
+    from services.transaction_report_generator import TransactionReportGenerator
+    output_path = os.path.join(jobs_dir, f"{job_id}.pdf")
+    temp_path = f"{output_path}.tmp"
+    with open(temp_path, 'wb') as f:
+        TransactionReportGenerator().generate(payload['transactions'], f, payload.get('metadata'))
+    os.replace(temp_path, output_path)
+    return output_path
+
+
+class ReportJobQueue:
+    """Queue of report rendering jobs with state persisted as JSON files."""
+
+    def __init__(self, jobs_dir: str, max_workers: int = DEFAULT_REPORT_WORKERS,
+                 retention_seconds: int = REPORT_JOB_RETENTION_SECONDS):
+        self.jobs_dir = jobs_dir
+        self.max_workers = max_workers
+        self.retention_seconds = retention_seconds
+        self._executor = None
+        self._futures = {}
+        self._lock = threading.Lock()
+        os.makedirs(jobs_dir, exist_ok=True)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def submit(self, user_id: str, report_type: str, payload: Dict, download_name: str,
+               output_path: Optional[str] = None) -> Dict:
+        """
+        Queue a report for rendering.
+
+        Args:
+            user_id: Owner of the job
+            report_type: 'analysis', 'transactions' or 'portfolio'
+            payload: For analysis reports, analysis_data, cache_key, cache_dir,
+                cache_max_bytes and optionally simulation options. For transaction reports, transactions and
+                metadata. For portfolio reports, analyses, cache_dir,
+                cache_max_bytes and optionally max_workers and title.
+            download_name: File name offered on download
+            output_path: Already rendered PDF; when it exists the job completes
+                immediately without using the pool
+
+        Returns:
+            Job record
+
+        Raises:
+            ValueError: If the report type is not supported
+        """
+        if report_type not in REPORT_JOB_TYPES:
+            raise ValueError(f"Unsupported report type: {report_type}")
+
+        self.prune()
+        now = datetime.now().isoformat()
+        job = {
+            'id': str(uuid.uuid4()),
+            'user_id': user_id,
+            'report_type': report_type,
+            'status': JOB_QUEUED,
+            'download_name': download_name,
+            'output_path': None,
+            'error': None,
+            'pid': os.getpid(),
+            'created_at': now,
+            'started_at': None,
+            'completed_at': None
+        }
+
+        if output_path and os.path.exists(output_path):
+            job.update(status=JOB_COMPLETED, output_path=output_path, completed_at=now)
+            _write_job(self.jobs_dir, job)
+            logger.debug(f"Report job {job['id']} served from existing output")
+            return job
+
+        with self._lock:
+            _write_job(self.jobs_dir, job)
+            try:
+                future = self._get_executor().submit(
+                    render_report_job, self.jobs_dir, job['id'], report_type, payload
+                )
+            except BrokenProcessPool:
+                self._executor = None
+                future = self._get_executor().submit(
+                    render_report_job, self.jobs_dir, job['id'], report_type, payload
+                )
+            self._futures[job['id']] = future
+        future.add_done_callback(lambda f, job_id=job['id']: self._finish(job_id, f))
+        logger.info(f"Queued {report_type} report job {job['id']} for user {user_id}")
+        return job
+
+    def _finish(self, job_id: str, future) -> None:
+        """Record the outcome of a finished job."""
+        job = _read_job(self.jobs_dir, job_id) or {'id': job_id}
+        try:
+            job['output_path'] = future.result()
+            job['status'] = JOB_COMPLETED
+            logger.info(f"Report job {job_id} completed")
+        except Exception as e:
+            job['status'] = JOB_FAILED
+            job['error'] = str(e) or e.__class__.__name__
+            logger.error(f"Report job {job_id} failed: {str(e)}")
+            logger.error(traceback.format_exc())
+            if isinstance(e, BrokenProcessPool):
+                with self._lock:
+                    self._executor = None
+        completed_at = datetime.now()
+        job['completed_at'] = completed_at.isoformat()
+        _write_job(self.jobs_dir, job)
+        with self._lock:
+            self._futures.pop(job_id, None)
+        if job.get('started_at') and job.get('report_type'):
+            elapsed = (completed_at - datetime.fromisoformat(job['started_at'])).total_seconds()
+            report_render_duration.observe(elapsed, report_type=job['report_type'], mode='job')
+
+    def get_job(self, job_id: str, user_id: str) -> Optional[Dict]:
+        """
+        Get a job's current state.
+
+        Jobs left queued or running by a process that no longer exists are
+        marked as failed, and completed jobs whose output is gone (for example
+        evicted from the report cache) are marked as expired.
+
+        Args:
+            job_id: Job ID
+            user_id: User requesting the job
+
+        Returns:
+            Job record, or None if not found or owned by another user
+        """
+        job = _read_job(self.jobs_dir, job_id)
+        if not job or job.get('user_id') != user_id:
+            return None
+
+        if job['status'] in ACTIVE_JOB_STATES:
+            with self._lock:
+                pid = job.get('pid')
+                orphaned = job_id not in self._futures if pid == os.getpid() else not _pid_alive(pid)
+                # Re-read before marking, the job may have just finished
+                current = _read_job(self.jobs_dir, job_id)
+                if orphaned and current and current['status'] in ACTIVE_JOB_STATES:
+                    job.update(status=JOB_FAILED, error='Report job was interrupted')
+                    _write_job(self.jobs_dir, job)
+                elif current:
+                    job = current
+
+        if job['status'] == JOB_COMPLETED and not (job.get('output_path') and os.path.exists(job['output_path'])):
+            job.update(status=JOB_EXPIRED, error='Report output is no longer available; submit the report again')
+            _write_job(self.jobs_dir, job)
+        return job
+
+    def get_output_path(self, job_id: str, user_id: str) -> Optional[str]:
+        """
+        Get the rendered PDF for a completed job.
+
+        Args:
+            job_id: Job ID
+            user_id: User requesting the download
+
+        Returns:
+            Path to the PDF, or None if the job is not complete
+        """
+        job = self.get_job(job_id, user_id)
+        if not job or job['status'] != JOB_COMPLETED:
+            return None
+        path = job.get('output_path')
+        return path if path and os.path.exists(path) else None
+
+    def prune(self) -> None:
+        """Remove finished jobs older than the retention period."""
+        cutoff = time.time() - self.retention_seconds
+        for entry in os.scandir(self.jobs_dir):
+            if not entry.name.endswith('.json') or entry.stat().st_mtime > cutoff:
+                continue
+            job_id = entry.name[:-len('.json')]
+            job = _read_job(self.jobs_dir, job_id)
+            if job and job.get('status') in ACTIVE_JOB_STATES and job_id in self._futures:
+                continue
+            for path in (entry.path, os.path.join(self.jobs_dir, f"{job_id}.pdf")):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            logger.debug(f"Pruned report job {job_id}")
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the worker pool."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait)
+                self._executor = None
+
+
+def get_report_jobs() -> ReportJobQueue:
+    """
+    Get the report job queue configured for the current app.
+
+    Returns:
+        ReportJobQueue for REPORT_JOBS_DIR and REPORT_WORKERS
+    """
+    jobs_dir = current_app.config.get('REPORT_JOBS_DIR') or \
+        os.path.join(current_app.config['DATA_DIR'], 'report_jobs')
+    with _queues_lock:
+        queue = _queues.get(jobs_dir)
+        if queue is None:
+            queue = _queues[jobs_dir] = ReportJobQueue(
+                jobs_dir, current_app.config.get('REPORT_WORKERS', DEFAULT_REPORT_WORKERS)
+            )
+    return queue
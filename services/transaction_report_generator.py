@@ -4,10 +4,28 @@ from reportlab.lib.units import inch
 from reportlab.platypus import (SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, 
                               Image, PageBreak, KeepTogether)
 from reportlab.platypus.flowables import Flowable
+from collections import defaultdict
 from datetime import datetime
 import logging
 import os
 import traceback
+from services.report_assets import get_logo
+
+# Transaction tables with at least this many rows are laid out a page at a time
+STREAMED_TABLE_MIN_ROWS = 24
+
+# Transactions table column widths (total: 7 inches)
+TRANSACTION_COLUMN_WIDTHS = [
+    0.7*inch,   # Date
+    0.6*inch,   # Type
+    0.8*inch,   # Category
+    1.2*inch,   # Description (reduced from 1.3)
+    0.7*inch,   # Amount
+    0.7*inch,   # Collector/Payer (reduced from 0.8)
+    0.6*inch,   # Status
+    1.2*inch    # Notes (reduced from 1.5)
+]
+TRANSACTION_CELL_PADDING = 3
 
 class RoundedTableFlowable(Flowable):
     """Wraps a table in a flowable with rounded corners."""
@@ -61,6 +79,69 @@ class RoundedTableFlowable(Flowable):
         self.height = height + self.padding * 2
         return self.width, self.height
 
+class TransactionRowsFlowable(Flowable):
+    """
+    Lays out a long transaction table one page at a time.
+
+    Rows are pulled from an iterator and measured once, only when the page
+    they land on is laid out, and each page is emitted as its own fixed-height
+    table. Memory use stays flat no matter how many transactions the report
+    holds, and no cell is wrapped more than once for layout.
+    """
+
+    def __init__(self, rows, header_height, measure_row, build_table):
+        """
+        Args:
+            rows: Iterator of table rows (lists of cell flowables)
+            header_height: Height of the header row repeated on every page
+            measure_row: Callable returning the height of a row
+            build_table: Callable (rows, row_heights, first_row_index) returning
+                a table with the header row
+        """
+        Flowable.__init__(self)
+        self.rows = rows
+        self.header_height = header_height
+        self.measure_row = measure_row
+        self.build_table = build_table
+        self.next_row = None
+        self.row_index = 0
+
+    def _peek(self):
+        """Measured next row, or None when all rows are laid out."""
+        if self.next_row is None:
+            row = next(self.rows, None)
+            if row is not None:
+                self.next_row = (row, self.measure_row(row))
+        return self.next_row
+
+    def wrap(self, availWidth, availHeight):
+        # Always claim more than the space left so the frame asks for a split
+        return (availWidth, availHeight + 1)
+
+    def split(self, availWidth, availHeight):
+        page_rows = []
+        row_heights = []
+        height = self.header_height
+        while self._peek() and height + self.next_row[1] <= availHeight:
+            row, row_height = self.next_row
+            page_rows.append(row)
+            row_heights.append(row_height)
+            height += row_height
+            self.next_row = None
+
+        if not page_rows:
+            # Nothing left, or not even one row fits and it moves to the next page
+            return [] if self.next_row else [Spacer(0, 0)]
+
+        page = self.build_table(page_rows, row_heights, self.row_index)
+        if not self.next_row:
+            return [page]
+
+        rest = TransactionRowsFlowable(self.rows, self.header_height, self.measure_row, self.build_table)
+        rest.next_row = self.next_row
+        rest.row_index = self.row_index + len(page_rows)
+        return [page, rest]
+
 # Brand configuration matching report_generator.py
 BRAND_CONFIG = {
     'colors': {
@@ -236,10 +317,11 @@ class TransactionReportGenerator:
             logo_height = 0.75*inch
             
             try:
-                if os.path.exists(logo_path):
-                    # Use actual logo from file with transparent background
+                logo = get_logo(logo_path)
+                if logo:
+                    # Use the preloaded logo with transparent background
                     canvas.drawImage(
-                        logo_path,
+                        logo,
                         doc.pagesize[0] - doc.rightMargin - 1.5*inch,
                         doc.pagesize[1] - doc.topMargin - logo_height,
                         width=1.5*inch,
@@ -262,7 +344,20 @@ class TransactionReportGenerator:
         return ', '.join(parts[:2]).strip() if len(parts) >= 2 else parts[0].strip()
 
     def generate(self, transactions, buffer, metadata=None):
-        """Generate a PDF report of transactions"""
+        """
+        Generate a PDF report of transactions.
+
+        Long transaction tables are laid out a page at a time, so pass a file
+        (e.g. a temp file) as buffer for large exports to keep memory flat.
+
+        Args:
+            transactions: List of transactions
+            buffer: File-like object or path the PDF is written to
+            metadata: Optional report metadata (property, user, date_range)
+
+        Returns:
+            True on success
+        """
         try:
             doc = SimpleDocTemplate(
                 buffer,
@@ -285,6 +380,7 @@ class TransactionReportGenerator:
     def _build_story(self, transactions, metadata):
         """Build the content (story) for the PDF"""
         story = []
+        summary = self._summarize(transactions)
 
         # Create header with title
         header_elements = self._create_header(metadata)
@@ -296,9 +392,9 @@ class TransactionReportGenerator:
         if metadata:
             property_id = metadata.get('property')
             if not property_id or property_id == 'All Properties':
-                story.extend(self._create_property_summary(transactions))
+                story.extend(self._create_property_summary(summary['totals']))
             else:
-                story.extend(self._create_grand_summary(transactions))
+                story.extend(self._create_grand_summary(summary['properties']))
                 # Add page break after the grand summary table
                 story.append(PageBreak())
         
@@ -353,7 +449,7 @@ class TransactionReportGenerator:
                 property_section.append(Spacer(1, 0.05*inch))
                 
                 # Add property transaction summary
-                property_section.extend(self._create_property_summary(property_transactions))
+                property_section.extend(self._create_property_summary(summary['properties'][property_id]))
                 property_section.append(Spacer(1, 0.1*inch))
                 
                 # Add property transactions
@@ -364,6 +460,31 @@ class TransactionReportGenerator:
 
         return story
 
+    def _summarize(self, transactions):
+        """
+        Total transaction amounts by type, overall and per property, in a single pass.
+
+        Args:
+            transactions: List of transactions
+
+        Returns:
+            Dict with 'totals' (type -> amount) and 'properties'
+            (property_id -> type -> amount)
+        """
+        totals = defaultdict(float)
+        properties = {}
+
+        for t in transactions:
+            amount = self._parse_amount(t['amount'])
+            transaction_type = t.get('type', '').lower()
+            totals[transaction_type] += amount
+
+            property_id = t.get('property_id')
+            if property_id:
+                properties.setdefault(property_id, defaultdict(float))[transaction_type] += amount
+
+        return {'totals': totals, 'properties': properties}
+
     def _create_header(self, metadata):
         """Create report header with title, date and metadata."""
         elements = []
@@ -403,8 +524,8 @@ class TransactionReportGenerator:
         
         return elements
 
-    def _create_grand_summary(self, transactions):
-        """Create the grand summary table for all properties"""
+    def _create_grand_summary(self, property_totals):
+        """Create the grand summary table for all properties from per-property totals by type"""
         elements = []
         colors = BRAND_CONFIG['colors']
         
@@ -412,22 +533,13 @@ class TransactionReportGenerator:
         elements.append(Paragraph("Property Summary", self.styles['BrandHeading3']))
         elements.append(Spacer(1, 0.05*inch))
         
-        # Group transactions by property
+        # Anything that is not income counts as an expense
         property_summaries = {}
-        
-        for t in transactions:
-            property_id = t.get('property_id')
-            if not property_id:
-                continue
-                
-            if property_id not in property_summaries:
-                property_summaries[property_id] = {'income': 0, 'expense': 0}
-            
-            amount = self._parse_amount(t['amount'])
-            if t.get('type', '').lower() == 'income':
-                property_summaries[property_id]['income'] += amount
-            else:
-                property_summaries[property_id]['expense'] += amount
+        for property_id, totals in property_totals.items():
+            property_summaries[property_id] = {
+                'income': totals.get('income', 0),
+                'expense': sum(amount for t_type, amount in totals.items() if t_type != 'income')
+            }
 
         # Create table data with styled cells
         header_style = ParagraphStyle(
@@ -547,8 +659,8 @@ class TransactionReportGenerator:
         
         return elements
 
-    def _create_property_summary(self, transactions):
-        """Create financial summary for a specific property."""
+    def _create_property_summary(self, totals):
+        """Create financial summary from transaction totals by type."""
         elements = []
         colors = BRAND_CONFIG['colors']
         
@@ -557,10 +669,8 @@ class TransactionReportGenerator:
         elements.append(Spacer(1, 0.05*inch))
         
         # Calculate totals
-        total_income = sum(self._parse_amount(t['amount']) 
-                         for t in transactions if t.get('type', '').lower() == 'income')
-        total_expenses = sum(self._parse_amount(t['amount']) 
-                           for t in transactions if t.get('type', '').lower() == 'expense')
+        total_income = totals.get('income', 0)
+        total_expenses = totals.get('expense', 0)
         net_amount = total_income - total_expenses
         
         # Define styles for table cells
@@ -646,7 +756,6 @@ class TransactionReportGenerator:
     def _create_transactions_table(self, transactions):
         """Create the transactions table with enhanced styling."""
         elements = []
-        colors = BRAND_CONFIG['colors']
         
         # Force more space before the section header to prevent overlap with preceding content
         elements.append(Spacer(1, 0.3*inch))  # Increased from 0.15 to 0.3
@@ -656,17 +765,40 @@ class TransactionReportGenerator:
         elements.append(header)
         elements.append(Spacer(1, 0.15*inch))  # Increased from 0.1 to 0.15
         
-        # Define column headers
-        columns = [
-            'Date',
-            'Type',
-            'Category',
-            'Description',
-            'Amount',
-            'Payer/<br/>Collector',
-            'Status',
-            'Notes'
-        ]
+        cell_styles = self._transaction_cell_styles()
+        rows = (self._create_transaction_row(t, cell_styles) for t in transactions)
+        
+        # Create table content list
+        table_content = []
+        if len(transactions) < STREAMED_TABLE_MIN_ROWS:
+            # Wrap small tables in a RoundedTableFlowable
+            transactions_table = self._build_transactions_table(list(rows), cell_styles)
+            rounded_transactions_table = RoundedTableFlowable(transactions_table, corner_radius=8, padding=2)
+            table_content.append(rounded_transactions_table)
+        else:
+            # Lay out large datasets page by page to keep memory flat
+            table_content.append(TransactionRowsFlowable(
+                rows,
+                self._measure_transaction_row(cell_styles['header_row']),
+                self._measure_transaction_row,
+                lambda page_rows, row_heights, first_row_index: self._build_transactions_table(
+                    page_rows, cell_styles, row_heights, first_row_index)
+            ))
+        
+        # Add note about transaction count
+        if transactions:
+            count_text = f"Total transactions: {len(transactions)}"
+            table_content.append(Spacer(1, 0.05*inch))
+            table_content.append(Paragraph(count_text, self.styles['BrandSmall']))
+        
+        # Add the table content
+        elements.extend(table_content)
+        
+        return elements
+
+    def _transaction_cell_styles(self):
+        """Create the header and cell styles of the transactions table."""
+        colors = BRAND_CONFIG['colors']
         
         # Create header style
         header_style = ParagraphStyle(
@@ -699,58 +831,84 @@ class TransactionReportGenerator:
             alignment=2  # Right aligned
         )
         
-        # Build table data with styled headers
-        table_data = [
-            [Paragraph(col, header_style) for col in columns]
+        # Define column headers
+        columns = [
+            'Date',
+            'Type',
+            'Category',
+            'Description',
+            'Amount',
+            'Payer/<br/>Collector',
+            'Status',
+            'Notes'
         ]
         
-        # Add data rows with styled cells
-        for t in transactions:
-            amount_value = t.get('amount', '0')
-            amount = self._parse_amount(amount_value)
-            amount_str = f"${amount:,.2f}"
-            
-            is_income = t.get('type', '').lower() == 'income'
-            amount_style = amount_income_style if is_income else amount_expense_style
-            
-            row = [
-                Paragraph(t.get('date', ''), cell_style),
-                Paragraph(t.get('type', ''), cell_style),
-                Paragraph(t.get('category', ''), cell_style),
-                Paragraph(t.get('description', ''), cell_style),
-                Paragraph(amount_str, amount_style),
-                Paragraph(t.get('collector_payer', ''), cell_style),
-                Paragraph(t.get('reimbursement', {}).get('reimbursement_status', ''), cell_style),
-                Paragraph(t.get('notes', ''), cell_style)
-            ]
-            
-            table_data.append(row)
-        
-        # Calculate column widths (total: 7 inches)
-        col_widths = [
-            0.7*inch,   # Date
-            0.6*inch,   # Type
-            0.8*inch,   # Category
-            1.2*inch,   # Description (reduced from 1.3)
-            0.7*inch,   # Amount
-            0.7*inch,   # Collector/Payer (reduced from 0.8)
-            0.6*inch,   # Status
-            1.2*inch    # Notes (reduced from 1.5)
+        return {
+            'header_row': [Paragraph(col, header_style) for col in columns],
+            'cell': cell_style,
+            'income': amount_income_style,
+            'expense': amount_expense_style
+        }
+
+    def _create_transaction_row(self, t, cell_styles):
+        """Create the styled cells of one transaction."""
+        cell_style = cell_styles['cell']
+        amount_value = t.get('amount', '0')
+        amount = self._parse_amount(amount_value)
+        amount_str = f"${amount:,.2f}"
+        
+        is_income = t.get('type', '').lower() == 'income'
+        amount_style = cell_styles['income'] if is_income else cell_styles['expense']
+        
+        return [
+            Paragraph(t.get('date', ''), cell_style),
+            Paragraph(t.get('type', ''), cell_style),
+            Paragraph(t.get('category', ''), cell_style),
+            Paragraph(t.get('description', ''), cell_style),
+            Paragraph(amount_str, amount_style),
+            Paragraph(t.get('collector_payer', ''), cell_style),
+            Paragraph(t.get('reimbursement', {}).get('reimbursement_status', ''), cell_style),
+            Paragraph(t.get('notes', ''), cell_style)
         ]
+
+    def _measure_transaction_row(self, row):
+        """Height of a transactions table row, as the table would lay it out."""
+        return max(
+            cell.wrap(width - 2 * TRANSACTION_CELL_PADDING, 72000)[1]
+            for cell, width in zip(row, TRANSACTION_COLUMN_WIDTHS)
+        ) + 2 * TRANSACTION_CELL_PADDING
+
+    def _build_transactions_table(self, rows, cell_styles, row_heights=None, first_row_index=0):
+        """
+        Build a styled transactions table from prepared rows.
+        
+        Args:
+            rows: Rows from _create_transaction_row
+            cell_styles: Styles from _transaction_cell_styles
+            row_heights: Measured heights of the rows, or None to let the table
+                measure them
+            first_row_index: Position of the first row in the whole table, so
+                alternating row colors continue across pages
+            
+        Returns:
+            Table with a repeating header row
+        """
+        colors = BRAND_CONFIG['colors']
+        table_data = [cell_styles['header_row']] + rows
+        if row_heights is not None:
+            row_heights = [self._measure_transaction_row(cell_styles['header_row'])] + row_heights
         
         # Create alternating row colors
         row_styles = []
         for i in range(1, len(table_data)):
-            if i % 2 == 1:  # Alternate rows
+            if (first_row_index + i) % 2 == 1:  # Alternate rows
                 row_styles.append(('BACKGROUND', (0, i), (-1, i), colors['table_row_alt']))
         
-        # For large transaction sets, use normal table without rounded corners
-        use_rounded = len(table_data) < 25  # Only use rounded corners for smaller tables
-        
         # Create table with repeating header
         transactions_table = Table(
             table_data,
-            colWidths=col_widths,
+            colWidths=TRANSACTION_COLUMN_WIDTHS,
+            rowHeights=row_heights,
             repeatRows=1,
             style=TableStyle([
                 # Header styling
@@ -763,10 +921,10 @@ class TransactionReportGenerator:
                 ('LINEBELOW', (0, 0), (-1, 0), 0.5, colors['border']),  # Thicker line below header
                 
                 # Cell padding
-                ('TOPPADDING', (0, 0), (-1, -1), 3),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
-                ('LEFTPADDING', (0, 0), (-1, -1), 3),  # Reduced from 4
-                ('RIGHTPADDING', (0, 0), (-1, -1), 3), # Reduced from 4
+                ('TOPPADDING', (0, 0), (-1, -1), TRANSACTION_CELL_PADDING),
+                ('BOTTOMPADDING', (0, 0), (-1, -1), TRANSACTION_CELL_PADDING),
+                ('LEFTPADDING', (0, 0), (-1, -1), TRANSACTION_CELL_PADDING),  # Reduced from 4
+                ('RIGHTPADDING', (0, 0), (-1, -1), TRANSACTION_CELL_PADDING), # Reduced from 4
             ] + row_styles)
         )
         
@@ -775,26 +933,7 @@ class TransactionReportGenerator:
             ('BOX', (0, 0), (-1, -1), 0.5, colors['border']),
         ]))
         
-        # Create table content list
-        table_content = []
-        if use_rounded:
-            # Wrap the table in a RoundedTableFlowable
-            rounded_transactions_table = RoundedTableFlowable(transactions_table, corner_radius=8, padding=2)
-            table_content.append(rounded_transactions_table)
-        else:
-            # Use standard table for large datasets to avoid overflow errors
-            table_content.append(transactions_table)
-        
-        # Add note about transaction count
-        if transactions:
-            count_text = f"Total transactions: {len(transactions)}"
-            table_content.append(Spacer(1, 0.05*inch))
-            table_content.append(Paragraph(count_text, self.styles['BrandSmall']))
-        
-        # Add the table content
-        elements.extend(table_content)
-        
-        return elements
+        return transactions_table
 
     def _parse_amount(self, amount_str):
         """Parse amount from string format"""
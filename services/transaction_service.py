@@ -3,7 +3,6 @@ import logging
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple, Union, Any
 
-import pandas as pd
 from flask import current_app
 from fuzzywuzzy import process
 
@@ -473,6 +472,8 @@ def process_bulk_import(file_path: str, column_mapping: Dict[str, str], properti
     Returns:
         Dict: Import statistics
     """
+    import pandas as pd
+
     # Read file
     if file_path.endswith(('.xlsx', '.xls')):
         df = pd.read_excel(file_path)
@@ -552,6 +553,8 @@ def process_bulk_import(file_path: str, column_mapping: Dict[str, str], properti
 
 def _find_matching_property(address: Any, properties: List[Dict]) -> Optional[str]:
     """Find a matching property using fuzzy matching."""
+    import pandas as pd
+
     if pd.isna(address):
         return None
         
@@ -580,6 +583,8 @@ def clean_amount(amount_str: Any) -> Tuple[Optional[float], Optional[str]]:
     Returns:
         Tuple[Optional[float], Optional[str]]: (amount, transaction_type)
     """
+    import pandas as pd
+
     if pd.isna(amount_str) or amount_str == '':
         return None, None
         
@@ -605,6 +610,8 @@ def parse_date(date_str: Any) -> Optional[str]:
     Returns:
         Optional[str]: Parsed date in YYYY-MM-DD format
     """
+    import pandas as pd
+
     if pd.isna(date_str) or date_str == '':
         return None
         
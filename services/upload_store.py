@@ -0,0 +1,388 @@
+# upload_store.py
+"""Content-addressed storage for transaction and reimbursement documents."""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from typing import BinaryIO, Dict, Optional
+
+from flask import current_app
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to the in-process lock only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+BLOB_DIR = 'blobs'
+DERIVATIVE_DIR = 'derivatives'
+INDEX_FILE = 'upload_index.json'
+STORE_CHUNK_SIZE = 64 * 1024
+
+# Blobs younger than this are never swept as orphans, so a document stored
+# just before its transaction is saved cannot be collected in between
+ORPHAN_GRACE_SECONDS = 3600
+
+DOCUMENT_FIELDS = ('documentation_file', 'reimbursement_documentation')
+
+# Hex digits of the content hash carried in versioned artifact URLs (?v=)
+ARTIFACT_VERSION_LENGTH = 16
+
+_stores: Dict[str, 'UploadStore'] = {}
+_stores_lock = threading.Lock()
+
+
+def _empty_index() -> Dict:
+    return {'version': 1, 'refs': {}, 'documents': {}, 'blobs': {}, 'pending': {}}
+
+
+def _ref_key(transaction_id, field: str) -> str:
+    if field not in DOCUMENT_FIELDS:
+        raise ValueError(f"Unknown document field: {field}")
+    return f"{transaction_id}:{field}"
+
+
+class UploadStore:
+    """
+    Uploaded documents stored once per distinct content.
+
+    Each file is written to blobs/<aa>/<bb>/<sha256> under the upload folder.
+    An index maps every (transaction, field) reference to the document name
+    saved on the transaction, and each name to its blob. Blobs are removed as
+    soon as no reference points at them. Names that are not in the index are
+    served from the flat upload folder as before.
+    """
+
+    def __init__(self, upload_folder: str):
+        self.upload_folder = os.path.realpath(upload_folder)
+        self.blob_dir = os.path.join(self.upload_folder, BLOB_DIR)
+        self.derivative_dir = os.path.join(self.upload_folder, DERIVATIVE_DIR)
+        self.index_path = os.path.join(self.upload_folder, INDEX_FILE)
+        self._lock = threading.Lock()
+        self._cached_index = None
+        self._cached_state = None
+        os.makedirs(self.blob_dir, exist_ok=True)
+
+    def blob_path(self, sha256: str) -> str:
+        return os.path.join(self.blob_dir, sha256[:2], sha256[2:4], sha256)
+
+    def derivative_path(self, key: str, variant: str) -> str:
+        return os.path.join(self.derivative_dir, key[:2], f"{key}-{variant}.jpg")
+
+    def _read_index(self) -> Dict:
+        try:
+            stat = os.stat(self.index_path)
+        except FileNotFoundError:
+            return _empty_index()
+        state = (stat.st_mtime_ns, stat.st_size)
+        if state != self._cached_state:
+            with open(self.index_path, 'r') as f:
+                self._cached_index = json.load(f)
+            self._cached_state = state
+        return self._cached_index
+
+    def _write_index(self, index: Dict) -> None:
+        temp_path = f"{self.index_path}.{uuid.uuid4().hex}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(index, f, indent=2)
+        os.replace(temp_path, self.index_path)
+        self._cached_state = None
+
+    def _update_index(self, update):
+        """Apply update to a fresh copy of the index under the store locks, then recount and GC."""
+        with self._lock, open(f"{self.index_path}.lock", 'a') as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            index = json.loads(json.dumps(self._read_index()))
+            result = update(index)
+            removed = self._recount(index)
+            self._write_index(index)
+            for sha256 in removed:
+                self._remove_blob(sha256)
+        return result
+
+    @staticmethod
+    def _recount(index: Dict) -> set:
+        """Rebuild document and blob reference counts; return blobs left unreferenced."""
+        names = set(index['refs'].values())
+        index['documents'] = {
+            name: document for name, document in index['documents'].items() if name in names
+        }
+        counts = {}
+        for name in index['refs'].values():
+            document = index['documents'].get(name)
+            if document:
+                blob = counts.setdefault(document['sha256'], {'size': document['size'], 'refcount': 0})
+                blob['refcount'] += 1
+
+        # Blobs stored but not yet linked stay until their grace period ends
+        cutoff = time.time() - ORPHAN_GRACE_SECONDS
+        known = set(index['blobs']) | set(index.get('pending', {}))
+        index['pending'] = {
+            sha256: stored_at for sha256, stored_at in index.get('pending', {}).items()
+            if stored_at > cutoff and sha256 not in counts
+        }
+        index['blobs'] = counts
+        return known - set(counts) - set(index['pending'])
+
+    def _remove_blob(self, sha256: str) -> None:
+        try:
+            os.remove(self.blob_path(sha256))
+            logger.debug(f"Removed unreferenced blob {sha256}")
+        except FileNotFoundError:
+            pass
+
+    def put(self, stream: BinaryIO) -> Dict:
+        """
+        Store the contents of a file, hashing while it is written.
+
+        The blob is kept for ORPHAN_GRACE_SECONDS waiting for link() to
+        reference it.
+
+        Args:
+            stream: Readable binary file object (e.g. a werkzeug FileStorage stream)
+
+        Returns:
+            Dict with the sha256 and size of the stored content
+        """
+        digest = hashlib.sha256()
+        size = 0
+        temp_path = os.path.join(self.blob_dir, f"{uuid.uuid4().hex}.tmp")
+        try:
+            with open(temp_path, 'wb') as f:
+                for chunk in iter(lambda: stream.read(STORE_CHUNK_SIZE), b''):
+                    digest.update(chunk)
+                    f.write(chunk)
+                    size += len(chunk)
+            sha256 = digest.hexdigest()
+            path = self.blob_path(sha256)
+
+            def update(index):
+                if os.path.exists(path):
+                    logger.debug(f"Upload matches existing blob {sha256}")
+                else:
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    os.replace(temp_path, path)
+                index.setdefault('pending', {})[sha256] = time.time()
+
+            self._update_index(update)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return {'sha256': sha256, 'size': size}
+
+    def link(self, transaction_id, field: str, filename: str, blob: Dict,
+             previous: Optional[str] = None) -> None:
+        """
+        Point a transaction's document field at a stored blob.
+
+        A document previously linked from the same field is released.
+
+        Args:
+            transaction_id: Transaction ID
+            field: 'documentation_file' or 'reimbursement_documentation'
+            filename: Document name saved on the transaction
+            blob: Result of put()
+            previous: Document name the field held before; deleted from the
+                flat upload folder if it predates the store
+        """
+        key = _ref_key(transaction_id, field)
+
+        def update(index):
+            replaced = index['refs'].get(key)
+            index['refs'][key] = filename
+            index['documents'][filename] = {'sha256': blob['sha256'], 'size': blob['size']}
+            return replaced
+
+        if self._update_index(update) is None and previous:
+            self._remove_legacy(previous)
+
+    def replace_blob(self, sha256: str, blob: Dict) -> int:
+        """
+        Move every document stored as one blob to another, e.g. a processed copy.
+
+        Args:
+            sha256: Content hash of the blob being replaced
+            blob: Result of put() for the new content
+
+        Returns:
+            Number of documents moved
+        """
+        def update(index):
+            moved = 0
+            for document in index['documents'].values():
+                if document['sha256'] == sha256:
+                    document.update(sha256=blob['sha256'], size=blob['size'])
+                    moved += 1
+            return moved
+
+        return self._update_index(update)
+
+    def unlink(self, transaction_id, field: str, filename: Optional[str] = None) -> None:
+        """
+        Release a transaction's document, removing its blob if nothing else uses it.
+
+        Args:
+            transaction_id: Transaction ID
+            field: 'documentation_file' or 'reimbursement_documentation'
+            filename: Document name on the transaction; deleted from the flat
+                upload folder if the document predates the store
+        """
+        key = _ref_key(transaction_id, field)
+        found = self._update_index(lambda index: index['refs'].pop(key, None))
+        if found is None and filename:
+            self._remove_legacy(filename)
+
+    def unlink_transaction(self, transaction_id, filenames: Dict[str, Optional[str]]) -> None:
+        """
+        Release every document of a deleted transaction.
+
+        Args:
+            transaction_id: Transaction ID
+            filenames: Document name per field, as saved on the transaction
+        """
+        for field in DOCUMENT_FIELDS:
+            self.unlink(transaction_id, field, filenames.get(field))
+
+    def _legacy_path(self, filename: str) -> Optional[str]:
+        path = os.path.realpath(os.path.join(self.upload_folder, filename))
+        if os.path.dirname(path) != self.upload_folder or path == self.index_path:
+            return None
+        return path
+
+    def _remove_legacy(self, filename: str) -> None:
+        path = self._legacy_path(filename)
+        if path and os.path.isfile(path):
+            os.remove(path)
+            logger.debug(f"Deleted legacy document: {path}")
+
+    def lookup(self, filename: str) -> Optional[Dict]:
+        """
+        Find the file holding a document and a strong validator for it.
+
+        Blobs are identified by their content hash. Legacy files use their
+        size and modification time.
+
+        Args:
+            filename: Document name as saved on the transaction
+
+        Returns:
+            Dict with path, etag and sha256 (None for legacy files), or None
+            if the document does not exist
+        """
+        document = self._read_index()['documents'].get(filename)
+        if document:
+            path = self.blob_path(document['sha256'])
+            if not os.path.isfile(path):
+                return None
+            return {'path': path, 'etag': document['sha256'], 'sha256': document['sha256']}
+
+        path = self._legacy_path(filename)
+        if not path or not os.path.isfile(path):
+            return None
+        stat = os.stat(path)
+        return {'path': path, 'etag': f"{stat.st_size:x}-{stat.st_mtime_ns:x}", 'sha256': None}
+
+    def resolve(self, filename: str) -> Optional[str]:
+        """
+        Find the file holding a document.
+
+        Args:
+            filename: Document name as saved on the transaction
+
+        Returns:
+            Path to the blob or legacy file, or None if it does not exist
+        """
+        found = self.lookup(filename)
+        return found['path'] if found else None
+
+    def version(self, filename: str) -> Optional[str]:
+        """
+        Short content hash of a stored document, for versioned artifact URLs.
+
+        Args:
+            filename: Document name as saved on the transaction
+
+        Returns:
+            First ARTIFACT_VERSION_LENGTH hex digits of the SHA-256, or None
+            for documents outside the store
+        """
+        document = self._read_index()['documents'].get(filename)
+        return document['sha256'][:ARTIFACT_VERSION_LENGTH] if document else None
+
+    def collect_garbage(self, grace_seconds: int = ORPHAN_GRACE_SECONDS) -> Dict:
+        """
+        Remove blobs, image derivatives and temporary files the index does not reference.
+
+        Unreferenced blobs are normally removed as soon as they are released;
+        this sweep catches uploads whose transaction was never saved, writes
+        interrupted by a crash and derivatives of removed documents.
+
+        Args:
+            grace_seconds: Minimum age of files to remove
+
+        Returns:
+            Dict with the number of files and bytes removed
+        """
+        cutoff = time.time() - grace_seconds
+        removed = {'files': 0, 'bytes': 0}
+
+        def sweep(index):
+            referenced = {document['sha256'] for document in index['documents'].values()}
+            referenced.update(index.get('pending', {}))
+            for directory in (self.blob_dir, self.derivative_dir):
+                for root, _, files in os.walk(directory):
+                    for name in files:
+                        # Derivatives are named <source sha256>-<variant>.jpg
+                        if name.split('-', 1)[0] in referenced:
+                            continue
+                        path = os.path.join(root, name)
+                        try:
+                            stat = os.stat(path)
+                            if stat.st_mtime > cutoff:
+                                continue
+                            os.remove(path)
+                        except FileNotFoundError:
+                            continue
+                        removed['files'] += 1
+                        removed['bytes'] += stat.st_size
+
+        self._update_index(sweep)
+        if removed['files']:
+            logger.info(f"Upload store GC removed {removed['files']} files ({removed['bytes']} bytes)")
+        return removed
+
+    def usage(self) -> Dict:
+        """
+        Summarize how much space deduplication saves.
+
+        Returns:
+            Dict with document and blob counts and logical vs stored bytes
+        """
+        index = self._read_index()
+        return {
+            'references': len(index['refs']),
+            'blobs': len(index['blobs']),
+            'logical_bytes': sum(blob['size'] * blob['refcount'] for blob in index['blobs'].values()),
+            'stored_bytes': sum(blob['size'] for blob in index['blobs'].values())
+        }
+
+
+def get_upload_store() -> UploadStore:
+    """
+    Get the upload store for the current app's UPLOAD_FOLDER.
+
+    Returns:
+        UploadStore shared by all requests
+    """
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    with _stores_lock:
+        store = _stores.get(upload_folder)
+        if store is None:
+            store = _stores[upload_folder] = UploadStore(upload_folder)
+    return store
@@ -0,0 +1,48 @@
+"""Local HTTP stand-ins shared by the comps tests."""
+
+import json
+import threading
+from werkzeug.serving import make_server
+from werkzeug.wrappers import Request, Response
+
+
+class StubRentcast:
+    """Minimal local RentCast stand-in counting the requests it serves; set status to fail them."""
+
+    def __init__(self):
+        self.requests = []
+        self.price = 250000
+        self.rent = 1800
+        self.status = 200
+
+    @Request.application
+    def __call__(self, request):
+        self.requests.append((request.path, dict(request.args)))
+        if self.status != 200:
+            return Response('{"message": "Too many requests"}', status=self.status, mimetype='application/json')
+        if request.path.endswith('/avm/value'):
+            body = {
+                'price': self.price, 'priceRangeLow': self.price - 10000, 'priceRangeHigh': self.price + 10000,
+                'comparables': [{'price': self.price - 5000, 'removedDate': '2024-01-05'}, {'price': 0}]
+            }
+        else:
+            body = {'rent': self.rent, 'rentRangeLow': self.rent - 100, 'rentRangeHigh': self.rent + 100,
+                    'comparables': [{'price': self.rent - 50}], 'confidenceScore': 0.8}
+        return Response(json.dumps(body), mimetype='application/json')
+
+
+def start_server(app, threaded=False):
+    """Serve a WSGI app on a free local port from a daemon thread; call shutdown() to stop it."""
+    server = make_server('127.0.0.1', 0, app, threaded=threaded)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def rentcast_config(server, **overrides):
+    """Flask config pointing the comps handler at a local server."""
+    return {
+        'RENTCAST_API_BASE_URL': f"http://127.0.0.1:{server.server_port}/v1",
+        'RENTCAST_API_KEY': 'test-key',
+        'RENTCAST_COMP_DEFAULTS': {'maxRadius': 1.0, 'daysOld': 180, 'compCount': 10},
+        **overrides
+    }
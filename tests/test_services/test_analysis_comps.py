@@ -0,0 +1,119 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import shutil
+import tempfile
+import threading
+import time
+from flask import Flask, session
+from services.analysis_service import AnalysisService
+from utils.comps_handler import RentcastAPIError
+
+
+PROPERTY_COMPS = {
+    'price': 250000, 'priceRangeLow': 240000, 'priceRangeHigh': 260000,
+    'comparables': [], 'last_run': '2024-01-01T00:00:00'
+}
+RENTAL_COMPS = {'estimated_rent': 1800, 'comparable_rentals': [], 'last_run': '2024-01-01T00:00:00'}
+
+
+class TestAnalysisComps(unittest.TestCase):
+    """Test suite for running property and rental comps together."""
+
+    def setUp(self):
+        """Set up a request context and a stored analysis."""
+        self.app = Flask(__name__)
+        self.app.secret_key = 'test'
+        self.app.config['COMPS_DEADLINE'] = 2
+        self.ctx = self.app.test_request_context()
+        self.ctx.push()
+
+        self.service = AnalysisService()
+        self.analysis = {
+            'id': 'analysis-1', 'analysis_type': 'LTR', 'address': '123 Main St, Springfield, IL 62701',
+            'bedrooms': 3, 'bathrooms': 2, 'square_footage': 1500
+        }
+        patchers = [
+            patch.object(self.service, 'get_analysis', side_effect=lambda *args: dict(self.analysis)),
+            patch.object(self.service, '_save_analysis')
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        """Pop the request context."""
+        self.ctx.pop()
+
+    def _slow(self, result, delay, error=None):
+        def fetch(*args, **kwargs):
+            time.sleep(delay)
+            if error:
+                raise error
+            return dict(result)
+        return fetch
+
+    def test_fetches_run_concurrently(self):
+        """Test that comps take about as long as the slower call, not their sum."""
+        threads = set()
+
+        def rental(*args):
+            threads.add(threading.current_thread().name)
+            return self._slow(RENTAL_COMPS, 0.4)()
+
+        with patch('utils.comps_handler.fetch_property_comps', self._slow(PROPERTY_COMPS, 0.4)), \
+             patch('utils.comps_handler.fetch_rental_comps', rental):
+            start = time.monotonic()
+            result = self.service.run_property_comps('analysis-1', 'test_user')
+            elapsed = time.monotonic() - start
+
+        self.assertLess(elapsed, 0.7)
+        self.assertTrue(all(name.startswith('comps') for name in threads))
+        self.assertEqual(result['comps_data']['estimated_value'], 250000)
+        self.assertEqual(result['comps_data']['rental_comps']['estimated_rent'], 1800)
+
+    def test_rental_failure_or_timeout_keeps_property_result(self):
+        """Test that a failing or slow rental fetch does not hold up property comps."""
+        for rental in (self._slow(None, 0, RentcastAPIError('boom')), self._slow(RENTAL_COMPS, 2)):
+            self.app.config['COMPS_DEADLINE'] = 0.3
+            with patch('utils.comps_handler.fetch_property_comps', self._slow(PROPERTY_COMPS, 0.1)), \
+                 patch('utils.comps_handler.fetch_rental_comps', rental):
+                start = time.monotonic()
+                result = self.service.run_property_comps('analysis-1', 'test_user')
+                elapsed = time.monotonic() - start
+
+            self.assertLess(elapsed, 1)
+            self.assertEqual(result['comps_data']['estimated_value'], 250000)
+            self.assertNotIn('rental_comps', result['comps_data'])
+
+    def test_property_failure_raises(self):
+        """Test that property comps errors surface as before."""
+        with patch('utils.comps_handler.fetch_property_comps', self._slow(None, 0, RentcastAPIError('no match'))), \
+             patch('utils.comps_handler.fetch_rental_comps', self._slow(RENTAL_COMPS, 0)):
+            with self.assertRaises(RentcastAPIError):
+                self.service.run_property_comps('analysis-1', 'test_user')
+
+
+    def test_session_limit_checked_before_rental_call(self):
+        """Test that no rental call goes out once the session has used its comp runs."""
+        self.app.config['MAX_COMP_RUNS_PER_SESSION'] = 1
+        session[f"comps_run_count_{self.analysis['address']}"] = 1
+        rental = MagicMock(return_value=dict(RENTAL_COMPS))
+
+        with patch('utils.comps_handler.fetch_property_comps', self._slow(PROPERTY_COMPS, 0)), \
+             patch('utils.comps_handler.fetch_rental_comps', rental):
+            with self.assertRaisesRegex(RentcastAPIError, 'Maximum comp runs'):
+                self.service.run_property_comps('analysis-1', 'test_user')
+            rental.assert_not_called()
+
+            # Property comps served from the comps cache do not count against the limit
+            comps_dir = tempfile.mkdtemp()
+            self.addCleanup(shutil.rmtree, comps_dir, ignore_errors=True)
+            self.app.config['COMPS_DIR'] = comps_dir
+            with patch('utils.comps_cache.CompsCache.has_entry', return_value=True):
+                result = self.service.run_property_comps('analysis-1', 'test_user')
+
+        self.assertEqual(result['comps_data']['rental_comps']['estimated_rent'], 1800)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,156 @@
+import unittest
+from unittest.mock import patch
+import shutil
+import tempfile
+from flask import Flask
+from services.analysis_service import AnalysisService
+from services.analysis_schema import ANALYSIS_SCHEMA
+from services.analysis_calculations import (
+    create_analysis, DESCRIPTIVE_FIELDS, METRIC_INPUT_FIELDS, METRICS_VERSION
+)
+from utils.json_handler import read_json, write_json
+
+
+class TestAnalysisIncrementalUpdate(unittest.TestCase):
+    """Test suite for incremental metric recalculation on update."""
+
+    def setUp(self):
+        """Set up a temporary analyses directory and test data."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.app = Flask(__name__)
+        self.app.config['ANALYSES_DIR'] = self.temp_dir
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+
+        self.service = AnalysisService()
+        self.ltr_data = {
+            'analysis_type': 'LTR',
+            'analysis_name': 'Test LTR',
+            'address': '123 Test St, Testville, TS 12345',
+            'purchase_price': 200000,
+            'monthly_rent': 2000,
+            'property_taxes': 200,
+            'insurance': 100,
+            'hoa_coa_coop': 0,
+            'management_fee_percentage': 8.0,
+            'capex_percentage': 2.0,
+            'vacancy_percentage': 4.0,
+            'repairs_percentage': 2.0,
+            'loan1_loan_name': 'Primary',
+            'loan1_loan_amount': 160000,
+            'loan1_loan_interest_rate': 6.5,
+            'loan1_loan_term': 360,
+            'loan1_loan_down_payment': 40000,
+            'loan1_loan_closing_costs': 5000,
+            'has_balloon_payment': False
+        }
+
+    def tearDown(self):
+        """Clean up the temporary directory."""
+        self.ctx.pop()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _create(self):
+        return self.service.create_analysis(dict(self.ltr_data), 'test_user')['analysis']
+
+    def test_create_stores_metrics_snapshot(self):
+        """Test that saved analyses carry their metrics snapshot."""
+        created = self._create()
+        stored = self.service._load_stored_analysis(created['id'], 'test_user')
+        self.assertEqual(stored['calculated_metrics'], created['calculated_metrics'])
+
+    def test_descriptive_update_reuses_snapshot(self):
+        """Test that renaming an analysis skips recalculation entirely."""
+        created = self._create()
+        update = {**created, 'analysis_name': 'Renamed', 'notes': 'Walked the property'}
+
+        with patch('services.analysis_service.create_analysis') as mock_create:
+            result = self.service.update_analysis(update, 'test_user')
+
+        mock_create.assert_not_called()
+        self.assertEqual(result['analysis']['analysis_name'], 'Renamed')
+        self.assertEqual(result['analysis']['calculated_metrics'], created['calculated_metrics'])
+
+    def test_reads_served_from_snapshot(self):
+        """Test that reads use a current snapshot and recalculate outdated ones without saving."""
+        created = self._create()
+        with patch('services.analysis_service.create_analysis') as mock_create:
+            analysis = self.service.get_analysis(created['id'], 'test_user')
+        mock_create.assert_not_called()
+        self.assertEqual(analysis['calculated_metrics'], created['calculated_metrics'])
+        self.assertNotIn('metrics_version', analysis)
+
+        # Snapshots from older metric code are recalculated on read, never written back
+        path = self.service._get_analysis_filepath(created['id'], 'test_user')
+        outdated = {**read_json(path), 'metrics_version': METRICS_VERSION - 1,
+                    'calculated_metrics': {'monthly_cash_flow': 'stale'}}
+        write_json(path, outdated)
+        with patch('services.analysis_service.create_analysis', wraps=create_analysis) as mock_create:
+            refreshed = self.service.get_analysis(created['id'], 'test_user')
+            self.service.get_analysis(created['id'], 'test_user')
+        self.assertEqual(mock_create.call_count, 2)
+        self.assertEqual(refreshed['calculated_metrics'], created['calculated_metrics'])
+        self.assertEqual(read_json(path), outdated)
+
+    def test_balloon_reads_recalculated(self):
+        """Test that balloon analyses skip the snapshot since their metrics depend on today's date."""
+        self.ltr_data.update({
+            'has_balloon_payment': True,
+            'balloon_due_date': '2030-01-01',
+            'balloon_refinance_ltv_percentage': 75.0,
+            'balloon_refinance_loan_amount': 150000,
+            'balloon_refinance_loan_interest_rate': 7.0,
+            'balloon_refinance_loan_term': 360,
+            'balloon_refinance_loan_down_payment': 0,
+            'balloon_refinance_loan_closing_costs': 3000
+        })
+        created = self._create()
+        path = self.service._get_analysis_filepath(created['id'], 'test_user')
+        write_json(path, {**read_json(path), 'calculated_metrics': {'monthly_cash_flow': 'stale'}})
+
+        with patch('services.analysis_service.create_analysis', wraps=create_analysis) as mock_create:
+            analysis = self.service.get_analysis(created['id'], 'test_user')
+        self.assertEqual(mock_create.call_count, 1)
+        self.assertEqual(analysis['calculated_metrics'], created['calculated_metrics'])
+
+    def test_metric_update_matches_full_calculation(self):
+        """Test that incremental results match a full recalculation."""
+        created = self._create()
+        changes = [
+            {'monthly_rent': 2400},
+            {'loan1_loan_interest_rate': 7.25},
+            {'vacancy_percentage': 8.0, 'analysis_name': 'Higher vacancy'},
+            {'purchase_price': 210000},
+            {'loan1_loan_closing_costs': 6500},
+        ]
+        for change in changes:
+            with self.subTest(change=change):
+                result = self.service.update_analysis({**created, **change}, 'test_user')
+                updated = result['analysis']
+                full_metrics = create_analysis(updated).get_report_data()['metrics']
+                self.assertEqual(updated['calculated_metrics'], full_metrics)
+
+    def test_unaffected_core_metrics_reused(self):
+        """Test that core metrics untouched by the change are not recomputed."""
+        analysis = create_analysis({**self._create(), 'closing_costs': 1000})
+        previous = analysis.get_report_data()['metrics']
+
+        fresh = create_analysis(dict(analysis.data))
+        with patch.object(type(fresh), 'annual_cash_flow') as mock_annual:
+            metrics = fresh.recalculate_metrics(previous, {'closing_costs'})
+
+        mock_annual.assert_not_called()
+        self.assertEqual(metrics['annual_cash_flow'], previous['annual_cash_flow'])
+
+    def test_unknown_field_forces_full_calculation(self):
+        """Test that unmapped fields fall back to a full recalculation."""
+        self.assertIsNone(create_analysis(self._create()).get_affected_metric_nodes({'analysis_type'}))
+
+    def test_schema_fields_are_mapped(self):
+        """Test that every schema field is either mapped or descriptive."""
+        unmapped = set(ANALYSIS_SCHEMA) - set(METRIC_INPUT_FIELDS) - DESCRIPTIVE_FIELDS
+        self.assertEqual(unmapped, {'analysis_type'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import unittest
+from unittest.mock import patch
+import uuid
+from datetime import datetime
+from services.analysis_calculations import (
+    create_analysis, get_metric_dependencies, LTRAnalysis, LoanCalculator
+)
+
+
+class TestAnalysisMetricGraph(unittest.TestCase):
+    """Test suite for memoized metric nodes on Analysis classes."""
+
+    def setUp(self):
+        """Set up test data."""
+        now = datetime.now().strftime("%Y-%m-%d")
+        self.ltr_data = {
+            'id': str(uuid.uuid4()),
+            'user_id': 'test_user',
+            'created_at': now,
+            'updated_at': now,
+            'analysis_type': 'LTR',
+            'analysis_name': 'Test LTR',
+            'address': '123 Test St, Testville, TS 12345',
+            'purchase_price': 200000,
+            'monthly_rent': 2000,
+            'property_taxes': 200,
+            'insurance': 100,
+            'hoa_coa_coop': 0,
+            'management_fee_percentage': 8.0,
+            'capex_percentage': 2.0,
+            'vacancy_percentage': 4.0,
+            'repairs_percentage': 2.0,
+            'loan1_loan_amount': 160000,
+            'loan1_loan_interest_rate': 6.5,
+            'loan1_loan_term': 360,
+            'loan1_loan_down_payment': 40000,
+            'loan1_loan_closing_costs': 5000,
+            'has_balloon_payment': False
+        }
+
+    def test_report_calculates_each_loan_payment_once(self):
+        """Test that a full report computes each loan payment only once."""
+        analysis = create_analysis(self.ltr_data)
+        with patch.object(LoanCalculator, 'calculate_payment',
+                          wraps=LoanCalculator.calculate_payment) as mock_payment:
+            analysis.get_report_data()
+        self.assertEqual(mock_payment.call_count, 1)
+
+    def test_operating_expenses_memoized(self):
+        """Test that operating expenses are computed at most once per instance."""
+        analysis = create_analysis(self.ltr_data)
+        first = analysis._calculate_operating_expenses()
+        with patch.object(analysis, '_get_money', wraps=analysis._get_money) as mock_get:
+            second = analysis._calculate_operating_expenses()
+        mock_get.assert_not_called()
+        self.assertIs(first, second)
+
+    def test_get_metric_only_computes_requested_nodes(self):
+        """Test that asking for cash-on-cash skips balloon projections."""
+        analysis = create_analysis(self.ltr_data)
+        with patch.object(LTRAnalysis, '_calculate_balloon_years') as mock_balloon:
+            coc = analysis.get_metric('cash_on_cash_return')
+        mock_balloon.assert_not_called()
+        self.assertEqual(str(coc), str(analysis.cash_on_cash_return))
+
+    def test_get_metric_matches_report_data(self):
+        """Test that node values match the report output."""
+        analysis = create_analysis(self.ltr_data)
+        metrics = analysis.get_report_data()['metrics']
+        fresh = create_analysis(self.ltr_data)
+        for key in fresh.CORE_METRIC_NODES:
+            self.assertEqual(str(fresh.get_metric(key)), metrics[key])
+
+    def test_get_metric_unknown(self):
+        """Test that unknown metric names are rejected."""
+        analysis = create_analysis(self.ltr_data)
+        with self.assertRaises(ValueError):
+            analysis.get_metric('not_a_metric')
+
+    def test_invalidate_metrics(self):
+        """Test that invalidation recomputes after data changes."""
+        analysis = create_analysis(self.ltr_data)
+        before = analysis.calculate_monthly_cash_flow()
+        analysis.data['monthly_rent'] = 2500
+        self.assertEqual(analysis.calculate_monthly_cash_flow(), before)
+        analysis.invalidate_metrics()
+        self.assertGreater(analysis.calculate_monthly_cash_flow(), before)
+
+    def test_dependency_graph(self):
+        """Test that declared dependencies are discoverable."""
+        graph = get_metric_dependencies(LTRAnalysis)
+        self.assertIn('calculate_monthly_cash_flow', graph)
+        self.assertIn('_calculate_loan_payments', graph['calculate_monthly_cash_flow'])
+        self.assertIn('annual_cash_flow', graph['cash_on_cash_return'])
+        for dependencies in graph.values():
+            for dependency in dependencies:
+                self.assertIn(dependency, graph)
+
+
+if __name__ == '__main__':
+    unittest.main()
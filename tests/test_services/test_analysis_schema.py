@@ -0,0 +1,175 @@
+import unittest
+import json
+from services.analysis_schema import (
+    ANALYSIS_TYPES, ANALYSIS_VALIDATORS, GENERIC_VALIDATOR, get_validator, to_int, to_float
+)
+from services.analysis_service import AnalysisService
+
+
+class TestCompiledAnalysisValidator(unittest.TestCase):
+    """Test suite for the compiled analysis schema validators."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.metadata = {
+            'id': '6f1c1b52-3f6c-4a59-9f57-5b8a1b6c2d11',
+            'user_id': 'test_user',
+            'created_at': '2024-01-01',
+            'updated_at': '2024-01-02',
+            'address': '123 Test St, Testville, TS 12345'
+        }
+        self.ltr_data = {
+            **self.metadata,
+            'analysis_type': 'LTR',
+            'analysis_name': 'Test LTR',
+            'purchase_price': '$200,000',
+            'monthly_rent': 2000,
+            'property_taxes': 200,
+            'insurance': 100,
+            'management_fee_percentage': '8%',
+            'has_balloon_payment': 'false',
+            'notes': ''
+        }
+        self.lease_data = {
+            **self.metadata,
+            'analysis_type': 'Lease Option',
+            'analysis_name': 'Test Lease Option',
+            'purchase_price': 200000,
+            'monthly_rent': 2000,
+            'property_taxes': 200,
+            'insurance': 100,
+            'option_consideration_fee': 5000,
+            'option_term_months': 24,
+            'strike_price': 220000,
+            'monthly_rent_credit_percentage': 10.0,
+            'rent_credit_cap': 5000
+        }
+
+    def test_validators_compiled_for_each_type(self):
+        """Test that a validator exists for every analysis type."""
+        for analysis_type in ANALYSIS_TYPES:
+            self.assertIs(get_validator(analysis_type), ANALYSIS_VALIDATORS[analysis_type])
+        self.assertIs(get_validator('Flip'), GENERIC_VALIDATOR)
+        self.assertIs(get_validator(None), GENERIC_VALIDATOR)
+
+    def test_valid_data_is_coerced(self):
+        """Test that valid data passes and is coerced to schema types."""
+        coerced, errors = get_validator('LTR')(self.ltr_data)
+        self.assertEqual(errors, [])
+        self.assertEqual(coerced['purchase_price'], 200000)
+        self.assertEqual(coerced['management_fee_percentage'], 8.0)
+        self.assertIs(coerced['has_balloon_payment'], False)
+
+    def test_errors_are_collected(self):
+        """Test that every error is reported in one pass."""
+        data = {
+            **self.ltr_data,
+            'analysis_name': '',
+            'monthly_rent': 0,
+            'purchase_price': 'abc',
+            'vacancy_percentage': 150
+        }
+        _, errors = get_validator('LTR')(data)
+        self.assertEqual(len(errors), 4)
+        self.assertIn("Missing required field: analysis_name", errors)
+        self.assertIn("Invalid monthly_rent: must be a positive number", errors)
+        self.assertIn("Invalid percentage value for vacancy_percentage: 150.0", errors)
+
+    def test_shared_and_type_rules(self):
+        """Test metadata, typical percentage ranges and per-type rules in the same pass."""
+        data = {key: value for key, value in self.ltr_data.items() if key not in ('user_id', 'insurance')}
+        _, errors = get_validator('LTR')({**data, 'capex_percentage': 12})
+        self.assertEqual(errors, ["Missing required field: User ID", "capex_percentage must be between 0% and 10%",
+                                  "Insurance must be greater than 0"])
+
+        balloon = {**self.ltr_data, 'has_balloon_payment': True, 'balloon_due_date': '2020-01-01',
+                   'balloon_refinance_ltv_percentage': 75, 'balloon_refinance_loan_amount': 150000,
+                   'balloon_refinance_loan_interest_rate': 7.0, 'balloon_refinance_loan_term': 480}
+        _, errors = get_validator('LTR')(balloon)
+        self.assertEqual(errors, ["Balloon due date must be in the future",
+                                  "Balloon refinance term must be between 1 and 360 months"])
+
+        brrrr = {**self.ltr_data, 'analysis_type': 'BRRRR', 'after_repair_value': 220000,
+                 'renovation_costs': 30000, 'renovation_duration': 6, 'initial_loan_amount': 150000,
+                 'initial_loan_interest_rate': 10.0, 'initial_loan_term': 12, 'refinance_loan_amount': 165000,
+                 'refinance_loan_interest_rate': 6.5, 'refinance_loan_term': 360}
+        self.assertEqual(get_validator('BRRRR')(brrrr)[1],
+                         ["After repair value must be greater than purchase price plus renovation costs"])
+        self.assertEqual(get_validator('PadSplit BRRRR')({**brrrr, 'after_repair_value': 300000,
+                                                          'initial_loan_term': 36})[1],
+                         ["Initial loan term must be between 1 and 24 months"])
+
+    def test_lease_option_rules(self):
+        """Test lease option specific validation."""
+        _, errors = get_validator('Lease Option')(self.lease_data)
+        self.assertEqual(errors, [])
+
+        data = {**self.lease_data, 'strike_price': 190000, 'option_term_months': 150}
+        _, errors = get_validator('Lease Option')(data)
+        self.assertIn("Strike price must be greater than purchase price", errors)
+        self.assertIn("Option term cannot exceed 120 months", errors)
+
+    def test_multi_family_unit_types(self):
+        """Test that Multi-Family validates unit types instead of monthly rent."""
+        unit = {'type': '2BR', 'count': 4, 'occupied': 3, 'square_footage': 900, 'rent': 1200}
+        data = {
+            **self.metadata,
+            'analysis_type': 'Multi-Family',
+            'analysis_name': 'Test MF',
+            'total_units': 4,
+            'occupied_units': 3,
+            'floors': 2,
+            'property_taxes': 500,
+            'insurance': 300,
+            'elevator_maintenance': 0,
+            'other_income': 0,
+            'hoa_coa_coop': 0,
+            'unit_types': json.dumps([unit])
+        }
+        self.assertEqual(get_validator('Multi-Family')(data)[1], [])
+
+        data['unit_types'] = json.dumps([{**unit, 'rent': 0}])
+        _, errors = get_validator('Multi-Family')(data)
+        self.assertEqual(errors, ["Each unit type must have a positive rent value"])
+
+        data['unit_types'] = json.dumps([{**unit, 'count': 5, 'occupied': 5}])
+        _, errors = get_validator('Multi-Family')(data)
+        self.assertEqual(errors, ["Sum of units must match total units",
+                                  "Sum of occupied units must match total occupied units"])
+
+    def test_converters(self):
+        """Test the shared numeric converters."""
+        self.assertEqual(to_int('$1,250.75'), 1250)
+        self.assertEqual(to_float('6.5%'), 6.5)
+        self.assertIsNone(to_int(''))
+        with self.assertRaises(ValueError):
+            to_float('six')
+
+    def test_normalize_uses_validator_output(self):
+        """Test that normalization coerces through the compiled validator in one pass."""
+        data = {**self.ltr_data, 'strike_price': 'unused', 'balloon_refinance_loan_amount': 'unused'}
+        normalized = AnalysisService().normalize_data(data)
+        self.assertEqual(normalized['purchase_price'], 200000)
+        self.assertEqual(normalized['management_fee_percentage'], 8.0)
+        self.assertIs(normalized['has_balloon_payment'], False)
+        self.assertEqual(normalized['strike_price'], 0)
+        self.assertEqual(normalized['balloon_refinance_loan_amount'], 0)
+        self.assertIsNone(normalized['balloon_due_date'])
+        self.assertEqual(normalized['id'], self.ltr_data['id'])
+
+        with self.assertRaises(ValueError) as context:
+            AnalysisService().normalize_data({**self.ltr_data, 'purchase_price': 'abc', 'monthly_rent': '0'})
+        self.assertIn("purchase_price", str(context.exception))
+        self.assertIn("monthly_rent", str(context.exception))
+
+    def test_service_reports_all_errors(self):
+        """Test that the service raises one ValueError listing every error."""
+        data = {**self.ltr_data, 'monthly_rent': -5, 'capex_percentage': -1}
+        with self.assertRaises(ValueError) as context:
+            AnalysisService().validate_analysis_data(data)
+        self.assertIn("monthly_rent", str(context.exception))
+        self.assertIn("capex_percentage", str(context.exception))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,179 @@
+import unittest
+from unittest.mock import patch
+import time
+import uuid
+from datetime import datetime
+from services.analysis_calculations import create_analysis, LoanCalculator, LoanDetails
+from services.analysis_sensitivity import calculate_sensitivity_grid, loan_payment_grid
+from utils.money import Money, Percentage
+
+
+class TestAnalysisSensitivity(unittest.TestCase):
+    """Test suite for vectorized sensitivity grids."""
+
+    def setUp(self):
+        """Set up test data."""
+        now = datetime.now().strftime("%Y-%m-%d")
+        base = {
+            'id': str(uuid.uuid4()),
+            'user_id': 'test_user',
+            'created_at': now,
+            'updated_at': now,
+            'address': '123 Test St, Testville, TS 12345',
+            'monthly_rent': 2000,
+            'property_taxes': 200,
+            'insurance': 100,
+            'hoa_coa_coop': 50,
+            'management_fee_percentage': 8.0,
+            'capex_percentage': 2.0,
+            'vacancy_percentage': 4.0,
+            'repairs_percentage': 2.0,
+        }
+        self.ltr_data = {
+            **base,
+            'analysis_type': 'LTR',
+            'analysis_name': 'Test LTR',
+            'purchase_price': 200000,
+            'loan1_loan_amount': 160000,
+            'loan1_loan_interest_rate': 6.5,
+            'loan1_loan_term': 360,
+            'loan1_loan_down_payment': 40000,
+            'loan1_loan_closing_costs': 5000,
+            'has_balloon_payment': False
+        }
+        self.brrrr_data = {
+            **base,
+            'analysis_type': 'BRRRR',
+            'analysis_name': 'Test BRRRR',
+            'purchase_price': 150000,
+            'after_repair_value': 250000,
+            'renovation_costs': 40000,
+            'renovation_duration': 4,
+            'initial_loan_amount': 120000,
+            'initial_loan_interest_rate': 10.0,
+            'initial_loan_term': 12,
+            'initial_interest_only': True,
+            'initial_loan_closing_costs': 3000,
+            'refinance_loan_amount': 187500,
+            'refinance_loan_interest_rate': 7.0,
+            'refinance_loan_term': 360,
+            'refinance_loan_closing_costs': 4000
+        }
+
+    def _assert_cell_matches(self, data, grid, index, overrides):
+        """Compare one grid cell against a full calculation with the overrides applied."""
+        metrics = create_analysis({**data, **overrides}).get_report_data()['metrics']
+        cell = grid['metrics']
+        for i in index:
+            cell = {name: values[i] for name, values in cell.items()}
+        self.assertAlmostEqual(cell['monthly_cash_flow'],
+                               float(metrics['monthly_cash_flow'].strip('$').replace(',', '')), delta=0.02)
+        self.assertAlmostEqual(cell['dscr'], float(metrics['dscr']), places=2)
+        self.assertAlmostEqual(cell['cap_rate'], float(metrics['cap_rate'].strip('%')), delta=0.01)
+        coc = metrics['cash_on_cash_return']
+        if coc == 'Infinite':
+            self.assertIsNone(cell['cash_on_cash_return'])
+        else:
+            self.assertAlmostEqual(cell['cash_on_cash_return'], float(coc.strip('%')), delta=0.01)
+
+    def test_ltr_grid_matches_full_calculation(self):
+        """Test LTR grid cells against individually calculated analyses."""
+        variables = [
+            {'field': 'monthly_rent', 'min': 1800, 'max': 2400, 'steps': 4},
+            {'field': 'loan1_loan_interest_rate', 'min': 5.0, 'max': 8.0, 'steps': 3},
+            {'field': 'purchase_price', 'min': 180000, 'max': 220000, 'steps': 3},
+        ]
+        grid = calculate_sensitivity_grid(self.ltr_data, variables)
+        self.assertEqual(grid['shape'], [4, 3, 3])
+
+        for index in [(0, 0, 0), (3, 2, 2), (1, 1, 0), (2, 0, 1)]:
+            overrides = {
+                variable['field']: grid['variables'][axis]['values'][index[axis]]
+                for axis, variable in enumerate(variables)
+            }
+            with self.subTest(overrides=overrides):
+                self._assert_cell_matches(self.ltr_data, grid, index, overrides)
+
+    def test_brrrr_grid_matches_full_calculation(self):
+        """Test BRRRR grid cells, including purchase price in cash invested."""
+        variables = [
+            {'field': 'purchase_price', 'min': 120000, 'max': 180000, 'steps': 3},
+            {'field': 'refinance_loan_interest_rate', 'min': 6.0, 'max': 8.0, 'steps': 3},
+        ]
+        grid = calculate_sensitivity_grid(self.brrrr_data, variables)
+        for index in [(0, 0), (1, 2), (2, 1)]:
+            overrides = {
+                variable['field']: grid['variables'][axis]['values'][index[axis]]
+                for axis, variable in enumerate(variables)
+            }
+            with self.subTest(overrides=overrides):
+                self._assert_cell_matches(self.brrrr_data, grid, index, overrides)
+
+    def test_loan_payment_grid_matches_calculator(self):
+        """Test the vectorized payment against LoanCalculator."""
+        for rate, interest_only in [(0.0, False), (6.5, False), (6.5, True)]:
+            expected = LoanCalculator.calculate_payment(LoanDetails(
+                amount=Money(160000), interest_rate=Percentage(rate),
+                term=360, is_interest_only=interest_only
+            ))
+            actual = float(loan_payment_grid(160000, [rate], 360, interest_only)[0])
+            self.assertAlmostEqual(actual, float(expected.dollars), places=2)
+
+    def test_large_grid_uses_single_analysis(self):
+        """Test that a 50x50 grid builds one Analysis and answers quickly."""
+        variables = [
+            {'field': 'monthly_rent', 'min': 1500, 'max': 2500, 'steps': 50},
+            {'field': 'loan1_loan_interest_rate', 'min': 4.0, 'max': 9.0, 'steps': 50},
+        ]
+        with patch('services.analysis_sensitivity.create_analysis',
+                   wraps=create_analysis) as mock_create:
+            start = time.perf_counter()
+            grid = calculate_sensitivity_grid(self.ltr_data, variables)
+            elapsed = time.perf_counter() - start
+
+        self.assertEqual(mock_create.call_count, 1)
+        self.assertEqual(len(grid['metrics']['dscr']), 50)
+        self.assertEqual(len(grid['metrics']['dscr'][0]), 50)
+        self.assertLess(elapsed, 1.0)
+
+    def test_grid_limited_to_reported_metrics(self):
+        """Test that Lease Option grids leave out the cap rate and DSCR it does not report."""
+        lease_data = {
+            **self.ltr_data,
+            'analysis_type': 'Lease Option',
+            'analysis_name': 'Test Lease Option',
+            'option_consideration_fee': 5000,
+            'option_term_months': 24,
+            'strike_price': 220000,
+            'monthly_rent_credit_percentage': 10.0,
+            'rent_credit_cap': 5000
+        }
+        reported = create_analysis(dict(lease_data)).get_report_data()['metrics']
+        grid = calculate_sensitivity_grid(lease_data, [{'field': 'monthly_rent', 'min': 1800, 'max': 2200,
+                                                        'steps': 3}])
+        self.assertEqual(set(grid['metrics']), {'monthly_cash_flow', 'cash_on_cash_return'})
+        self.assertNotIn('cap_rate', reported)
+        self.assertNotIn('dscr', reported)
+        self.assertEqual(set(calculate_sensitivity_grid(self.ltr_data, [{'field': 'monthly_rent', 'min': 1800,
+                                                                         'max': 2200, 'steps': 3}])['metrics']),
+                         {'monthly_cash_flow', 'cash_on_cash_return', 'cap_rate', 'dscr'})
+
+    def test_invalid_variables(self):
+        """Test rejection of unsupported or malformed variables."""
+        invalid = [
+            [],
+            [{'field': 'notes', 'min': 0, 'max': 1}],
+            [{'field': 'monthly_rent', 'min': 2000, 'max': 1000}],
+            [{'field': 'monthly_rent', 'min': 1000, 'max': 2000, 'steps': 500}],
+            [{'field': 'monthly_rent', 'min': 1, 'max': 2}, {'field': 'monthly_rent', 'min': 1, 'max': 2}],
+            [{'field': field, 'min': 1, 'max': 2} for field in (
+                'monthly_rent', 'purchase_price', 'loan1_loan_interest_rate', 'loan2_loan_interest_rate')],
+        ]
+        for variables in invalid:
+            with self.subTest(variables=variables):
+                with self.assertRaises(ValueError):
+                    calculate_sensitivity_grid(self.ltr_data, variables)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+import unittest
+from unittest.mock import patch
+import uuid
+from datetime import datetime
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from services.analysis_calculations import create_analysis
+from services.analysis_simulation import (
+    run_projection_simulation, calculate_irr, default_simulation_seed, parse_simulation_options, _loan_balance,
+    check_inline_simulation, MAX_INLINE_SIMULATION_PATHS
+)
+from services.report_generator import generate_report
+
+
+class TestAnalysisSimulation(unittest.TestCase):
+    """Test suite for Monte Carlo projections."""
+
+    def setUp(self):
+        """Set up test data."""
+        now = datetime.now().strftime("%Y-%m-%d")
+        self.ltr_data = {
+            'id': str(uuid.uuid4()),
+            'user_id': 'test_user',
+            'created_at': now,
+            'updated_at': now,
+            'analysis_type': 'LTR',
+            'analysis_name': 'Test LTR',
+            'address': '123 Test St, Testville, TS 12345',
+            'purchase_price': 200000,
+            'monthly_rent': 2000,
+            'property_taxes': 200,
+            'insurance': 100,
+            'hoa_coa_coop': 0,
+            'management_fee_percentage': 8.0,
+            'capex_percentage': 2.0,
+            'vacancy_percentage': 4.0,
+            'repairs_percentage': 2.0,
+            'loan1_loan_amount': 160000,
+            'loan1_loan_interest_rate': 6.5,
+            'loan1_loan_term': 360,
+            'loan1_loan_down_payment': 40000,
+            'loan1_loan_closing_costs': 5000,
+            'has_balloon_payment': False
+        }
+        self.no_growth = {
+            'rent_growth': {'type': 'fixed', 'value': 0.0},
+            'expense_growth': {'type': 'fixed', 'value': 0.0},
+            'appreciation': {'type': 'fixed', 'value': 0.0},
+            'vacancy': {'type': 'fixed', 'value': 0.04},
+        }
+
+    def test_fixed_distributions_match_deterministic_cash_flow(self):
+        """Test that zero-variance paths reproduce the analysis cash flow."""
+        results = run_projection_simulation(self.ltr_data, paths=10, years=5,
+                                             distributions=self.no_growth, seed=1)
+        annual_cf = create_analysis(dict(self.ltr_data)).get_metric('annual_cash_flow')
+        self.assertAlmostEqual(results['annual_cash_flow']['p5'][0], float(annual_cf.dollars), places=1)
+        self.assertEqual(results['annual_cash_flow']['p5'], results['annual_cash_flow']['p95'])
+
+    def test_percentile_bands_are_ordered(self):
+        """Test band shape and ordering for a random run."""
+        results = run_projection_simulation(self.ltr_data, paths=2000, years=10, seed=7)
+        self.assertEqual(results['years'], list(range(1, 11)))
+        for metric in ('annual_cash_flow', 'equity'):
+            bands = results[metric]
+            self.assertEqual(len(bands['p50']), 10)
+            for year in range(10):
+                self.assertLessEqual(bands['p5'][year], bands['p50'][year])
+                self.assertLessEqual(bands['p50'][year], bands['p95'][year])
+        self.assertLessEqual(results['irr']['p5'], results['irr']['p95'])
+
+    def test_seeded_runs_are_reproducible(self):
+        """Test that a seed gives identical results and a different seed does not."""
+        first = run_projection_simulation(self.ltr_data, paths=1000, seed=42)
+        self.assertEqual(first, run_projection_simulation(self.ltr_data, paths=1000, seed=42))
+        self.assertNotEqual(first['equity'], run_projection_simulation(self.ltr_data, paths=1000, seed=43)['equity'])
+
+    def test_large_runs_use_process_pool(self):
+        """Test that large runs are split across worker processes with the same results."""
+        with patch('services.analysis_simulation.PARALLEL_SIMULATION_THRESHOLD', 1000), \
+             patch('services.analysis_simulation.SIMULATION_CHUNK_SIZE', 500), \
+             patch('services.analysis_simulation.ProcessPoolExecutor', wraps=ProcessPoolExecutor) as mock_pool:
+            parallel = run_projection_simulation(self.ltr_data, paths=2000, seed=3, max_workers=2)
+            serial = run_projection_simulation(self.ltr_data, paths=2000, seed=3, max_workers=1)
+        mock_pool.assert_called_once_with(max_workers=2)
+        self.assertEqual(parallel['equity'], serial['equity'])
+        self.assertEqual(parallel['irr'], serial['irr'])
+
+    def test_irr(self):
+        """Test the vectorized IRR solver."""
+        flows = np.array([[-1000, 100, 100, 1100], [-1000, 0, 0, 1331]], dtype=float)
+        irr = calculate_irr(flows)
+        np.testing.assert_allclose(irr, [0.10, 0.10], atol=1e-6)
+        self.assertTrue(np.isnan(calculate_irr(np.array([[100.0, 100.0]])))[0])
+
+    def test_loan_balance(self):
+        """Test remaining balance against known amortization values."""
+        balance = _loan_balance(160000, 6.5, 360, [0, 360])
+        self.assertAlmostEqual(float(balance[0]), 160000, places=2)
+        self.assertEqual(float(balance[1]), 0.0)
+        self.assertAlmostEqual(float(_loan_balance(100000, 6.0, 360, 120)), 83685.71, delta=1.0)
+
+    def test_invalid_options(self):
+        """Test validation of simulation options."""
+        with self.assertRaises(ValueError):
+            run_projection_simulation(self.ltr_data, paths=0)
+        with self.assertRaises(ValueError):
+            run_projection_simulation(self.ltr_data, distributions={'interest': {'type': 'fixed', 'value': 1}})
+        with self.assertRaises(ValueError):
+            run_projection_simulation(self.ltr_data, distributions={'vacancy': {'type': 'beta'}})
+        with self.assertRaises(ValueError):
+            parse_simulation_options({'paths': 'many'})
+
+    def test_inline_simulation_capped(self):
+        """Test that runs too large for a web request are sent to the report job queue."""
+        options = parse_simulation_options({'paths': MAX_INLINE_SIMULATION_PATHS})
+        self.assertIs(check_inline_simulation(options), options)
+        with self.assertRaisesRegex(ValueError, 'report job'):
+            check_inline_simulation(parse_simulation_options({'paths': MAX_INLINE_SIMULATION_PATHS + 1}))
+
+    def test_default_seed_follows_analysis_version(self):
+        """Test that report simulations are reproducible until the analysis is edited."""
+        seed = parse_simulation_options({'paths': '500'}, self.ltr_data)['seed']
+        self.assertEqual(seed, default_simulation_seed(dict(self.ltr_data)))
+        self.assertNotEqual(seed, default_simulation_seed({**self.ltr_data, 'updated_at': '2099-01-01'}))
+        self.assertEqual(parse_simulation_options({'seed': '7'}, self.ltr_data)['seed'], 7)
+        self.assertNotIn('seed', parse_simulation_options({}))
+
+    def test_report_includes_simulation_section(self):
+        """Test that the PDF report renders with simulation results attached."""
+        data = dict(self.ltr_data)
+        data['calculated_metrics'] = create_analysis(dict(data)).get_report_data()['metrics']
+        data['projection_simulation'] = run_projection_simulation(data, paths=500, seed=5)
+        buffer = generate_report(data)
+        self.assertTrue(buffer.getvalue().startswith(b'%PDF'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+import unittest
+from unittest.mock import patch
+import json
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from flask import Flask
+from services.comps_refresh import CALLS_PER_REFRESH, CompsRefreshScheduler, TokenBucket
+from tests.stub_servers import StubRentcast, rentcast_config, start_server
+
+
+class TestCompsRefresh(unittest.TestCase):
+    """Test suite for the background comps refresh scheduler."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Start the stub RentCast server."""
+        cls.stub = StubRentcast()
+        cls.stub.price, cls.stub.rent = 310000, 2100
+        cls.server = start_server(cls.stub)
+
+    @classmethod
+    def tearDownClass(cls):
+        """Stop the stub server."""
+        cls.server.shutdown()
+
+    def setUp(self):
+        """Set up an app with stale, fresh and never-run analyses."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.stub.requests.clear()
+        self.stub.status = 200
+        self.app = Flask(__name__)
+        self.app.config.update(rentcast_config(
+            self.server,
+            ANALYSES_DIR=os.path.join(self.temp_dir, 'analyses'),
+            COMPS_DIR=os.path.join(self.temp_dir, 'comps'),
+            MAX_COMP_RUNS_PER_SESSION=0  # Background refreshes are not bound by the session limit
+        ))
+        os.makedirs(self.app.config['ANALYSES_DIR'])
+        self.state_file = os.path.join(self.temp_dir, 'comps_refresh.json')
+
+        self.stale = [self._write_analysis(days_old) for days_old in (45, 90, 60)]
+        self.fresh = self._write_analysis(5)
+        self.never_run = self._write_analysis(None)
+
+    def tearDown(self):
+        """Clean up the temporary directory."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _write_analysis(self, days_old):
+        analysis_id = str(uuid.uuid4())
+        analysis = {
+            'id': analysis_id, 'user_id': 'user@example.com', 'analysis_type': 'LTR',
+            'analysis_name': 'Test', 'address': f"{len(os.listdir(self.app.config['ANALYSES_DIR']))} Main St",
+            'bedrooms': 3, 'bathrooms': 2, 'square_footage': 1500, 'purchase_price': 250000
+        }
+        if days_old is not None:
+            last_run = (datetime.utcnow() - timedelta(days=days_old)).isoformat()
+            analysis['comps_data'] = {'last_run': last_run, 'run_count': 2, 'estimated_value': 250000}
+        filename = f"{analysis_id}_user@example.com.json"
+        with open(os.path.join(self.app.config['ANALYSES_DIR'], filename), 'w') as f:
+            json.dump(analysis, f)
+        return filename
+
+    def _read(self, filename):
+        with open(os.path.join(self.app.config['ANALYSES_DIR'], filename), 'r') as f:
+            return json.load(f)
+
+    def _scheduler(self, **kwargs):
+        return CompsRefreshScheduler(self.app, self.state_file, interval=60, **kwargs)
+
+    def test_refreshes_stale_analyses_oldest_first(self):
+        """Test that only stale analyses are refreshed and saved with update_analysis_comps."""
+        scheduler = self._scheduler()
+        self.assertEqual(scheduler.find_stale(), [self.stale[1], self.stale[2], self.stale[0]])
+
+        summary = scheduler.run_batch()
+
+        self.assertEqual((summary['refreshed'], summary['failed'], summary['remaining']), (3, 0, 0))
+        self.assertEqual(len(self.stub.requests), 3 * CALLS_PER_REFRESH)
+        refreshed = self._read(self.stale[0])
+        self.assertEqual(refreshed['comps_data']['estimated_value'], 310000)
+        self.assertEqual(refreshed['comps_data']['run_count'], 2)
+        self.assertEqual(refreshed['comps_data']['rental_comps']['estimated_rent'], 2100)
+        self.assertIn('mao', refreshed['comps_data'])
+        self.assertNotIn('comps_data', self._read(self.never_run))
+        self.assertEqual(self._read(self.fresh)['comps_data']['estimated_value'], 250000)
+
+        self.assertEqual(scheduler.find_stale(), [])
+        self.assertEqual(scheduler.status()['refreshed'], 3)
+
+    def test_token_budget_and_resume_after_restart(self):
+        """Test that the bucket caps calls and the queue survives a restart."""
+        scheduler = self._scheduler(batch_size=1, monthly_calls=30)
+        self.assertEqual(scheduler.run_batch()['refreshed'], 1)
+        summary = scheduler.run_batch()
+        self.assertEqual((summary['refreshed'], summary['remaining']), (0, 2))
+        self.assertGreater(summary['next_tokens_in'], 0)
+
+        # A new scheduler picks up the persisted queue and budget
+        restarted = self._scheduler(batch_size=1, monthly_calls=30)
+        self.assertEqual(restarted.status()['queued'], 2)
+        self.assertEqual(restarted.run_batch()['refreshed'], 0)
+        with patch('services.comps_refresh.time.time', return_value=time.time() + 3 * 24 * 60 * 60):
+            self.assertEqual(restarted.run_batch()['refreshed'], 1)
+        self.assertEqual(len(self.stub.requests), 2 * CALLS_PER_REFRESH)
+
+    def test_rate_limited_upstream_pauses_refresh(self):
+        """Test that a 429 drains the budget and keeps the analysis queued."""
+        self.stub.status = 429
+        scheduler = self._scheduler()
+        summary = scheduler.run_batch()
+
+        self.assertEqual((summary['refreshed'], summary['failed'], summary['remaining']), (0, 0, 3))
+        self.assertLess(scheduler.status()['tokens'], CALLS_PER_REFRESH)
+        self.assertEqual(scheduler.status()['backing_off'], 0)
+
+    def test_token_bucket(self):
+        """Test refill over time, capacity and draining."""
+        bucket = TokenBucket(rate=1.0, capacity=4, tokens=0, updated=time.time() - 10)
+        self.assertTrue(bucket.try_acquire(4))
+        self.assertFalse(bucket.try_acquire(1))
+        self.assertGreater(bucket.time_until(2), 1)
+        bucket.drain()
+        self.assertEqual(bucket.to_dict()['tokens'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+from flask import Flask
+from services.document_export import collect_documents, document_filename, stream_documents_zip
+
+
+class TestDocumentExport(unittest.TestCase):
+    """Test suite for the streaming document ZIP export."""
+
+    def setUp(self):
+        """Set up an upload folder with a few documents."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.upload_folder = os.path.join(self.temp_dir, 'uploads')
+        os.makedirs(self.upload_folder)
+        self.files = {
+            'receipt.pdf': os.urandom(5000),
+            'notes.txt': b'repairs ' * 2000,
+            'large.csv': b'date,amount\n' * 50000
+        }
+        for name, data in self.files.items():
+            with open(os.path.join(self.upload_folder, name), 'wb') as f:
+                f.write(data)
+
+    def tearDown(self):
+        """Clean up the temporary directory."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _build(self, filenames, **kwargs):
+        chunks = list(stream_documents_zip(filenames, self.upload_folder, **kwargs))
+        return chunks, zipfile.ZipFile(io.BytesIO(b''.join(chunks)))
+
+    def test_document_filename(self):
+        """Test filenames from plain values and artifact links."""
+        link = '<button onclick="window.open(\'/transactions/artifact/my%20receipt.pdf\')">View</button>'
+        self.assertEqual(document_filename(link), 'my receipt.pdf')
+        self.assertEqual(document_filename(link.replace('.pdf', '.pdf?v=0123456789abcdef')), 'my receipt.pdf')
+        self.assertEqual(document_filename('receipt.pdf'), 'receipt.pdf')
+        self.assertIsNone(document_filename(''))
+        self.assertIsNone(document_filename(None))
+
+        transactions = [
+            {'documentation_file': 'receipt.pdf', 'reimbursement_documentation': 'notes.txt'},
+            {'documentation_file': 'receipt.pdf', 'reimbursement_documentation': ''},
+            {'documentation_file': None}
+        ]
+        self.assertEqual(collect_documents(transactions), ['receipt.pdf', 'notes.txt'])
+
+    def test_archive_contents_and_manifest(self):
+        """Test compression choice and the manifest sizes and checksums."""
+        with patch('services.document_export.EXPORT_PRELOAD_MAX_BYTES', 100000):
+            _, archive = self._build(['receipt.pdf', 'notes.txt', 'large.csv', 'missing.pdf', '../secret.txt'])
+
+        for name, data in self.files.items():
+            self.assertEqual(archive.read(f'documents/{name}'), data)
+        self.assertEqual(archive.getinfo('documents/receipt.pdf').compress_type, zipfile.ZIP_STORED)
+        self.assertEqual(archive.getinfo('documents/notes.txt').compress_type, zipfile.ZIP_DEFLATED)
+
+        manifest = json.loads(archive.read('manifest.json'))
+        self.assertEqual(manifest['total_documents'], 3)
+        self.assertEqual(sorted(manifest['missing']), ['../secret.txt', 'missing.pdf'])
+        for entry in manifest['documents']:
+            data = self.files[entry['name']]
+            self.assertEqual(entry['size'], len(data))
+            self.assertEqual(entry['sha256'], hashlib.sha256(data).hexdigest())
+        self.assertIn(hashlib.sha256(self.files['large.csv']).hexdigest(),
+                      archive.read('document_summary.txt').decode())
+        self.assertIsNone(archive.testzip())
+
+    def test_large_files_streamed_in_chunks(self):
+        """Test that files over the preload limit are written in bounded chunks."""
+        with patch('services.document_export.EXPORT_PRELOAD_MAX_BYTES', 1000), \
+             patch('services.document_export.EXPORT_CHUNK_SIZE', 4096):
+            chunks, archive = self._build(['receipt.pdf', 'large.csv'], max_workers=2)
+
+        self.assertGreater(len(chunks), 10)
+        self.assertLess(max(len(chunk) for chunk in chunks), 10000)
+        self.assertEqual(archive.read('documents/large.csv'), self.files['large.csv'])
+
+    def test_export_route(self):
+        """Test that the route filters transactions and streams the archive."""
+        from routes.transactions import transactions_bp
+        app = Flask(__name__)
+        app.config['UPLOAD_FOLDER'] = self.upload_folder
+        app.config['LOGIN_DISABLED'] = True
+        app.register_blueprint(transactions_bp, url_prefix='/transactions')
+
+        transactions = [
+            {'type': 'expense', 'description': 'Plumber', 'documentation_file': 'receipt.pdf',
+             'reimbursement_documentation': ''},
+            {'type': 'income', 'description': 'Rent', 'documentation_file': 'notes.txt',
+             'reimbursement_documentation': ''}
+        ]
+        with patch('routes.transactions.current_user', MagicMock(id='test_user', role='User')), \
+             patch('routes.transactions.get_transactions_for_view', return_value=transactions) as mock_view:
+            response = app.test_client().get(
+                '/transactions/documents/export?property_id=all&transaction_type=expense&start_date=2024-01-01'
+            )
+            body = response.get_data()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/zip')
+        self.assertIn('attachment', response.headers['Content-Disposition'])
+        self.assertNotIn('Content-Length', response.headers)
+        self.assertEqual(mock_view.call_args[0][2:6], (None, None, '2024-01-01', None))
+        names = zipfile.ZipFile(io.BytesIO(body)).namelist()
+        self.assertIn('documents/receipt.pdf', names)
+        self.assertNotIn('documents/notes.txt', names)
+
+
+if __name__ == '__main__':
+    unittest.main()
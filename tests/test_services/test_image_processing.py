@@ -0,0 +1,116 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import io
+import os
+import shutil
+import tempfile
+import time
+from flask import Flask
+from PIL import Image
+from services.image_processing import (create_thumbnail, downscale_image, optimize_stored_image,
+                                       schedule_image_optimization)
+from services.upload_store import UploadStore
+
+
+def make_jpeg(size, orientation=None):
+    image = Image.new('RGB', size, 'red')
+    exif = Image.Exif()
+    exif[0x010F] = 'Phone Maker'
+    if orientation:
+        exif[0x0112] = orientation
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', exif=exif.tobytes())
+    return buffer.getvalue()
+
+
+class TestImageProcessing(unittest.TestCase):
+    """Test suite for upload image downscaling and thumbnails."""
+
+    def setUp(self):
+        """Set up an upload store."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.upload_folder = os.path.join(self.temp_dir, 'uploads')
+        os.makedirs(self.upload_folder)
+        self.store = UploadStore(self.upload_folder)
+
+    def tearDown(self):
+        """Clean up the temporary directory."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _attach(self, transaction_id, filename, data):
+        blob = self.store.put(io.BytesIO(data))
+        self.store.link(transaction_id, 'documentation_file', filename, blob)
+        return blob
+
+    def test_downscale_strips_exif_and_keeps_orientation(self):
+        """Test the size cap, upright pixels and removed EXIF data."""
+        processed = downscale_image(make_jpeg((3000, 2000), orientation=6))
+
+        with Image.open(io.BytesIO(processed)) as image:
+            self.assertEqual(image.format, 'JPEG')
+            self.assertEqual(max(image.size), 800)
+            self.assertGreater(image.height, image.width)  # Rotated upright
+            self.assertEqual(len(image.getexif()), 0)
+
+        # Small images keep their format and only lose metadata
+        with Image.open(io.BytesIO(downscale_image(make_jpeg((300, 200))))) as image:
+            self.assertEqual((image.size, len(image.getexif())), ((300, 200), 0))
+
+        buffer = io.BytesIO()
+        Image.new('RGBA', (300, 200)).save(buffer, 'PNG')
+        self.assertIsNone(downscale_image(buffer.getvalue()))
+        self.assertEqual(Image.open(io.BytesIO(create_thumbnail(buffer.getvalue(), 100))).size, (100, 67))
+
+    def test_stored_image_replaced_for_all_documents(self):
+        """Test that optimizing a shared blob moves every document to the smaller copy."""
+        original = make_jpeg((2400, 1800))
+        blob = self._attach(1, 'trans_1_receipt.jpg', original)
+        self._attach(2, 'trans_2_receipt.jpg', original)
+
+        optimized = schedule_image_optimization(self.store, blob['sha256']).result(timeout=30)
+
+        self.assertLess(optimized['size'], len(original))
+        self.assertFalse(os.path.exists(self.store.blob_path(blob['sha256'])))
+        for name in ('trans_1_receipt.jpg', 'trans_2_receipt.jpg'):
+            self.assertEqual(self.store.resolve(name), self.store.blob_path(optimized['sha256']))
+        self.assertEqual(self.store.usage()['blobs'], 1)
+
+        # Already optimized images are left alone
+        self.assertIsNone(optimize_stored_image(self.store, optimized['sha256']))
+        self.assertIsNone(optimize_stored_image(self.store, '0' * 64))
+
+    def test_thumbnail_rendered_once_and_collected(self):
+        """Test lazy thumbnails, their on-disk cache and cleanup with the document."""
+        from routes.transactions import transactions_bp
+        app = Flask(__name__)
+        app.config['UPLOAD_FOLDER'] = self.upload_folder
+        app.config['LOGIN_DISABLED'] = True
+        app.register_blueprint(transactions_bp, url_prefix='/transactions')
+        blob = self._attach(1, 'trans_1_receipt.jpg', make_jpeg((1000, 600)))
+        url = '/transactions/artifact/trans_1_receipt.jpg?size=thumb'
+
+        with patch('routes.transactions.current_user', MagicMock(id='test_user', role='User')):
+            client = app.test_client()
+            response = client.get(url)
+            thumbnail = response.get_data()
+            response.close()
+            with patch('services.image_processing.create_thumbnail') as mock_create:
+                cached = client.get(url)
+                cached.close()
+            mock_create.assert_not_called()
+
+        self.assertEqual(response.mimetype, 'image/jpeg')
+        self.assertEqual(Image.open(io.BytesIO(thumbnail)).size, (200, 120))
+        self.assertEqual(response.headers['ETag'], f'"{blob["sha256"]}-thumb"')
+        self.assertEqual(cached.status_code, 200)
+
+        derivative = self.store.derivative_path(blob['sha256'], 'thumb')
+        self.assertTrue(os.path.exists(derivative))
+        self.store.unlink(1, 'documentation_file')
+        with patch('services.upload_store.time.time', return_value=time.time() + 7200):
+            self.store.collect_garbage()
+        self.assertFalse(os.path.exists(derivative))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+import unittest
+from unittest.mock import patch
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from flask import Flask
+from pypdf import PdfReader
+from services.analysis_service import AnalysisService
+from services.portfolio_report import concatenate_pdfs, generate_portfolio_report, render_analysis_part
+from services.report_cache import report_cache_key
+
+
+class TestPortfolioReport(unittest.TestCase):
+    """Test suite for batch portfolio reports."""
+
+    def setUp(self):
+        """Set up temporary directories and a few analyses."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.temp_dir, 'report_cache')
+        self.app = Flask(__name__)
+        self.app.config['ANALYSES_DIR'] = os.path.join(self.temp_dir, 'analyses')
+        self.app.config['REPORT_CACHE_DIR'] = self.cache_dir
+        os.makedirs(self.app.config['ANALYSES_DIR'])
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+
+        self.service = AnalysisService()
+        base = {
+            'analysis_type': 'LTR',
+            'address': '123 Test St, Testville, TS 12345',
+            'purchase_price': 200000,
+            'property_taxes': 200,
+            'insurance': 100,
+            'management_fee_percentage': 8.0,
+            'capex_percentage': 2.0,
+            'vacancy_percentage': 4.0,
+            'repairs_percentage': 2.0,
+            'loan1_loan_amount': 160000,
+            'loan1_loan_interest_rate': 6.5,
+            'loan1_loan_term': 360,
+            'loan1_loan_down_payment': 40000,
+            'loan1_loan_closing_costs': 5000,
+            'has_balloon_payment': False
+        }
+        self.ids = [
+            self.service.create_analysis(
+                {**base, 'analysis_name': f'Deal {rent}', 'monthly_rent': rent}, 'test_user'
+            )['analysis']['id']
+            for rent in (1800, 2000, 2200)
+        ]
+
+    def tearDown(self):
+        """Clean up the temporary directory."""
+        self.ctx.pop()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _page_count(self, path):
+        return len(PdfReader(path).pages)
+
+    def test_merged_report_has_summary_and_all_parts(self):
+        """Test that the merged PDF is the summary followed by every analysis report."""
+        path = self.service.generate_portfolio_report('test_user', self.ids, max_workers=1)
+        analyses = self.service._prepare_portfolio_data('test_user', self.ids)
+        part_pages = sum(
+            self._page_count(render_analysis_part(analysis, report_cache_key(analysis), self.cache_dir, 10 ** 9))
+            for analysis in analyses
+        )
+
+        reader = PdfReader(path)
+        self.assertEqual(len(reader.pages), part_pages + 1)
+        summary_text = reader.pages[0].extract_text()
+        for rent in (1800, 2000, 2200):
+            self.assertIn(f'Deal {rent}', summary_text)
+        self.assertEqual([item.title for item in reader.outline], ['Deal 1800', 'Deal 2000', 'Deal 2200'])
+
+    def test_all_analyses_for_user(self):
+        """Test that omitting ids includes every analysis of the user."""
+        analyses = self.service._prepare_portfolio_data('test_user')
+        self.assertEqual(sorted(a['id'] for a in analyses), sorted(self.ids))
+        with self.assertRaises(ValueError):
+            self.service._prepare_portfolio_data('nobody')
+
+    def test_parts_render_in_parallel_and_are_reused(self):
+        """Test that uncached parts go to a process pool and cached ones are reused."""
+        analyses = self.service._prepare_portfolio_data('test_user', self.ids)
+        with patch('services.portfolio_report.ProcessPoolExecutor', wraps=ProcessPoolExecutor) as mock_pool:
+            first = generate_portfolio_report(analyses, self.cache_dir, 10 ** 9, max_workers=2)
+        mock_pool.assert_called_once_with(max_workers=2)
+
+        # A different selection reuses the cached parts without a pool
+        with patch('services.portfolio_report.ProcessPoolExecutor') as mock_pool, \
+             patch('services.portfolio_report.render_analysis_part') as mock_render:
+            second = generate_portfolio_report(analyses[:2], self.cache_dir, 10 ** 9, max_workers=2)
+        mock_pool.assert_not_called()
+        mock_render.assert_not_called()
+        self.assertNotEqual(first, second)
+        self.assertTrue(os.path.exists(second))
+
+        # The same selection is served from the cache
+        self.assertEqual(generate_portfolio_report(analyses, self.cache_dir, 10 ** 9), first)
+
+    def test_parts_are_streamed_one_at_a_time(self):
+        """Test that each part is written out before the next one is read."""
+        analyses = self.service._prepare_portfolio_data('test_user', self.ids)
+        paths = [render_analysis_part(analysis, report_cache_key(analysis), self.cache_dir, 10 ** 9)
+                 for analysis in analyses]
+        merged_path = os.path.join(self.temp_dir, 'merged.pdf')
+        sizes = []
+
+        with open(merged_path, 'wb') as f:
+            def parts():
+                for index, path in enumerate(paths):
+                    sizes.append(f.tell())
+                    yield path, f'Part {index}'
+            pages = concatenate_pdfs(parts(), f)
+
+        self.assertTrue(all(later > earlier for earlier, later in zip(sizes, sizes[1:])))
+        reader = PdfReader(merged_path, strict=True)
+        self.assertEqual(len(reader.pages), pages)
+        self.assertEqual(pages, sum(self._page_count(path) for path in paths))
+        self.assertEqual([reader.get_destination_page_number(item) for item in reader.outline],
+                         [0, self._page_count(paths[0]), self._page_count(paths[0]) + self._page_count(paths[1])])
+
+    def test_invalid_selection(self):
+        """Test rejection of empty or unknown selections."""
+        with self.assertRaises(ValueError):
+            generate_portfolio_report([], self.cache_dir, 10 ** 9)
+        with self.assertRaises(ValueError):
+            self.service.generate_portfolio_report('test_user', ['6f1c1b52-3f6c-4a59-9f57-5b8a1b6c2d11'])
+
+
+if __name__ == '__main__':
+    unittest.main()
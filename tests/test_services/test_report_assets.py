@@ -0,0 +1,143 @@
+import unittest
+from unittest.mock import patch
+import copy
+import os
+import shutil
+import tempfile
+from io import BytesIO
+from pypdf import PdfReader
+from services.analysis_calculations import create_analysis
+from services.report_assets import ChartCache, chart_cache, get_logo, schedule_fingerprint
+from services.report_generator import (BRAND_CONFIG, ChartGenerator, PropertyReportGenerator,
+                                       generate_report)
+
+
+class TestReportAssets(unittest.TestCase):
+    """Test suite for the shared report rendering assets."""
+
+    def setUp(self):
+        """Set up analysis data and a clean chart cache."""
+        self.temp_dir = tempfile.mkdtemp()
+        chart_cache.clear()
+
+        self.data = {
+            'analysis_type': 'LTR',
+            'analysis_name': 'Test LTR',
+            'address': '123 Test St, Testville, TS 12345',
+            'purchase_price': 200000,
+            'monthly_rent': 2000,
+            'property_taxes': 200,
+            'insurance': 100,
+            'management_fee_percentage': 8.0,
+            'capex_percentage': 2.0,
+            'vacancy_percentage': 4.0,
+            'repairs_percentage': 2.0,
+            'loan1_loan_amount': 160000,
+            'loan1_loan_interest_rate': 6.5,
+            'loan1_loan_term': 360,
+            'loan1_loan_down_payment': 40000,
+            'loan1_loan_closing_costs': 5000,
+            'has_balloon_payment': False,
+            'id': '6f1c1b52-3f6c-4a59-9f57-5b8a1b6c2d11',
+            'user_id': 'test_user',
+            'created_at': '2024-01-01',
+            'updated_at': '2024-01-01'
+        }
+        self.data['calculated_metrics'] = create_analysis(dict(self.data)).get_report_data()['metrics']
+
+        self.schedule = {
+            'total_schedule': [
+                {'month': m, 'ending_balance': 1000 - m * 10, 'principal_payment': 10, 'interest_payment': 5}
+                for m in range(1, 101)
+            ],
+            'balloon_data': None
+        }
+
+    def tearDown(self):
+        """Clean up the temporary directory."""
+        chart_cache.clear()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_chart_reused_across_reports(self):
+        """Test that a second report with the same loan schedule reuses the chart."""
+        generate_report(copy.deepcopy(self.data))
+        self.assertEqual((chart_cache.hits, chart_cache.misses), (0, 1))
+
+        with patch.object(ChartGenerator, '_render_amortization_chart') as mock_render:
+            pdf = generate_report({**copy.deepcopy(self.data), 'monthly_rent': 2100})
+        mock_render.assert_not_called()
+        self.assertEqual(chart_cache.hits, 1)
+        self.assertGreater(len(PdfReader(pdf).pages), 0)
+
+    def test_schedule_fingerprint(self):
+        """Test that the fingerprint follows the drawn values and the balloon month."""
+        fingerprint = schedule_fingerprint(self.schedule)
+        self.assertEqual(fingerprint, schedule_fingerprint(copy.deepcopy(self.schedule)))
+
+        changed = copy.deepcopy(self.schedule)
+        changed['total_schedule'][50]['ending_balance'] += 1
+        self.assertNotEqual(fingerprint, schedule_fingerprint(changed))
+        self.assertNotEqual(
+            fingerprint, schedule_fingerprint({**self.schedule, 'balloon_data': {'months_to_balloon': 60}})
+        )
+
+    def test_chart_cache_is_bounded(self):
+        """Test LRU eviction and that failed renders are not cached."""
+        cache = ChartCache(max_entries=2)
+        cache.get_or_render('a', lambda: b'a')
+        cache.get_or_render('b', lambda: b'b')
+        cache.get_or_render('a', lambda: b'stale')
+        cache.get_or_render('c', lambda: b'c')
+        self.assertEqual(cache.get_or_render('a', lambda: b'new'), b'a')
+        self.assertEqual(cache.get_or_render('b', lambda: b'new'), b'new')
+
+        def fail():
+            raise ValueError("No amortization schedule data available")
+        with self.assertRaises(ValueError):
+            cache.get_or_render('d', fail)
+        self.assertEqual(cache.get_or_render('d', lambda: b'd'), b'd')
+
+        # Chart errors fall back to an uncached placeholder image
+        buffer = ChartGenerator().create_amortization_chart({'total_schedule': []})
+        self.assertTrue(buffer.getvalue().startswith(b'\x89PNG'))
+        self.assertEqual(chart_cache.misses, 1)
+        self.assertEqual(len(chart_cache._entries), 0)
+
+    def test_logo_loaded_once_until_changed(self):
+        """Test that the logo is decoded once and reloaded when the file changes."""
+        logo_path = os.path.join(self.temp_dir, 'logo.png')
+        shutil.copyfile(BRAND_CONFIG['logo_path'], logo_path)
+
+        logo = get_logo(logo_path)
+        self.assertIsNotNone(logo)
+        self.assertIs(get_logo(logo_path), logo)
+
+        stat = os.stat(logo_path)
+        os.utime(logo_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        self.assertIsNot(get_logo(logo_path), logo)
+        self.assertIsNone(get_logo(os.path.join(self.temp_dir, 'missing.png')))
+
+    def test_styles_shared(self):
+        """Test that generators share one stylesheet."""
+        first = PropertyReportGenerator(copy.deepcopy(self.data))
+        second = PropertyReportGenerator(copy.deepcopy(self.data))
+        self.assertIs(first.styles, second.styles)
+        self.assertIn('BrandHeading3', first.styles)
+
+    def test_native_amortization_chart(self):
+        """Test the reportlab chart fast path."""
+        with patch('services.report_generator.NATIVE_AMORTIZATION_CHART', True), \
+             patch.object(ChartGenerator, '_render_amortization_chart') as mock_render:
+            pdf = generate_report(copy.deepcopy(self.data))
+        mock_render.assert_not_called()
+        self.assertIsInstance(pdf, BytesIO)
+        self.assertGreater(len(PdfReader(pdf).pages), 0)
+
+        drawing = ChartGenerator().create_amortization_drawing(
+            {**self.schedule, 'balloon_data': {'months_to_balloon': 60}}, 288, 216
+        )
+        self.assertEqual((drawing.width, drawing.height), (288, 216))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import copy
+import os
+import shutil
+import tempfile
+from flask import Flask
+from services.analysis_calculations import create_analysis
+from services.analysis_service import AnalysisService
+from services.report_cache import ReportCache, report_cache_key
+from services.report_generator import generate_report
+
+
+class TestReportCache(unittest.TestCase):
+    """Test suite for the content-addressed PDF report cache."""
+
+    def setUp(self):
+        """Set up a temporary cache directory and test data."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.app = Flask(__name__)
+        self.app.config['ANALYSES_DIR'] = os.path.join(self.temp_dir, 'analyses')
+        self.app.config['REPORT_CACHE_DIR'] = os.path.join(self.temp_dir, 'report_cache')
+        os.makedirs(self.app.config['ANALYSES_DIR'])
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+
+        self.ltr_data = {
+            'analysis_type': 'LTR',
+            'analysis_name': 'Test LTR',
+            'address': '123 Test St, Testville, TS 12345',
+            'purchase_price': 200000,
+            'monthly_rent': 2000,
+            'property_taxes': 200,
+            'insurance': 100,
+            'management_fee_percentage': 8.0,
+            'capex_percentage': 2.0,
+            'vacancy_percentage': 4.0,
+            'repairs_percentage': 2.0,
+            'loan1_loan_amount': 160000,
+            'loan1_loan_interest_rate': 6.5,
+            'loan1_loan_term': 360,
+            'loan1_loan_down_payment': 40000,
+            'loan1_loan_closing_costs': 5000,
+            'has_balloon_payment': False
+        }
+
+    def tearDown(self):
+        """Clean up the temporary directory."""
+        self.ctx.pop()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_key_ignores_timestamps(self):
+        """Test that volatile timestamps do not change the key but inputs do."""
+        data = {**self.ltr_data, 'updated_at': '2024-01-01', 'generated_date': '2024-01-01 10:00:00'}
+        key = report_cache_key(data)
+        self.assertEqual(key, report_cache_key({**data, 'updated_at': '2024-02-01',
+                                                'generated_date': '2024-02-01 09:00:00'}))
+        self.assertNotEqual(key, report_cache_key({**data, 'monthly_rent': 2100}))
+        self.assertNotEqual(key, report_cache_key({**data, 'calculated_metrics': {'dscr': '1.20'}}))
+
+    def test_key_covers_template_and_brand(self):
+        """Test that template version and brand asset changes invalidate keys."""
+        key = report_cache_key(self.ltr_data)
+        with patch('services.report_cache.REPORT_TEMPLATE_VERSION', 'next'):
+            self.assertNotEqual(key, report_cache_key(self.ltr_data))
+        with patch('services.report_cache.NATIVE_AMORTIZATION_CHART', True):
+            self.assertNotEqual(key, report_cache_key(self.ltr_data))
+        with patch.dict('services.report_cache.BRAND_CONFIG', {'logo_path': '/nonexistent/logo.png'}):
+            self.assertNotEqual(key, report_cache_key(self.ltr_data))
+
+    def test_lru_eviction(self):
+        """Test that the least recently used reports are evicted over the cap."""
+        cache = ReportCache(os.path.join(self.temp_dir, 'lru'), max_bytes=250)
+        first = cache.put('a', b'x' * 100)
+        cache.put('b', b'x' * 100)
+        os.utime(first, ns=(1, 1))
+        os.utime(cache.get('b'), ns=(2, 2))
+        self.assertEqual(cache.get('a'), first)  # touching 'a' makes 'b' the oldest
+        cache.put('c', b'x' * 100)
+
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('c'))
+
+    def test_service_reuses_cached_report(self):
+        """Test that repeated report requests render the PDF once."""
+        service = AnalysisService()
+        analysis = service.create_analysis(dict(self.ltr_data), 'test_user')['analysis']
+
+        with patch('services.analysis_service.generate_report', wraps=generate_report) as mock_generate:
+            first = service.generate_pdf_report(analysis['id'], 'test_user').getvalue()
+            second = service.generate_pdf_report(analysis['id'], 'test_user').getvalue()
+
+        self.assertEqual(mock_generate.call_count, 1)
+        self.assertTrue(first.startswith(b'%PDF'))
+        self.assertEqual(first, second)
+
+    def test_route_serves_etag_and_304(self):
+        """Test that the PDF route sets an ETag and answers If-None-Match with 304."""
+        from routes.analyses import analyses_bp
+        self.app.register_blueprint(analyses_bp)
+        client = self.app.test_client()
+
+        data = {**self.ltr_data, 'id': '6f1c1b52-3f6c-4a59-9f57-5b8a1b6c2d11', 'user_id': 'test_user',
+                'created_at': '2024-01-01', 'updated_at': '2024-01-01'}
+        data['calculated_metrics'] = create_analysis(dict(data)).get_report_data()['metrics']
+
+        with patch('routes.analyses.current_user', MagicMock(id='test_user')), \
+             patch('routes.analyses.analysis_service.get_analysis', side_effect=lambda *_: copy.deepcopy(data)), \
+             patch('services.analysis_service.generate_report', wraps=generate_report) as mock_generate:
+            response = client.get(f"/generate_pdf/{data['id']}")
+            etag = response.headers['ETag']
+            cached = client.get(f"/generate_pdf/{data['id']}", headers={'If-None-Match': etag})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/pdf')
+        self.assertEqual(etag.strip('"'), report_cache_key(data))
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(mock_generate.call_count, 1)
+
+    def test_simulated_report_keyed_by_options(self):
+        """Test that simulated reports are keyed by options and only simulate on a cache miss."""
+        from routes.analyses import analyses_bp
+        from services.analysis_simulation import run_projection_simulation
+        self.app.register_blueprint(analyses_bp)
+        client = self.app.test_client()
+
+        data = {**self.ltr_data, 'id': '6f1c1b52-3f6c-4a59-9f57-5b8a1b6c2d11', 'user_id': 'test_user',
+                'created_at': '2024-01-01', 'updated_at': '2024-01-01'}
+        data['calculated_metrics'] = create_analysis(dict(data)).get_report_data()['metrics']
+        url = f"/generate_pdf/{data['id']}?simulate=1&paths=200"
+
+        with patch('routes.analyses.current_user', MagicMock(id='test_user')), \
+             patch('routes.analyses.analysis_service.get_analysis', side_effect=lambda *_: copy.deepcopy(data)), \
+             patch('services.analysis_simulation.run_projection_simulation',
+                   wraps=run_projection_simulation) as mock_simulate:
+            first = client.get(url)
+            etag = first.headers['ETag']
+            self.assertEqual(client.get(url, headers={'If-None-Match': etag}).status_code, 304)
+            self.assertEqual(client.get(url).headers['ETag'], etag)
+            self.assertEqual(mock_simulate.call_count, 1)
+
+            self.assertNotEqual(client.get(f"{url}&seed=7").headers['ETag'], etag)
+            self.assertEqual(client.get(f"/generate_pdf/{data['id']}?simulate=1&paths=0").status_code, 400)
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(mock_simulate.call_count, 2)
+        self.assertEqual(len(os.listdir(self.app.config['REPORT_CACHE_DIR'])), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
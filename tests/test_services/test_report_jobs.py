@@ -0,0 +1,169 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import os
+import shutil
+import tempfile
+import time
+from flask import Flask
+from services.analysis_service import AnalysisService
+from services.report_jobs import (
+    ReportJobQueue, _write_job, JOB_COMPLETED, JOB_EXPIRED, JOB_FAILED, JOB_QUEUED
+)
+
+
+class TestReportJobs(unittest.TestCase):
+    """Test suite for background report rendering jobs."""
+
+    def setUp(self):
+        """Set up temporary directories and test data."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.jobs_dir = os.path.join(self.temp_dir, 'report_jobs')
+        self.app = Flask(__name__)
+        self.app.config['ANALYSES_DIR'] = os.path.join(self.temp_dir, 'analyses')
+        self.app.config['REPORT_CACHE_DIR'] = os.path.join(self.temp_dir, 'report_cache')
+        self.app.config['REPORT_JOBS_DIR'] = self.jobs_dir
+        self.app.config['LOGIN_DISABLED'] = True
+        os.makedirs(self.app.config['ANALYSES_DIR'])
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+
+        self.transactions = [
+            {'property_id': '123 Test St', 'type': 'income', 'category': 'Rent',
+             'description': 'March rent', 'amount': '$2,000.00', 'date': '2024-03-01',
+             'collector_payer': 'Tenant', 'notes': ''},
+            {'property_id': '123 Test St', 'type': 'expense', 'category': 'Repairs',
+             'description': 'Plumbing', 'amount': '$150.00', 'date': '2024-03-05',
+             'collector_payer': 'Plumber', 'notes': ''}
+        ]
+        self.metadata = {'user': 'Test User', 'generated_date': '2024-03-31 12:00:00',
+                         'property': 'All Properties', 'date_range': None}
+
+    def tearDown(self):
+        """Shut down worker pools and clean up."""
+        from services.report_jobs import _queues
+        for queue in _queues.values():
+            queue.shutdown()
+        _queues.clear()
+        self.ctx.pop()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _wait(self, queue, job_id, user_id='test_user', timeout=60):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            job = queue.get_job(job_id, user_id)
+            if job['status'] in (JOB_COMPLETED, JOB_FAILED):
+                return job
+            time.sleep(0.1)
+        self.fail(f"Report job {job_id} did not finish")
+
+    def test_transaction_report_job(self):
+        """Test that a transaction report renders in the pool and is owner-only."""
+        queue = ReportJobQueue(self.jobs_dir, max_workers=1)
+        try:
+            job = queue.submit('test_user', 'transactions',
+                               {'transactions': self.transactions, 'metadata': self.metadata},
+                               download_name='transactions.pdf')
+            self.assertEqual(job['status'], JOB_QUEUED)
+
+            finished = self._wait(queue, job['id'])
+            self.assertEqual(finished['status'], JOB_COMPLETED)
+            with open(queue.get_output_path(job['id'], 'test_user'), 'rb') as f:
+                self.assertTrue(f.read().startswith(b'%PDF'))
+
+            self.assertIsNone(queue.get_job(job['id'], 'other_user'))
+            self.assertIsNone(queue.get_output_path(job['id'], 'other_user'))
+        finally:
+            queue.shutdown()
+
+    def test_failed_job_records_error(self):
+        """Test that render errors are persisted on the job."""
+        queue = ReportJobQueue(self.jobs_dir, max_workers=1)
+        try:
+            job = queue.submit('test_user', 'transactions', {'transactions': None},
+                               download_name='transactions.pdf')
+            finished = self._wait(queue, job['id'])
+            self.assertEqual(finished['status'], JOB_FAILED)
+            self.assertTrue(finished['error'])
+            self.assertIsNone(queue.get_output_path(job['id'], 'test_user'))
+        finally:
+            queue.shutdown()
+
+    def test_interrupted_job_is_failed(self):
+        """Test that jobs left running by a dead process are marked failed."""
+        queue = ReportJobQueue(self.jobs_dir)
+        _write_job(self.jobs_dir, {'id': 'stale', 'user_id': 'test_user', 'report_type': 'transactions',
+                                   'status': 'running', 'pid': 2 ** 22 + 1})
+        job = queue.get_job('stale', 'test_user')
+        self.assertEqual(job['status'], JOB_FAILED)
+        self.assertEqual(job['error'], 'Report job was interrupted')
+
+    def test_analysis_job_uses_report_cache(self):
+        """Test that analysis jobs render into the report cache and reuse it."""
+        service = AnalysisService()
+        analysis = service.create_analysis({
+            'analysis_type': 'LTR',
+            'analysis_name': 'Test LTR',
+            'address': '123 Test St, Testville, TS 12345',
+            'purchase_price': 200000,
+            'monthly_rent': 2000,
+            'property_taxes': 200,
+            'insurance': 100,
+            'management_fee_percentage': 8.0,
+            'capex_percentage': 2.0,
+            'vacancy_percentage': 4.0,
+            'repairs_percentage': 2.0,
+            'loan1_loan_amount': 160000,
+            'loan1_loan_interest_rate': 6.5,
+            'loan1_loan_term': 360,
+            'loan1_loan_down_payment': 40000,
+            'loan1_loan_closing_costs': 5000,
+            'has_balloon_payment': False
+        }, 'test_user')['analysis']
+
+        from services.report_jobs import get_report_jobs
+        job = service.submit_pdf_report_job(analysis['id'], 'test_user')
+        finished = self._wait(get_report_jobs(), job['id'])
+        self.assertEqual(finished['status'], JOB_COMPLETED)
+        self.assertEqual(os.path.dirname(finished['output_path']), self.app.config['REPORT_CACHE_DIR'])
+
+        repeat = service.submit_pdf_report_job(analysis['id'], 'test_user')
+        self.assertEqual(repeat['status'], JOB_COMPLETED)
+        self.assertEqual(repeat['output_path'], finished['output_path'])
+
+    def test_job_routes(self):
+        """Test the submit, status and download endpoints."""
+        from routes.reports import reports_bp
+        self.app.register_blueprint(reports_bp, url_prefix='/reports')
+        client = self.app.test_client()
+
+        with patch('routes.reports.current_user', MagicMock(id='test_user')):
+            response = client.post('/reports/jobs', json={
+                'report_type': 'transactions',
+                'transactions': self.transactions,
+                'metadata': self.metadata
+            })
+            self.assertEqual(response.status_code, 202)
+            job_id = response.get_json()['job_id']
+
+            from services.report_jobs import get_report_jobs
+            self._wait(get_report_jobs(), job_id)
+            status = client.get(f'/reports/jobs/{job_id}').get_json()
+            self.assertEqual(status['status'], JOB_COMPLETED)
+
+            download = client.get(status['download_url'])
+            self.assertEqual(download.status_code, 200)
+            self.assertEqual(download.mimetype, 'application/pdf')
+
+            # Output removed after completion: the job expires instead of staying "not ready"
+            os.remove(get_report_jobs().get_job(job_id, 'test_user')['output_path'])
+            self.assertEqual(client.get(status['download_url']).status_code, 410)
+            status = client.get(f'/reports/jobs/{job_id}').get_json()
+            self.assertEqual(status['status'], JOB_EXPIRED)
+            self.assertNotIn('download_url', status)
+
+            self.assertEqual(client.post('/reports/jobs', json={'report_type': 'zip'}).status_code, 400)
+            self.assertEqual(client.get('/reports/jobs/missing').status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import unittest
+from io import BytesIO
+from pypdf import PdfReader
+from reportlab.lib.units import inch
+from services.transaction_report_generator import (TransactionReportGenerator, TransactionRowsFlowable,
+                                                   RoundedTableFlowable)
+
+
+class TestTransactionReportGenerator(unittest.TestCase):
+    """Test suite for transaction PDF reports."""
+
+    def setUp(self):
+        """Set up the generator and test transactions."""
+        self.generator = TransactionReportGenerator()
+        self.properties = ['1 Main St, Springfield, ST 12345', '2 Oak Ave, Shelbyville, ST 12345']
+        self.transactions = [
+            {
+                'property_id': self.properties[i % 2],
+                'type': 'income' if i % 3 == 0 else 'expense',
+                'category': 'Rent' if i % 3 == 0 else 'Repairs',
+                'description': f'Transaction {i}',
+                'amount': f'{100 + i:.2f}',
+                'date': f'2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}',
+                'collector_payer': 'Tenant',
+                'notes': '',
+                'reimbursement': {'reimbursement_status': 'not_required'}
+            }
+            for i in range(300)
+        ]
+
+    def _generate(self, transactions, metadata):
+        buffer = BytesIO()
+        self.generator.generate(transactions, buffer, metadata)
+        buffer.seek(0)
+        return PdfReader(buffer)
+
+    def test_summarize_single_pass(self):
+        """Test totals by type, overall and per property."""
+        summary = self.generator._summarize(self.transactions)
+        income = sum(100 + i for i in range(300) if i % 3 == 0)
+        expense = sum(100 + i for i in range(300) if i % 3 != 0)
+
+        self.assertAlmostEqual(summary['totals']['income'], income)
+        self.assertAlmostEqual(summary['totals']['expense'], expense)
+        self.assertEqual(set(summary['properties']), set(self.properties))
+        self.assertAlmostEqual(
+            sum(totals['income'] for totals in summary['properties'].values()), income
+        )
+
+    def test_long_table_spans_pages(self):
+        """Test that every transaction of a long report is laid out across pages."""
+        reader = self._generate(self.transactions, {'property': 'All Properties', 'user': 'test_user'})
+        text = '\n'.join(page.extract_text() for page in reader.pages)
+
+        self.assertGreater(len(reader.pages), 5)
+        for i in range(300):
+            self.assertIn(f'Transaction {i}\n', f'{text}\n')
+        self.assertIn('Total transactions: 300', text)
+        # The header row repeats on every page of the table
+        self.assertIn('Description', reader.pages[-1].extract_text())
+
+    def test_property_sections(self):
+        """Test the grand summary and per-property sections."""
+        reader = self._generate(self.transactions, {'property': self.properties[0]})
+        text = '\n'.join(page.extract_text() for page in reader.pages)
+
+        self.assertIn('Property Summary', text)
+        self.assertEqual(text.count('Financial Summary'), 2)
+        self.assertEqual(text.count('Total transactions: 150'), 2)
+
+    def test_rows_built_lazily(self):
+        """Test that rows are created only as pages are laid out."""
+        created = []
+        cell_styles = self.generator._transaction_cell_styles()
+
+        def rows():
+            for t in self.transactions:
+                created.append(t)
+                yield self.generator._create_transaction_row(t, cell_styles)
+
+        flowable = TransactionRowsFlowable(
+            rows(),
+            self.generator._measure_transaction_row(cell_styles['header_row']),
+            self.generator._measure_transaction_row,
+            lambda page_rows, row_heights, first_row_index: self.generator._build_transactions_table(
+                page_rows, cell_styles, row_heights, first_row_index)
+        )
+        page, rest = flowable.split(7.5*inch, 9*inch)
+        page_rows = len(page._cellvalues) - 1
+
+        self.assertLess(len(created), 100)
+        self.assertEqual(len(created), page_rows + 1)  # One row measured for the next page
+        self.assertLessEqual(page.wrap(7.5*inch, 9*inch)[1], 9*inch)
+        self.assertEqual(rest.row_index, page_rows)
+
+        # A frame too short for any row moves the table to the next page
+        self.assertEqual(rest.split(7.5*inch, 0.1*inch), [])
+
+    def test_small_table_rounded(self):
+        """Test that short tables keep the rounded table styling."""
+        elements = self.generator._create_transactions_table(self.transactions[:5])
+        self.assertTrue(any(isinstance(e, RoundedTableFlowable) for e in elements))
+
+        elements = self.generator._create_transactions_table(self.transactions)
+        self.assertTrue(any(isinstance(e, TransactionRowsFlowable) for e in elements))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,204 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+from flask import Flask
+from services.document_export import stream_documents_zip, _load_document
+from services.upload_store import UploadStore
+
+
+class TestUploadStore(unittest.TestCase):
+    """Test suite for the content-addressed upload store."""
+
+    def setUp(self):
+        """Set up an upload folder and store."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.upload_folder = os.path.join(self.temp_dir, 'uploads')
+        os.makedirs(self.upload_folder)
+        self.store = UploadStore(self.upload_folder)
+        self.receipt = os.urandom(20000)
+
+    def tearDown(self):
+        """Clean up the temporary directory."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _blob_files(self):
+        return [name for _, _, files in os.walk(self.store.blob_dir) for name in files]
+
+    def _attach(self, transaction_id, field, filename, data, **kwargs):
+        blob = self.store.put(io.BytesIO(data))
+        self.store.link(transaction_id, field, filename, blob, **kwargs)
+        return blob
+
+    def test_identical_uploads_stored_once(self):
+        """Test that the same receipt on several transactions is stored once."""
+        blob = self._attach(1, 'documentation_file', 'trans_1_receipt.pdf', self.receipt)
+        self._attach(2, 'documentation_file', 'trans_2_receipt.pdf', self.receipt)
+        self._attach(2, 'reimbursement_documentation', 'trans_2_share.pdf', self.receipt)
+
+        self.assertEqual(self._blob_files(), [blob['sha256']])
+        self.assertEqual(self.store.blob_path(blob['sha256']), self.store.resolve('trans_2_share.pdf'))
+        with open(self.store.resolve('trans_1_receipt.pdf'), 'rb') as f:
+            self.assertEqual(f.read(), self.receipt)
+
+        usage = self.store.usage()
+        self.assertEqual((usage['references'], usage['blobs']), (3, 1))
+        self.assertEqual(usage['logical_bytes'], 3 * len(self.receipt))
+        self.assertEqual(usage['stored_bytes'], len(self.receipt))
+
+    def test_blob_removed_with_last_reference(self):
+        """Test reference counting as documents are replaced and released."""
+        blob = self._attach(1, 'documentation_file', 'trans_1_receipt.pdf', self.receipt)
+        self._attach(2, 'documentation_file', 'trans_2_receipt.pdf', self.receipt)
+
+        # Replacing one reference keeps the shared blob
+        self._attach(1, 'documentation_file', 'trans_1_invoice.pdf', b'invoice')
+        self.assertIsNone(self.store.resolve('trans_1_receipt.pdf'))
+        self.assertTrue(os.path.exists(self.store.blob_path(blob['sha256'])))
+
+        self.store.unlink_transaction(2, {'documentation_file': 'trans_2_receipt.pdf'})
+        self.assertFalse(os.path.exists(self.store.blob_path(blob['sha256'])))
+        self.assertEqual(len(self._blob_files()), 1)
+
+        with open(self.store.index_path) as f:
+            index = json.load(f)
+        self.assertEqual(index['refs'], {'1:documentation_file': 'trans_1_invoice.pdf'})
+        self.assertEqual(list(index['blobs'].values())[0]['refcount'], 1)
+
+        with self.assertRaises(ValueError):
+            self.store.unlink(1, 'notes')
+
+    def test_legacy_files(self):
+        """Test that documents from the flat upload folder resolve and are cleaned up."""
+        legacy = os.path.join(self.upload_folder, 'trans_3_old.pdf')
+        with open(legacy, 'wb') as f:
+            f.write(b'old')
+
+        self.assertEqual(self.store.resolve('trans_3_old.pdf'), os.path.realpath(legacy))
+        self.assertIsNone(self.store.resolve('../outside.pdf'))
+        self.assertIsNone(self.store.resolve('upload_index.json'))
+        self.assertIsNone(self.store.resolve('missing.pdf'))
+
+        # Replacing a pre-store document removes the flat file
+        self._attach(3, 'documentation_file', 'trans_3_new.pdf', b'new', previous='trans_3_old.pdf')
+        self.assertFalse(os.path.exists(legacy))
+        self.assertIsNotNone(self.store.resolve('trans_3_new.pdf'))
+
+    def test_unlinked_uploads_collected_after_grace(self):
+        """Test that stored but never linked uploads and stray files are swept."""
+        blob = self.store.put(io.BytesIO(self.receipt))
+        stray = os.path.join(self.store.blob_dir, 'stray.tmp')
+        with open(stray, 'wb') as f:
+            f.write(b'x' * 10)
+
+        self.assertEqual(self.store.collect_garbage(), {'files': 0, 'bytes': 0})
+        self.assertTrue(os.path.exists(self.store.blob_path(blob['sha256'])))
+
+        old = time.time() - 7200
+        os.utime(stray, (old, old))
+        with patch('services.upload_store.time.time', return_value=time.time() + 7200):
+            removed = self.store.collect_garbage()
+        self.assertEqual(removed['files'], 1)
+        self.assertFalse(os.path.exists(stray))
+        self.assertFalse(os.path.exists(self.store.blob_path(blob['sha256'])))
+
+    def test_export_reads_shared_documents_once(self):
+        """Test that the ZIP export reads a shared document once and writes it under each name."""
+        self._attach(1, 'documentation_file', 'trans_1_receipt.txt', b'receipt ' * 1000)
+        self._attach(2, 'documentation_file', 'trans_2_receipt.txt', b'receipt ' * 1000)
+
+        with patch('services.document_export._load_document', wraps=_load_document) as mock_load:
+            archive = zipfile.ZipFile(io.BytesIO(b''.join(stream_documents_zip(
+                ['trans_1_receipt.txt', 'trans_2_receipt.txt', 'trans_9_missing.txt'],
+                self.upload_folder, resolve=self.store.resolve
+            ))))
+        manifest = json.loads(archive.read('manifest.json'))
+
+        self.assertEqual(mock_load.call_count, 1)
+        self.assertEqual(archive.read('documents/trans_1_receipt.txt'), b'receipt ' * 1000)
+        self.assertEqual(archive.read('documents/trans_2_receipt.txt'), b'receipt ' * 1000)
+        self.assertEqual(manifest['total_documents'], 2)
+        self.assertEqual(manifest['total_bytes'], 16000)
+        self.assertEqual(manifest['documents'][0]['sha256'], manifest['documents'][1]['sha256'])
+        self.assertEqual(manifest['missing'], ['trans_9_missing.txt'])
+
+    def _client(self):
+        from routes.transactions import transactions_bp
+        app = Flask(__name__)
+        app.config['UPLOAD_FOLDER'] = self.upload_folder
+        app.config['LOGIN_DISABLED'] = True
+        app.register_blueprint(transactions_bp, url_prefix='/transactions')
+        return app.test_client()
+
+    def test_artifact_route_resolves_through_index(self):
+        """Test that artifacts are served from the blob for their document name."""
+        self._attach(1, 'documentation_file', 'trans_1_receipt.pdf', self.receipt)
+
+        with patch('routes.transactions.current_user', MagicMock(id='test_user', role='User')):
+            client = self._client()
+            response = client.get('/transactions/artifact/trans_1_receipt.pdf')
+            missing = client.get('/transactions/artifact/trans_2_receipt.pdf')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/pdf')
+        self.assertEqual(response.get_data(), self.receipt)
+        response.close()
+        self.assertEqual(missing.status_code, 404)
+
+    def test_artifact_conditional_range_and_caching(self):
+        """Test ETags, 304s, byte ranges and immutable caching of versioned URLs."""
+        blob = self._attach(1, 'documentation_file', 'trans_1_receipt.pdf', self.receipt)
+        url = '/transactions/artifact/trans_1_receipt.pdf'
+        version = self.store.version('trans_1_receipt.pdf')
+
+        with patch('routes.transactions.current_user', MagicMock(id='test_user', role='User')):
+            client = self._client()
+            response = client.get(url)
+            response.close()
+            cached = client.get(url, headers={'If-None-Match': f'"{blob["sha256"]}"'})
+            partial = client.get(url, headers={'Range': 'bytes=100-199'})
+            partial.close()
+            versioned = client.get(f'{url}?v={version}')
+            versioned.close()
+            stale = client.get(f'{url}?v=0000000000000000')
+            stale.close()
+            unsatisfiable = client.get(url, headers={'Range': f'bytes={len(self.receipt) + 10}-'})
+
+        self.assertEqual(response.headers['ETag'], f'"{blob["sha256"]}"')
+        self.assertEqual(response.headers['Accept-Ranges'], 'bytes')
+        self.assertIn('private', response.headers['Cache-Control'])
+        self.assertIn('no-cache', response.headers['Cache-Control'])
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(partial.status_code, 206)
+        self.assertEqual(partial.get_data(), self.receipt[100:200])
+        self.assertEqual(partial.headers['Content-Range'], f'bytes 100-199/{len(self.receipt)}')
+        self.assertEqual(version, blob['sha256'][:16])
+        self.assertIn('immutable', versioned.headers['Cache-Control'])
+        self.assertIn('max-age=31536000', versioned.headers['Cache-Control'])
+        self.assertNotIn('immutable', stale.headers['Cache-Control'])
+        self.assertEqual(unsatisfiable.status_code, 416)
+
+    def test_legacy_artifact_etag(self):
+        """Test that flat-folder documents get a size and mtime ETag."""
+        legacy = os.path.join(self.upload_folder, 'trans_3_old.pdf')
+        with open(legacy, 'wb') as f:
+            f.write(b'old receipt')
+        stat = os.stat(legacy)
+        self.assertEqual(self.store.lookup('trans_3_old.pdf')['etag'],
+                         f"{stat.st_size:x}-{stat.st_mtime_ns:x}")
+        self.assertIsNone(self.store.version('trans_3_old.pdf'))
+
+        with patch('routes.transactions.current_user', MagicMock(id='test_user', role='User')):
+            client = self._client()
+            etag = client.get('/transactions/uploads/trans_3_old.pdf').headers['ETag']
+            cached = client.get('/transactions/uploads/trans_3_old.pdf', headers={'If-None-Match': etag})
+        self.assertEqual(cached.status_code, 304)
+
+
+if __name__ == '__main__':
+    unittest.main()
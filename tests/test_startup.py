@@ -0,0 +1,72 @@
+import unittest
+from unittest.mock import patch
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from app import create_app
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cold start of create_app() in a fresh interpreter; override on slow CI machines
+STARTUP_BUDGET_SECONDS = float(os.environ.get('STARTUP_BUDGET_SECONDS', '1.5'))
+
+# Only needed once a dashboard, import or chart is actually used
+DEFERRED_MODULES = ['dash', 'dash_bootstrap_components', 'plotly', 'pandas', 'matplotlib', 'pypdf']
+
+COLD_START_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+from app import create_app
+create_app()
+elapsed = time.perf_counter() - start
+print(json.dumps({'elapsed': elapsed, 'loaded': [m for m in %r if m in sys.modules]}))
+""" % (DEFERRED_MODULES,)
+
+
+class TestStartup(unittest.TestCase):
+    """Test suite for application cold start and lazily mounted Dash apps."""
+
+    def test_cold_start_within_budget(self):
+        """Test that create_app() stays fast and defers heavy imports."""
+        with tempfile.TemporaryDirectory() as cwd:  # Keep the startup log out of the repo
+            env = dict(os.environ, PYTHONPATH=REPO_ROOT)
+            output = subprocess.run([sys.executable, '-c', COLD_START_SCRIPT], cwd=cwd, env=env,
+                                    capture_output=True, text=True, timeout=60)
+        self.assertEqual(output.returncode, 0, output.stderr)
+        result = json.loads(output.stdout.strip().splitlines()[-1])
+
+        self.assertEqual(result['loaded'], [])
+        self.assertLess(result['elapsed'], STARTUP_BUDGET_SECONDS,
+                        f"create_app() took {result['elapsed']:.2f}s, budget is {STARTUP_BUDGET_SECONDS}s")
+
+    def test_dash_mounted_on_first_request(self):
+        """Test that a Dash app is built on first access and keeps login protection."""
+        app = create_app()
+        client = app.test_client()
+        self.assertFalse(app.portfolio_dash.is_mounted)
+
+        response = client.get('/dashboards/_dash/portfolio/')
+        self.assertEqual(response.status_code, 302)
+        self.assertIn('/login', response.location)
+        self.assertTrue(app.portfolio_dash.is_mounted)
+        self.assertFalse(app.amortization_dash.is_mounted)
+
+        users = {'user@example.com': {'email': 'user@example.com', 'name': 'Test User', 'password': 'x'}}
+        with client.session_transaction() as sess:
+            sess['_user_id'] = 'user@example.com'
+            sess['_fresh'] = True
+        with patch('services.user_service.load_users', return_value=users):
+            response = client.get('/dashboards/_dash/portfolio/')
+            layout = client.get('/dashboards/_dash/portfolio/_dash-layout')
+            # Routes outside the Dash prefixes still go to the main app
+            view = client.get('/dashboards/portfolio/view')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'_dash-config', response.data)
+        self.assertEqual(layout.status_code, 200)
+        self.assertEqual(view.status_code, 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from flask import Flask
+from utils.address_autocomplete import (SOURCE_CACHE, SOURCE_GEOAPIFY, SOURCE_PREFIX,
+                                        AddressAutocomplete, AddressIndex, AutocompleteCache,
+                                        normalize_query)
+
+
+def suggestions(*addresses):
+    return [{'formatted': address, 'lat': 39.6, 'lon': -77.7} for address in addresses]
+
+
+class TestAddressAutocomplete(unittest.TestCase):
+    """Test suite for the local autocomplete index and Geoapify cache."""
+
+    def setUp(self):
+        """Set up properties and analyses to seed the index from."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.properties_file = os.path.join(self.temp_dir, 'properties.json')
+        self.analyses_dir = os.path.join(self.temp_dir, 'analyses')
+        os.makedirs(self.analyses_dir)
+        with open(self.properties_file, 'w') as f:
+            json.dump([{
+                'address': '454 Guilford Avenue, Hagerstown, MD 21740',
+                'partners': [{'name': 'Jane Partner'}, {'name': 'Sam Partner'}]
+            }], f)
+        self._save_analysis('a1', 'user@example.com', '456 Oak Street, Hagerstown, MD 21740')
+        self.autocomplete = AddressAutocomplete(AddressIndex(self.properties_file, self.analyses_dir),
+                                                AutocompleteCache())
+        self.calls = []
+
+    def tearDown(self):
+        """Clean up the temporary directory."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _save_analysis(self, analysis_id, user_id, address):
+        path = os.path.join(self.analyses_dir, f"{analysis_id}_{user_id}.json")
+        with open(f"{path}.temp", 'w') as f:
+            json.dump({'id': analysis_id, 'address': address}, f)
+        os.replace(f"{path}.temp", path)
+
+    def _fetcher(self, results):
+        def fetch():
+            self.calls.append(1)
+            return results
+        return fetch
+
+    def test_local_addresses_scoped_to_owner(self):
+        """Test that users, admins included, only see their own properties and analyses."""
+        fetch = self._fetcher([])
+        jane = {'user_id': 'jane@example.com', 'name': 'Jane Partner'}
+        analyst = {'user_id': 'user@example.com', 'name': 'Analyst'}
+
+        results, _ = self.autocomplete.suggest('454 Guil', fetch, jane)
+        self.assertEqual([r['formatted'] for r in results], ['454 Guilford Avenue, Hagerstown, MD 21740'])
+        self.assertEqual(self.autocomplete.suggest('454 Guil', fetch, analyst)[0], [])
+        self.assertEqual(self.autocomplete.suggest('456 oak st', fetch, None)[0], [])
+        self.assertEqual(self.autocomplete.suggest('45', fetch, {'user_id': 'admin@example.com', 'name': 'Admin'})[0], [])
+
+        # New analyses are picked up without a restart
+        time.sleep(0.01)
+        self._save_analysis('a2', 'user@example.com', '458 Oak Street, Hagerstown, MD 21740')
+        results, _ = self.autocomplete.suggest('45', fetch, analyst)
+        self.assertEqual(len(results), 2)
+
+    def test_cache_and_prefix_filtering(self):
+        """Test exact hits and longer queries answered from a cached prefix."""
+        fetch = self._fetcher(suggestions('12 Main Street, Springfield, IL', '12 Maple Drive, Springfield, IL',
+                                          '120 Elm Road, Chicago, IL'))
+
+        self.assertEqual(self.autocomplete.suggest('12 M', fetch)[1], SOURCE_GEOAPIFY)
+        self.assertEqual(self.autocomplete.suggest('12  m', fetch)[1], SOURCE_CACHE)
+        results, source = self.autocomplete.suggest('12 Main St', fetch)
+        self.assertEqual((source, [r['formatted'] for r in results]),
+                         (SOURCE_PREFIX, ['12 Main Street, Springfield, IL']))
+        self.assertEqual(len(self.calls), 1)
+
+        # A prefix list cut off at the limit only answers if enough of it still matches
+        full = suggestions(*[f"77 Pine Street Unit {n}, Denver, CO" for n in range(5)])
+        self.autocomplete.suggest('77 P', self._fetcher(full))
+        self.assertEqual(self.autocomplete.suggest('77 Pine', fetch)[1], SOURCE_PREFIX)
+        self.assertEqual(self.autocomplete.suggest('77 Pine Street Unit 3', fetch)[1], SOURCE_GEOAPIFY)
+
+        self.assertEqual(normalize_query(' 12 Main St., Spr'), '12 main st spr')
+
+    def test_concurrent_queries_coalesced(self):
+        """Test that identical in-flight queries share one Geoapify request."""
+        release = threading.Event()
+
+        def fetch():
+            self.calls.append(1)
+            release.wait(5)
+            return suggestions('9 Birch Lane, Austin, TX')
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.autocomplete.suggest('9 Birch', fetch)))
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.1)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual([len(r[0]) for r in results], [1, 1, 1, 1])
+        self.assertEqual(self.autocomplete.stats()['coalesced'], 3)
+
+    def test_route_serves_local_and_cached_results(self):
+        """Test the API endpoint end to end with a mocked Geoapify client."""
+        from routes.api import api_bp
+        app = Flask(__name__)
+        app.config.update(GEOAPIFY_API_KEY='test_api_key', PROPERTIES_FILE=self.properties_file,
+                          ANALYSES_DIR=self.analyses_dir)
+        app.register_blueprint(api_bp, url_prefix='/api')
+        response = MagicMock(status_code=200)
+        response.json.return_value = {'results': suggestions('454 Guilford Avenue, Hagerstown, MD 21740',
+                                                             '454 Guilford Rd, Columbia, MD 21046')}
+        client = MagicMock()
+        client.get.return_value = response
+        user = MagicMock(is_authenticated=True, id='jane@example.com', role='User')
+        user.name = 'Jane Partner'
+
+        with patch('routes.api.get_client', return_value=client), patch('routes.api.current_user', user):
+            first = app.test_client().get('/api/autocomplete?query=454 Guilford').get_json()
+            second = app.test_client().get('/api/autocomplete?query=454 Guilford R').get_json()
+
+        self.assertEqual([r['formatted'] for r in first['data']],
+                         ['454 Guilford Avenue, Hagerstown, MD 21740', '454 Guilford Rd, Columbia, MD 21046'])
+        self.assertEqual([r['formatted'] for r in second['data']], ['454 Guilford Rd, Columbia, MD 21046'])
+        self.assertEqual(client.get.call_count, 1)
+        self.assertEqual(client.get.call_args.kwargs['params']['limit'], 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
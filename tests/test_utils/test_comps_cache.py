@@ -0,0 +1,117 @@
+import unittest
+from unittest.mock import patch
+import os
+import shutil
+import tempfile
+import time
+from flask import Flask
+from utils.comps_cache import (CACHE_HIT, CACHE_MISS, CACHE_STALE, CompsCache, comps_cache_key,
+                               get_comps_cache, normalize_address)
+from utils.comps_handler import fetch_property_comps, fetch_rental_comps
+from tests.stub_servers import StubRentcast, rentcast_config, start_server
+
+
+class TestCompsCache(unittest.TestCase):
+    """Test suite for the persistent RentCast comps cache."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Start the stub RentCast server."""
+        cls.stub = StubRentcast()
+        cls.server = start_server(cls.stub)
+
+    @classmethod
+    def tearDownClass(cls):
+        """Stop the stub server."""
+        cls.server.shutdown()
+
+    def setUp(self):
+        """Set up an app configured against the stub server."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.stub.requests.clear()
+        self.app = Flask(__name__)
+        self.app.secret_key = 'test'
+        self.app.config.update(rentcast_config(
+            self.server,
+            MAX_COMP_RUNS_PER_SESSION=3,
+            COMPS_DIR=os.path.join(self.temp_dir, 'comps')
+        ))
+
+    def tearDown(self):
+        """Clean up the temporary directory."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _fetch(self, address='123 Main Street, Springfield, IL 62701', **kwargs):
+        args = {'property_type': 'Single Family', 'bedrooms': 3, 'bathrooms': 2, 'square_footage': 1500}
+        args.update(kwargs)
+        return fetch_property_comps(self.app.config, address, **args)
+
+    def test_key_normalization(self):
+        """Test that formatting differences share a key and parameters do not."""
+        params = {'address': '123 Main St., Springfield,  IL', 'bedrooms': 3, 'propertyType': 'Single Family'}
+        key = comps_cache_key('avm/value', params)
+        self.assertEqual(normalize_address('123  MAIN ST, springfield, IL'), '123 MAIN ST,SPRINGFIELD,IL')
+        self.assertEqual(key, comps_cache_key('/avm/value', {**params, 'address': '123 main st, springfield, IL',
+                                                              'bedrooms': '3.0'}))
+        self.assertNotEqual(key, comps_cache_key('avm/value', {**params, 'bedrooms': 4}))
+        self.assertNotEqual(key, comps_cache_key('avm/rent/long-term', params))
+
+    def test_repeat_runs_served_from_cache(self):
+        """Test that repeat runs across sessions reuse the stored response."""
+        with self.app.test_request_context():
+            first = self._fetch()
+        with self.app.test_request_context():
+            from flask import session
+            second = self._fetch(address='123 MAIN ST, Springfield, IL 62701')
+            self.assertEqual(session.get('comps_run_count_123 MAIN ST, Springfield, IL 62701', 0), 0)
+            rental = fetch_rental_comps(self.app.config, '123 Main St, Springfield, IL 62701', 3, 2, 1500)
+            fetch_rental_comps(self.app.config, '123 Main St, Springfield, IL 62701', 3, 2, 1500)
+
+        self.assertEqual([path for path, _ in self.stub.requests], ['/v1/avm/value', '/v1/avm/rent/long-term'])
+        self.assertEqual(first['price'], second['price'])
+        self.assertEqual(len(second['comparables']), 1)  # Filtering still applies to cached responses
+        self.assertEqual(rental['estimated_rent'], 1800)
+
+        stats = get_comps_cache(self.app.config).stats()
+        self.assertEqual((stats['hits'], stats['misses']), (2, 2))
+
+        with self.app.test_request_context():
+            self._fetch(bedrooms=4)
+        self.assertEqual(len(self.stub.requests), 3)
+
+    def test_stale_while_revalidate(self):
+        """Test that stale entries are served at once and refreshed in the background."""
+        cache = CompsCache(os.path.join(self.temp_dir, 'swr'), ttl=60, stale_ttl=3600)
+        params = {'address': '1 Oak Ave, Springfield, IL'}
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            return {'price': 100 * len(calls)}
+
+        self.assertEqual(cache.get_or_fetch('avm/value', params, fetch), ({'price': 100}, CACHE_MISS))
+        self.assertEqual(cache.get_or_fetch('avm/value', params, fetch)[1], CACHE_HIT)
+
+        with patch('utils.comps_cache.time.time', return_value=time.time() + 120):
+            self.assertEqual(cache.get_or_fetch('avm/value', params, fetch), ({'price': 100}, CACHE_STALE))
+        cache._executor.shutdown(wait=True)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(cache.get_or_fetch('avm/value', params, fetch), ({'price': 200}, CACHE_HIT))
+
+        # Expired entries go to the API again
+        with patch('utils.comps_cache.time.time', return_value=time.time() + 7200):
+            self.assertEqual(cache.get_or_fetch('avm/value', params, fetch)[1], CACHE_MISS)
+        self.assertEqual(cache.stats()['refreshes'], 1)
+
+    def test_cache_disabled(self):
+        """Test that a zero TTL sends every request upstream."""
+        self.app.config['COMPS_CACHE_TTL'] = 0
+        self.assertIsNone(get_comps_cache(self.app.config))
+        with self.app.test_request_context():
+            self._fetch()
+            self._fetch()
+        self.assertEqual(len(self.stub.requests), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
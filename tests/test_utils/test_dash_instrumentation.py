@@ -0,0 +1,92 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import json
+import dash
+from dash import html, Input, Output
+from dash.exceptions import PreventUpdate
+from flask import Flask
+from routes.monitor import monitor_bp
+from dash_apps.instrumentation import callback_errors, callback_report, instrument_callbacks
+
+
+class TestDashInstrumentation(unittest.TestCase):
+    """Test suite for per-callback Dash instrumentation and the timings page."""
+
+    def setUp(self):
+        """Set up a small Dash app with normal, prevented and failing callbacks."""
+        self.server = Flask(__name__)
+        self.server.config.update(SECRET_KEY='test', LOGIN_DISABLED=True, COMPS_DIR=None, PROPERTIES_FILE=None, ANALYSES_DIR=None)
+        self.server.register_blueprint(monitor_bp)
+        self.dash_app = dash.Dash(__name__, server=self.server, url_base_pathname='/dash/')
+        self.dash_app.layout = html.Div([html.Div(id='source'), html.Div(id='echo'),
+                                         html.Div(id='skip'), html.Div(id='broken')])
+
+        @self.dash_app.callback(Output('echo', 'children'), Input('source', 'children'))
+        def echo(value):
+            return f"echo {value}"
+
+        @self.dash_app.callback(Output('skip', 'children'), Input('source', 'children'))
+        def skip(value):
+            raise PreventUpdate
+
+        @self.dash_app.callback(Output('broken', 'children'), Input('source', 'children'))
+        def broken(value):
+            raise KeyError(value)
+
+        instrument_callbacks(self.dash_app, 'instrumentation_test')
+        self.client = self.server.test_client()
+
+    def _fire(self, output):
+        payload = {
+            'output': output,
+            'outputs': {'id': output.split('.')[0], 'property': 'children'},
+            'inputs': [{'id': 'source', 'property': 'children', 'value': 'x'}],
+            'changedPropIds': ['source.children'],
+            'state': []
+        }
+        return self.client.post('/dash/_dash-update-component', data=json.dumps(payload),
+                                content_type='application/json')
+
+    def _stats(self):
+        return {row['callback']: row for row in callback_report() if row['app'] == 'instrumentation_test'}
+
+    def test_callbacks_recorded(self):
+        """Test durations, payload sizes, prevented updates and errors per callback."""
+        before = self._stats()
+        errors = callback_errors.value(app='instrumentation_test', callback='broken', error='KeyError')
+        self.assertIn('echo x', self._fire('echo.children').get_data(as_text=True))
+        self.assertEqual(self._fire('skip.children').status_code, 204)
+        self._fire('broken.children')
+
+        after = self._stats()
+        self.assertEqual(after['echo']['calls'] - before['echo']['calls'], 1)
+        self.assertGreater(after['echo']['mean_bytes_in'], 0)
+        self.assertGreater(after['echo']['mean_bytes_out'], 0)
+        self.assertEqual(after['skip']['prevented'] - before['skip']['prevented'], 1)
+        self.assertEqual(after['broken']['errors'] - before['broken']['errors'], 1)
+        self.assertEqual(after['broken']['last_error'], 'KeyError')
+        self.assertEqual(callback_errors.value(app='instrumentation_test', callback='broken', error='KeyError')
+                         - errors, 1)
+
+        instrument_callbacks(self.dash_app, 'instrumentation_test')  # Wrapping twice is a no-op
+        self._fire('echo.children')
+        self.assertEqual(self._stats()['echo']['calls'] - after['echo']['calls'], 1)
+
+    def test_timings_page_admin_only(self):
+        """Test the debug page JSON, sort validation and the admin check."""
+        self._fire('echo.children')
+        admin = MagicMock(is_authenticated=True, role='Admin')
+        with patch('utils.utils.current_user', admin):
+            response = self.client.get('/monitor/dash-callbacks?format=json&sort=calls')
+            self.assertEqual(response.status_code, 200)
+            rows = response.get_json()['data']
+            self.assertEqual([row['calls'] for row in rows], sorted((row['calls'] for row in rows), reverse=True))
+            self.assertEqual(self.client.get('/monitor/dash-callbacks?sort=output').status_code, 400)
+
+        with patch('utils.utils.current_user', MagicMock(is_authenticated=True, role='User')), \
+                patch('utils.utils.url_for', return_value='/'):
+            self.assertEqual(self.client.get('/monitor/dash-callbacks').status_code, 403)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import unittest
+from unittest.mock import patch
+import socket
+import threading
+import time
+import requests
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from utils.http_client import CircuitOpenError, UpstreamClient, UpstreamPolicy
+
+
+class ScriptedHandler(BaseHTTPRequestHandler):
+    """Keep-alive handler answering with the server's scripted status codes."""
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.server.ports.append(self.client_address[1])
+        status = self.server.statuses.pop(0) if self.server.statuses else 200
+        body = b'{"ok": true}'
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        if status == 429:
+            self.send_header('Retry-After', '0')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestHttpClient(unittest.TestCase):
+    """Test suite for the pooled upstream HTTP client."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Start the scripted server."""
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), ScriptedHandler)
+        cls.server.statuses = []
+        cls.server.ports = []
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.url = f"http://127.0.0.1:{cls.server.server_port}/v1/avm/value"
+
+    @classmethod
+    def tearDownClass(cls):
+        """Stop the scripted server."""
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        """Set up a client with short backoff."""
+        self.server.statuses.clear()
+        self.server.ports.clear()
+        self.client = UpstreamClient('test', UpstreamPolicy(
+            connect_timeout=1, read_timeout=2, max_attempts=3, backoff_base=0.001, backoff_max=0.01,
+            failure_threshold=2, reset_timeout=30
+        ))
+
+    def test_connections_reused(self):
+        """Test that sequential requests share one keep-alive connection."""
+        for _ in range(3):
+            self.assertEqual(self.client.get(self.url, params={'address': '1 Main St'}).json(), {'ok': True})
+        self.assertEqual(len(set(self.server.ports)), 1)
+
+    def test_retries_on_5xx_and_429(self):
+        """Test retries with backoff and the returned final response."""
+        self.server.statuses.extend([503, 429])
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+
+        stats = self.client.stats()
+        self.assertEqual(stats['retries'], 2)
+        self.assertEqual(stats['responses'], {'503': 1, '429': 1, '200': 1})
+        self.assertEqual(stats['latency']['count'], 3)
+        self.assertEqual(stats['latency']['buckets']['+Inf'], 3)
+
+        # Exhausted retries hand back the last response; client errors are not retried
+        self.server.statuses.extend([502, 502, 502, 404])
+        self.assertEqual(self.client.get(self.url).status_code, 502)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 404)
+        with self.assertRaises(requests.HTTPError):
+            response.raise_for_status()
+
+    def test_circuit_breaker(self):
+        """Test that repeated failures open the circuit until a trial call succeeds."""
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            dead_url = f"http://127.0.0.1:{sock.getsockname()[1]}/"
+
+        for _ in range(2):
+            with self.assertRaises(requests.ConnectionError):
+                self.client.get(dead_url)
+        self.assertEqual(self.client.breaker.state, 'open')
+        with self.assertRaises(CircuitOpenError):
+            self.client.get(self.url)
+        self.assertEqual(self.server.ports, [])
+
+        with patch('utils.http_client.time.monotonic', return_value=time.monotonic() + 60):
+            self.assertEqual(self.client.breaker.state, 'half_open')
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+        self.assertEqual(self.client.breaker.state, 'closed')
+
+
+if __name__ == '__main__':
+    unittest.main()
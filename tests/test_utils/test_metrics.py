@@ -0,0 +1,107 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import os
+import shutil
+import tempfile
+from flask import Flask
+from routes.monitor import monitor_bp
+from utils.json_handler import read_json, write_json
+from utils.metrics import (MetricsRegistry, http_request_duration, http_requests, init_metrics,
+                           json_store_bytes, json_store_duration, store_label)
+
+
+class TestMetrics(unittest.TestCase):
+    """Test suite for the metrics registry, hooks and /metrics endpoint."""
+
+    def setUp(self):
+        """Set up an instrumented app with the monitor blueprint."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.app = Flask(__name__)
+        self.app.config.update(COMPS_DIR=None, PROPERTIES_FILE=None,
+                               ANALYSES_DIR=os.path.join(self.temp_dir, 'analyses'))
+        self.app.register_blueprint(monitor_bp)
+        init_metrics(self.app, 'metrics_test')
+
+        @self.app.route('/boom')
+        def boom():
+            raise RuntimeError('boom')
+
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        """Clean up the temporary directory."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_registry_text_format(self):
+        """Test counter and histogram exposition, including label escaping."""
+        registry = MetricsRegistry()
+        counter = registry.counter('jobs_total', 'Jobs run', ('queue',))
+        histogram = registry.histogram('job_seconds', 'Job time', ('queue',), buckets=(0.1, 1.0))
+        counter.inc(queue='a"b')
+        counter.inc(2, queue='a"b')
+        histogram.observe(0.5, queue='x')
+        self.assertIs(registry.counter('jobs_total', 'Jobs run', ('queue',)), counter)
+
+        lines = registry.render().splitlines()
+        self.assertIn('# TYPE jobs_total counter', lines)
+        self.assertIn('jobs_total{queue="a\\"b"} 3', lines)
+        self.assertIn('job_seconds_bucket{queue="x",le="0.1"} 0', lines)
+        self.assertIn('job_seconds_bucket{queue="x",le="1.0"} 1', lines)
+        self.assertIn('job_seconds_bucket{queue="x",le="+Inf"} 1', lines)
+        self.assertIn('job_seconds_count{queue="x"} 1', lines)
+
+    def test_requests_counted_per_endpoint(self):
+        """Test request counts and latency, including unhandled errors."""
+        labels = {'app': 'metrics_test', 'endpoint': 'monitor.health_check', 'method': 'GET'}
+        before = (http_requests.value(status=200, **labels), http_request_duration.snapshot(**labels)['count'],
+                  http_requests.value(app='metrics_test', endpoint='boom', method='GET', status=500))
+        self.client.get('/health')
+        self.client.get('/health')
+        self.client.get('/boom')
+
+        self.assertEqual(http_requests.value(status=200, **labels) - before[0], 2)
+        self.assertEqual(http_request_duration.snapshot(**labels)['count'] - before[1], 2)
+        self.assertEqual(http_requests.value(app='metrics_test', endpoint='boom', method='GET', status=500)
+                         - before[2], 1)
+
+    def test_metrics_endpoint(self):
+        """Test the scrape output and admin or METRICS_TOKEN protection."""
+        self.client.get('/health')
+        with patch('routes.monitor.current_user', MagicMock(is_authenticated=False)):
+            self.assertEqual(self.client.get('/metrics').status_code, 403)
+        with patch('routes.monitor.current_user', MagicMock(is_authenticated=True, role='User')):
+            self.assertEqual(self.client.get('/metrics').status_code, 403)
+        with patch('routes.monitor.current_user', MagicMock(is_authenticated=True, role='Admin')):
+            body = self.client.get('/metrics').get_data(as_text=True)
+        self.assertIn('http_requests_total{app="metrics_test",endpoint="monitor.health_check",'
+                      'method="GET",status="200"}', body)
+        self.assertIn('process_resident_memory_bytes{pid=', body)
+        self.assertIn('# TYPE upstream_request_duration_seconds histogram', body)
+
+        self.app.config['METRICS_TOKEN'] = 'secret'
+        with patch('routes.monitor.current_user', MagicMock(is_authenticated=True, role='Admin')):
+            self.assertEqual(self.client.get('/metrics').status_code, 401)
+        response = self.client.get('/metrics', headers={'Authorization': 'Bearer secret'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain; version=0.0.4'))
+
+    def test_json_store_timings(self):
+        """Test JSON store reads and writes labelled without per-record cardinality."""
+        path = os.path.join(self.temp_dir, 'properties.json')
+        writes = json_store_bytes.value(store='properties', op='write')
+        write_json(path, [{'address': '123 Main St'}])
+        read_json(path)
+
+        size = os.path.getsize(path)
+        self.assertEqual(json_store_bytes.value(store='properties', op='write') - writes, size)
+        self.assertGreaterEqual(json_store_duration.snapshot(store='properties', op='read')['count'], 1)
+        self.assertEqual(store_label('/data/analyses/0b6c3a7e-1f2d-4c5b-9a8e-7d6f5e4c3b2a_user@example.com.json'),
+                         'analyses')
+
+        with patch('utils.metrics.psutil', None), \
+                patch('routes.monitor.current_user', MagicMock(is_authenticated=True, role='Admin')):
+            self.assertNotIn('process_resident_memory_bytes', self.client.get('/metrics').get_data(as_text=True))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import os
+import pstats
+import shutil
+import tempfile
+from flask import Flask
+from routes.monitor import monitor_bp
+from utils.request_profiler import init_request_profiler, list_profiles
+
+
+def busy_work():
+    return sum(i * i for i in range(20000))
+
+
+class TestRequestProfiler(unittest.TestCase):
+    """Test suite for on-demand and sampled request profiling."""
+
+    def setUp(self):
+        """Set up a profiled app with the monitor blueprint."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.app = Flask(__name__)
+        self.app.config.update(SECRET_KEY='test', LOGIN_DISABLED=True, PROFILES_DIR=self.temp_dir,
+                               PROFILE_SAMPLE_RATE=0, PROFILE_MAX_FILES=3)
+        self.app.register_blueprint(monitor_bp)
+        init_request_profiler(self.app, 'profiler_test')
+
+        @self.app.route('/work')
+        def work():
+            return str(busy_work())
+
+        @self.app.route('/dash/_dash-update-component', methods=['POST'])
+        def dash_update():
+            return str(busy_work())
+
+        self.client = self.app.test_client()
+        self.admin = MagicMock(is_authenticated=True, role='Admin')
+        self.user = MagicMock(is_authenticated=True, role='User')
+
+    def tearDown(self):
+        """Clean up the profiles directory."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_admin_flag_profiles_request(self):
+        """Test that only admins can request a profile and that all files are written."""
+        with patch('utils.request_profiler.current_user', self.user):
+            response = self.client.get('/work?_profile=1')
+        self.assertNotIn('X-Profile-Id', response.headers)
+        self.assertEqual(list_profiles(self.temp_dir), [])
+
+        with patch('utils.request_profiler.current_user', self.admin):
+            response = self.client.get('/work', headers={'X-Profile-Request': '1'})
+        profile_id = response.headers['X-Profile-Id']
+        profile = list_profiles(self.temp_dir)[0]
+        self.assertEqual((profile['id'], profile['label'], profile['trigger'], profile['app']),
+                         (profile_id, 'work', 'header', 'profiler_test'))
+
+        stats = pstats.Stats(os.path.join(self.temp_dir, f"{profile_id}.pstats"))
+        self.assertTrue(any(func[2] == 'busy_work' for func in stats.stats))
+        with open(os.path.join(self.temp_dir, f"{profile_id}.collapsed"), 'r') as f:
+            lines = f.read().splitlines()
+        stack, weight = lines[0].rsplit(' ', 1)
+        self.assertGreater(int(weight), 0)
+        self.assertTrue(any('test_request_profiler.busy_work:' in line.split(' ')[0] and
+                            'test_request_profiler.work:' in line for line in lines))
+
+    def test_dash_callbacks_and_sampling(self):
+        """Test profiling callbacks from a flagged dashboard page, sampling and pruning."""
+        with patch('utils.request_profiler.current_user', self.admin):
+            response = self.client.post('/dash/_dash-update-component', json={'output': 'chart.figure'},
+                                        headers={'Referer': 'http://localhost/dash/?_profile=1'})
+        self.assertEqual(list_profiles(self.temp_dir)[0]['label'], 'dash:chart.figure')
+        self.assertEqual(list_profiles(self.temp_dir)[0]['trigger'], 'referrer')
+
+        self.app.config['PROFILE_SAMPLE_RATE'] = 1.0
+        with patch('utils.request_profiler.current_user', self.user):
+            for _ in range(4):
+                response = self.client.get('/work')
+            self.assertIn('X-Profile-Id', response.headers)
+            self.assertNotIn('X-Profile-Id', self.client.get('/health').headers)
+        profiles = list_profiles(self.temp_dir)
+        self.assertEqual(len(profiles), 3)
+        self.assertEqual({profile['trigger'] for profile in profiles}, {'sample'})
+        self.assertEqual(len(os.listdir(self.temp_dir)), 9)
+
+    def test_admin_routes(self):
+        """Test listing and downloading profiles, including invalid and missing IDs."""
+        with patch('utils.request_profiler.current_user', self.admin):
+            profile_id = self.client.get('/work?_profile=1').headers['X-Profile-Id']
+
+        with patch('utils.utils.current_user', self.admin):
+            listed = self.client.get('/monitor/profiles?format=json').get_json()['data']
+            self.assertEqual([profile['id'] for profile in listed], [profile_id])
+
+            response = self.client.get(f'/monitor/profiles/{profile_id}/collapsed')
+            self.assertEqual(response.status_code, 200)
+            self.assertIn(f'{profile_id}.collapsed', response.headers['Content-Disposition'])
+            self.assertEqual(self.client.get(f'/monitor/profiles/{profile_id}/html').status_code, 400)
+            self.assertEqual(self.client.get('/monitor/profiles/..secrets/pstats').status_code, 400)
+            self.assertEqual(self.client.get('/monitor/profiles/20990101-000000_missing/pstats').status_code, 404)
+
+        with patch('utils.utils.current_user', self.user), patch('utils.utils.url_for', return_value='/'):
+            self.assertEqual(self.client.get('/monitor/profiles').status_code, 403)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+from unittest.mock import patch
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import utils.startup_profiler as startup_profiler
+from utils.startup_profiler import StartupProfiler, startup_phase, start_startup_profiler
+
+
+class TestStartupProfiler(unittest.TestCase):
+    """Test suite for the opt-in startup profiler."""
+
+    def setUp(self):
+        """Set up a package of slow modules to import."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.report_path = os.path.join(self.temp_dir, 'logs', 'startup_profile.json')
+        with open(os.path.join(self.temp_dir, 'profiled_outer.py'), 'w') as f:
+            f.write("import time\nimport profiled_inner\ntime.sleep(0.02)\n")
+        with open(os.path.join(self.temp_dir, 'profiled_inner.py'), 'w') as f:
+            f.write("import time\ntime.sleep(0.05)\n")
+        sys.path.insert(0, self.temp_dir)
+        self.profiler = StartupProfiler(self.report_path)
+
+    def tearDown(self):
+        """Remove the hook, the modules and the temporary directory."""
+        self.profiler.uninstall()
+        sys.path.remove(self.temp_dir)
+        for name in ('profiled_outer', 'profiled_inner'):
+            sys.modules.pop(name, None)
+        startup_profiler._profiler = None
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_imports_and_phases_reported(self):
+        """Test self and total import times, phase attribution and the JSON report."""
+        self.profiler.install()
+        with self.profiler.phase('blueprints'):
+            import profiled_outer  # noqa: F401
+        with self.profiler.phase('logging'):
+            time.sleep(0.01)
+        report = self.profiler.finish()
+
+        imports = {entry['module']: entry for entry in report['imports']}
+        outer, inner = imports['profiled_outer'], imports['profiled_inner']
+        self.assertGreaterEqual(inner['self_ms'], 50)
+        self.assertGreaterEqual(outer['total_ms'], outer['self_ms'] + inner['total_ms'] - 1)
+        self.assertLess(outer['self_ms'], 50)
+        self.assertEqual((outer['phase'], inner['phase']), ('blueprints', 'blueprints'))
+        self.assertEqual(report['imports'][0]['module'], 'profiled_inner')  # Sorted by self time
+        self.assertEqual([phase['name'] for phase in report['phases']], ['blueprints', 'logging'])
+        self.assertGreaterEqual(report['phases'][0]['duration_ms'], 70)
+
+        with open(self.report_path, 'r') as f:
+            self.assertEqual(json.load(f)['import_count'], report['import_count'])
+
+    def test_disabled_without_env(self):
+        """Test that nothing is installed unless STARTUP_PROFILE is set."""
+        with patch.dict(os.environ, {'STARTUP_PROFILE': ''}):
+            self.assertIsNone(start_startup_profiler())
+        with startup_phase('config'):
+            pass
+        self.assertFalse(any(isinstance(finder, startup_profiler._ImportTimer) for finder in sys.meta_path))
+
+        with patch.dict(os.environ, {'STARTUP_PROFILE': '1', 'STARTUP_PROFILE_FILE': self.report_path}):
+            self.profiler = start_startup_profiler()
+        with startup_phase('config'):
+            pass
+        self.assertEqual(self.profiler.report_path, self.report_path)
+        self.assertEqual([phase['name'] for phase in self.profiler.report()['phases']], ['config'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import os
+import shutil
+import tempfile
+import time
+from flask import Flask
+from utils.comps_handler import RentcastAPIError, fetch_property_comps, fetch_rental_comps
+from utils.http_client import UpstreamClient, UpstreamPolicy
+from utils.upstream_standin import LatencyModel, StandinConfig, UpstreamStandin, create_standin_app
+from tests.stub_servers import rentcast_config, start_server
+
+
+class TestUpstreamStandin(unittest.TestCase):
+    """Test suite for the local RentCast and Geoapify stand-in."""
+
+    def setUp(self):
+        """Set up an app configured against a fresh stand-in."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.app = Flask(__name__)
+        self.app.secret_key = 'test'
+        self.app.config.update(
+            MAX_COMP_RUNS_PER_SESSION=100,
+            COMPS_DIR=os.path.join(self.temp_dir, 'comps'),
+            COMPS_CACHE_TTL=0,
+            GEOAPIFY_API_KEY='test_api_key_123'
+        )
+        # Short backoff so retry tests stay fast
+        self.client = UpstreamClient('rentcast', UpstreamPolicy(backoff_base=0.001, backoff_max=0.01))
+        patcher = patch('utils.comps_handler.get_client', return_value=self.client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        """Stop the stand-in and clean up."""
+        if hasattr(self, 'server'):
+            self.server.shutdown()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _serve(self, **config):
+        self.standin = UpstreamStandin(StandinConfig(**config))
+        self.server = start_server(create_standin_app(self.standin), threaded=True)
+        self.app.config.update(rentcast_config(
+            self.server, RENTCAST_COMP_DEFAULTS={'maxRadius': 1.0, 'daysOld': 180, 'compCount': 8}
+        ))
+        self.app.config['GEOAPIFY_API_BASE_URL'] = self.app.config['RENTCAST_API_BASE_URL']
+
+    def _comps(self, address='454 Guilford Avenue, Hagerstown, MD 21740'):
+        with self.app.test_request_context():
+            return fetch_property_comps(self.app.config, address, 'Single Family', 3, 1.5, 1344)
+
+    def test_fixture_and_synthetic_payloads_are_deterministic(self):
+        """Test that comps come from fixtures or stable synthetic values."""
+        self._serve()
+        comps = self._comps()
+        self.assertEqual((comps['price'], comps['priceRangeLow']), (212000, 196000))
+        self.assertEqual(len(comps['comparables']), 6)  # Active listings are filtered out by the handler
+        self.assertTrue(all(comp['saleDate'] for comp in comps['comparables']))
+
+        other = self._comps('9 Nowhere Lane, Smalltown, KS 67001')
+        again = self._comps('9 NOWHERE LN, Smalltown, KS 67001')
+        self.assertEqual(other['price'], again['price'])
+        self.assertEqual([c['price'] for c in other['comparables']], [c['price'] for c in again['comparables']])
+
+        with self.app.test_request_context():
+            rental = fetch_rental_comps(self.app.config, '454 Guilford Avenue, Hagerstown, MD 21740', 3, 1.5, 1344)
+        self.assertEqual(rental['estimated_rent'], 1750)
+
+    def test_latency_errors_and_429_bursts(self):
+        """Test injected latency and that the pooled client retries through failures."""
+        self._serve(rentcast_latency=LatencyModel.parse('fixed:50'), burst_every=4, burst_length=2,
+                    retry_after=0)
+        start = time.monotonic()
+        self._comps()
+        self.assertGreaterEqual(time.monotonic() - start, 0.05)
+        self._comps()
+        self._comps()  # Requests 2 and 3 are a 429 burst, retried until request 4 succeeds
+
+        stats = self.standin.stats()['rentcast']
+        self.assertEqual((stats['requests'], stats['statuses']), (5, {'200': 3, '429': 2}))
+        self.assertEqual(self.client.stats()['retries'], 2)
+
+        # Same seed, same error sequence
+        standins = [UpstreamStandin(StandinConfig(error_rate=0.3, seed=7)) for _ in range(2)]
+        plans = [[standin.plan('rentcast')[1] for _ in range(30)] for standin in standins]
+        self.assertEqual(plans[0], plans[1])
+        self.assertEqual(set(plans[0]), {200, 503})
+        with self.assertRaises(ValueError):
+            LatencyModel.parse('normal:100')
+
+    def test_errors_surface_after_retries(self):
+        """Test that persistent upstream errors reach the caller as RentcastAPIError."""
+        self._serve(error_rate=1.0, error_status=503)
+        with self.assertRaises(RentcastAPIError):
+            self._comps()
+        self.assertEqual(self.standin.stats()['rentcast']['statuses'], {'503': self.client.policy.max_attempts})
+
+    def test_geoapify_autocomplete(self):
+        """Test autocomplete through the API route against the stand-in."""
+        from routes.api import api_bp
+        self._serve()
+        self.app.config.update(PROPERTIES_FILE=None, ANALYSES_DIR=os.path.join(self.temp_dir, 'analyses'))
+        self.app.register_blueprint(api_bp, url_prefix='/api')
+
+        with patch('routes.api.current_user', MagicMock(is_authenticated=False)):
+            data = self.app.test_client().get('/api/autocomplete?query=12 Maple Dr').get_json()
+
+        self.assertEqual(data['status'], 'success')
+        self.assertEqual([r['formatted'] for r in data['data']],
+                         ['12 Maple Drive, Springfield, IL 62704, United States of America'])
+        self.assertEqual(self.standin.stats()['geoapify']['statuses'], {'200': 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,388 @@
+"""Server-side address autocomplete: local prefix index plus a Geoapify response cache."""
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+AUTOCOMPLETE_LIMIT = 5  # Suggestions requested from Geoapify and returned to the browser
+MIN_QUERY_LENGTH = 2
+MIN_PREFIX_RESULTS = 3  # Filtered prefix results needed to skip Geoapify when the prefix list was truncated
+MAX_NODE_ENTRIES = 64  # Addresses kept per trie node
+DEFAULT_AUTOCOMPLETE_CACHE_TTL = 24 * 60 * 60
+DEFAULT_AUTOCOMPLETE_CACHE_SIZE = 2000
+COALESCE_TIMEOUT = 15  # Seconds a duplicate query waits for the request already in flight
+
+SOURCE_LOCAL = 'local'
+SOURCE_CACHE = 'cache'
+SOURCE_PREFIX = 'prefix'
+SOURCE_GEOAPIFY = 'geoapify'
+
+_autocompleters: Dict[tuple, 'AddressAutocomplete'] = {}
+_autocompleters_lock = threading.Lock()
+
+
+def normalize_query(text: str) -> str:
+    """
+    Normalize an address or query for matching.
+
+    Case, punctuation and repeated whitespace are ignored, so typing
+    '123 Main St., Spr' extends '123 main st' as a prefix.
+
+    Args:
+        text: Query or address text
+
+    Returns:
+        Normalized text
+    """
+    return ' '.join(re.sub(r'[^\w\s]', ' ', str(text).lower()).split())
+
+
+def matches_query(query: str, address: str) -> bool:
+    """
+    Check whether an address can complete a normalized query.
+
+    Every query word must start some word of the address.
+
+    Args:
+        query: Normalized query
+        address: Address text
+
+    Returns:
+        True if the address matches
+    """
+    words = normalize_query(address).split()
+    return all(any(word.startswith(term) for word in words) for term in query.split())
+
+
+class _TrieNode:
+    __slots__ = ('children', 'entries')
+
+    def __init__(self):
+        self.children: Dict[str, '_TrieNode'] = {}
+        self.entries: List[int] = []
+
+
+class AddressTrie:
+    """Character trie over normalized addresses; each node lists the addresses below it."""
+
+    def __init__(self):
+        self.root = _TrieNode()
+        self.addresses: List[Tuple[str, frozenset]] = []
+        self._positions: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.addresses)
+
+    def insert(self, address: str, owners: Iterable[str]) -> None:
+        """
+        Add an address visible to the given owners.
+
+        Args:
+            address: Address as displayed
+            owners: User IDs and partner names allowed to see the address
+        """
+        key = normalize_query(address)
+        if not key:
+            return
+        owners = frozenset(owner.strip().lower() for owner in owners if owner)
+        position = self._positions.get(key)
+        if position is not None:
+            # Same address from another property or analysis: merge the owners
+            shown, known = self.addresses[position]
+            self.addresses[position] = (shown, known | owners)
+            return
+
+        position = self._positions[key] = len(self.addresses)
+        self.addresses.append((address.strip(), owners))
+        node = self.root
+        for char in key:
+            node = node.children.setdefault(char, _TrieNode())
+            if len(node.entries) < MAX_NODE_ENTRIES:
+                node.entries.append(position)
+
+    def search(self, query: str, viewer: Optional[Dict] = None, limit: int = AUTOCOMPLETE_LIMIT) -> List[str]:
+        """
+        Find addresses starting with a normalized query.
+
+        Only addresses the viewer owns or partners on are returned, for
+        admins too: suggestions are not the place to browse other users' data.
+
+        Args:
+            query: Normalized query
+            viewer: Dict with user_id and name; None matches nothing
+            limit: Maximum number of addresses
+
+        Returns:
+            Matching addresses visible to the viewer
+        """
+        if not viewer:
+            return []
+        node = self.root
+        for char in query:
+            node = node.children.get(char)
+            if node is None:
+                return []
+
+        identities = {str(viewer.get(field, '')).strip().lower() for field in ('user_id', 'name')} - {''}
+        found = []
+        for position in node.entries:
+            address, owners = self.addresses[position]
+            if owners & identities:
+                found.append(address)
+                if len(found) >= limit:
+                    break
+        return found
+
+
+class AddressIndex:
+    """Address trie seeded from properties.json and saved analyses, rebuilt when they change."""
+
+    def __init__(self, properties_file: Optional[str], analyses_dir: Optional[str]):
+        self.properties_file = properties_file
+        self.analyses_dir = analyses_dir
+        self.trie = AddressTrie()
+        self._signature = None
+        self._lock = threading.Lock()
+
+    def _source_signature(self) -> tuple:
+        signature = []
+        for path in (self.properties_file, self.analyses_dir):
+            try:
+                signature.append(os.stat(path).st_mtime_ns if path else None)
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
+
+    def _property_entries(self) -> Iterable[Tuple[str, List[str]]]:
+        if not self.properties_file or not os.path.exists(self.properties_file):
+            return
+        with open(self.properties_file, 'r') as f:
+            properties = json.load(f)
+        for prop in properties if isinstance(properties, list) else []:
+            if isinstance(prop, dict) and prop.get('address'):
+                partners = [partner.get('name', '') for partner in prop.get('partners', [])
+                            if isinstance(partner, dict)]
+                yield prop['address'], partners
+
+    def _analysis_entries(self) -> Iterable[Tuple[str, List[str]]]:
+        if not self.analyses_dir or not os.path.isdir(self.analyses_dir):
+            return
+        for filename in os.listdir(self.analyses_dir):
+            if not filename.endswith('.json') or '_' not in filename:
+                continue
+            try:
+                with open(os.path.join(self.analyses_dir, filename), 'r') as f:
+                    analysis = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning(f"Skipping analysis {filename} in address index: {str(e)}")
+                continue
+            if isinstance(analysis, dict) and analysis.get('address'):
+                # Analysis files are named {analysis_id}_{user_id}.json
+                yield analysis['address'], [analysis.get('user_id') or filename[:-5].split('_', 1)[1]]
+
+    def refresh(self) -> None:
+        """Rebuild the trie if properties.json or the analyses directory changed."""
+        signature = self._source_signature()
+        if signature == self._signature:
+            return
+        with self._lock:
+            if signature == self._signature:
+                return
+            trie = AddressTrie()
+            try:
+                for address, owners in self._property_entries():
+                    trie.insert(address, owners)
+                for address, owners in self._analysis_entries():
+                    trie.insert(address, owners)
+            except Exception as e:
+                logger.error(f"Error building address index: {str(e)}")
+                logger.error(traceback.format_exc())
+                return
+            self.trie = trie
+            self._signature = signature
+            logger.debug(f"Built address index with {len(trie)} addresses")
+
+    def search(self, query: str, viewer: Optional[Dict] = None, limit: int = AUTOCOMPLETE_LIMIT) -> List[str]:
+        self.refresh()
+        return self.trie.search(query, viewer, limit)
+
+
+class AutocompleteCache:
+    """
+    In-memory LRU cache of Geoapify suggestions keyed by normalized query.
+
+    A query missing from the cache can still be answered from a cached
+    shorter prefix: its suggestions are filtered down to those matching the
+    longer query. That is safe when the prefix list was complete (fewer than
+    AUTOCOMPLETE_LIMIT suggestions) and good enough when enough remain; an
+    empty filtered list always goes back to Geoapify.
+    """
+
+    def __init__(self, ttl: int = DEFAULT_AUTOCOMPLETE_CACHE_TTL, max_entries: int = DEFAULT_AUTOCOMPLETE_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[str, Tuple[float, List[Dict]]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key: str) -> Optional[List[Dict]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.time() - entry[0] >= self.ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def lookup(self, query: str, limit: int = AUTOCOMPLETE_LIMIT) -> Tuple[Optional[List[Dict]], Optional[str]]:
+        """
+        Find cached suggestions for a normalized query.
+
+        Args:
+            query: Normalized query
+            limit: Suggestion count Geoapify was asked for
+
+        Returns:
+            Tuple of the suggestions and SOURCE_CACHE or SOURCE_PREFIX,
+            or (None, None) if Geoapify has to be asked
+        """
+        with self._lock:
+            results = self._get(query)
+            if results is not None:
+                return list(results), SOURCE_CACHE
+            for end in range(len(query) - 1, MIN_QUERY_LENGTH - 1, -1):
+                results = self._get(query[:end])
+                if results is None:
+                    continue
+                filtered = [result for result in results if matches_query(query, result['formatted'])]
+                if filtered and (len(results) < limit or len(filtered) >= MIN_PREFIX_RESULTS):
+                    return filtered, SOURCE_PREFIX
+                # Too little of the longest cached prefix matches; let Geoapify's fuzzy matching try
+                return None, None
+        return None, None
+
+    def store(self, query: str, results: List[Dict]) -> None:
+        with self._lock:
+            self._entries[query] = (time.time(), list(results))
+            self._entries.move_to_end(query)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class AddressAutocomplete:
+    """Suggest addresses from local data first, then cached or coalesced Geoapify lookups."""
+
+    def __init__(self, index: AddressIndex, cache: AutocompleteCache, limit: int = AUTOCOMPLETE_LIMIT):
+        self.index = index
+        self.cache = cache
+        self.limit = limit
+        self.counts = {source: 0 for source in (SOURCE_LOCAL, SOURCE_CACHE, SOURCE_PREFIX, SOURCE_GEOAPIFY)}
+        self.coalesced = 0
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def _fetch_once(self, key: str, fetch: Callable[[], List[Dict]]) -> List[Dict]:
+        """Call Geoapify for a query, sharing one request among concurrent identical queries."""
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+            else:
+                self.coalesced += 1
+        if not leader:
+            return list(future.result(timeout=COALESCE_TIMEOUT))
+
+        try:
+            results = fetch()
+            self.cache.store(key, results)
+            future.set_result(results)
+            return list(results)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def suggest(self, query: str, fetch: Callable[[], List[Dict]],
+                viewer: Optional[Dict] = None) -> Tuple[List[Dict], str]:
+        """
+        Get address suggestions for a query.
+
+        Args:
+            query: Query as typed
+            fetch: Callable asking Geoapify and returning validated results
+                (dicts with formatted, lat and lon)
+            viewer: Current user as a dict of user_id and name, used to
+                show only their own properties and analyses
+
+        Returns:
+            Tuple of up to limit suggestions and the source of the remote part
+            (or SOURCE_LOCAL if local addresses filled the list)
+        """
+        key = normalize_query(query)
+        local = [{'formatted': address, 'lat': None, 'lon': None}
+                 for address in self.index.search(key, viewer, self.limit)]
+        if len(local) >= self.limit:
+            source, remote = SOURCE_LOCAL, []
+        else:
+            remote, source = self.cache.lookup(key, self.limit)
+            if remote is None:
+                remote, source = self._fetch_once(key, fetch), SOURCE_GEOAPIFY
+
+        with self._lock:
+            self.counts[source] += 1
+
+        seen = {normalize_query(result['formatted']) for result in local}
+        merged = local + [result for result in remote if normalize_query(result['formatted']) not in seen]
+        return merged[:self.limit], source
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get request counts by source.
+
+        Returns:
+            Dict of local, cache, prefix and geoapify counts plus coalesced
+            requests, cache entries and indexed addresses
+        """
+        with self._lock:
+            stats = dict(self.counts)
+            stats['coalesced'] = self.coalesced
+        stats['cached_queries'] = len(self.cache)
+        stats['indexed_addresses'] = len(self.index.trie)
+        return stats
+
+
+def get_autocomplete(app_config) -> AddressAutocomplete:
+    """
+    Get the autocomplete service for PROPERTIES_FILE and ANALYSES_DIR.
+
+    Args:
+        app_config: Application configuration
+
+    Returns:
+        Shared AddressAutocomplete
+    """
+    key = (app_config.get('PROPERTIES_FILE'), app_config.get('ANALYSES_DIR'))
+    with _autocompleters_lock:
+        autocomplete = _autocompleters.get(key)
+        if autocomplete is None:
+            cache = AutocompleteCache(
+                int(app_config.get('AUTOCOMPLETE_CACHE_TTL', DEFAULT_AUTOCOMPLETE_CACHE_TTL)),
+                int(app_config.get('AUTOCOMPLETE_CACHE_SIZE', DEFAULT_AUTOCOMPLETE_CACHE_SIZE))
+            )
+            autocomplete = _autocompleters[key] = AddressAutocomplete(AddressIndex(*key), cache)
+    return autocomplete
@@ -0,0 +1,254 @@
+"""Persistent cache for RentCast comps responses."""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_COMPS_CACHE_TTL = 7 * 24 * 60 * 60  # Serve cached comps for a week
+DEFAULT_COMPS_CACHE_STALE_TTL = 30 * 24 * 60 * 60  # Then serve stale while refreshing, for up to a month
+COMPS_REFRESH_WORKERS = 2
+
+CACHE_HIT = 'hit'
+CACHE_STALE = 'stale'
+CACHE_MISS = 'miss'
+
+_caches: Dict[tuple, 'CompsCache'] = {}
+_caches_lock = threading.Lock()
+
+
+def normalize_address(address: str) -> str:
+    """
+    Normalize an address for cache keys.
+
+    Case, punctuation other than commas and repeated whitespace are ignored,
+    so '123 Main St., Springfield' and '123 MAIN ST, springfield' match.
+
+    Args:
+        address: Address as sent to RentCast
+
+    Returns:
+        Normalized address
+    """
+    address = re.sub(r'[^\w\s,]', '', str(address).upper())
+    parts = [' '.join(part.split()) for part in address.split(',')]
+    return ','.join(part for part in parts if part)
+
+
+def _normalize_value(value: Any) -> Any:
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return str(value).strip().lower()
+
+
+def comps_cache_key(endpoint: str, params: Dict) -> str:
+    """
+    Build the cache key for a RentCast request.
+
+    Args:
+        endpoint: API path, e.g. 'avm/value'
+        params: Query parameters, including the address
+
+    Returns:
+        SHA-256 hex digest
+    """
+    normalized = {
+        name: normalize_address(value) if name == 'address' else _normalize_value(value)
+        for name, value in params.items()
+    }
+    payload = json.dumps({'endpoint': endpoint.strip('/'), 'params': normalized}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class CompsCache:
+    """
+    On-disk cache of raw RentCast responses with stale-while-revalidate.
+
+    Entries younger than ttl are served as hits. Entries up to stale_ttl old
+    are served immediately while a background refresh replaces them. Older
+    entries, and failures of the background refresh, fall through to the API.
+    """
+
+    def __init__(self, cache_dir: str, ttl: int = DEFAULT_COMPS_CACHE_TTL,
+                 stale_ttl: int = DEFAULT_COMPS_CACHE_STALE_TTL):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.stale_ttl = max(stale_ttl, ttl)
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self._executor = ThreadPoolExecutor(max_workers=COMPS_REFRESH_WORKERS, thread_name_prefix='comps-refresh')
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _read(self, key: str) -> Optional[Dict]:
+        try:
+            with open(self._path(key), 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (json.JSONDecodeError, OSError) as e:
+            logger.warning(f"Ignoring unreadable comps cache entry {key}: {str(e)}")
+            return None
+
+    def _write(self, key: str, endpoint: str, params: Dict, response: Dict) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump({
+                'fetched_at': time.time(),
+                'endpoint': endpoint,
+                'address': params.get('address'),
+                'response': response
+            }, f)
+        os.replace(temp_path, path)
+
+    def _refresh(self, key: str, endpoint: str, params: Dict, fetch: Callable[[], Dict]) -> None:
+        try:
+            self._write(key, endpoint, params, fetch())
+            with self._lock:
+                self.refreshes += 1
+            logger.debug(f"Refreshed stale comps for {params.get('address')}")
+        except Exception as e:
+            with self._lock:
+                self.refresh_errors += 1
+            logger.error(f"Error refreshing comps for {params.get('address')}: {str(e)}")
+            logger.error(traceback.format_exc())
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def has_entry(self, endpoint: str, params: Dict) -> bool:
+        """
+        Check whether a request would be served from the cache without calling the API.
+
+        Args:
+            endpoint: API path, e.g. 'avm/value'
+            params: Query parameters
+
+        Returns:
+            True if a fresh or stale entry exists for the request
+        """
+        entry = self._read(comps_cache_key(endpoint, params))
+        return bool(entry) and time.time() - entry['fetched_at'] < self.stale_ttl
+
+    def get_or_fetch(self, endpoint: str, params: Dict, fetch: Callable[[], Dict],
+                     force: bool = False) -> Tuple[Dict, str]:
+        """
+        Return the cached response for a request, calling the API when needed.
+
+        Args:
+            endpoint: API path, e.g. 'avm/value'
+            params: Query parameters (the API key is not part of them)
+            fetch: Callable performing the API request and returning the JSON body
+            force: Skip the cached entry and replace it with a fresh response
+
+        Returns:
+            Tuple of the response (a fresh copy the caller may modify) and
+            CACHE_HIT, CACHE_STALE or CACHE_MISS
+        """
+        key = comps_cache_key(endpoint, params)
+        entry = None if force else self._read(key)
+        age = time.time() - entry['fetched_at'] if entry else None
+
+        if entry and age < self.ttl:
+            with self._lock:
+                self.hits += 1
+            logger.debug(f"Comps cache hit for {params.get('address')} ({age:.0f}s old)")
+            return entry['response'], CACHE_HIT
+
+        if entry and age < self.stale_ttl:
+            with self._lock:
+                self.stale_hits += 1
+                refresh = key not in self._refreshing
+                self._refreshing.add(key)
+            if refresh:
+                self._executor.submit(self._refresh, key, endpoint, params, fetch)
+            logger.debug(f"Serving stale comps for {params.get('address')} ({age:.0f}s old)")
+            return entry['response'], CACHE_STALE
+
+        with self._lock:
+            self.misses += 1
+        response = fetch()
+        self._write(key, endpoint, params, response)
+        return json.loads(json.dumps(response)), CACHE_MISS
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the cache counters.
+
+        Returns:
+            Dict of hits, stale_hits, misses, refreshes and refresh_errors
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'refreshes': self.refreshes,
+                'refresh_errors': self.refresh_errors
+            }
+
+
+def get_comps_cache(app_config) -> Optional[CompsCache]:
+    """
+    Get the comps cache configured by COMPS_DIR, COMPS_CACHE_TTL and COMPS_CACHE_STALE_TTL.
+
+    Args:
+        app_config: Application configuration
+
+    Returns:
+        Shared CompsCache, or None if COMPS_DIR is not configured or the TTL is 0
+    """
+    cache_dir = app_config.get('COMPS_DIR')
+    ttl = int(app_config.get('COMPS_CACHE_TTL', DEFAULT_COMPS_CACHE_TTL))
+    if not cache_dir or ttl <= 0:
+        return None
+    stale_ttl = int(app_config.get('COMPS_CACHE_STALE_TTL', DEFAULT_COMPS_CACHE_STALE_TTL))
+    with _caches_lock:
+        cache = _caches.get((cache_dir, ttl, stale_ttl))
+        if cache is None:
+            cache = _caches[(cache_dir, ttl, stale_ttl)] = CompsCache(cache_dir, ttl, stale_ttl)
+    return cache
+
+
+def cached_comps_request(app_config, endpoint: str, params: Dict, fetch: Callable[[], Dict],
+                         force: bool = False) -> Tuple[Dict, str]:
+    """
+    Run a RentCast request through the comps cache when one is configured.
+
+    Args:
+        app_config: Application configuration
+        endpoint: API path, e.g. 'avm/value'
+        params: Query parameters
+        fetch: Callable performing the API request
+        force: Always call the API, refreshing the cached entry
+
+    Returns:
+        Tuple of the response and the cache status
+    """
+    cache = get_comps_cache(app_config)
+    if cache is None:
+        return fetch(), CACHE_MISS
+    return cache.get_or_fetch(endpoint, params, fetch, force=force)
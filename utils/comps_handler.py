@@ -4,6 +4,8 @@ from datetime import datetime
 import logging
 from flask import session, current_app
 from utils.mao_calculator import calculate_mao
+from utils.comps_cache import CACHE_MISS, cached_comps_request, get_comps_cache
+from utils.http_client import get_client
 
 logger = logging.getLogger(__name__)
 
@@ -103,6 +105,59 @@ def format_address(address: str) -> str:
         # If anything goes wrong, return the original address without encoding
         return address
 
+def _property_comps_params(comp_defaults: Dict, address: str, property_type: str, bedrooms: float,
+                           bathrooms: float, square_footage: float) -> Dict:
+    return {
+        'address': format_address(address),
+        'propertyType': property_type,
+        'bedrooms': bedrooms,
+        'bathrooms': bathrooms,
+        'squareFootage': square_footage,
+        'maxRadius': comp_defaults.get('maxRadius', 1.0),
+        'daysOld': comp_defaults.get('daysOld', 180),
+        'compCount': comp_defaults.get('compCount', 5),
+        'includeActiveSoldPending': 'false',  # Only include sold properties
+        'includeSold': 'true'
+    }
+
+def check_property_comps_allowed(
+    app_config,
+    address: str,
+    property_type: str,
+    bedrooms: float,
+    bathrooms: float,
+    square_footage: float
+) -> None:
+    """
+    Check the session run limit before any comps call goes out.
+    
+    Runs past MAX_COMP_RUNS_PER_SESSION are still allowed when the property
+    comps would be served from the comps cache, as fetch_property_comps
+    only counts paid API calls.
+    
+    Args:
+        app_config: Application configuration
+        address: Property address string
+        property_type: Type of property
+        bedrooms: Number of bedrooms
+        bathrooms: Number of bathrooms
+        square_footage: Property square footage
+        
+    Raises:
+        RentcastAPIError: If the session has used up its comp runs
+    """
+    max_runs = app_config.get('MAX_COMP_RUNS_PER_SESSION')
+    if max_runs is None:
+        max_runs = 3
+    if session.get(f'comps_run_count_{address}', 0) < max_runs:
+        return
+
+    cache = get_comps_cache(app_config)
+    comp_defaults = app_config.get('RENTCAST_COMP_DEFAULTS') or {}
+    params = _property_comps_params(comp_defaults, address, property_type, bedrooms, bathrooms, square_footage)
+    if cache is None or not cache.has_entry('avm/value', params):
+        raise RentcastAPIError(f"Maximum comp runs ({max_runs}) reached for this session")
+
 def fetch_property_comps(
     app_config,
     address: str,
@@ -110,7 +165,8 @@ def fetch_property_comps(
     bedrooms: float,
     bathrooms: float,
     square_footage: float,
-    analysis_data: Optional[Dict] = None  # New parameter
+    analysis_data: Optional[Dict] = None,  # New parameter
+    refresh: bool = False  # Background refresh: bypass the comps cache and the session run limit
 ) -> Optional[Dict]:
     try:
         logger.debug(f"Fetching comps for address: {address}")
@@ -134,14 +190,9 @@ def fetch_property_comps(
             max_runs = 3  # Default value if not configured
             logger.warning("MAX_COMP_RUNS_PER_SESSION not found in config, using default: 3")
         
-        # Check run count
+        # Check run count; only paid API calls count against it
         session_key = f'comps_run_count_{address}'
-        run_count = session.get(session_key, 0)
-        
-        if run_count >= max_runs:
-            raise RentcastAPIError(
-                f"Maximum comp runs ({max_runs}) reached for this session"
-            )
+        run_count = 0 if refresh else session.get(session_key, 0)
         
         # Log configuration (excluding API key)
         logger.debug(f"Using API base URL: {api_base_url}")
@@ -149,23 +200,9 @@ def fetch_property_comps(
         logger.debug(f"Using comp defaults: {comp_defaults}")
         logger.debug(f"Max runs per session: {max_runs}")
         
-        # Format address for URL
-        formatted_address = format_address(address)
-        
         # Construct API URL with parameters
         url = f"{api_base_url}/avm/value"
-        params = {
-            'address': formatted_address,
-            'propertyType': property_type,
-            'bedrooms': bedrooms,
-            'bathrooms': bathrooms,
-            'squareFootage': square_footage,
-            'maxRadius': comp_defaults.get('maxRadius', 1.0),
-            'daysOld': comp_defaults.get('daysOld', 180),
-            'compCount': comp_defaults.get('compCount', 5),
-            'includeActiveSoldPending': 'false',  # Only include sold properties
-            'includeSold': 'true'
-        }
+        params = _property_comps_params(comp_defaults, address, property_type, bedrooms, bathrooms, square_footage)
         
         # Set up headers with API key
         headers = {
@@ -173,16 +210,19 @@ def fetch_property_comps(
             'X-Api-Key': api_key
         }
         
-        # Make API request
-        logger.debug("Making RentCast API request with parameters: %s", params)
-        response = requests.get(url, params=params, headers=headers)
-        
-        # Check for successful response
-        response.raise_for_status()
-        
-        # Parse response
-        data = response.json()
-        logger.debug("Successfully received comps data")
+        def fetch():
+            if not refresh and run_count >= max_runs:
+                raise RentcastAPIError(
+                    f"Maximum comp runs ({max_runs}) reached for this session"
+                )
+            logger.debug("Making RentCast API request with parameters: %s", params)
+            response = get_client('rentcast').get(url, params=params, headers=headers)
+            response.raise_for_status()
+            return response.json()
+
+        # Make API request, or reuse a cached response for the same property and parameters
+        data, cache_status = cached_comps_request(app_config, 'avm/value', params, fetch, force=refresh)
+        logger.debug(f"Successfully received comps data (cache {cache_status})")
         
         # Verify required fields are present
         required_fields = ['price', 'priceRangeLow', 'priceRangeHigh', 'comparables']
@@ -239,9 +279,10 @@ def fetch_property_comps(
             logger.debug("MAO calculation not included in response")
 
         # Increment and store run count
-        run_count += 1
-        session[session_key] = run_count
-        logger.debug(f"Updated run count to {run_count}")
+        if cache_status == CACHE_MISS and not refresh:
+            run_count += 1
+            session[session_key] = run_count
+            logger.debug(f"Updated run count to {run_count}")
         
         # Verify all required data is present in the final result
         logger.debug(f"Final comps data has keys: {list(data.keys())}")
@@ -261,7 +302,8 @@ def fetch_rental_comps(
     bedrooms: float,
     bathrooms: float,
     square_footage: float,
-    property_type: str = 'single_family'
+    property_type: str = 'single_family',
+    refresh: bool = False
 ) -> Optional[Dict]:
     """
     Fetch rental comps data from RentCast API
@@ -273,6 +315,7 @@ def fetch_rental_comps(
         bathrooms: Number of bathrooms
         square_footage: Property square footage
         property_type: Type of property (default: single_family)
+        refresh: Always call the API, refreshing the cached response
         
     Returns:
         Dictionary with rental comps data
@@ -318,16 +361,15 @@ def fetch_rental_comps(
             'X-Api-Key': api_key
         }
         
-        # Make API request
-        logger.debug("Making RentCast Rental API request with parameters: %s", params)
-        response = requests.get(url, params=params, headers=headers)
-        
-        # Check for successful response
-        response.raise_for_status()
-        
-        # Parse response
-        data = response.json()
-        logger.debug("Successfully received rental comps data")
+        def fetch():
+            logger.debug("Making RentCast Rental API request with parameters: %s", params)
+            response = get_client('rentcast').get(url, params=params, headers=headers)
+            response.raise_for_status()
+            return response.json()
+
+        # Make API request, or reuse a cached response for the same property and parameters
+        data, cache_status = cached_comps_request(app_config, 'avm/rent/long-term', params, fetch, force=refresh)
+        logger.debug(f"Successfully received rental comps data (cache {cache_status})")
         
         # Filter rental comps to ensure valid entries
         if 'comparables' in data and isinstance(data['comparables'], list):
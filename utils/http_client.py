@@ -0,0 +1,272 @@
+"""Shared outbound HTTP client for the RentCast and Geoapify APIs."""
+
+import logging
+import random
+import threading
+import time
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from tenacity import (RetryCallState, Retrying, retry_if_exception_type, retry_if_result, stop_after_attempt,
+                      stop_after_delay)
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+POOL_MAXSIZE = 10
+
+
+@dataclass(frozen=True)
+class UpstreamPolicy:
+    """Timeouts, retry and circuit breaker settings for one upstream API."""
+    connect_timeout: float = 3.05
+    read_timeout: float = 10.0
+    max_attempts: int = 3
+    max_elapsed: float = 15.0  # Give up retrying once this many seconds have passed
+    backoff_base: float = 0.25
+    backoff_max: float = 4.0
+    failure_threshold: int = 5
+    reset_timeout: float = 30.0
+
+
+UPSTREAM_POLICIES = {
+    'rentcast': UpstreamPolicy(read_timeout=15.0),
+    'geoapify': UpstreamPolicy(read_timeout=5.0, max_attempts=2, max_elapsed=6.0)
+}
+
+
+class CircuitOpenError(requests.RequestException):
+    """Raised without calling an upstream whose circuit breaker is open."""
+    pass
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    After failure_threshold failed calls the circuit opens and calls fail
+    fast for reset_timeout seconds. Then a single trial call is let through;
+    its outcome closes the circuit or opens it again.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self.opened_at is None:
+                return 'closed'
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                return 'half_open'
+            return 'open'
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.reset_timeout or self._trial_running:
+                return False
+            self._trial_running = True
+            return True
+
+    def record(self, success: bool) -> None:
+        with self._lock:
+            self._trial_running = False
+            if success:
+                self.failures = 0
+                self.opened_at = None
+                return
+            self.failures += 1
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class LatencyHistogram:
+    """Cumulative latency histogram with fixed buckets, in seconds."""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last slot is +Inf
+        self.total = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self.counts[bisect_left(self.buckets, seconds)] += 1
+            self.total += seconds
+            self.count += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            cumulative, running = [], 0
+            for count in self.counts:
+                running += count
+                cumulative.append(running)
+            return {
+                'buckets': dict(zip([*map(str, self.buckets), '+Inf'], cumulative)),
+                'sum': self.total,
+                'count': self.count
+            }
+
+
+class UpstreamClient:
+    """Pooled, retrying, circuit-broken HTTP access to one upstream API."""
+
+    def __init__(self, name: str, policy: UpstreamPolicy):
+        self.name = name
+        self.policy = policy
+        self.breaker = CircuitBreaker(policy.failure_threshold, policy.reset_timeout)
+        self.latency = LatencyHistogram()
+        self.responses: Dict[str, int] = {}
+        self.retries = 0
+        self._sessions: Dict[str, requests.Session] = {}
+        self._lock = threading.Lock()
+
+    def session_for(self, url: str) -> requests.Session:
+        """Get the keep-alive session holding the connection pool for the URL's host."""
+        parts = urlsplit(url)
+        host = f"{parts.scheme}://{parts.netloc}"
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_MAXSIZE)
+                session.mount(f"{parts.scheme}://", adapter)
+                self._sessions[host] = session
+        return session
+
+    def _count(self, outcome: str) -> None:
+        with self._lock:
+            self.responses[outcome] = self.responses.get(outcome, 0) + 1
+
+    def _wait(self, retry_state: RetryCallState) -> float:
+        """Full-jitter exponential backoff, honouring Retry-After on 429 responses."""
+        delay = random.uniform(0, min(self.policy.backoff_max,
+                                      self.policy.backoff_base * 2 ** (retry_state.attempt_number - 1)))
+        outcome = retry_state.outcome
+        if outcome is not None and not outcome.failed:
+            retry_after = outcome.result().headers.get('Retry-After', '')
+            if retry_after.isdigit():
+                delay = max(delay, min(float(retry_after), self.policy.backoff_max))
+        return delay
+
+    def _before_sleep(self, retry_state: RetryCallState) -> None:
+        with self._lock:
+            self.retries += 1
+        outcome = retry_state.outcome
+        reason = outcome.exception() if outcome.failed else f"HTTP {outcome.result().status_code}"
+        logger.warning(f"Retrying {self.name} request (attempt {retry_state.attempt_number}): {reason}")
+
+    def _send(self, method: str, url: str, timeout: Tuple[float, float], **kwargs) -> requests.Response:
+        start = time.perf_counter()
+        try:
+            response = self.session_for(url).request(method, url, timeout=timeout, **kwargs)
+        except requests.RequestException as e:
+            self.latency.observe(time.perf_counter() - start)
+            self._count(type(e).__name__)
+            raise
+        self.latency.observe(time.perf_counter() - start)
+        self._count(str(response.status_code))
+        return response
+
+    def request(self, method: str, url: str, timeout: Optional[Tuple[float, float]] = None,
+                **kwargs) -> requests.Response:
+        """
+        Send a request, retrying connection errors, timeouts, 429s and 5xx responses.
+
+        Args:
+            method: HTTP method
+            url: Absolute URL
+            timeout: (connect, read) timeout in seconds; defaults to the upstream policy
+            **kwargs: Passed to requests (params, headers, json, ...)
+
+        Returns:
+            The final response. A 429 or 5xx is returned as-is once retries
+            are exhausted, so callers can still use raise_for_status().
+
+        Raises:
+            CircuitOpenError: If the upstream is failing and the circuit is open
+            requests.RequestException: If the last attempt failed to connect or timed out
+        """
+        if not self.breaker.allow():
+            self._count('circuit_open')
+            raise CircuitOpenError(f"{self.name} is unavailable (circuit open)")
+
+        timeout = timeout or (self.policy.connect_timeout, self.policy.read_timeout)
+        retrying = Retrying(
+            stop=stop_after_attempt(self.policy.max_attempts) | stop_after_delay(self.policy.max_elapsed),
+            wait=self._wait,
+            retry=(retry_if_exception_type((requests.ConnectionError, requests.Timeout))
+                   | retry_if_result(lambda response: response.status_code in RETRY_STATUSES)),
+            before_sleep=self._before_sleep,
+            retry_error_callback=lambda retry_state: retry_state.outcome.result(),
+            reraise=True
+        )
+        try:
+            response = retrying(self._send, method, url, timeout, **kwargs)
+        except Exception:
+            self.breaker.record(False)
+            raise
+        self.breaker.record(response.status_code not in RETRY_STATUSES)
+        return response
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def stats(self) -> Dict:
+        """
+        Get latency, response and retry counters.
+
+        Returns:
+            Dict with the latency histogram, response counts by status or
+            error type, retries and circuit state
+        """
+        with self._lock:
+            responses = dict(self.responses)
+            retries = self.retries
+        return {
+            'latency': self.latency.snapshot(),
+            'responses': responses,
+            'retries': retries,
+            'circuit': self.breaker.state
+        }
+
+
+_clients: Dict[str, UpstreamClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(name: str) -> UpstreamClient:
+    """
+    Get the shared client for an upstream API.
+
+    Args:
+        name: Upstream name, a key of UPSTREAM_POLICIES ('rentcast', 'geoapify')
+
+    Returns:
+        UpstreamClient shared by all threads of the process
+    """
+    with _clients_lock:
+        client = _clients.get(name)
+        if client is None:
+            client = _clients[name] = UpstreamClient(name, UPSTREAM_POLICIES.get(name, UpstreamPolicy()))
+    return client
+
+
+def upstream_stats() -> Dict[str, Dict]:
+    """Get stats for every upstream used so far in this process."""
+    with _clients_lock:
+        clients = list(_clients.values())
+    return {client.name: client.stats() for client in clients}
@@ -3,7 +3,9 @@
 import json
 import os
 import logging
+from utils.metrics import timed_json_io
 
+@timed_json_io('read')
 def read_json(file_path):
     if not os.path.exists(file_path):
         logging.warning(f"File not found: {file_path}. Returning empty list.")
@@ -19,6 +21,7 @@ def read_json(file_path):
         logging.error(f"Error decoding JSON from {file_path}: {str(e)}. Returning empty list.")
         return []
 
+@timed_json_io('write')
 def write_json(file_path, data):
     try:
         with open(file_path, 'w') as file:
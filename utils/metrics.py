@@ -0,0 +1,379 @@
+# utils/metrics.py
+"""
+In-process metrics rendered in the Prometheus text exposition format.
+
+Counters and histograms are updated from Flask hooks and small decorators on
+hot paths. Values owned by other modules (cache stats, upstream clients,
+process memory) are read by collectors only when /metrics is scraped. Metrics
+are per process; under gunicorn each worker reports its own values, labelled
+with its pid.
+"""
+
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from flask import g, request
+
+from utils.http_client import LatencyHistogram, upstream_stats
+
+try:
+    import psutil
+except ImportError:  # Worker memory is simply not reported
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+IO_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+RENDER_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+BYTE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# A sample is (metric name suffix, labels, value)
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    type = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            return self._values.get(key, 0)
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            values = list(self._values.items())
+        return [('', dict(zip(self.labelnames, key)), value) for key, value in values]
+
+
+class Histogram:
+    """Histogram with one LatencyHistogram per label combination."""
+
+    type = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Tuple[float, ...] = REQUEST_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = buckets
+        self._series: Dict[tuple, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, labels: Dict) -> LatencyHistogram:
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        series = self._series.get(key)
+        if series is None:
+            with self._lock:
+                series = self._series.setdefault(key, LatencyHistogram(self.buckets))
+        return series
+
+    def observe(self, value: float, **labels) -> None:
+        self._get(labels).observe(value)
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the with block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def snapshot(self, **labels) -> Dict:
+        return self._get(labels).snapshot()
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            series = list(self._series.items())
+        samples = []
+        for key, histogram in series:
+            labels = dict(zip(self.labelnames, key))
+            samples.extend(histogram_samples(histogram.snapshot(), labels))
+        return samples
+
+
+def histogram_samples(snapshot: Dict, labels: Dict[str, str]) -> List[Sample]:
+    """Turn a LatencyHistogram snapshot into _bucket, _sum and _count samples."""
+    samples = [('_bucket', {**labels, 'le': bound}, count) for bound, count in snapshot['buckets'].items()]
+    samples.append(('_sum', labels, snapshot['sum']))
+    samples.append(('_count', labels, snapshot['count']))
+    return samples
+
+
+class MetricsRegistry:
+    """Metrics owned by this process plus collectors evaluated at scrape time."""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, str, List[Sample]]]]] = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                  buckets: Tuple[float, ...] = REQUEST_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def register_collector(self, collector: Callable) -> Callable:
+        """
+        Add a collector returning (name, type, help, samples) families at scrape time.
+
+        Can be used as a decorator.
+        """
+        with self._lock:
+            if collector not in self._collectors:
+                self._collectors.append(collector)
+        return collector
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text format."""
+        with self._lock:
+            families = [(m.name, m.type, m.documentation, m.samples()) for m in self._metrics.values()]
+            collectors = list(self._collectors)
+        for collector in collectors:
+            try:
+                families.extend(collector())
+            except Exception as e:
+                logger.error(f"Error collecting metrics from {collector.__name__}: {str(e)}")
+
+        lines = []
+        for name, metric_type, documentation, samples in families:
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for suffix, labels, value in samples:
+                lines.append(f"{name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+http_requests = registry.counter(
+    'http_requests_total', 'HTTP requests by app, endpoint, method and status', ('app', 'endpoint', 'method', 'status'))
+http_request_duration = registry.histogram(
+    'http_request_duration_seconds', 'HTTP request latency by app and endpoint', ('app', 'endpoint', 'method'))
+json_store_duration = registry.histogram(
+    'json_store_duration_seconds', 'JSON store read and write latency', ('store', 'op'), IO_BUCKETS)
+json_store_bytes = registry.counter(
+    'json_store_bytes_total', 'Bytes read from and written to JSON stores', ('store', 'op'))
+report_render_duration = registry.histogram(
+    'report_render_duration_seconds', 'PDF report render time', ('report_type', 'mode'), RENDER_BUCKETS)
+
+_UUID_NAME = re.compile(r'[0-9a-f]{8}-[0-9a-f]{4}-')
+
+
+def store_label(path: str) -> str:
+    """
+    Name a JSON store for labels without per-record cardinality.
+
+    Files named after a record ID (e.g. analyses/<uuid>_<user>.json) are
+    labelled by their directory instead.
+    """
+    directory, filename = os.path.split(str(path))
+    name = os.path.splitext(filename)[0]
+    if _UUID_NAME.match(name):
+        return os.path.basename(directory) or 'records'
+    return name
+
+
+def timed_json_io(op: str):
+    """
+    Decorator recording duration and bytes of a JSON store operation.
+
+    The wrapped function takes the file path as its first argument.
+    """
+    def decorator(f):
+        @wraps(f)
+        def wrapper(file_path, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return f(file_path, *args, **kwargs)
+            finally:
+                label = store_label(file_path)
+                json_store_duration.observe(time.perf_counter() - start, store=label, op=op)
+                try:
+                    json_store_bytes.inc(os.path.getsize(file_path), store=label, op=op)
+                except OSError:
+                    pass
+        return wrapper
+    return decorator
+
+
+def init_metrics(app, name: str = 'main') -> None:
+    """
+    Record request counts and latency for every request to a Flask app.
+
+    Dash apps are mounted on their own Flask servers and are initialized with
+    their own name. They all share /_dash-update-component, so per-callback
+    timings come from dash_apps.instrumentation instead.
+
+    Args:
+        app: Flask application
+        name: Value of the app label
+    """
+    @app.before_request
+    def _start_request_timer():
+        g._metrics_start = time.perf_counter()
+
+    def record(status: int):
+        start = g.pop('_metrics_start', None)
+        if start is None:
+            return
+        elapsed = time.perf_counter() - start
+        endpoint = request.endpoint or 'unmatched'
+        http_requests.inc(app=name, endpoint=endpoint, method=request.method, status=status)
+        http_request_duration.observe(elapsed, app=name, endpoint=endpoint, method=request.method)
+
+    @app.after_request
+    def _record_request(response):
+        record(response.status_code)
+        return response
+
+    @app.teardown_request
+    def _record_failed_request(error):
+        # after_request does not run for unhandled exceptions
+        record(500)
+
+
+def _cache_family(caches: Dict[str, Tuple[int, int]]) -> List[Tuple[str, str, str, List[Sample]]]:
+    requests_samples, ratio_samples = [], []
+    for cache, (hits, misses) in caches.items():
+        requests_samples.append(('', {'cache': cache, 'result': 'hit'}, hits))
+        requests_samples.append(('', {'cache': cache, 'result': 'miss'}, misses))
+        if hits + misses:
+            ratio_samples.append(('', {'cache': cache}, hits / (hits + misses)))
+    return [
+        ('cache_requests_total', 'counter', 'Cache lookups by cache and result', requests_samples),
+        ('cache_hit_ratio', 'gauge', 'Share of cache lookups served from the cache', ratio_samples)
+    ]
+
+
+@registry.register_collector
+def collect_caches():
+    """Hit and miss counts of caches whose modules are already loaded."""
+    from flask import current_app
+    caches = {}
+    # Only inspect modules already in use so a scrape never imports report code
+    if 'services.report_assets' in sys.modules:
+        chart_cache = sys.modules['services.report_assets'].chart_cache
+        caches['chart'] = (chart_cache.hits, chart_cache.misses)
+    if 'services.report_cache' in sys.modules:
+        stats = sys.modules['services.report_cache'].report_cache_stats()
+        caches['report'] = (stats['hits'], stats['misses'])
+    if 'utils.comps_cache' in sys.modules:
+        comps_cache = sys.modules['utils.comps_cache'].get_comps_cache(current_app.config)
+        if comps_cache:
+            stats = comps_cache.stats()
+            caches['comps'] = (stats['hits'] + stats['stale_hits'], stats['misses'])
+    if 'utils.address_autocomplete' in sys.modules:
+        stats = sys.modules['utils.address_autocomplete'].get_autocomplete(current_app.config).stats()
+        served = stats.get('local', 0) + stats.get('cache', 0) + stats.get('prefix', 0)
+        caches['autocomplete'] = (served, stats.get('geoapify', 0))
+    return _cache_family(caches)
+
+
+@registry.register_collector
+def collect_upstreams():
+    """Latency, responses, retries and circuit state of outbound API clients."""
+    latency, responses, retries, circuit = [], [], [], []
+    for name, stats in upstream_stats().items():
+        latency.extend(histogram_samples(stats['latency'], {'upstream': name}))
+        for status, count in stats['responses'].items():
+            responses.append(('', {'upstream': name, 'status': status}, count))
+        retries.append(('', {'upstream': name}, stats['retries']))
+        circuit.append(('', {'upstream': name}, 0 if stats['circuit'] == 'closed' else 1))
+    return [
+        ('upstream_request_duration_seconds', 'histogram', 'Outbound API latency per attempt', latency),
+        ('upstream_responses_total', 'counter', 'Outbound API responses by status or error type', responses),
+        ('upstream_retries_total', 'counter', 'Outbound API retries', retries),
+        ('upstream_circuit_open', 'gauge', 'Whether the upstream circuit breaker is open or half-open', circuit)
+    ]
+
+
+@registry.register_collector
+def collect_process():
+    """Memory, CPU and thread counts of this worker."""
+    if psutil is None:
+        return []
+    process = psutil.Process()
+    labels = {'pid': str(process.pid)}
+    with process.oneshot():
+        memory = process.memory_info()
+        cpu = process.cpu_times()
+        threads = process.num_threads()
+    return [
+        ('process_resident_memory_bytes', 'gauge', 'Resident set size of this worker', [('', labels, memory.rss)]),
+        ('process_cpu_seconds_total', 'counter', 'CPU time used by this worker',
+         [('', labels, cpu.user + cpu.system)]),
+        ('process_threads', 'gauge', 'Threads in this worker', [('', labels, threads)])
+    ]
+
+
+def register_status_collector(name: str, documentation: str, get_status: Callable[[], Optional[Dict]]) -> None:
+    """
+    Export the numeric fields of a status dict as gauges named <name>_<field>.
+
+    Args:
+        name: Metric name prefix
+        documentation: Help text
+        get_status: Callable returning the status dict, or None to skip
+    """
+    def collect():
+        status = get_status()
+        if not status:
+            return []
+        return [(f"{name}_{field}", 'gauge', documentation, [('', {}, value)])
+                for field, value in status.items()
+                if isinstance(value, (int, float)) and not isinstance(value, bool)]
+    collect.__name__ = f"collect_{name}"
+    registry.register_collector(collect)
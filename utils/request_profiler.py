@@ -0,0 +1,291 @@
+# utils/request_profiler.py
+"""
+Opt-in cProfile capture for individual requests and Dash callbacks.
+
+A request is profiled when an admin sends the X-Profile-Request: 1 header or
+the _profile=1 query flag, or when it is picked at PROFILE_SAMPLE_RATE. Dash
+callback requests are also profiled when the page that issued them was opened
+with _profile=1, so a slow dashboard can be profiled by reloading it with the
+flag. Each profile is written to PROFILES_DIR as a .pstats file, a collapsed
+stack file for flamegraph.pl or speedscope, and a small JSON summary.
+"""
+
+import cProfile
+import json
+import logging
+import os
+import pstats
+import random
+import re
+import time
+import traceback
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from flask import g, request
+from flask_login import current_user
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = 'X-Profile-Request'
+PROFILE_QUERY_ARG = '_profile'
+PROFILE_ID_HEADER = 'X-Profile-Id'
+PROFILE_FILES = {'pstats': '.pstats', 'collapsed': '.collapsed', 'summary': '.json'}
+
+MAX_STACK_DEPTH = 64
+DASH_UPDATE_PATH = '/_dash-update-component'
+_PROFILE_ID = re.compile(r'^[A-Za-z0-9_.-]+$')
+
+
+def _flag_set(value: Optional[str]) -> bool:
+    return (value or '').lower() in ('1', 'true', 'yes')
+
+
+def _is_admin() -> bool:
+    try:
+        return current_user.is_authenticated and current_user.role == 'Admin'
+    except Exception:
+        return False
+
+
+def _requested_trigger() -> Optional[str]:
+    """Work out whether the current request asked to be profiled."""
+    if _flag_set(request.headers.get(PROFILE_HEADER)):
+        return 'header'
+    if _flag_set(request.args.get(PROFILE_QUERY_ARG)):
+        return 'query'
+    # Dash callbacks are XHRs from the dashboard page, which carries the flag
+    if request.path.endswith(DASH_UPDATE_PATH) and request.referrer:
+        query = parse_qs(urlsplit(request.referrer).query)
+        if _flag_set((query.get(PROFILE_QUERY_ARG) or [None])[0]):
+            return 'referrer'
+    return None
+
+
+def _request_label() -> str:
+    if request.path.endswith(DASH_UPDATE_PATH):
+        payload = request.get_json(silent=True) or {}
+        if payload.get('output'):
+            return f"dash:{payload['output']}"
+    return request.endpoint or request.path
+
+
+def _function_label(func: tuple) -> str:
+    filename, line, name = func
+    if filename == '~':  # Builtins
+        label = name
+    else:
+        label = f"{os.path.splitext(os.path.basename(filename))[0]}.{name}:{line}"
+    # Frames are separated by ';' and the count by the last space
+    return label.replace(';', ',').replace(' ', '_')
+
+
+def collapsed_stacks(stats: pstats.Stats) -> List[str]:
+    """
+    Convert profile stats to collapsed stack lines ("a;b;c 1234").
+
+    cProfile records caller/callee pairs rather than full stacks, so time in a
+    function reached from several paths is split between them in proportion to
+    the time each caller spent in it. Weights are in microseconds.
+
+    Args:
+        stats: Loaded profile statistics
+
+    Returns:
+        Collapsed stack lines, heaviest first
+    """
+    entries = stats.stats
+    callees: Dict[tuple, List[tuple]] = {}
+    for func, (_, _, _, _, callers) in entries.items():
+        for caller in callers:
+            callees.setdefault(caller, []).append(func)
+
+    totals: Dict[str, float] = {}
+
+    def walk(func: tuple, stack: List[str], self_time: float, cumulative: float, share: float):
+        label = _function_label(func)
+        path = stack + [label]
+        key = ';'.join(path)
+        totals[key] = totals.get(key, 0.0) + self_time * share
+        func_cumulative = entries[func][3]
+        if len(path) >= MAX_STACK_DEPTH or not func_cumulative:
+            return
+        # Fraction of this function's total time that was spent on this path
+        child_share = share * cumulative / func_cumulative
+        for callee in callees.get(func, ()):
+            if _function_label(callee) in path:  # Recursion is folded into the first frame
+                continue
+            _, _, edge_self, edge_cumulative = entries[callee][4][func][:4]
+            if edge_cumulative * child_share * 1e6 >= 1:
+                walk(callee, path, edge_self, edge_cumulative, child_share)
+
+    for func, (_, _, self_time, cumulative, callers) in entries.items():
+        if not callers:
+            walk(func, [], self_time, cumulative, 1.0)
+
+    lines = [(stack, round(seconds * 1e6)) for stack, seconds in totals.items()]
+    return [f"{stack} {weight}" for stack, weight in sorted(lines, key=lambda line: line[1], reverse=True)
+            if weight > 0]
+
+
+def _profile_path(directory: str, profile_id: str, kind: str) -> str:
+    return os.path.join(directory, f"{profile_id}{PROFILE_FILES[kind]}")
+
+
+def write_profile(profiler: cProfile.Profile, directory: str, profile_id: str, summary: Dict) -> Dict:
+    """
+    Write the pstats, collapsed stack and summary files for one profile.
+
+    Args:
+        profiler: Finished profiler
+        directory: Profiles directory
+        profile_id: Base file name shared by the three files
+        summary: Request details to store alongside the profile
+
+    Returns:
+        The summary as written
+    """
+    os.makedirs(directory, exist_ok=True)
+    profiler.dump_stats(_profile_path(directory, profile_id, 'pstats'))
+    stats = pstats.Stats(profiler)
+    with open(_profile_path(directory, profile_id, 'collapsed'), 'w') as f:
+        f.write('\n'.join(collapsed_stacks(stats)) + '\n')
+    summary = dict(summary, id=profile_id, function_calls=stats.total_calls)
+    with open(_profile_path(directory, profile_id, 'summary'), 'w') as f:
+        json.dump(summary, f, indent=2)
+    return summary
+
+
+def list_profiles(directory: str) -> List[Dict]:
+    """
+    Get the summaries of stored profiles, newest first.
+
+    Args:
+        directory: Profiles directory
+
+    Returns:
+        List of profile summary dicts
+    """
+    if not directory or not os.path.isdir(directory):
+        return []
+    profiles = []
+    for filename in os.listdir(directory):
+        if not filename.endswith(PROFILE_FILES['summary']):
+            continue
+        try:
+            with open(os.path.join(directory, filename), 'r') as f:
+                profiles.append(json.load(f))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Skipping unreadable profile summary {filename}: {str(e)}")
+    return sorted(profiles, key=lambda profile: profile.get('created_at', ''), reverse=True)
+
+
+def profile_file(directory: str, profile_id: str, kind: str) -> str:
+    """
+    Get the path of one stored profile file.
+
+    Args:
+        directory: Profiles directory
+        profile_id: Profile ID from list_profiles
+        kind: 'pstats', 'collapsed' or 'summary'
+
+    Returns:
+        Path to the file
+
+    Raises:
+        ValueError: If the ID or kind is invalid
+        FileNotFoundError: If the profile does not exist
+    """
+    if kind not in PROFILE_FILES:
+        raise ValueError(f"Unsupported profile file type: {kind}")
+    if not _PROFILE_ID.match(profile_id or '') or profile_id.startswith('.'):
+        raise ValueError(f"Invalid profile ID: {profile_id}")
+    path = _profile_path(directory, profile_id, kind)
+    if not os.path.isfile(path):
+        raise FileNotFoundError(path)
+    return path
+
+
+def prune_profiles(directory: str, keep: int) -> None:
+    """Delete all but the newest `keep` profiles."""
+    for profile in list_profiles(directory)[keep:]:
+        for kind in PROFILE_FILES:
+            try:
+                os.remove(_profile_path(directory, profile['id'], kind))
+            except OSError:
+                pass
+
+
+def init_request_profiler(app, name: str = 'main') -> None:
+    """
+    Profile requests to a Flask app on demand or by sampling.
+
+    Uses PROFILES_DIR, PROFILE_SAMPLE_RATE (0 to 1, default 0) and
+    PROFILE_MAX_FILES from the app config. Dash servers are initialized with
+    their own name so callback profiles are labelled by dashboard.
+
+    Args:
+        app: Flask application
+        name: Label stored with each profile
+    """
+    @app.before_request
+    def _start_profile():
+        directory = app.config.get('PROFILES_DIR')
+        if not directory or request.endpoint == 'static':
+            return
+        trigger = _requested_trigger()
+        if trigger and not _is_admin():
+            trigger = None
+        if trigger is None:
+            rate = app.config.get('PROFILE_SAMPLE_RATE') or 0
+            if rate <= 0 or (request.endpoint or '').startswith('monitor.') or random.random() >= rate:
+                return
+            trigger = 'sample'
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:  # Another profiler is already active on this thread
+            return
+        g._request_profile = {
+            'profiler': profiler,
+            'id': f"{datetime.now().strftime('%Y%m%d-%H%M%S')}_{uuid.uuid4().hex[:8]}",
+            'trigger': trigger,
+            'start': time.perf_counter()
+        }
+
+    @app.after_request
+    def _tag_profiled_response(response):
+        profile = g.get('_request_profile')
+        if profile:
+            response.headers[PROFILE_ID_HEADER] = profile['id']
+        return response
+
+    @app.teardown_request
+    def _finish_profile(error):
+        profile = g.pop('_request_profile', None)
+        if profile is None:
+            return
+        profile['profiler'].disable()
+        duration = time.perf_counter() - profile['start']
+        directory = app.config['PROFILES_DIR']
+        try:
+            write_profile(profile['profiler'], directory, profile['id'], {
+                'app': name,
+                'label': _request_label(),
+                'method': request.method,
+                'path': request.path,
+                'trigger': profile['trigger'],
+                'duration_ms': round(duration * 1000, 1),
+                'error': error.__class__.__name__ if error else None,
+                'pid': os.getpid(),
+                'created_at': datetime.now().isoformat()
+            })
+            prune_profiles(directory, app.config.get('PROFILE_MAX_FILES', 200))
+            logger.info(f"Saved profile {profile['id']} for {request.method} {request.path} "
+                        f"({duration * 1000:.0f}ms, {profile['trigger']})")
+        except Exception as e:
+            logger.error(f"Error saving profile {profile['id']}: {str(e)}")
+            logger.error(traceback.format_exc())
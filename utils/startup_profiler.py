@@ -0,0 +1,233 @@
+# utils/startup_profiler.py
+"""
+Opt-in cold start instrumentation for the application factory.
+
+Set STARTUP_PROFILE=1 to time every module import and each phase of
+create_app (config, logging, blueprints, Dash mounts). The results are written
+as JSON to STARTUP_PROFILE_FILE (default data/logs/startup_profile.json) and
+a sorted summary is logged. Only the standard library is used here so the
+profiler can be installed before anything else is imported.
+"""
+
+import importlib.abc
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+STARTUP_PROFILE_ENV = 'STARTUP_PROFILE'
+STARTUP_PROFILE_FILE_ENV = 'STARTUP_PROFILE_FILE'
+DEFAULT_REPORT_PATH = os.path.join(os.path.abspath(os.path.dirname(os.path.dirname(__file__))),
+                                   'data', 'logs', 'startup_profile.json')
+SUMMARY_TOP_IMPORTS = 15
+
+_profiler: Optional['StartupProfiler'] = None
+_profiler_lock = threading.Lock()
+
+
+class _ImportTimer(importlib.abc.MetaPathFinder):
+    """
+    Meta path hook that times module execution.
+
+    Specs are resolved by the remaining finders as usual; the hook only wraps
+    the loader's exec_module so the loader type and identity are unchanged.
+    """
+
+    def __init__(self, profiler: 'StartupProfiler'):
+        self.profiler = profiler
+        self._local = threading.local()
+
+    def find_spec(self, fullname, path, target=None):
+        if getattr(self._local, 'finding', False):
+            return None
+        self._local.finding = True
+        try:
+            spec = None
+            for finder in sys.meta_path:
+                find_spec = getattr(finder, 'find_spec', None)
+                if finder is self or find_spec is None:
+                    continue
+                spec = find_spec(fullname, path, target)
+                if spec is not None:
+                    break
+        finally:
+            self._local.finding = False
+
+        loader = getattr(spec, 'loader', None)
+        # Builtin and frozen importers are shared classes and cheap to load
+        if loader is None or isinstance(loader, type):
+            return spec
+        exec_module = getattr(loader, 'exec_module', None)
+        if exec_module is None or getattr(exec_module, '_startup_timed', False):
+            return spec
+
+        profiler = self.profiler
+
+        def timed_exec_module(module):
+            with profiler.time_import(module.__spec__.name if module.__spec__ else module.__name__):
+                exec_module(module)
+
+        timed_exec_module._startup_timed = True
+        try:
+            loader.exec_module = timed_exec_module
+        except (AttributeError, TypeError):
+            pass
+        return spec
+
+
+class StartupProfiler:
+    """Collects import durations and create_app phase timings."""
+
+    def __init__(self, report_path: str = DEFAULT_REPORT_PATH):
+        self.report_path = report_path
+        self.started_at = datetime.now().isoformat()
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._finder = _ImportTimer(self)
+        self.imports: Dict[str, Dict] = {}
+        self.phases: List[Dict] = []
+
+    def install(self):
+        """Start timing imports."""
+        if self._finder not in sys.meta_path:
+            sys.meta_path.insert(0, self._finder)
+
+    def uninstall(self):
+        """Stop timing imports that have not started yet."""
+        if self._finder in sys.meta_path:
+            sys.meta_path.remove(self._finder)
+
+    def _elapsed_ms(self, since: float) -> float:
+        return round((time.perf_counter() - since) * 1000, 3)
+
+    @contextmanager
+    def time_import(self, name: str):
+        """Time one module body; time spent in nested imports is excluded from self_ms."""
+        stack = self._local.__dict__.setdefault('imports', [])
+        frame = {'start': time.perf_counter(), 'children': 0.0}
+        stack.append(frame)
+        try:
+            yield
+        finally:
+            stack.pop()
+            total = time.perf_counter() - frame['start']
+            if stack:
+                stack[-1]['children'] += total
+            phases = self._local.__dict__.get('phases')
+            with self._lock:
+                self.imports[name] = {
+                    'total_ms': round(total * 1000, 3),
+                    'self_ms': round((total - frame['children']) * 1000, 3),
+                    'phase': phases[-1] if phases else None
+                }
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time a named phase of application startup."""
+        phases = self._local.__dict__.setdefault('phases', [])
+        phases.append(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            phases.pop()
+            with self._lock:
+                self.phases.append({
+                    'name': name,
+                    'start_ms': round((start - self._origin) * 1000, 3),
+                    'duration_ms': self._elapsed_ms(start)
+                })
+
+    def report(self) -> Dict:
+        """Build the JSON report, imports sorted by self time."""
+        with self._lock:
+            imports = sorted(({'module': name, **timing} for name, timing in self.imports.items()),
+                             key=lambda entry: entry['self_ms'], reverse=True)
+            phases = list(self.phases)
+        return {
+            'started_at': self.started_at,
+            'elapsed_ms': self._elapsed_ms(self._origin),
+            'python': sys.version.split()[0],
+            'pid': os.getpid(),
+            'phases': phases,
+            'import_count': len(imports),
+            'import_total_ms': round(sum(entry['self_ms'] for entry in imports), 3),
+            'imports': imports
+        }
+
+    def write_report(self) -> Dict:
+        """Write the report to disk and return it."""
+        report = self.report()
+        try:
+            os.makedirs(os.path.dirname(self.report_path), exist_ok=True)
+            temp_path = f"{self.report_path}.{os.getpid()}.tmp"
+            with open(temp_path, 'w') as f:
+                json.dump(report, f, indent=2)
+            os.replace(temp_path, self.report_path)
+        except OSError as e:
+            logger.error(f"Error writing startup profile to {self.report_path}: {str(e)}")
+        return report
+
+    def log_summary(self, report: Dict):
+        lines = [f"Startup profile: {report['elapsed_ms']:.0f}ms since profiler start, "
+                 f"{report['import_count']} modules imported in {report['import_total_ms']:.0f}ms"]
+        for entry in sorted(report['phases'], key=lambda phase: phase['duration_ms'], reverse=True):
+            lines.append(f"  phase {entry['name']:<28} {entry['duration_ms']:>10.1f}ms")
+        for entry in report['imports'][:SUMMARY_TOP_IMPORTS]:
+            lines.append(f"  import {entry['module']:<27} {entry['self_ms']:>10.1f}ms self "
+                         f"{entry['total_ms']:>10.1f}ms total")
+        logger.info('\n'.join(lines))
+
+    def finish(self) -> Dict:
+        """Write the report and log a summary; profiling continues for later phases."""
+        report = self.write_report()
+        self.log_summary(report)
+        return report
+
+
+def start_startup_profiler() -> Optional[StartupProfiler]:
+    """
+    Install the profiler if STARTUP_PROFILE is set.
+
+    Call this before importing the application so its imports are timed.
+
+    Returns:
+        The active StartupProfiler, or None when profiling is disabled
+    """
+    global _profiler
+    if os.environ.get(STARTUP_PROFILE_ENV, '').lower() not in ('1', 'true', 'yes'):
+        return None
+    with _profiler_lock:
+        if _profiler is None:
+            _profiler = StartupProfiler(os.environ.get(STARTUP_PROFILE_FILE_ENV) or DEFAULT_REPORT_PATH)
+            _profiler.install()
+    return _profiler
+
+
+def get_startup_profiler() -> Optional[StartupProfiler]:
+    return _profiler
+
+
+@contextmanager
+def startup_phase(name: str):
+    """Time a startup phase when profiling is enabled; a no-op otherwise."""
+    if _profiler is None:
+        yield
+        return
+    with _profiler.phase(name):
+        yield
+
+
+def finish_startup_profile() -> Optional[Dict]:
+    """Write and log the startup report when profiling is enabled."""
+    if _profiler is None:
+        return None
+    return _profiler.finish()
@@ -0,0 +1,322 @@
+"""
+Local stand-in for the RentCast and Geoapify APIs.
+
+Serves realistic /avm/value, /avm/rent/long-term and geocode/autocomplete
+payloads so the comps and autocomplete paths can be load tested offline,
+with configurable latency, error rates and 429 bursts. Run it and point the
+app at it:
+
+    python -m utils.upstream_standin --port 5055 --latency lognormal:150:0.5 \\
+        --error-rate 0.02 --burst-every 200 --burst-length 5 --seed 7
+    export RENTCAST_API_BASE_URL=http://127.0.0.1:5055/v1
+    export GEOAPIFY_API_BASE_URL=http://127.0.0.1:5055/v1
+
+Properties in fixtures/upstream_standin.json are served as listed; any other
+address gets synthetic values derived from the address. Latency, errors and
+bursts are drawn from a generator seeded per upstream and request number,
+so a run with the same seed and request order is reproducible.
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import unquote_plus
+
+from flask import Flask, jsonify, request
+
+from utils.address_autocomplete import matches_query, normalize_query
+from utils.comps_cache import normalize_address
+from utils.comps_handler import format_address
+
+DEFAULT_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'upstream_standin.json')
+DEFAULT_PORT = 5055
+FIXED_DATE = datetime(2024, 6, 1)  # Comparable dates are relative to this, not today, to stay reproducible
+MAX_COMPARABLES = 25
+RENTCAST = 'rentcast'
+GEOAPIFY = 'geoapify'
+
+
+@dataclass(frozen=True)
+class LatencyModel:
+    """
+    Response latency distribution.
+
+    Specs are 'fixed:MS', 'uniform:LOW_MS:HIGH_MS' or 'lognormal:MEDIAN_MS:SIGMA'.
+    """
+    kind: str = 'fixed'
+    first: float = 0.0
+    second: float = 0.0
+
+    @classmethod
+    def parse(cls, spec: str) -> 'LatencyModel':
+        parts = str(spec).split(':')
+        kind = parts[0]
+        try:
+            values = [float(part) for part in parts[1:]]
+        except ValueError:
+            raise ValueError(f"Invalid latency spec: {spec}")
+        if kind == 'fixed' and len(values) == 1:
+            return cls(kind, values[0])
+        if kind in ('uniform', 'lognormal') and len(values) == 2:
+            return cls(kind, values[0], values[1])
+        raise ValueError(f"Invalid latency spec: {spec}")
+
+    def sample(self, rng: random.Random) -> float:
+        """Draw a latency in seconds."""
+        if self.kind == 'uniform':
+            return rng.uniform(self.first, self.second) / 1000
+        if self.kind == 'lognormal':
+            return rng.lognormvariate(math.log(max(self.first, 0.001)), self.second) / 1000
+        return self.first / 1000
+
+
+@dataclass
+class StandinConfig:
+    """Behaviour of the stand-in server."""
+    rentcast_latency: LatencyModel = field(default_factory=LatencyModel)
+    geoapify_latency: LatencyModel = field(default_factory=LatencyModel)
+    error_rate: float = 0.0  # Share of requests answered with error_status
+    error_status: int = 503
+    burst_every: int = 0  # Every this many requests per upstream, end with a burst of 429s (0 disables)
+    burst_length: int = 0
+    retry_after: int = 1
+    seed: int = 0
+    fixtures_path: str = DEFAULT_FIXTURES
+
+
+def _address_key(address: str) -> str:
+    # The app abbreviates street suffixes before calling RentCast, so match on that form
+    return normalize_address(format_address(address))
+
+
+def _digest(*parts) -> int:
+    return int(hashlib.sha256(':'.join(map(str, parts)).encode()).hexdigest()[:12], 16)
+
+
+class UpstreamStandin:
+    """Fixture-backed RentCast and Geoapify responses with injected latency and failures."""
+
+    def __init__(self, config: Optional[StandinConfig] = None):
+        self.config = config or StandinConfig()
+        with open(self.config.fixtures_path, 'r') as f:
+            fixtures = json.load(f)
+        self.properties = {_address_key(prop['address']): prop for prop in fixtures.get('properties', [])}
+        self.streets = fixtures.get('streets', [])
+        self._counters = {RENTCAST: 0, GEOAPIFY: 0}
+        self._stats = {RENTCAST: {}, GEOAPIFY: {}}
+        self._lock = threading.Lock()
+
+    def plan(self, upstream: str) -> Tuple[float, int]:
+        """
+        Decide the latency and status of the next request to an upstream.
+
+        Returns:
+            Tuple of the delay in seconds and the HTTP status (200 for success)
+        """
+        with self._lock:
+            number = self._counters[upstream]
+            self._counters[upstream] += 1
+        rng = random.Random(f"{self.config.seed}:{upstream}:{number}")
+        latency = self.config.rentcast_latency if upstream == RENTCAST else self.config.geoapify_latency
+        delay = latency.sample(rng)
+
+        burst_every, burst_length = self.config.burst_every, self.config.burst_length
+        if burst_every and number % burst_every >= burst_every - burst_length:
+            return delay, 429
+        if rng.random() < self.config.error_rate:
+            return delay, self.config.error_status
+        return delay, 200
+
+    def record(self, upstream: str, status: int) -> None:
+        with self._lock:
+            statuses = self._stats[upstream]
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {upstream: {'requests': self._counters[upstream], 'statuses': dict(self._stats[upstream])}
+                    for upstream in self._counters}
+
+    def subject(self, address: str, params: Dict) -> Dict:
+        """Get the fixture for an address, or synthesize one from it."""
+        fixture = self.properties.get(_address_key(address))
+        if fixture:
+            return fixture
+
+        seed = _digest(_address_key(address))
+        square_footage = float(params.get('squareFootage') or 900 + seed % 1800)
+        price = round((90 + seed % 160) * square_footage, -3)
+        rent = round(price * (0.007 + (seed % 5) / 1000), -1)
+        return {
+            'address': address,
+            'latitude': 25 + (seed % 2400) / 100, 'longitude': -70 - (seed % 5000) / 100,
+            'propertyType': params.get('propertyType') or 'Single Family',
+            'bedrooms': float(params.get('bedrooms') or 1 + seed % 5),
+            'bathrooms': float(params.get('bathrooms') or 1 + seed % 3),
+            'squareFootage': square_footage,
+            'price': price, 'priceRangeLow': round(price * 0.92, -3), 'priceRangeHigh': round(price * 1.08, -3),
+            'rent': rent, 'rentRangeLow': round(rent * 0.9, -1), 'rentRangeHigh': round(rent * 1.1, -1)
+        }
+
+    def comparables(self, subject: Dict, params: Dict, key: str) -> List[Dict]:
+        """Comparable listings around a subject; some are still active, as in real responses."""
+        count = min(int(float(params.get('compCount') or 5)), MAX_COMPARABLES)
+        days_old = int(float(params.get('daysOld') or 180))
+        radius = float(params.get('maxRadius') or 1.0)
+        parts = [part.strip() for part in subject['address'].split(',')] + ['', '']
+        street_name, city, region = parts[0].split(' ', 1)[-1], parts[1], parts[2]
+        comps = []
+        for index in range(count):
+            seed = _digest(subject['address'], key, index)
+            listed = FIXED_DATE - timedelta(days=seed % max(days_old, 1) + 30)
+            comp = {
+                'id': f"standin-{seed:x}",
+                'formattedAddress': f"{100 + seed % 900} {street_name}, {city}, {region}",
+                'city': city, 'state': region[:2], 'zipCode': region[3:8],
+                'propertyType': subject['propertyType'],
+                'bedrooms': subject['bedrooms'], 'bathrooms': subject['bathrooms'],
+                'squareFootage': round(subject['squareFootage'] * (0.85 + (seed % 30) / 100)),
+                'price': round(subject[key] * (0.88 + (seed % 25) / 100), -1 if key == 'rent' else -3),
+                'listedDate': listed.strftime('%Y-%m-%dT00:00:00.000Z'),
+                'distance': round(radius * (seed % 100) / 100, 3),
+                'correlation': round(0.9 + (seed % 10) / 100, 4)
+            }
+            if index % 4 != 3:
+                removed = listed + timedelta(days=7 + seed % 60)
+                comp['removedDate'] = removed.strftime('%Y-%m-%dT00:00:00.000Z')
+                comp['daysOnMarket'] = (removed - listed).days
+            comps.append(comp)
+        return comps
+
+    def suggestions(self, text: str, limit: int) -> List[Dict]:
+        """Geoapify-style autocomplete results for the query text."""
+        # The app sends the query already URL-encoded once, so undo that first
+        query = normalize_query(unquote_plus(text))
+        number = re.match(r'(\d+)', query)
+        results = []
+        for street, city, state, postcode, lat, lon in self.streets:
+            house_numbers = [number.group(1)] if number else [str(100 + _digest(street, n) % 900) for n in range(2)]
+            for house_number in house_numbers:
+                formatted = f"{house_number} {street}, {city}, {state} {postcode}, United States of America"
+                if not matches_query(query, formatted):
+                    continue
+                results.append({
+                    'formatted': formatted,
+                    'address_line1': f"{house_number} {street}",
+                    'address_line2': f"{city}, {state} {postcode}, United States of America",
+                    'housenumber': house_number, 'street': street, 'city': city,
+                    'state_code': state, 'postcode': postcode, 'country_code': 'us',
+                    'lat': lat, 'lon': lon, 'result_type': 'building',
+                    'rank': {'confidence': 1 if number else 0.8}
+                })
+        return results[:limit]
+
+
+def create_standin_app(standin: Optional[UpstreamStandin] = None) -> Flask:
+    """
+    Create the WSGI app serving the stand-in APIs under /v1.
+
+    Args:
+        standin: UpstreamStandin to serve; a default one if omitted
+
+    Returns:
+        Flask application, with the stand-in available as app.standin
+    """
+    standin = standin or UpstreamStandin()
+    app = Flask(__name__)
+    app.standin = standin
+
+    def respond(upstream: str, authorized: bool, build) -> Tuple:
+        delay, status = standin.plan(upstream)
+        time.sleep(delay)
+        if not authorized:
+            status = 401
+        standin.record(upstream, status)
+        if status == 401:
+            return jsonify({'status': 401, 'message': 'Invalid or missing API key'}), 401
+        if status == 429:
+            response = jsonify({'status': 429, 'message': 'Too many requests'})
+            response.headers['Retry-After'] = str(standin.config.retry_after)
+            return response, 429
+        if status != 200:
+            return jsonify({'status': status, 'message': 'Upstream error'}), status
+        return jsonify(build()), 200
+
+    @app.route('/v1/avm/value')
+    def avm_value():
+        params = request.args
+
+        def build():
+            subject = standin.subject(params.get('address', ''), params)
+            body = {key: subject[key] for key in ('price', 'priceRangeLow', 'priceRangeHigh', 'latitude',
+                                                  'longitude')}
+            body['comparables'] = standin.comparables(subject, params, 'price')
+            return body
+        return respond(RENTCAST, bool(request.headers.get('X-Api-Key')), build)
+
+    @app.route('/v1/avm/rent/long-term')
+    def avm_rent():
+        params = request.args
+
+        def build():
+            subject = standin.subject(params.get('address', ''), params)
+            body = {key: subject[key] for key in ('rent', 'rentRangeLow', 'rentRangeHigh', 'latitude', 'longitude')}
+            body['comparables'] = standin.comparables(subject, params, 'rent')
+            return body
+        return respond(RENTCAST, bool(request.headers.get('X-Api-Key')), build)
+
+    @app.route('/v1/geocode/autocomplete')
+    def geocode_autocomplete():
+        text = request.args.get('text', '')
+        limit = request.args.get('limit', 5, type=int)
+        return respond(GEOAPIFY, bool(request.args.get('apiKey')),
+                       lambda: {'results': standin.suggestions(text, limit), 'query': {'text': text}})
+
+    @app.route('/_standin/stats')
+    def stats():
+        return jsonify(standin.stats())
+
+    return app
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Run the stand-in server from the command line."""
+    from werkzeug.serving import run_simple
+
+    parser = argparse.ArgumentParser(description='Local RentCast and Geoapify stand-in for load tests')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--latency', default='fixed:0', help="RentCast latency: fixed:MS, uniform:LOW:HIGH "
+                                                             "or lognormal:MEDIAN_MS:SIGMA")
+    parser.add_argument('--geoapify-latency', default=None, help='Geoapify latency (defaults to --latency)')
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--error-status', type=int, default=503)
+    parser.add_argument('--burst-every', type=int, default=0)
+    parser.add_argument('--burst-length', type=int, default=0)
+    parser.add_argument('--retry-after', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--fixtures', default=DEFAULT_FIXTURES)
+    args = parser.parse_args(argv)
+
+    config = StandinConfig(
+        rentcast_latency=LatencyModel.parse(args.latency),
+        geoapify_latency=LatencyModel.parse(args.geoapify_latency or args.latency),
+        error_rate=args.error_rate, error_status=args.error_status,
+        burst_every=args.burst_every, burst_length=args.burst_length, retry_after=args.retry_after,
+        seed=args.seed, fixtures_path=args.fixtures
+    )
+    print(f"Serving RentCast/Geoapify stand-in on http://{args.host}:{args.port}/v1")
+    run_simple(args.host, args.port, create_standin_app(UpstreamStandin(config)), threaded=True)
+
+
+if __name__ == '__main__':
+    main()